@@ -18,12 +18,13 @@ var timeoutActive = false;  // Prevent fast consecutive selections that causes e
  * @param {String} algorithm - The name of the algorithm ('fringe' or 'astar').
  * @param {Number} length - The length of the route in meters.
  * @param {Number} timeTaken - The time taken to compute the route in seconds.
+ * @param {Number} nodesExpanded - The number of nodes the search expanded.
  */
-function updateRouteInfo(algorithm, length, timeTaken) {
+function updateRouteInfo(algorithm, length, timeTaken, nodesExpanded) {
     if (algorithm === 'fringe') {
-        document.getElementById('fringe-length').innerText = `Fringe Search Route Length: ${length.toFixed(2)} meters | Time Taken: ${timeTaken.toFixed(2)} seconds`;
+        document.getElementById('fringe-length').innerText = `Fringe Search Route Length: ${length.toFixed(2)} meters | Time Taken: ${timeTaken.toFixed(2)} seconds | Nodes Expanded: ${nodesExpanded}`;
     } else if (algorithm === 'astar') {
-        document.getElementById('astar-length').innerText = `A* Route Length: ${length.toFixed(2)} meters | Time Taken: ${timeTaken.toFixed(2)} seconds`;
+        document.getElementById('astar-length').innerText = `A* Route Length: ${length.toFixed(2)} meters | Time Taken: ${timeTaken.toFixed(2)} seconds | Nodes Expanded: ${nodesExpanded}`;
     }
 }
 
@@ -34,8 +35,9 @@ function updateRouteInfo(algorithm, length, timeTaken) {
  * @param {String} algorithm - The algorithm used for the route ('fringe' or 'astar').
  * @param {Number} length - The length of the route in meters.
  * @param {Number} timeTaken - The time taken to compute the route in seconds.
+ * @param {Number} nodesExpanded - The number of nodes the search expanded.
  */
-function addRouteToMap(routeCoordinates, algorithm, length, timeTaken) {
+function addRouteToMap(routeCoordinates, algorithm, length, timeTaken, nodesExpanded) {
     /**
      * Offsets the coordinates slightly to avoid overlap between multiple routes.
      *
@@ -48,7 +50,7 @@ function addRouteToMap(routeCoordinates, algorithm, length, timeTaken) {
     }
 
     // Update the route length and time for the selected algorithm
-    updateRouteInfo(algorithm, length, timeTaken);
+    updateRouteInfo(algorithm, length, timeTaken, nodesExpanded);
 
     if (algorithm === 'fringe') {
         if (fringePolyline) {
@@ -123,37 +125,29 @@ function onMapClick(e) {
         goalMarker = L.marker(e.latlng).addTo(map).bindPopup("Goal").openPopup();
         console.log("Goal marker set", goalMarker);
 
-        // Request the Fringe Search route from the backend
-        fetch('/calculate-fringe-route', {
+        // Request both routes from the backend in a single round trip
+        fetch('/compare-routes', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
                 start: startMarker.getLatLng(),
-                goal: goalMarker.getLatLng()
+                goal: goalMarker.getLatLng(),
+                algorithms: ['fringe', 'astar']
             })
         })
         .then(response => response.json())
         .then(data => {
-            addRouteToMap(data.routeCoordinates, 'fringe', data.length, data.timeTaken);  // Draw the route on the map and show length and time
-        })
-        .catch(error => console.error('Error:', error));
-
-        // Request the A* route from the backend
-        fetch('/calculate-astar-route', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                start: startMarker.getLatLng(),
-                goal: goalMarker.getLatLng()
-            })
-        })
-        .then(response => response.json())
-        .then(data => {
-            addRouteToMap(data.routeCoordinates, 'astar', data.length, data.timeTaken);  // Draw the route on the map and show length and time
+            // Draw each route on the map and show its length, time and expansions
+            for (const [algorithm, route] of Object.entries(data.routes || {})) {
+                if (route.error) {
+                    console.error(`${algorithm}: ${route.error}`);
+                    continue;
+                }
+                addRouteToMap(route.routeCoordinates, algorithm, route.length, route.timeTaken,
+                              route.nodesExpanded);
+            }
         })
         .catch(error => console.error('Error:', error));
 
@@ -1,24 +1,20 @@
 import heapq
-from utils.graph_utils import GraphUtils
+from algorithms.graph_search import GraphSearch
 
-class AStarOSMnx:
+class AStarOSMnx(GraphSearch):
     """A* (A-star) algorithm implementation using OSMnx graph data.
-    
+
     This class provides methods to find the shortest path between nodes in a graph using the
-    A* algorithm. It uses the Euclidean distance for the heuristic function to estimate the
-    distance between geographic points.
+    A* algorithm. The heuristic function estimates the remaining distance between geographic
+    points, by default in meters with EquirectangularHeuristic.
+
+    The search runs over an array-backed CompactGraph, see GraphSearch.
 
     Attributes:
-        graph (networkx.Graph): The street network graph from OSMnx.
+        graph (networkx.Graph or CompactGraph): The street network graph from OSMnx.
+        heuristic (Heuristic): Estimates the remaining cost from a node to the goal.
+        nodes_expanded (int): Number of nodes expanded in the latest query.
     """
-    def __init__(self, graph):
-        """Initializes AStarOSMnx with the given graph.
-
-        Args:
-            graph (networkx.Graph): A NetworkX graph representing the street network.
-        """
-        self.graph = graph
-
     def find_path(self, start_node, goal_node):
         """Finds the shortest path by expanding nodes based on the sum of their actual cost
         from the start node (g-score) and the estimated cost to the goal node (heuristic, h-score).
@@ -27,101 +23,89 @@ class AStarOSMnx:
         Args:
             start_node (int): The node ID where the path starts.
             goal_node (int): The node ID where the path ends.
-        
+
         Returns:
             tuple:
                 list: The shortest path as a list of node IDs, from start_node to goal_node.
-                float: The total distance of the path in kilometers.
+                float: The total distance of the path in meters.
                 If no path is found, returns (None, float('inf')).
 
         """
+        graph = self.compact_graph
+        indices = self.node_indices(start_node, goal_node)
 
-        if start_node not in self.graph.nodes or goal_node not in self.graph.nodes:
+        if indices is None:
             return None, float('inf')
+        start, goal = indices
 
-        # Initialize g-scores (cost from start) and f-scores (estimated total cost) for all nodes
-        g_scores = {node: float("inf") for node in self.graph.nodes}
-        g_scores[start_node] = 0
+        heuristic = self.heuristic.estimator(graph, goal)
 
-        f_scores = {node: float("inf") for node in self.graph.nodes}
-        f_scores[start_node] = GraphUtils.euclidean(self.graph, start_node, goal_node)
+        # Reuse the engine's search arrays, a new generation invalidates the previous query
+        state = self.search_state
+        state.reset(start)
+        generation = state.generation
+        closed = state.closed
 
-        # Open list (priority queue) for nodes to explore and a closed set for processed nodes
-        open_list = []
-        heapq.heappush(open_list, (f_scores[start_node], start_node))
-        closed_set = set()
+        # Open list (priority queue) of (f-score, node), where f-score = g-score + heuristic
+        heapq.heappush(state.open_list, (heuristic(start), start))
+        expanded = 0
 
-        came_from = {}
+        while state.open_list:
+            current = heapq.heappop(state.open_list)[1]
 
-        # Combine all state-related variables into one dictionary
-        state = {
-            'g_scores': g_scores,
-            'f_scores': f_scores,
-            'came_from': came_from,
-            'open_list': open_list,
-            'closed_set': closed_set
-        }
-
-        while state['open_list']:
-            current = heapq.heappop(state['open_list'])[1]
-
-            if current in state['closed_set']:
+            # Skip stale queue entries of nodes that were already expanded
+            if closed[current] == generation:
                 continue
-            state['closed_set'].add(current)
+            closed[current] = generation
+            expanded += 1
 
-            if current == goal_node:
-                reconstructed_path = self.reconstruct_path(state['came_from'], current)
-                final_g_score = state['g_scores'][current]
-                return reconstructed_path, final_g_score
+            if current == goal:
+                self.nodes_expanded = expanded
+                return self.reconstruct(state, current), state.g_scores[current]
 
             # Process neighbors of the current node
-            self.process_neighbors(current, goal_node, state)
+            self.process_neighbors(current, state, heuristic)
 
+        self.nodes_expanded = expanded
         return None, float("inf")
 
-    def process_neighbors(self, current, goal_node, state):
+    def process_neighbors(self, current, state, heuristic):
         """Processes and evaluates the neighbors of the current node.
 
         Args:
-            current (int): The current node being explored.
-            goal_node (int): The target goal node.
-            state (dict): A dictionary containing 'g_scores', 
-                            'f_scores', 'came_from', 'open_list', and 'closed_set'.
+            current (int): Index of the current node being explored.
+            state (SearchState): The g-scores, parents, closed stamps and open list
+                of the current query.
+            heuristic (callable): Estimates the remaining cost from a node index to the goal.
         """
-        g_scores = state['g_scores']
-        f_scores = state['f_scores']
-        came_from = state['came_from']
-        open_list = state['open_list']
-        closed_set = state['closed_set']
-
-        for neighbor in self.graph.neighbors(current):
-            tentative_g_score = (
-                g_scores[current] + GraphUtils.get_edge_length(self.graph, current, neighbor))
-
-            if neighbor in closed_set:
+        generation = state.generation
+        g_scores = state.g_scores
+        came_from = state.came_from
+        visited = state.visited
+        closed = state.closed
+        open_list = state.open_list
+        current_g_score = g_scores[current]
+
+        for neighbor, length in self.outgoing_edges(current):
+            if closed[neighbor] == generation:
                 continue
 
-            # If a better path is found, update g-scores, f-scores, and parent mapping
-            if tentative_g_score < g_scores[neighbor]:
-                came_from[neighbor] = current
+            tentative_g_score = current_g_score + length
+
+            # If a better path is found, update the g-score and parent and queue the neighbor
+            if visited[neighbor] != generation or tentative_g_score < g_scores[neighbor]:
+                visited[neighbor] = generation
                 g_scores[neighbor] = tentative_g_score
-                f_scores[neighbor] = (
-                    tentative_g_score + GraphUtils.euclidean(self.graph, neighbor, goal_node))
-                heapq.heappush(open_list, (f_scores[neighbor], neighbor))
+                came_from[neighbor] = current
+                heapq.heappush(open_list, (tentative_g_score + heuristic(neighbor), neighbor))
 
-    def reconstruct_path(self, came_from, current):
-        """Reconstructs the shortest path from the came_from dictionary.
+    def outgoing_edges(self, current):
+        """Returns the outgoing edges the search follows from a node.
 
         Args:
-            came_from (dict): A dictionary mapping each node to the node it came from.
-            current (int): The current node ID (usually the goal node).
+            current (int): Index of the current node being explored.
 
         Returns:
-            list: The reconstructed shortest path as a list of node IDs, from start to goal.
+            iterator: (target index, edge length) pairs.
         """
-        path = [current]
-        while current in came_from:
-            current = came_from[current]
-            path.append(current)
-        path.reverse()  # Reverse the path to get it from start to goal
-        return path
+        return self.compact_graph.neighbors(current)
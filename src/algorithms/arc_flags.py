@@ -0,0 +1,275 @@
+import numpy as np
+from sklearn.neighbors import KDTree
+from algorithms.a_star import AStarOSMnx
+from algorithms.dijkstra import DijkstraOSMnx
+from utils.array_file import save_arrays, map_arrays
+
+
+def kd_partition(graph, cell_count=32):
+    """Partitions the nodes of a graph geometrically into cells of equal size.
+
+    The largest cell is split at the median of its wider side until there are cell_count
+    cells, so the cells follow the density of the road network. Nodes without coordinates
+    are placed as if they were at the center of the graph.
+
+    Args:
+        graph (CompactGraph): The graph.
+        cell_count (int): Number of cells. Defaults to 32.
+
+    Returns:
+        numpy.ndarray: The cell (int16) of every node.
+    """
+    return split_nodes(projected_points(graph), cell_count)
+
+
+def place_partition(graph, place_node_ids, cells_per_place=1):
+    """Partitions the nodes of a graph by the place (municipality) they belong to.
+
+    Nodes of the graph that are in none of the places, for example because the places were
+    downloaded and simplified separately, get the place of the nearest node that is. Every
+    place can further be split into cells_per_place cells with kd_partition().
+
+    Args:
+        graph (CompactGraph): The graph.
+        place_node_ids (list): The node IDs of every place, for example the nodes of the
+            graph of each place in PLACES.
+        cells_per_place (int): Number of cells every place is split into. Defaults to 1.
+
+    Returns:
+        numpy.ndarray: The cell (int16) of every node, place by place.
+    """
+    places = np.full(graph.node_count, -1, dtype=np.int16)
+    for place, node_ids in reversed(list(enumerate(place_node_ids))):
+        node_ids = np.asarray(list(node_ids), dtype=np.int64)
+        indices = graph.indices_of(node_ids).clip(0, graph.node_count - 1)
+        places[indices[graph.node_ids[indices] == node_ids]] = place
+
+    points = projected_points(graph)
+    known = np.flatnonzero(places >= 0)
+    unknown = np.flatnonzero(places < 0)
+    if len(known) and len(unknown):
+        _, nearest = KDTree(points[known]).query(points[unknown], k=1)
+        places[unknown] = places[known[nearest[:, 0]]]
+    places[places < 0] = 0
+
+    cells = places * cells_per_place
+    if cells_per_place > 1:
+        for place in np.unique(places):
+            nodes = np.flatnonzero(places == place)
+            cells[nodes] += split_nodes(points[nodes], cells_per_place)
+    return cells
+
+
+def projected_points(graph):
+    """Returns the projected coordinates of the nodes in meters, zero if unknown.
+
+    Args:
+        graph (CompactGraph): The graph.
+
+    Returns:
+        numpy.ndarray: The east and north coordinates, one row per node.
+    """
+    spatial_index = graph.spatial_index
+    return np.column_stack((np.nan_to_num(np.asarray(spatial_index.x, dtype=np.float64)),
+                            np.nan_to_num(np.asarray(spatial_index.y, dtype=np.float64))))
+
+
+def split_nodes(points, cell_count):
+    """Splits points into cells of equal size, see kd_partition().
+
+    Args:
+        points (numpy.ndarray): The projected coordinates, one row per point.
+        cell_count (int): Number of cells.
+
+    Returns:
+        numpy.ndarray: The cell (int16) of every point.
+    """
+    groups = [np.arange(len(points))]
+    while len(groups) < min(cell_count, len(points)):
+        groups.sort(key=len)
+        group = groups.pop()
+        axis = int(np.argmax(np.ptp(points[group], axis=0)))
+        group = group[np.argsort(points[group, axis], kind='stable')]
+        groups.extend((group[:len(group) // 2], group[len(group) // 2:]))
+
+    cells = np.zeros(len(points), dtype=np.int16)
+    for cell, group in enumerate(groups):
+        cells[group] = cell
+    return cells
+
+
+class ArcFlags:
+    """Arc flags of a graph partitioned into cells.
+
+    The flag of an edge for a cell is set if the edge lies on a shortest path to some node
+    in the cell. A search towards a goal then only follows the edges flagged for the cell
+    of the goal, which prunes most edges leading away from it. Any shortest path into a
+    cell enters it through a boundary node (a node of the cell with an incoming edge from
+    another cell), so the flags are computed with one backward Dijkstra search from every
+    boundary node, flagging the edges of its shortest path tree (and all ties), and every
+    edge inside the cell is flagged too.
+
+    The flags are stored as bitsets, one row of ceil(cells / 8) bytes per edge.
+
+    Attributes:
+        node_ids (numpy.ndarray): Node IDs of the graph the flags were computed for.
+        cells (numpy.ndarray): The cell (int16) of every node.
+        flags (numpy.ndarray): The packed flags (uint8) of every edge, bit c of an edge for
+            cell c in little-endian bit order.
+        fingerprint (str): CompactGraph.fingerprint of the graph, None if unknown.
+    """
+    # Relative tolerance of the shortest path test, so rounding never drops a flag
+    TOLERANCE = 1e-9
+
+    def __init__(self, node_ids, cells, flags, fingerprint=None):
+        """Initializes the flags.
+
+        Args:
+            node_ids (numpy.ndarray): Node IDs of the graph the flags were computed for.
+            cells (numpy.ndarray): The cell of every node.
+            flags (numpy.ndarray): The packed flags of every edge.
+            fingerprint (str): Fingerprint of the graph. Defaults to None.
+        """
+        self.node_ids = node_ids
+        self.cells = cells
+        self.flags = flags
+        self.fingerprint = fingerprint
+        self._masks = {}
+
+    @classmethod
+    def build(cls, graph, cells):
+        """Computes the arc flags of a partitioned graph.
+
+        Args:
+            graph (CompactGraph): The graph.
+            cells (numpy.ndarray): The cell of every node, see kd_partition() and
+                place_partition().
+
+        Returns:
+            ArcFlags: The flags of the graph.
+        """
+        cells = np.asarray(cells, dtype=np.int16)
+        sources = graph.sources()
+        targets = np.asarray(graph.targets)
+        lengths = np.asarray(graph.lengths)
+        flags = np.zeros((graph.edge_count, int(cells.max()) + 1 if len(cells) else 1),
+                         dtype=bool)
+
+        inside = cells[sources] == cells[targets]
+        flags[np.flatnonzero(inside), cells[targets[inside]]] = True
+
+        search = DijkstraOSMnx(graph)
+        for boundary in np.unique(targets[~inside]).tolist():
+            distances = search.distances_from(boundary, reverse=True)
+            with np.errstate(invalid='ignore'):
+                slack = distances[targets] + lengths - distances[sources]
+                on_path = slack <= cls.TOLERANCE * distances[sources] + cls.TOLERANCE
+            flags[on_path, cells[boundary]] = True
+
+        return cls(graph.node_ids, cells, np.packbits(flags, axis=1, bitorder='little'),
+                   graph.fingerprint)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-maps flags saved with save().
+
+        Args:
+            path (str): The flags file.
+
+        Returns:
+            ArcFlags: The mapped flags.
+        """
+        arrays, metadata = map_arrays(path)
+        return cls(arrays['node_ids'], arrays['cells'], arrays['flags'],
+                   metadata.get('fingerprint'))
+
+    def save(self, path):
+        """Saves the flags into a file that can be memory-mapped.
+
+        Args:
+            path (str): The flags file.
+        """
+        save_arrays(path, {'node_ids': self.node_ids, 'cells': self.cells, 'flags': self.flags},
+                    {'cells': self.cell_count, 'fingerprint': self.fingerprint})
+
+    def matches(self, graph):
+        """Returns True if the flags were computed for a graph with the same nodes and edges.
+
+        Args:
+            graph (CompactGraph): The graph to check.
+        """
+        return self.fingerprint == graph.fingerprint
+
+    @property
+    def cell_count(self):
+        """int: Number of cells."""
+        return int(self.cells.max()) + 1 if len(self.cells) else 0
+
+    def edge_mask(self, cell):
+        """Returns the flags of every edge for one cell, unpacked on first use.
+
+        Args:
+            cell (int): The cell.
+
+        Returns:
+            memoryview: 1 for the edges flagged for the cell and 0 for the others.
+        """
+        mask = self._masks.get(cell)
+        if mask is None:
+            column = np.asarray(self.flags[:, cell >> 3])
+            mask = self._masks[cell] = memoryview((column >> (cell & 7)) & 1)
+        return mask
+
+
+class ArcFlagsAStarOSMnx(AStarOSMnx):
+    """A* following only the edges flagged for the cell of the goal.
+
+    The pruned searches find the same shortest paths as A*, see ArcFlags. With a zero
+    heuristic the search is Dijkstra's algorithm with arc flags.
+
+    Attributes:
+        graph (networkx.Graph or CompactGraph): The street network graph from OSMnx.
+        heuristic (Heuristic): Estimates the remaining cost from a node to the goal.
+        nodes_expanded (int): Number of nodes expanded in the latest query.
+    """
+    def __init__(self, graph, arc_flags=None, heuristic=None, cell_count=32):
+        """Initializes the engine.
+
+        Args:
+            graph (networkx.Graph or CompactGraph): A graph representing the street network.
+            arc_flags (ArcFlags): Precomputed flags of the graph, computed on the first
+                query with kd_partition() if None.
+            heuristic (Heuristic): Heuristic used by the search. Defaults to
+                EquirectangularHeuristic.
+            cell_count (int): Number of cells if the flags are computed. Defaults to 32.
+        """
+        super().__init__(graph, heuristic=heuristic)
+        self._arc_flags = arc_flags
+        self.cell_count = cell_count
+
+    @property
+    def arc_flags(self):
+        """ArcFlags: The flags the queries run on, computed on first use."""
+        if self._arc_flags is None:
+            graph = self.compact_graph
+            self._arc_flags = ArcFlags.build(graph, kd_partition(graph, self.cell_count))
+        return self._arc_flags
+
+    def find_path(self, start_node, goal_node):
+        """Finds the shortest path with A* over the edges flagged for the goal's cell.
+
+        Args:
+            start_node (int): The node ID where the path starts.
+            goal_node (int): The node ID where the path ends.
+
+        Returns:
+            tuple: The path as a list of node IDs and its length, (None, inf) if there is none.
+        """
+        goal = self.compact_graph.index_of(goal_node)
+        if goal is not None:
+            arc_flags = self.arc_flags
+            self._local.edge_mask = arc_flags.edge_mask(int(arc_flags.cells[goal]))
+        return super().find_path(start_node, goal_node)
+
+    def outgoing_edges(self, current):
+        return self.compact_graph.masked_neighbors(current, self._local.edge_mask)
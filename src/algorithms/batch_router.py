@@ -0,0 +1,52 @@
+from algorithms.dijkstra import DijkstraOSMnx
+
+
+class BatchRouter:
+    """Routes many start and goal pairs, sharing one search between pairs with the same start.
+
+    Pairs are grouped by their start node. A group with several goals is served by a single
+    Dijkstra search from the start that stops once every goal is closed, and every other pair
+    is routed on its own with the search engine of the router. Results are produced group by
+    group, so they can be streamed to the client while the rest of the batch is computed.
+
+    Attributes:
+        engine (GraphSearch): The search engine used for pairs that do not share a start.
+        shared_search (bool): Whether pairs with the same start are served by one search.
+    """
+    def __init__(self, engine, shared_search=True):
+        """Initializes the router.
+
+        Args:
+            engine (GraphSearch): The search engine used for single pairs.
+            shared_search (bool): If True (default), pairs with the same start are served by
+                one search. Disable it for engines whose single queries are cheaper than a
+                one-to-many search, such as Contraction Hierarchies.
+        """
+        self.engine = engine
+        self.shared_search = shared_search
+        self._dijkstra = DijkstraOSMnx(engine.compact_graph)
+
+    def routes(self, pairs):
+        """Finds the shortest path of every pair.
+
+        Args:
+            pairs (iterable): (start node ID, goal node ID) tuples.
+
+        Yields:
+            tuple: The position of the pair in pairs, the path as a list of node IDs and its
+            length in meters, or None and infinity if there is no path. The pairs are yielded
+            grouped by start node, not in input order.
+        """
+        groups = {}
+        for index, (start_node, goal_node) in enumerate(pairs):
+            groups.setdefault(start_node, []).append((index, goal_node))
+
+        for start_node, goals in groups.items():
+            goal_nodes = list(dict.fromkeys(goal_node for _, goal_node in goals))
+            if self.shared_search and len(goal_nodes) > 1:
+                paths = dict(zip(goal_nodes, self._dijkstra.find_paths(start_node, goal_nodes)))
+            else:
+                paths = {goal_node: self.engine.find_path(start_node, goal_node)
+                         for goal_node in goal_nodes}
+            for index, goal_node in goals:
+                yield (index, *paths[goal_node])
@@ -0,0 +1,157 @@
+import heapq
+from algorithms.graph_search import GraphSearch
+from algorithms.search_state import SearchState
+
+class BidirectionalAStarOSMnx(GraphSearch):
+    """Bidirectional A* algorithm implementation using OSMnx graph data.
+
+    A forward A* from the start node and a backward A* from the goal node, which follows the
+    incoming edges of the directed graph (CompactGraph.reverse), run in turns until their
+    frontiers meet. On long routes the two searches expand two small balls instead of one
+    large ball around the start node.
+
+    Both searches use the average potential p(v) = (h_goal(v) - h_start(v)) / 2 and its
+    negation, which keeps both potentials consistent and lets the searches stop as soon as
+    the sum of their smallest queue keys reaches the length of the best path found.
+
+    The search runs over an array-backed CompactGraph, see GraphSearch.
+
+    Attributes:
+        graph (networkx.Graph or CompactGraph): The street network graph from OSMnx.
+        heuristic (Heuristic): Estimates the distance between nodes.
+        nodes_expanded (int): Number of nodes expanded by both searches in the latest query.
+    """
+    def find_path(self, start_node, goal_node):
+        """Finds the shortest path by searching from both ends until the searches meet.
+
+        Args:
+            start_node (int): The node ID where the path starts.
+            goal_node (int): The node ID where the path ends.
+
+        Returns:
+            tuple:
+                list: The shortest path as a list of node IDs, from start_node to goal_node.
+                float: The total distance of the path in meters.
+                If no path is found, returns (None, float('inf')).
+        """
+        graph = self.compact_graph
+        indices = self.node_indices(start_node, goal_node)
+
+        if indices is None:
+            return None, float('inf')
+        start, goal = indices
+
+        if start == goal:
+            self.nodes_expanded = 0
+            return [start_node], 0.0
+
+        forward_potential, backward_potential = self.potentials(start, goal)
+        forward = self.search_state
+        backward = self.backward_state
+        forward.reset(start)
+        backward.reset(goal)
+        heapq.heappush(forward.open_list, (forward_potential(start), start))
+        heapq.heappush(backward.open_list, (backward_potential(goal), goal))
+
+        searches = (
+            (forward, backward, graph, forward_potential),
+            (backward, forward, graph.reverse, backward_potential)
+        )
+        best = [float('inf'), -1]  # Length of the best path found and its meeting node
+        expanded = 0
+
+        while forward.open_list and backward.open_list:
+            # Stop when no path through an unexpanded node can be shorter than the best one
+            if forward.open_list[0][0] + backward.open_list[0][0] >= best[0]:
+                break
+
+            # Advance the search whose queue has the smaller key
+            side = 0 if forward.open_list[0][0] <= backward.open_list[0][0] else 1
+            if self.expand_next(*searches[side], best):
+                expanded += 1
+
+        self.nodes_expanded = expanded
+        if best[1] == -1:
+            return None, float('inf')
+
+        meeting = best[1]
+        path = forward.reconstruct_path(meeting) + backward.reconstruct_path(meeting)[-2::-1]
+        return graph.node_path(path), best[0]
+
+    def potentials(self, start, goal):
+        """Builds the consistent average potentials of the forward and backward searches.
+
+        Args:
+            start (int): The start node index.
+            goal (int): The goal node index.
+
+        Returns:
+            tuple: The forward potential (h_goal - h_start) / 2 and its negation for the
+            backward search, both functions of a node index.
+        """
+        to_goal = self.heuristic.estimator(self.compact_graph, goal)
+        to_start = self.heuristic.estimator(self.compact_graph, start, reverse=True)
+
+        def forward_potential(node):
+            return (to_goal(node) - to_start(node)) / 2
+
+        def backward_potential(node):
+            return (to_start(node) - to_goal(node)) / 2
+
+        return forward_potential, backward_potential
+
+    @property
+    def backward_state(self):
+        """SearchState: The reusable arrays of the backward search of the calling thread."""
+        return self.thread_local('backward_state', SearchState)
+
+    def expand_next(self, state, other, graph, potential, best):
+        """Expands the node with the smallest key in one of the two searches.
+
+        Args:
+            state (SearchState): The search to advance.
+            other (SearchState): The search running in the opposite direction.
+            graph (CompactGraph): The graph, or its reverse for the backward search.
+            potential (callable): Potential of the search added to the g-scores as the key.
+            best (list): Length and meeting node of the best path found, updated in place.
+
+        Returns:
+            bool: True if a node was expanded, False if the popped entry was stale.
+        """
+        current = heapq.heappop(state.open_list)[1]
+        generation = state.generation
+        if state.closed[current] == generation:
+            return False
+        state.closed[current] = generation
+
+        g_scores = state.g_scores
+        visited = state.visited
+        current_g_score = g_scores[current]
+
+        for neighbor, length in graph.neighbors(current):
+            if state.closed[neighbor] == generation:
+                continue
+
+            tentative_g_score = current_g_score + length
+            if visited[neighbor] != generation or tentative_g_score < g_scores[neighbor]:
+                state.visit(neighbor, tentative_g_score, current)
+                heapq.heappush(
+                    state.open_list, (tentative_g_score + potential(neighbor), neighbor))
+
+                # A node reached by both searches closes a path from start to goal
+                if other.visited[neighbor] == other.generation:
+                    self.update_best(best, tentative_g_score + other.g_scores[neighbor], neighbor)
+        return True
+
+    @staticmethod
+    def update_best(best, length, meeting):
+        """Keeps the shorter of the best path found and a new path through a meeting node.
+
+        Args:
+            best (list): Length and meeting node of the best path found, updated in place.
+            length (float): Length of the new path.
+            meeting (int): Node index where the two searches meet on the new path.
+        """
+        if length < best[0]:
+            best[0] = length
+            best[1] = meeting
@@ -0,0 +1,509 @@
+import heapq
+import numpy as np
+from algorithms.dijkstra import DijkstraOSMnx
+from algorithms.graph_search import GraphSearch
+from algorithms.search_state import SearchState
+from utils.compact_graph import CompactGraph
+
+
+class NodeContractor:
+    """Contracts the nodes of a graph one by one to build a contraction hierarchy.
+
+    The remaining (uncontracted) graph is kept as dictionaries of outgoing and incoming edges.
+    Contracting a node removes it and adds a shortcut u -> w for every pair of neighbors
+    whose shortest path runs through the node, unless a local witness search finds another
+    path that is at most as long.
+
+    Nodes are contracted in the order of their priority, the edge difference (shortcuts added
+    minus edges removed) plus the number of already contracted neighbors and the level of the
+    node, which spreads the contractions evenly over the graph. Contracting a node only
+    changes the priorities of its neighbors, so they are recomputed and pushed into the queue
+    again right after it; queue entries with an outdated priority are skipped when popped.
+
+    Attributes:
+        outgoing (list): Outgoing edges {target: length} of each uncontracted node.
+        incoming (list): Incoming edges {source: length} of each uncontracted node.
+        contracted_neighbors (list): Number of contracted neighbors of each node.
+        shortcuts (dict): Middle node of each shortcut, keyed by (source, target).
+        witness_limit (int): Maximum number of nodes a witness search may settle.
+    """
+    def __init__(self, graph, witness_limit=50):
+        """Copies the edges of a graph into the contraction dictionaries.
+
+        Args:
+            graph (CompactGraph): The graph to contract.
+            witness_limit (int): Maximum number of nodes a witness search may settle. Smaller
+                limits make the preprocessing faster but add unnecessary shortcuts.
+        """
+        self.outgoing = [{} for _ in range(graph.node_count)]
+        self.incoming = [{} for _ in range(graph.node_count)]
+        self.contracted_neighbors = [0] * graph.node_count
+        self.levels = [0] * graph.node_count
+        self.shortcuts = {}
+        self.witness_limit = witness_limit
+        for node in range(graph.node_count):
+            for neighbor, length in graph.neighbors(node):
+                self.add_edge(node, neighbor, length)
+
+    def add_edge(self, source, target, length, middle=None):
+        """Adds an edge, or shortens an existing edge between the same nodes.
+
+        Args:
+            source (int): The source node index.
+            target (int): The target node index.
+            length (float): The edge length.
+            middle (int): The contracted node a shortcut bypasses, None for original edges.
+        """
+        if length < self.outgoing[source].get(target, float('inf')):
+            self.outgoing[source][target] = length
+            self.incoming[target][source] = length
+            if middle is None:
+                self.shortcuts.pop((source, target), None)
+            else:
+                self.shortcuts[(source, target)] = middle
+
+    def contract_all(self):
+        """Contracts every node in priority order.
+
+        Returns:
+            tuple: The rank of each node and the upward and downward edges as lists of
+            (source, target, length), where every edge points to the higher ranked node.
+        """
+        priorities = [self.priority(node) for node in range(len(self.outgoing))]
+        queue = [(priority, node) for node, priority in enumerate(priorities)]
+        heapq.heapify(queue)
+        rank = [-1] * len(self.outgoing)
+        upward = []
+        downward = []
+        contracted = 0
+
+        while queue:
+            priority, node = heapq.heappop(queue)
+            if rank[node] != -1 or priority != priorities[node]:
+                continue  # Stale entry of a contracted node or of an updated priority
+
+            rank[node] = contracted
+            contracted += 1
+            upward.extend((node, target, length)
+                          for target, length in self.outgoing[node].items())
+            downward.extend((source, node, length)
+                            for source, length in self.incoming[node].items())
+            neighbors = set(self.outgoing[node]) | set(self.incoming[node])
+            self.contract(node, self.find_shortcuts(node))
+
+            # Contracting a node only changes the priorities of its neighbors
+            for neighbor in neighbors:
+                priorities[neighbor] = self.priority(neighbor)
+                heapq.heappush(queue, (priorities[neighbor], neighbor))
+        return rank, upward, downward
+
+    def priority(self, node, shortcuts=None):
+        """Computes the contraction priority of a node, lower is contracted first.
+
+        Args:
+            node (int): The node index.
+            shortcuts (list): The shortcuts the node needs, found if not given.
+
+        Returns:
+            int: The edge difference plus the number of contracted neighbors.
+        """
+        if shortcuts is None:
+            shortcuts = self.find_shortcuts(node, self.witness_limit // 5)
+        removed = len(self.outgoing[node]) + len(self.incoming[node])
+        return (2 * (len(shortcuts) - removed) + self.contracted_neighbors[node]
+                + self.levels[node])
+
+    def contract(self, node, shortcuts):
+        """Removes a node from the remaining graph and adds the shortcuts it needs.
+
+        Args:
+            node (int): The node index.
+            shortcuts (list): The shortcuts as (source, target, length) tuples.
+        """
+        for source, target, length in shortcuts:
+            self.add_edge(source, target, length, node)
+
+        level = self.levels[node] + 1
+        for target in self.outgoing[node]:
+            del self.incoming[target][node]
+            self.contracted_neighbors[target] += 1
+            self.levels[target] = max(self.levels[target], level)
+        for source in self.incoming[node]:
+            del self.outgoing[source][node]
+            self.contracted_neighbors[source] += 1
+            self.levels[source] = max(self.levels[source], level)
+        self.outgoing[node] = {}
+        self.incoming[node] = {}
+
+    def find_shortcuts(self, node, witness_limit=None):
+        """Finds the shortcuts needed to keep all shortest paths when a node is removed.
+
+        Args:
+            node (int): The node index.
+            witness_limit (int): Maximum number of nodes a witness search may settle.
+                Defaults to the witness_limit attribute.
+
+        Returns:
+            list: The shortcuts as (source, target, length) tuples.
+        """
+        shortcuts = []
+        outgoing = self.outgoing[node]
+        if not outgoing:
+            return shortcuts
+
+        for source, in_length in self.incoming[node].items():
+            limit = in_length + max(outgoing.values())
+            witnesses = self.witness_distances(
+                source, node, outgoing, limit, witness_limit or self.witness_limit)
+            for target, out_length in outgoing.items():
+                length = in_length + out_length
+                if target != source and witnesses.get(target, float('inf')) > length:
+                    shortcuts.append((source, target, length))
+        return shortcuts
+
+    def witness_distances(self, source, excluded, targets, limit, witness_limit):
+        """Runs a bounded Dijkstra search from a source avoiding the node being contracted.
+
+        Args:
+            source (int): The source node index.
+            excluded (int): The node being contracted.
+            targets (dict): The nodes whose distances are needed.
+            limit (float): Distances above this are not needed.
+            witness_limit (int): Maximum number of nodes to settle.
+
+        Returns:
+            dict: The distances found from the source, may be too long for unsettled nodes.
+        """
+        distances = {source: 0.0}
+        open_list = [(0.0, source)]
+        remaining = len(targets)
+        settled = 0
+
+        while open_list and remaining and settled < witness_limit:
+            distance, current = heapq.heappop(open_list)
+            if distance > distances[current]:
+                continue
+            if distance > limit:
+                break
+            settled += 1
+            if current in targets:
+                remaining -= 1
+
+            for neighbor, length in self.outgoing[current].items():
+                tentative = distance + length
+                if neighbor != excluded and tentative < distances.get(neighbor, float('inf')):
+                    distances[neighbor] = tentative
+                    heapq.heappush(open_list, (tentative, neighbor))
+        return distances
+
+
+class ContractionHierarchy:
+    """Contraction hierarchy of a graph: node ranks, upward graphs and shortcuts.
+
+    Every shortest path in the original graph has a counterpart that first climbs to higher
+    ranked nodes and then descends. The upward graph holds the edges to higher ranked nodes
+    and the downward graph the reversed edges from higher ranked nodes, so both halves of a
+    query only ever go up. Shortcuts are unpacked back into original edges through the
+    middle node they bypass.
+
+    Attributes:
+        rank (numpy.ndarray): Contraction order of each node (int32).
+        upward (CompactGraph): Edges u -> w with rank[u] < rank[w].
+        downward (CompactGraph): Reversed edges w -> u of edges u -> w with rank[u] > rank[w].
+        shortcuts (dict): Middle node of each shortcut, keyed by (source, target).
+        fingerprint (str): CompactGraph.fingerprint of the contracted graph, None if unknown.
+    """
+    def __init__(self, rank, upward, downward, shortcuts, fingerprint=None):
+        """Initializes the hierarchy from its parts.
+
+        Args:
+            rank (numpy.ndarray): Contraction order of each node.
+            upward (CompactGraph): Edges to higher ranked nodes.
+            downward (CompactGraph): Reversed edges from higher ranked nodes.
+            shortcuts (dict): Middle node of each shortcut, keyed by (source, target).
+            fingerprint (str): Fingerprint of the contracted graph. Defaults to None.
+        """
+        self.rank = rank
+        self.upward = upward
+        self.downward = downward
+        self.shortcuts = shortcuts
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, graph, witness_limit=50):
+        """Contracts every node of a graph.
+
+        Args:
+            graph (CompactGraph): The graph to contract.
+            witness_limit (int): Maximum number of nodes a witness search may settle.
+
+        Returns:
+            ContractionHierarchy: The hierarchy of the graph.
+        """
+        contractor = NodeContractor(graph, witness_limit)
+        rank, upward, downward = contractor.contract_all()
+        return cls(np.array(rank, dtype=np.int32),
+                   cls.edge_graph(graph, upward), cls.edge_graph(graph, downward, reverse=True),
+                   contractor.shortcuts, graph.fingerprint)
+
+    @staticmethod
+    def edge_graph(graph, edges, reverse=False):
+        """Builds a CompactGraph sharing the node arrays of a graph from a list of edges.
+
+        Args:
+            graph (CompactGraph): The original graph.
+            edges (list): The edges as (source, target, length) tuples.
+            reverse (bool): If True, reverse every edge.
+
+        Returns:
+            CompactGraph: The graph of the edges.
+        """
+        sources, targets, lengths = (list(column) for column in zip(*edges)) if edges else (
+            [], [], [])
+        if reverse:
+            sources, targets = targets, sources
+        return CompactGraph.from_edges(
+            graph.node_ids, sources, targets, lengths, graph.lat, graph.lon)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a hierarchy saved with save().
+
+        Args:
+            path (str): Path of the .npz file.
+
+        Returns:
+            ContractionHierarchy: The loaded hierarchy.
+        """
+        with np.load(path) as data:
+            graphs = [CompactGraph(data['node_ids'], data[f'{name}_offsets'],
+                                   data[f'{name}_targets'], data[f'{name}_lengths'],
+                                   data['lat'], data['lon'])
+                      for name in ('upward', 'downward')]
+            shortcuts = {(source, target): middle
+                         for source, target, middle in data['shortcuts'].tolist()}
+            return cls(data['rank'], graphs[0], graphs[1], shortcuts,
+                       str(data['fingerprint']) if 'fingerprint' in data else None)
+
+    def save(self, path):
+        """Saves the hierarchy into an uncompressed .npz file.
+
+        Args:
+            path (str): Path of the .npz file.
+        """
+        shortcuts = np.array([(source, target, middle) for (source, target), middle
+                              in self.shortcuts.items()], dtype=np.int32).reshape(-1, 3)
+        graphs = {}
+        for name, graph in (('upward', self.upward), ('downward', self.downward)):
+            graphs[f'{name}_offsets'] = graph.offsets
+            graphs[f'{name}_targets'] = graph.targets
+            graphs[f'{name}_lengths'] = graph.lengths
+        np.savez(path, node_ids=self.upward.node_ids, lat=self.upward.lat, lon=self.upward.lon,
+                 rank=self.rank, shortcuts=shortcuts,
+                 fingerprint=np.array(self.fingerprint or ''), **graphs)
+
+    def matches(self, graph):
+        """Returns True if the hierarchy was built for a graph with the same nodes and edges.
+
+        Args:
+            graph (CompactGraph): The graph to check.
+        """
+        return self.fingerprint == graph.fingerprint
+
+    def upward_distances(self, state, source, backward=False):
+        """Runs a complete upward search from a node with stall-on-demand.
+
+        The shortest distance between two nodes is the smallest sum of a forward and a
+        backward upward distance over the nodes both searches reach, which is what the
+        many-to-many bucket algorithm of the distance matrix builds on.
+
+        Args:
+            state (SearchState): The search arrays to use.
+            source (int): The source node index.
+            backward (bool): If True, search the downward graph, giving distances to the
+                source instead of from it.
+
+        Returns:
+            list: (node index, distance) tuples of every node closed and not stalled.
+        """
+        graph, stall_graph = (self.downward, self.upward) if backward else (
+            self.upward, self.downward)
+        state.reset(source)
+        state.open_list.append((0.0, source))
+        generation = state.generation
+        g_scores = state.g_scores
+        visited = state.visited
+        reached = []
+
+        while state.open_list:
+            current_g_score, current = heapq.heappop(state.open_list)
+            if state.closed[current] == generation:
+                continue
+            state.closed[current] = generation
+            if any(visited[higher] == generation and g_scores[higher] + length < current_g_score
+                   for higher, length in stall_graph.neighbors(current)):
+                continue
+
+            reached.append((current, current_g_score))
+            DijkstraOSMnx.relax_neighbors(graph, state, current, current_g_score)
+        return reached
+
+    def unpack(self, path):
+        """Replaces the shortcuts on a path with the original edges they bypass.
+
+        Args:
+            path (list): Node indices along a path in the hierarchy.
+
+        Returns:
+            list: Node indices along the same path in the original graph.
+        """
+        result = path[:1]
+        for source, target in zip(path, path[1:]):
+            stack = [(source, target)]
+            while stack:
+                source, target = stack.pop()
+                middle = self.shortcuts.get((source, target))
+                if middle is None:
+                    result.append(target)
+                else:
+                    stack.append((middle, target))
+                    stack.append((source, middle))
+        return result
+
+
+class ContractionHierarchyOSMnx(GraphSearch):
+    """Contraction Hierarchies (CH) query engine using OSMnx graph data.
+
+    A query runs Dijkstra's algorithm upward from both the start node and the goal node in
+    the ContractionHierarchy. The searches only meet at nodes ranked above both ends, which
+    keeps them to a few hundred nodes even on long routes. Each search stops when its
+    smallest key reaches the best path found, and the path is unpacked into original edges.
+
+    The hierarchy is built on the first query unless one is given, see
+    ContractionHierarchy.build() and ContractionHierarchy.load().
+
+    Attributes:
+        graph (networkx.Graph or CompactGraph): The street network graph from OSMnx.
+        nodes_expanded (int): Number of nodes expanded by both searches in the latest query.
+    """
+    def __init__(self, graph, hierarchy=None):
+        """Initializes the engine.
+
+        Args:
+            graph (networkx.Graph or CompactGraph): A graph representing the street network.
+            hierarchy (ContractionHierarchy): A prebuilt hierarchy of the graph.
+        """
+        super().__init__(graph)
+        self._hierarchy = hierarchy
+
+    @property
+    def hierarchy(self):
+        """ContractionHierarchy: The hierarchy the queries run on, built on first use."""
+        if self._hierarchy is None:
+            self._hierarchy = ContractionHierarchy.build(self.compact_graph)
+        return self._hierarchy
+
+    def find_path(self, start_node, goal_node):
+        """Finds the shortest path with upward searches from both ends.
+
+        Args:
+            start_node (int): The node ID where the path starts.
+            goal_node (int): The node ID where the path ends.
+
+        Returns:
+            tuple:
+                list: The shortest path as a list of node IDs, from start_node to goal_node.
+                float: The total distance of the path in meters.
+                If no path is found, returns (None, float('inf')).
+        """
+        indices = self.node_indices(start_node, goal_node)
+
+        if indices is None:
+            return None, float('inf')
+        start, goal = indices
+
+        hierarchy = self.hierarchy
+        forward = self.search_state
+        backward = self.thread_local('backward_state', SearchState)
+        forward.reset(start)
+        backward.reset(goal)
+        forward.open_list.append((0.0, start))
+        backward.open_list.append((0.0, goal))
+
+        searches = ((forward, backward, hierarchy.upward, hierarchy.downward),
+                    (backward, forward, hierarchy.downward, hierarchy.upward))
+        best = [float('inf'), -1]  # Length of the best path found and its meeting node
+        self.nodes_expanded = 0
+
+        while forward.open_list or backward.open_list:
+            # Advance the search whose queue has the smaller key
+            search = searches[self.next_side(forward.open_list, backward.open_list)]
+
+            # A search is done when no unexpanded node can lead to a shorter path
+            if search[0].open_list[0][0] >= best[0]:
+                search[0].open_list.clear()
+                continue
+            self.expand_next(*search, best)
+
+        if best[1] == -1:
+            return None, float('inf')
+
+        meeting = best[1]
+        path = forward.reconstruct_path(meeting) + backward.reconstruct_path(meeting)[-2::-1]
+        return self.compact_graph.node_path(hierarchy.unpack(path)), best[0]
+
+    @staticmethod
+    def next_side(forward_queue, backward_queue):
+        """Returns 0 to advance the forward search or 1 to advance the backward search.
+
+        Args:
+            forward_queue (list): Priority queue of the forward search.
+            backward_queue (list): Priority queue of the backward search.
+        """
+        if not backward_queue:
+            return 0
+        if forward_queue and forward_queue[0][0] <= backward_queue[0][0]:
+            return 0
+        return 1
+
+    def expand_next(self, state, other, graph, stall_graph, best):
+        """Expands the node with the smallest key in one of the two upward searches.
+
+        A node is not expanded (stalled) if a higher ranked node already reached by the same
+        search has an edge to it giving a shorter distance, because then no shortest path
+        can continue upward through it.
+
+        Args:
+            state (SearchState): The search to advance.
+            other (SearchState): The search running in the opposite direction.
+            graph (CompactGraph): The upward graph, or the downward graph for the backward
+                search.
+            stall_graph (CompactGraph): The edges from higher ranked nodes into each node,
+                which is the graph of the other search.
+            best (list): Length and meeting node of the best path found, updated in place.
+        """
+        current_g_score, current = heapq.heappop(state.open_list)
+        generation = state.generation
+        g_scores = state.g_scores
+        visited = state.visited
+        if state.closed[current] == generation:
+            return
+        state.closed[current] = generation
+
+        # A node reached by both searches closes a path from start to goal
+        if other.visited[current] == other.generation:
+            length = current_g_score + other.g_scores[current]
+            if length < best[0]:
+                best[0] = length
+                best[1] = current
+
+        for higher, length in stall_graph.neighbors(current):
+            if visited[higher] == generation and g_scores[higher] + length < current_g_score:
+                return
+
+        self.nodes_expanded += 1
+        for neighbor, length in graph.neighbors(current):
+            tentative_g_score = current_g_score + length
+            if visited[neighbor] != generation or tentative_g_score < g_scores[neighbor]:
+                state.visit(neighbor, tentative_g_score, current)
+                heapq.heappush(state.open_list, (tentative_g_score, neighbor))
@@ -0,0 +1,150 @@
+import heapq
+import numpy as np
+from algorithms.graph_search import GraphSearch
+
+class DijkstraOSMnx(GraphSearch):
+    """Dijkstra's algorithm implementation using OSMnx graph data.
+
+    Dijkstra's algorithm is A* without a heuristic. Besides single queries it computes the
+    distances from one node to every node, which the preprocessing steps (landmarks) need.
+
+    The search runs over an array-backed CompactGraph, see GraphSearch.
+
+    Attributes:
+        graph (networkx.Graph or CompactGraph): The street network graph from OSMnx.
+        nodes_expanded (int): Number of nodes expanded in the latest query.
+    """
+    def find_path(self, start_node, goal_node):
+        """Finds the shortest path by always expanding the node closest to the start node.
+
+        Args:
+            start_node (int): The node ID where the path starts.
+            goal_node (int): The node ID where the path ends.
+
+        Returns:
+            tuple:
+                list: The shortest path as a list of node IDs, from start_node to goal_node.
+                float: The total distance of the path in meters.
+                If no path is found, returns (None, float('inf')).
+        """
+        indices = self.node_indices(start_node, goal_node)
+
+        if indices is None:
+            return None, float('inf')
+        start, goal = indices
+
+        state = self.search_state
+        self.run(self.compact_graph, state, start, (goal,))
+
+        if state.closed[goal] != state.generation:
+            return None, float('inf')
+        return self.compact_graph.node_path(state.reconstruct_path(goal)), state.g_scores[goal]
+
+    def find_paths(self, start_node, goal_nodes):
+        """Finds the shortest paths from one node to many goals with a single search.
+
+        The search stops as soon as every goal is closed, so routing from one start to many
+        nearby goals costs little more than routing to the farthest of them. Without any goal
+        in the graph there is nothing to search for, so the search is skipped.
+
+        Args:
+            start_node (int): The node ID where the paths start.
+            goal_nodes (list): The node IDs where the paths end.
+
+        Returns:
+            list: A (path, length) tuple for each goal node as returned by find_path.
+        """
+        graph = self.compact_graph
+        start = graph.index_of(start_node)
+        goals = [graph.index_of(goal_node) for goal_node in goal_nodes]
+        known_goals = [goal for goal in goals if goal is not None]
+        if start is None or not known_goals:
+            self.nodes_expanded = 0
+            return [(None, float('inf'))] * len(goals)
+
+        state = self.search_state
+        self.run(graph, state, start, known_goals)
+
+        paths = []
+        for goal in goals:
+            if goal is None or state.closed[goal] != state.generation:
+                paths.append((None, float('inf')))
+            else:
+                paths.append((graph.node_path(state.reconstruct_path(goal)), state.g_scores[goal]))
+        return paths
+
+    def distances_from(self, source, reverse=False):
+        """Computes the shortest distances from a node to every node.
+
+        Args:
+            source (int): The source node index.
+            reverse (bool): If True, follow edges backwards, giving the distances from every
+                node to the source instead.
+
+        Returns:
+            numpy.ndarray: Distances indexed by node index, infinity for unreachable nodes.
+        """
+        graph = self.compact_graph.reverse if reverse else self.compact_graph
+        state = self.search_state
+        settled = self.run(graph, state, source)
+
+        distances = np.full(graph.node_count, np.inf)
+        distances[settled] = np.take(state.g_scores, settled)
+        return distances
+
+    def run(self, graph, state, source, goals=()):
+        """Runs the search from a source until the goals (or every reachable node) are closed.
+
+        Args:
+            graph (CompactGraph): The graph, or its reverse.
+            state (SearchState): The search arrays to use.
+            source (int): The source node index.
+            goals (iterable): Optional goal node indices to stop at once all are closed.
+
+        Returns:
+            list: The closed node indices in the order they were closed.
+        """
+        state.reset(source)
+        generation = state.generation
+        closed = state.closed
+        open_list = state.open_list
+        open_list.append((0.0, source))
+        settled = []
+        remaining = set(goals)
+
+        while open_list:
+            current_g_score, current = heapq.heappop(open_list)
+
+            if closed[current] == generation:
+                continue
+            closed[current] = generation
+            settled.append(current)
+
+            if current in remaining:
+                remaining.discard(current)
+                if not remaining:
+                    break
+            self.relax_neighbors(graph, state, current, current_g_score)
+
+        self.nodes_expanded = len(settled)
+        return settled
+
+    @staticmethod
+    def relax_neighbors(graph, state, current, current_g_score):
+        """Updates the neighbors reached with a shorter path through the current node.
+
+        Args:
+            graph (CompactGraph): The graph, or its reverse.
+            state (SearchState): The search arrays to update.
+            current (int): The node index being expanded.
+            current_g_score (float): Distance from the source to the current node.
+        """
+        generation = state.generation
+        g_scores = state.g_scores
+        visited = state.visited
+
+        for neighbor, length in graph.neighbors(current):
+            tentative_g_score = current_g_score + length
+            if visited[neighbor] != generation or tentative_g_score < g_scores[neighbor]:
+                state.visit(neighbor, tentative_g_score, current)
+                heapq.heappush(state.open_list, (tentative_g_score, neighbor))
@@ -0,0 +1,160 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from algorithms.dijkstra import DijkstraOSMnx
+from algorithms.graph_search import GraphSearch
+
+# First item of the tasks DistanceMatrix submits to its worker pool, see DistanceMatrix.map_rows
+ROWS_TASK = 'matrix-rows'
+
+
+class DistanceMatrix(GraphSearch):
+    """Shortest distances from many origins to many destinations.
+
+    Without a hierarchy every origin runs one Dijkstra search that stops once all targets
+    are closed. With a ContractionHierarchy the bucket algorithm is used instead: a backward
+    upward search from every target stores (target, distance) entries in buckets at the nodes
+    it reaches, and a forward upward search from every origin combines its distances with
+    the buckets of the nodes it reaches. Both kinds of search visit only a few hundred nodes,
+    so a matrix costs about as much as one CH query per row and column.
+
+    The rows of large matrices are split across the processes of a long-lived WorkerPool,
+    such as the route workers of the app, instead of starting processes for every matrix.
+    Every worker needs a DistanceMatrix of the same graph and hierarchy, and its handler
+    passes the tasks starting with ROWS_TASK to rows() (see routing_graph.run_worker_task).
+    Smaller matrices, and every matrix without a pool, are computed in the calling thread.
+
+    Attributes:
+        graph (networkx.Graph or CompactGraph): The street network graph from OSMnx.
+        hierarchy (ContractionHierarchy): Optional hierarchy of the graph.
+        pool (WorkerPool): Worker processes computing the rows of large matrices, or None.
+    """
+    # Fewer rows than this are computed in the calling thread, where sending the targets and
+    # buckets to the workers costs more
+    PARALLEL_MIN_ROWS = 16
+
+    def __init__(self, graph, hierarchy=None, pool=None):
+        """Initializes the matrix engine.
+
+        Args:
+            graph (networkx.Graph or CompactGraph): A graph representing the street network.
+            hierarchy (ContractionHierarchy): A hierarchy of the graph. Defaults to None,
+                which uses one Dijkstra search per origin.
+            pool (WorkerPool): Worker processes computing the rows of large matrices.
+                Defaults to None, which computes every matrix in the calling thread.
+        """
+        super().__init__(graph)
+        self.hierarchy = hierarchy
+        self.pool = pool
+        self._dijkstra = DijkstraOSMnx(self.compact_graph)
+
+    def compute(self, source_nodes, target_nodes):
+        """Computes the shortest distances between every origin and destination.
+
+        Args:
+            source_nodes (list): Node IDs of the origins.
+            target_nodes (list): Node IDs of the destinations.
+
+        Returns:
+            numpy.ndarray: Distances in meters of shape (origins, destinations), infinity if
+            there is no path or a node is not in the graph.
+
+        Raises:
+            PoolSaturatedError: If the worker pool is saturated.
+            TimeoutError: If the rows were not computed in time.
+            RuntimeError: If the rows failed in a worker or the worker died.
+        """
+        graph = self.compact_graph
+        sources = [graph.index_of(node) for node in source_nodes]
+        targets = [graph.index_of(node) for node in target_nodes]
+        rows = [i for i, source in enumerate(sources) if source is not None]
+        columns = [j for j, target in enumerate(targets) if target is not None]
+
+        matrix = np.full((len(sources), len(targets)), np.inf)
+        if not rows or not columns:
+            return matrix
+
+        column_targets = [targets[j] for j in columns]
+        matrix[np.ix_(rows, columns)] = self.map_rows([sources[i] for i in rows],
+                                                      column_targets, self.buckets(column_targets))
+        return matrix
+
+    def map_rows(self, sources, targets, buckets):
+        """Computes the matrix rows of the origins, in the worker pool if worthwhile.
+
+        The origins are split into one chunk per worker, which are submitted at once.
+
+        Args:
+            sources (list): Origin node indices.
+            targets (list): Target node indices.
+            buckets (dict): The buckets of the targets, or None to use Dijkstra's algorithm.
+
+        Returns:
+            numpy.ndarray: Distances of shape (origins, targets).
+        """
+        if self.pool is None or len(sources) < self.PARALLEL_MIN_ROWS:
+            return self.rows(sources, targets, buckets)
+
+        tasks = [(ROWS_TASK, chunk.tolist(), targets, buckets)
+                 for chunk in np.array_split(sources, min(self.pool.processes, len(sources)))]
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            return np.vstack(list(executor.map(self.pool.submit, tasks)))
+
+    def buckets(self, targets):
+        """Collects the backward upward search distances of every target by node.
+
+        Args:
+            targets (list): Target node indices.
+
+        Returns:
+            dict: (column, distance) tuples keyed by node index, or None without a hierarchy.
+        """
+        if self.hierarchy is None:
+            return None
+        buckets = {}
+        state = self.search_state
+        for column, target in enumerate(targets):
+            for node, distance in self.hierarchy.upward_distances(state, target, backward=True):
+                buckets.setdefault(node, []).append((column, distance))
+        return buckets
+
+    def rows(self, sources, targets, buckets):
+        """Computes the matrix rows of some origins.
+
+        Args:
+            sources (list): Origin node indices.
+            targets (list): Target node indices.
+            buckets (dict): The buckets of the targets, or None to use Dijkstra's algorithm.
+
+        Returns:
+            numpy.ndarray: Distances of shape (origins, targets).
+        """
+        matrix = np.full((len(sources), len(targets)), np.inf)
+        state = self.search_state
+        for i, source in enumerate(sources):
+            if buckets is None:
+                self._dijkstra.run(self.compact_graph, state, source, targets)
+                matrix[i] = [state.g_scores[target] if state.closed[target] == state.generation
+                             else math.inf for target in targets]
+            else:
+                matrix[i] = self.bucket_row(state, source, len(targets), buckets)
+        return matrix
+
+    def bucket_row(self, state, source, size, buckets):
+        """Computes the matrix row of an origin from the buckets of the targets.
+
+        Args:
+            state (SearchState): The search arrays to use.
+            source (int): The origin node index.
+            size (int): Number of targets.
+            buckets (dict): The buckets of the targets.
+
+        Returns:
+            list: The distance to each target.
+        """
+        row = [math.inf] * size
+        for node, distance in self.hierarchy.upward_distances(state, source):
+            for column, target_distance in buckets.get(node, ()):
+                if distance + target_distance < row[column]:
+                    row[column] = distance + target_distance
+        return row
@@ -0,0 +1,84 @@
+class FringeList:
+    """Doubly linked list of node indices backed by flat arrays, used as the fringe.
+
+    Each node index has its own prev/next slot, and the extra slot at index size is the
+    sentinel head of a circular list. Membership is tracked with generation stamps like in
+    SearchState, so reset, membership tests, insertion and removal are all O(1).
+
+    Attributes:
+        head (int): Index of the sentinel slot.
+        next_nodes (list): Next node of each node in the list.
+        prev_nodes (list): Previous node of each node in the list.
+        member (list): Generation in which the node was last inserted into the list.
+        generation (int): Stamp of the current query.
+    """
+    def __init__(self, size):
+        """Allocates the arrays for a graph.
+
+        Args:
+            size (int): Number of nodes in the graph.
+        """
+        self.head = size
+        self.next_nodes = [size] * (size + 1)
+        self.prev_nodes = [size] * (size + 1)
+        self.member = [0] * (size + 1)
+        self.generation = 0
+
+    def reset(self):
+        """Empties the list in O(1) by starting a new generation."""
+        self.generation += 1
+        self.next_nodes[self.head] = self.head
+        self.prev_nodes[self.head] = self.head
+
+    def __contains__(self, node):
+        """Returns True if the node is in the list."""
+        return self.member[node] == self.generation
+
+    def is_empty(self):
+        """Returns True if the list has no nodes."""
+        return self.next_nodes[self.head] == self.head
+
+    def first(self):
+        """Returns the first node, or head if the list is empty."""
+        return self.next_nodes[self.head]
+
+    def insert_after(self, anchor, node):
+        """Inserts a node right after another node (or after head to insert at the front).
+
+        Args:
+            anchor (int): The node to insert after.
+            node (int): The node to insert. It must not be in the list.
+        """
+        following = self.next_nodes[anchor]
+        self.prev_nodes[node] = anchor
+        self.next_nodes[node] = following
+        self.prev_nodes[following] = node
+        self.next_nodes[anchor] = node
+        self.member[node] = self.generation
+
+    def append(self, node):
+        """Inserts a node at the end of the list.
+
+        Args:
+            node (int): The node to insert. It must not be in the list.
+        """
+        self.insert_after(self.prev_nodes[self.head], node)
+
+    def remove(self, node):
+        """Unlinks a node from the list.
+
+        Args:
+            node (int): The node to remove. It must be in the list.
+        """
+        previous = self.prev_nodes[node]
+        following = self.next_nodes[node]
+        self.next_nodes[previous] = following
+        self.prev_nodes[following] = previous
+        self.member[node] = 0
+
+    def __iter__(self):
+        """Iterates over the nodes from front to back."""
+        node = self.next_nodes[self.head]
+        while node != self.head:
+            yield node
+            node = self.next_nodes[node]
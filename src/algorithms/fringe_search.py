@@ -1,25 +1,28 @@
-from collections import deque
-from utils.graph_utils import GraphUtils
+from algorithms.fringe_list import FringeList
+from algorithms.graph_search import GraphSearch
 
 
-class FringeSearchOSMnx:
+class FringeSearchOSMnx(GraphSearch):
     """Fringe Search algorithm implementation using OSMnx graph data.
     
     This class provides methods to find the shortest path between nodes in a graph 
-    using the Fringe Search algorithm. It uses the Euclidean distance for the 
-    heuristic function to estimate the distance between geographic points.
+    using the Fringe Search algorithm. The heuristic function estimates the remaining
+    distance between geographic points, by default in meters with EquirectangularHeuristic.
 
-    Attributes:
-        graph (networkx.Graph): The street network graph from OSMnx.
-    """
-    def __init__(self, graph):
-        """Initializes FringeSearchOSMnx with the provided graph.
+    The fringe is a doubly linked list stored in flat arrays indexed by node (FringeList),
+    so checking whether a node is in the fringe, inserting a node after the current node
+    and removing a node are all O(1). Nodes above the threshold stay where they are in the
+    list for the next iteration, which splits the fringe into its now and later parts
+    without copying.
 
-        Args:
-            graph (networkx.Graph): A NetworkX graph representing the street network.
-        """
-        self.graph = graph
+    The search runs over an array-backed CompactGraph, see GraphSearch.
 
+    Attributes:
+        graph (networkx.Graph or CompactGraph): The street network graph from OSMnx.
+        heuristic (Heuristic): Estimates the remaining cost from a node to the goal.
+        nodes_expanded (int): Number of node expansions in the latest query, counting
+            nodes expanded again in later iterations.
+    """
     def find_path(self, start_node, goal_node):
         """Finds the shortest path using the Fringe Search algorithm.
 
@@ -43,72 +46,89 @@ class FringeSearchOSMnx:
                 float: The total distance of the path in meters.
                 If no path is found, returns (None, float('inf')).
         """
-        if start_node not in self.graph.nodes or goal_node not in self.graph.nodes:
+        graph = self.compact_graph
+        indices = self.node_indices(start_node, goal_node)
+
+        if indices is None:
             return None, float('inf')
+        start, goal = indices
+
+        heuristic = self.heuristic.estimator(graph, goal)
+        self.nodes_expanded = 0
 
         # Initialize the first threshold (flimit) using the heuristic from the start to the goal
-        flimit = GraphUtils.euclidean(self.graph, start_node, goal_node)
+        flimit = heuristic(start)
 
         # Cache stores g-values (actual cost from start) and parent of each visited node
-        cache = {start_node: (0, None)}
+        cache = self.search_state
+        cache.reset(start)
 
-        # Initialize the fringe (queue) with the start node
-        fringe = deque([start_node])
-        found = False
+        # Initialize the fringe with the start node
+        fringe = self.fringe_list
+        fringe.reset()
+        fringe.append(start)
 
-        while True:
+        while not fringe.is_empty():
             # Process nodes in the fringe
-            next_fringe, fmin, found = self.process_fringe(fringe, goal_node, flimit, cache)
+            fmin, found = self.process_fringe(fringe, goal, flimit, cache, heuristic)
 
             if found:
-                return self.reconstruct_path(cache, goal_node), cache[goal_node][0]
+                return self.reconstruct(cache, goal), cache.g_scores[goal]
 
-            if not next_fringe:
-                return None, float('inf')
-
-            # Move to the next iteration with updated fringe and flimit
-            fringe = next_fringe
+            # Move to the next iteration with the updated flimit
             flimit = fmin
 
-    def process_fringe(self, fringe, goal_node, flimit, cache):
-        """Processes nodes in the fringe, expanding and evaluating neighbors.
+        return None, float('inf')
+
+    @property
+    def fringe_list(self):
+        """FringeList: The reusable fringe of the calling thread."""
+        return self.thread_local('fringe', FringeList)
+
+    def process_fringe(self, fringe, goal, flimit, cache, heuristic):
+        """Processes nodes in the fringe from front to back, expanding and evaluating neighbors.
 
         This method evaluates nodes in the current fringe and updates their 
-        f-values. Nodes exceeding the flimit are deferred to a future iteration.
+        f-values. Nodes exceeding the flimit are left in the fringe for a future iteration,
+        expanded nodes are replaced by their updated neighbors.
 
         Args:
-            fringe (deque): The queue of nodes to explore.
-            goal_node (int): The goal node ID.
+            fringe (FringeList): The list of nodes to explore.
+            goal (int): The goal node index.
             flimit (float): The current f-value limit.
-            cache (dict): A dictionary storing g-values and parent nodes.
+            cache (SearchState): The g-values and parent nodes of visited nodes.
+            heuristic (callable): Estimates the remaining cost from a node index to the goal.
 
         Returns:
-            tuple: The updated fringe for the next iteration, the minimum f-value, 
-            and a boolean indicating if the goal node was found.
+            tuple: The minimum f-value above flimit and a boolean indicating
+            if the goal node was found.
         """
-        next_fringe = deque()
         fmin = float('inf')
-        found = False
+        g_scores = cache.g_scores
+        next_nodes = fringe.next_nodes
+        current = fringe.first()
 
-        while fringe:
-            current = fringe.popleft()
-            g = cache[current][0]
-            h = GraphUtils.euclidean(self.graph, current, goal_node)
-            f = g + h
+        while current != fringe.head:
+            f = g_scores[current] + heuristic(current)
 
             if f > flimit:
                 fmin = min(fmin, f)
-                next_fringe.append(current)
+                current = next_nodes[current]
                 continue
 
-            if current == goal_node:
-                found = True
-                break
+            if current == goal:
+                return fmin, True
 
             # Expand neighbors of the current node
+            self.nodes_expanded += 1
             self.expand_neighbors(current, fringe, cache)
 
-        return next_fringe, fmin, found
+            # The neighbors were inserted right after the current node, so they are visited next
+            following = next_nodes[current]
+            fringe.remove(current)
+            current = following
+
+        return fmin, False
 
     def expand_neighbors(self, current, fringe, cache):
         """Expands and processes neighbors of the current node.
@@ -117,39 +137,26 @@ class FringeSearchOSMnx:
         calculates their tentative g-values, and updates the cache and fringe.
 
         Args:
-            current (int): The current node being explored.
-            fringe (deque): The queue of nodes to explore.
-            cache (dict): A dictionary storing g-values and parent nodes.
+            current (int): Index of the current node being explored.
+            fringe (FringeList): The list of nodes to explore.
+            cache (SearchState): The g-values and parent nodes of visited nodes.
         """
-        neighbors = list(self.graph.neighbors(current))
+        generation = cache.generation
+        g_scores = cache.g_scores
+        visited = cache.visited
+        current_g = g_scores[current]
+
+        neighbors = list(self.compact_graph.neighbors(current))
         neighbors.reverse()
 
-        for neighbor in neighbors:
-            edge_length = GraphUtils.get_edge_length(self.graph, current, neighbor)
-            tentative_g = cache[current][0] + edge_length
+        for neighbor, edge_length in neighbors:
+            tentative_g = current_g + edge_length
 
-            if neighbor not in cache or tentative_g < cache[neighbor][0]:
-                cache[neighbor] = (tentative_g, current)
+            if visited[neighbor] != generation or tentative_g < g_scores[neighbor]:
+                cache.visit(neighbor, tentative_g, current)
 
                 if neighbor in fringe:
                     fringe.remove(neighbor)
 
-                # Add the neighbor to the front of the fringe
-                fringe.appendleft(neighbor)
-
-    def reconstruct_path(self, cache, current):
-        """Reconstructs the path from the start node to the current node.
-        
-        Args:
-            cache (dict): A dictionary mapping nodes to their g-values and parent nodes.
-            current (int): The current node ID (usually the goal node).
-
-        Returns:
-            list: The reconstructed path as a list of node IDs from the start node to the goal node.
-        """
-        path = [current]
-        while cache[current][1] is not None:
-            current = cache[current][1]
-            path.append(current)
-        path.reverse() # Reverse the list to get the path from start to goal
-        return path
+                # Add the neighbor right after the current node
+                fringe.insert_after(current, neighbor)
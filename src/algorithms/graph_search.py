@@ -0,0 +1,93 @@
+import threading
+import networkx as nx
+from algorithms.search_state import SearchState
+from utils.compact_graph import CompactGraph
+from utils.heuristics import EquirectangularHeuristic
+
+
+class GraphSearch:
+    """Base class for the search algorithms running over a CompactGraph.
+
+    A NetworkX graph is converted into a CompactGraph on the first query, so build the
+    CompactGraph once and share it between engines when the same graph is queried repeatedly.
+    Any other graph, such as a TiledGraph, is searched as it is.
+
+    The per-node search arrays are allocated once per engine and thread (see SearchState), so
+    one engine can serve many queries, also from concurrent request threads.
+
+    Attributes:
+        graph (networkx.Graph, CompactGraph or TiledGraph): The street network graph.
+        heuristic (Heuristic): Estimates the remaining cost from a node to the goal.
+        nodes_expanded (int): Number of node expansions in the latest query.
+    """
+    def __init__(self, graph, heuristic=None):
+        """Initializes the search with the given graph.
+
+        Args:
+            graph (networkx.Graph, CompactGraph or TiledGraph): A graph representing the
+                street network.
+            heuristic (Heuristic): Heuristic used by the search. Defaults to
+                EquirectangularHeuristic, a lower bound of the remaining distance in meters.
+        """
+        self.graph = graph
+        self.heuristic = heuristic or EquirectangularHeuristic()
+        self.nodes_expanded = 0
+        self._compact = None if isinstance(graph, nx.Graph) else graph
+        self._local = threading.local()
+
+    @property
+    def compact_graph(self):
+        """CompactGraph: The array-backed graph the search runs on, built on first use from a
+        NetworkX graph."""
+        if self._compact is None:
+            self._compact = CompactGraph.from_networkx(self.graph)
+        return self._compact
+
+    def node_indices(self, start_node, goal_node):
+        """Looks up the node indices of the start and goal nodes.
+
+        Args:
+            start_node (int): The node ID where the path starts.
+            goal_node (int): The node ID where the path ends.
+
+        Returns:
+            tuple: The start and goal node indices, or None if either node is not in the graph.
+        """
+        start = self.compact_graph.index_of(start_node)
+        goal = self.compact_graph.index_of(goal_node)
+        if start is None or goal is None:
+            return None
+        return start, goal
+
+    def reconstruct(self, state, goal):
+        """Converts the path found to the goal into node IDs.
+
+        Args:
+            state (SearchState): The search that closed the goal.
+            goal (int): The goal node index.
+
+        Returns:
+            list: The node IDs along the path from the start node to the goal.
+        """
+        return self.compact_graph.node_path(state.reconstruct_path(goal))
+
+    @property
+    def search_state(self):
+        """SearchState: The reusable search arrays of the calling thread."""
+        return self.thread_local('state', SearchState)
+
+    def thread_local(self, name, factory):
+        """Returns per-node arrays of the calling thread, allocating them on first use.
+
+        Args:
+            name (str): Name of the arrays.
+            factory (callable): Creates the arrays from the number of nodes in the graph.
+
+        Returns:
+            object: The arrays created by factory for this engine and thread.
+        """
+        value = getattr(self._local, name, None)
+        if value is None:
+            value = factory(self.compact_graph.node_count)
+            setattr(self._local, name, value)
+        return value
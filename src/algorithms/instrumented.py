@@ -0,0 +1,176 @@
+import time
+from algorithms.a_star import AStarOSMnx
+from algorithms.fringe_list import FringeList
+from algorithms.fringe_search import FringeSearchOSMnx
+from algorithms.graph_search import GraphSearch
+from algorithms.reusable_a_star import ReusableAStarOSMnx
+from utils.metrics import SearchStats
+
+
+class InstrumentedSearch(GraphSearch):
+    """Base of the engines recording SearchStats for every query.
+
+    The instrumented engines are subclasses that count in overridden steps of the search,
+    so the plain engines run exactly the same code as before and instrumentation costs
+    nothing unless an instrumented engine is used. Every query records the number of nodes
+    expanded and, with time.perf_counter_ns, the 'search' and 'reconstruct' (path
+    reconstruction) phases. The stats are kept per thread, like the search arrays.
+    """
+    @property
+    def stats(self):
+        """SearchStats: The counters and timings of the latest query of the calling thread."""
+        stats = getattr(self._local, 'stats', None)
+        if stats is None:
+            stats = self._local.stats = SearchStats()
+        return stats
+
+    def find_path(self, start_node, goal_node):
+        """Finds the shortest path like the engine, recording the stats of the query.
+
+        Args:
+            start_node (int): The node ID where the path starts.
+            goal_node (int): The node ID where the path ends.
+
+        Returns:
+            tuple: The path as a list of node IDs and its length, (None, inf) if there is none.
+        """
+        stats = self._local.stats = SearchStats()
+        start_time = time.perf_counter_ns()
+        path, length = super().find_path(start_node, goal_node)  # pylint: disable=no-member
+        elapsed = time.perf_counter_ns() - start_time
+        stats.phases['search'] = elapsed - stats.phases.get('reconstruct', 0)
+        stats.counters['nodes_expanded'] = self.nodes_expanded
+        return path, length
+
+    def reconstruct(self, state, goal):
+        start_time = time.perf_counter_ns()
+        path = super().reconstruct(state, goal)
+        self.stats.phases['reconstruct'] = time.perf_counter_ns() - start_time
+        return path
+
+
+class InstrumentedAStarOSMnx(InstrumentedSearch, AStarOSMnx):
+    """A* counting edges relaxed, heap pushes and pops, stale pops and the peak open list.
+
+    Every query records these counters in its SearchStats:
+
+    - edges_relaxed: Outgoing edges scanned from expanded nodes.
+    - heap_pushes and heap_pops: Entries pushed to and popped from the open list.
+    - stale_pops: Popped entries of nodes that were already expanded.
+    - peak_queue_size: Largest length of the open list.
+    """
+    def find_path(self, start_node, goal_node):
+        path, length = super().find_path(start_node, goal_node)
+        if self.nodes_expanded:
+            counters = self.stats.counters
+            # The start node is pushed before the search, and every pop expands a node or
+            # skips a stale entry
+            counters['heap_pushes'] += 1
+            counters['heap_pops'] = counters['heap_pushes'] - len(self.search_state.open_list)
+            counters['stale_pops'] = counters['heap_pops'] - self.nodes_expanded
+        return path, length
+
+    def process_neighbors(self, current, state, heuristic):
+        queue_size = len(state.open_list)
+        super().process_neighbors(current, state, heuristic)
+        stats = self.stats
+        stats.counters['edges_relaxed'] += self.compact_graph.out_degree(current)
+        stats.counters['heap_pushes'] += len(state.open_list) - queue_size
+        stats.peak('peak_queue_size', len(state.open_list))
+
+
+class InstrumentedReusableAStarOSMnx(InstrumentedSearch, ReusableAStarOSMnx):
+    """A* reusing search trees, with the counters of InstrumentedAStarOSMnx.
+
+    The counters only cover the work of the query itself, so a goal already closed by an
+    earlier query from the same start records no expansions at all.
+    """
+    def extend(self, tree, goal):
+        if tree.goal is None:
+            # The start node was pushed when the tree was created for this query
+            self.stats.counters['heap_pushes'] += 1
+        return super().extend(tree, goal)
+
+    def pop_open(self, tree):
+        current = super().pop_open(tree)
+        counters = self.stats.counters
+        counters['heap_pops'] += 1
+        if current in tree.closed:
+            counters['stale_pops'] += 1
+        return current
+
+    def relax_edges(self, tree, current, heuristic):
+        queue_size = len(tree.open_list)
+        super().relax_edges(tree, current, heuristic)
+        stats = self.stats
+        stats.counters['edges_relaxed'] += self.compact_graph.out_degree(current)
+        stats.counters['heap_pushes'] += len(tree.open_list) - queue_size
+        stats.peak('peak_queue_size', len(tree.open_list))
+
+
+class InstrumentedFringeList(FringeList):
+    """FringeList counting its nodes as they are inserted and removed.
+
+    Attributes:
+        size (int): Number of nodes in the list.
+        peak_size (int): Largest number of nodes in the list since the last reset.
+    """
+    def __init__(self, size):
+        super().__init__(size)
+        self.size = 0
+        self.peak_size = 0
+
+    def reset(self):
+        super().reset()
+        self.size = 0
+        self.peak_size = 0
+
+    def insert_after(self, anchor, node):
+        super().insert_after(anchor, node)
+        self.size += 1
+        self.peak_size = max(self.peak_size, self.size)
+
+    def remove(self, node):
+        super().remove(node)
+        self.size -= 1
+
+
+class InstrumentedFringeSearchOSMnx(InstrumentedSearch, FringeSearchOSMnx):
+    """Fringe Search counting iterations, re-visits, edges relaxed and the peak fringe.
+
+    Every query records these counters in its SearchStats:
+
+    - iterations: Passes over the fringe, one per f-limit.
+    - revisits: Expansions of nodes that were already expanded in an earlier pass.
+    - edges_relaxed: Outgoing edges scanned from expanded nodes.
+    - peak_fringe_size: Largest number of nodes in the fringe, counted by the fringe itself
+      (InstrumentedFringeList).
+
+    This engine extends the Python FringeSearchOSMnx, so with INSTRUMENTATION the app
+    serves and measures it even where the compiled CompiledFringeSearchOSMnx is available.
+    """
+    @property
+    def fringe_list(self):
+        """InstrumentedFringeList: The reusable fringe of the calling thread."""
+        return self.thread_local('instrumented_fringe', InstrumentedFringeList)
+
+    def find_path(self, start_node, goal_node):
+        self._local.expanded_nodes = set()
+        fringe = self.fringe_list
+        fringe.reset()
+        path, length = super().find_path(start_node, goal_node)
+        self.stats.counters['peak_fringe_size'] = fringe.peak_size
+        return path, length
+
+    def process_fringe(self, fringe, goal, flimit, cache, heuristic):
+        self.stats.counters['iterations'] += 1
+        return super().process_fringe(fringe, goal, flimit, cache, heuristic)
+
+    def expand_neighbors(self, current, fringe, cache):
+        counters = self.stats.counters
+        expanded_nodes = self._local.expanded_nodes
+        if current in expanded_nodes:
+            counters['revisits'] += 1
+        expanded_nodes.add(current)
+        counters['edges_relaxed'] += self.compact_graph.out_degree(current)
+        super().expand_neighbors(current, fringe, cache)
@@ -0,0 +1,628 @@
+import math
+import numpy as np
+from algorithms.a_star import AStarOSMnx
+from algorithms.fringe_search import FringeSearchOSMnx
+from algorithms.graph_search import GraphSearch
+from algorithms.landmarks import LandmarkHeuristic
+from utils.heuristics import (EARTH_RADIUS_M, EquirectangularHeuristic, EuclideanHeuristic,
+                              HaversineHeuristic, MemoizedHeuristic, TravelTimeHeuristic)
+from utils.tiled_graph import TiledGraph
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Whether the search kernels below are compiled to machine code. Without numba they stay
+# plain Python functions, and the compiled engines run the Python engines they extend.
+COMPILED = numba is not None
+
+# Kinds of heuristics the kernels evaluate, see heuristic_model()
+PLANAR, HAVERSINE, LANDMARKS = 0, 1, 2
+HEURISTIC_KINDS = {
+    EquirectangularHeuristic: PLANAR,
+    EuclideanHeuristic: PLANAR,
+    HaversineHeuristic: HAVERSINE,
+    LandmarkHeuristic: LANDMARKS
+}
+
+
+def jit(function):
+    """Compiles a kernel with numba if it is installed, otherwise returns it unchanged.
+
+    The kernels release the GIL, so concurrent request threads search in parallel, and the
+    machine code is cached next to this module so it is only compiled once.
+
+    Args:
+        function (callable): The kernel, written in the subset of Python numba compiles.
+
+    Returns:
+        callable: The compiled kernel, or function itself without numba.
+    """
+    if numba is None:
+        return function
+    return numba.njit(cache=True, nogil=True)(function)
+
+
+@jit
+def heap_push(keys, nodes, size, key, node):
+    """Pushes an entry onto a binary min-heap stored in two arrays.
+
+    Entries are ordered by (key, node) like the (f-score, node) tuples of heapq, so the
+    entries are popped in the same order as from the open list of AStarOSMnx.
+
+    Args:
+        keys (numpy.ndarray): The keys of the heap entries.
+        nodes (numpy.ndarray): The nodes of the heap entries.
+        size (int): Number of entries in the heap.
+        key (float): Key of the new entry.
+        node (int): Node of the new entry.
+
+    Returns:
+        int: The new number of entries.
+    """
+    position = size
+    while position > 0:
+        parent = (position - 1) >> 1
+        if keys[parent] < key or (keys[parent] == key and nodes[parent] <= node):
+            break
+        keys[position] = keys[parent]
+        nodes[position] = nodes[parent]
+        position = parent
+    keys[position] = key
+    nodes[position] = node
+    return size + 1
+
+
+@jit
+def heap_pop(keys, nodes, size):
+    """Removes the smallest entry from a heap built with heap_push().
+
+    Args:
+        keys (numpy.ndarray): The keys of the heap entries.
+        nodes (numpy.ndarray): The nodes of the heap entries.
+        size (int): Number of entries in the heap, at least one.
+
+    Returns:
+        tuple: The node of the removed entry and the new number of entries.
+    """
+    smallest = nodes[0]
+    size -= 1
+    key = keys[size]
+    node = nodes[size]
+    position = 0
+    child = 1
+    while child < size:
+        if child + 1 < size and (keys[child + 1] < keys[child] or (
+                keys[child + 1] == keys[child] and nodes[child + 1] < nodes[child])):
+            child += 1
+        if key < keys[child] or (key == keys[child] and node <= nodes[child]):
+            break
+        keys[position] = keys[child]
+        nodes[position] = nodes[child]
+        position = child
+        child = 2 * position + 1
+    keys[position] = key
+    nodes[position] = node
+    return smallest, size
+
+
+@jit
+def trace_path(came_from, goal):
+    """Follows the parent pointers from the goal back to the start node.
+
+    Args:
+        came_from (numpy.ndarray): Parent node index of every visited node, -1 for the start.
+        goal (int): The node index the path ends at.
+
+    Returns:
+        numpy.ndarray: Node indices (int64) from the start node to the goal.
+    """
+    count = 1
+    node = goal
+    while came_from[node] != -1:
+        node = came_from[node]
+        count += 1
+
+    path = np.empty(count, dtype=np.int64)
+    node = goal
+    for position in range(count - 1, -1, -1):
+        path[position] = node
+        node = came_from[node]
+    return path
+
+
+@jit
+def estimate(heuristic, node, generation):
+    """Returns the heuristic estimate of a node, computing it on its first use in a query.
+
+    Like the lazy MemoizedHeuristic, every node is estimated at most once per query, and
+    only the nodes the search reaches are estimated at all.
+
+    Args:
+        heuristic (tuple): The model of heuristic_model(), the estimates and estimate stamps
+            of KernelState and the goal node index.
+        node (int): The node index to estimate.
+        generation (int): Stamp of the current query.
+
+    Returns:
+        float: The estimated cost from the node to the goal.
+    """
+    model, (estimates, estimated), goal = heuristic
+    if estimated[node] == generation:
+        return estimates[node]
+    kind, scale = model[0], model[1]
+    if kind == PLANAR:
+        value = planar_distance(model, node, goal)
+    elif kind == HAVERSINE:
+        value = haversine_distance(model, node, goal)
+    else:
+        value = landmark_bound(model, node, goal)
+    value *= scale
+    estimates[node] = value
+    estimated[node] = generation
+    return value
+
+
+@jit
+def planar_distance(model, node, goal):
+    """Estimates the distance on a plane like EquirectangularHeuristic and
+    EuclideanHeuristic.
+
+    Args:
+        model (tuple): The model of heuristic_model() with the x and y coordinates.
+        node (int): The node index to estimate.
+        goal (int): The goal node index.
+
+    Returns:
+        float: The distance, zero for nodes without coordinates.
+    """
+    x, y = model[3], model[4]
+    distance = math.hypot(x[node] - x[goal], y[node] - y[goal])
+    return 0.0 if math.isnan(distance) else distance
+
+
+@jit
+def haversine_distance(model, node, goal):
+    """Estimates the great-circle distance like HaversineHeuristic.
+
+    Args:
+        model (tuple): The model of heuristic_model() with the latitudes and longitudes in
+            radians and the cosines of the latitudes.
+        node (int): The node index to estimate.
+        goal (int): The goal node index.
+
+    Returns:
+        float: The distance in meters, zero for nodes without coordinates.
+    """
+    lat, lon, cos_lat = model[3], model[4], model[5]
+    a = (math.sin((lat[node] - lat[goal]) / 2) ** 2
+         + cos_lat[node] * cos_lat[goal] * math.sin((lon[node] - lon[goal]) / 2) ** 2)
+    distance = 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(a, 1.0)))
+    return 0.0 if math.isnan(distance) else distance
+
+
+@jit
+def landmark_bound(model, node, goal):
+    """Estimates the distance with the landmark bounds like LandmarkHeuristic.
+
+    Args:
+        model (tuple): The model of heuristic_model() with the slack and the distance
+            tables from and to the landmarks.
+        node (int): The node index to estimate.
+        goal (int): The goal node index.
+
+    Returns:
+        float: The largest bound lowered by the slack, infinite if the node cannot reach
+        the goal.
+    """
+    slack, landmark_table, node_table = model[2], model[6], model[7]
+    best = 0.0
+    for k in range(node_table.shape[1]):
+        # Landmarks the goal cannot reach, or cannot be reached from, give no bounds
+        if node_table[goal, k] != np.inf:
+            best = max(best, float(node_table[node, k]) - float(node_table[goal, k]))
+        if landmark_table[goal, k] != np.inf:
+            best = max(best, float(landmark_table[goal, k]) - float(landmark_table[node, k]))
+    return best - slack if best > slack else 0.0
+
+
+@jit
+def start_search(search, start, generation):
+    """Makes the start node the only visited node of a query, like SearchState.reset().
+
+    Args:
+        search (tuple): The g-scores, parents and visited stamps of the query.
+        start (int): The start node index.
+        generation (int): Stamp of the current query.
+    """
+    g_scores, came_from, visited = search
+    visited[start] = generation
+    g_scores[start] = 0.0
+    came_from[start] = -1
+
+
+@jit
+def relax(search, current, neighbor, g_score, generation):
+    """Records the path to a neighbor through the current node if it is the first or a
+    shorter path to the neighbor, like the searches do with SearchState.visit().
+
+    Args:
+        search (tuple): The g-scores, parents and visited stamps of the query.
+        current (int): Index of the node being expanded.
+        neighbor (int): Index of the neighbor.
+        g_score (float): Cost of the path to the neighbor through the current node.
+        generation (int): Stamp of the current query.
+
+    Returns:
+        bool: Whether the path was recorded.
+    """
+    g_scores, came_from, visited = search
+    if visited[neighbor] == generation and g_score >= g_scores[neighbor]:
+        return False
+    visited[neighbor] = generation
+    g_scores[neighbor] = g_score
+    came_from[neighbor] = current
+    return True
+
+
+@jit
+def astar_kernel(graph, state, heuristic, start, goal):
+    """Runs the search of AStarOSMnx over the CSR arrays of a graph.
+
+    Args:
+        graph (tuple): The offsets, targets and lengths arrays of a CompactGraph.
+        state (tuple): The search arrays, closed stamps, heap arrays and generation of the
+            query, see KernelState.astar_arrays().
+        heuristic (tuple): The heuristic argument of estimate().
+        start (int): The start node index.
+        goal (int): The goal node index.
+
+    Returns:
+        tuple: The path as node indices (empty if there is none), its length (inf if there
+        is none) and the number of nodes expanded.
+    """
+    search, closed, (keys, nodes), generation = state
+    start_search(search, start, generation)
+    size = heap_push(keys, nodes, 0, estimate(heuristic, start, generation), start)
+    expanded = 0
+
+    while size > 0:
+        current, size = heap_pop(keys, nodes, size)
+
+        # Stale queue entries of nodes that were already expanded are skipped
+        if closed[current] != generation:
+            closed[current] = generation
+            expanded += 1
+            if current == goal:
+                return trace_path(search[1], goal), search[0][goal], expanded
+            size = astar_neighbors(graph, state, heuristic, current, size)
+
+    return np.empty(0, dtype=np.int64), np.inf, expanded
+
+
+@jit
+def astar_neighbors(graph, state, heuristic, current, size):  # pylint: disable=too-many-locals
+    """Relaxes the outgoing edges of a node, like AStarOSMnx.process_neighbors().
+
+    Args:
+        graph (tuple): The offsets, targets and lengths arrays of a CompactGraph.
+        state (tuple): The state of the query, see astar_kernel().
+        heuristic (tuple): The heuristic argument of estimate().
+        current (int): Index of the node being expanded.
+        size (int): Number of entries in the open list.
+
+    Returns:
+        int: The new number of entries in the open list.
+    """
+    offsets, targets, lengths = graph
+    search, closed, (keys, nodes), generation = state
+    current_g_score = search[0][current]
+
+    for edge in range(offsets[current], offsets[current + 1]):
+        neighbor = targets[edge]
+        tentative_g_score = current_g_score + lengths[edge]
+        if (closed[neighbor] != generation
+                and relax(search, current, neighbor, tentative_g_score, generation)):
+            f_score = tentative_g_score + estimate(heuristic, neighbor, generation)
+            size = heap_push(keys, nodes, size, f_score, neighbor)
+    return size
+
+
+@jit
+def link_after(fringe, anchor, node, generation):
+    """Inserts a node right after another node, like FringeList.insert_after().
+
+    Args:
+        fringe (tuple): The next links, previous links and membership stamps of the fringe.
+        anchor (int): The node to insert after.
+        node (int): The node to insert. It must not be in the fringe.
+        generation (int): Stamp of the current query.
+    """
+    next_nodes, prev_nodes, member = fringe
+    following = next_nodes[anchor]
+    prev_nodes[node] = anchor
+    next_nodes[node] = following
+    prev_nodes[following] = node
+    next_nodes[anchor] = node
+    member[node] = generation
+
+
+@jit
+def unlink(fringe, node):
+    """Removes a node from the fringe, like FringeList.remove().
+
+    Args:
+        fringe (tuple): The next links, previous links and membership stamps of the fringe.
+        node (int): The node to remove. It must be in the fringe.
+    """
+    next_nodes, prev_nodes, member = fringe
+    previous = prev_nodes[node]
+    following = next_nodes[node]
+    next_nodes[previous] = following
+    prev_nodes[following] = previous
+    member[node] = 0
+
+
+@jit
+def fringe_kernel(graph, state, heuristic, start, goal):
+    """Runs the search of FringeSearchOSMnx over the CSR arrays of a graph.
+
+    The fringe is the same doubly linked list as FringeList, with the sentinel head in the
+    last slot of the link arrays.
+
+    Args:
+        graph (tuple): The offsets, targets and lengths arrays of a CompactGraph.
+        state (tuple): The search arrays, fringe arrays and generation of the query, see
+            KernelState.fringe_arrays().
+        heuristic (tuple): The heuristic argument of estimate().
+        start (int): The start node index.
+        goal (int): The goal node index.
+
+    Returns:
+        tuple: The path as node indices (empty if there is none), its length (inf if there
+        is none) and the number of node expansions.
+    """
+    search, fringe, generation = state
+    next_nodes = fringe[0]
+    head = len(next_nodes) - 1
+    start_search(search, start, generation)
+    next_nodes[head] = fringe[1][head] = head
+    link_after(fringe, head, start, generation)
+    flimit = estimate(heuristic, start, generation)
+    expanded = 0
+
+    while next_nodes[head] != head:
+        fmin = np.inf
+        current = next_nodes[head]
+
+        while current != head:
+            f = search[0][current] + estimate(heuristic, current, generation)
+            if f > flimit:
+                fmin = min(fmin, f)
+                current = next_nodes[current]
+            elif current == goal:
+                return trace_path(search[1], goal), search[0][goal], expanded
+            else:
+                expanded += 1
+                current = fringe_expand(graph, state, current)
+
+        flimit = fmin
+
+    return np.empty(0, dtype=np.int64), np.inf, expanded
+
+
+@jit
+def fringe_expand(graph, state, current):
+    """Expands a node of the fringe: inserts its improved neighbors right after it, in the
+    order of FringeSearchOSMnx.expand_neighbors(), and removes the node.
+
+    Args:
+        graph (tuple): The offsets, targets and lengths arrays of a CompactGraph.
+        state (tuple): The state of the query, see fringe_kernel().
+        current (int): Index of the node being expanded.
+
+    Returns:
+        int: The node visited next, the first inserted neighbor if there is one.
+    """
+    offsets, targets, lengths = graph
+    search, fringe, generation = state
+    member = fringe[2]
+    current_g = search[0][current]
+
+    for edge in range(offsets[current + 1] - 1, offsets[current] - 1, -1):
+        neighbor = targets[edge]
+        if relax(search, current, neighbor, current_g + lengths[edge], generation):
+            if member[neighbor] == generation:
+                unlink(fringe, neighbor)
+            link_after(fringe, current, neighbor, generation)
+
+    # The neighbors were inserted right after the current node, so they are visited next
+    following = fringe[0][current]
+    unlink(fringe, current)
+    return following
+
+
+class KernelState:
+    """Per-node arrays of the search kernels, reused across queries like SearchState.
+
+    Every query starts a new generation instead of clearing the arrays. The heap has room
+    for one entry per edge and the start node, the most A* ever pushes.
+
+    Attributes:
+        generation (int): Stamp of the current query.
+        search (tuple): The cost from the start node, the parent node index on the best
+            known path and the generation in which both were written.
+        closed (numpy.ndarray): Generation in which the node was expanded by A*.
+        heap (tuple): The keys (f-scores) and nodes of the open list of A*.
+        fringe (tuple): The next and previous node in the fringe, with the head in the last
+            slot, and the generation in which the node was inserted into the fringe.
+        memo (tuple): The heuristic estimates and the generation in which each was computed.
+    """
+    def __init__(self, size, edge_count):
+        """Allocates the arrays for a graph.
+
+        Args:
+            size (int): Number of nodes in the graph.
+            edge_count (int): Number of edges in the graph.
+        """
+        self.generation = 0
+        self.search = (np.zeros(size, dtype=np.float64), np.full(size, -1, dtype=np.int64),
+                       np.zeros(size, dtype=np.int64))
+        self.closed = np.zeros(size, dtype=np.int64)
+        self.heap = (np.zeros(edge_count + 1, dtype=np.float64),
+                     np.zeros(edge_count + 1, dtype=np.int64))
+        self.fringe = (np.full(size + 1, size, dtype=np.int64),
+                       np.full(size + 1, size, dtype=np.int64), np.zeros(size + 1, dtype=np.int64))
+        self.memo = (np.zeros(size, dtype=np.float64), np.zeros(size, dtype=np.int64))
+
+    def astar_arrays(self):
+        """Starts a new query of astar_kernel().
+
+        Returns:
+            tuple: The state argument of astar_kernel().
+        """
+        self.generation += 1
+        return self.search, self.closed, self.heap, self.generation
+
+    def fringe_arrays(self):
+        """Starts a new query of fringe_kernel().
+
+        Returns:
+            tuple: The state argument of fringe_kernel().
+        """
+        self.generation += 1
+        return self.search, self.fringe, self.generation
+
+
+def kernel_heuristic(heuristic):
+    """Finds the heuristic the kernels evaluate in place of the engine's heuristic.
+
+    A MemoizedHeuristic is replaced by the heuristic it wraps, since the kernels memoize
+    every estimate themselves, and a TravelTimeHeuristic by its distance heuristic, whose
+    estimates are scaled.
+
+    Args:
+        heuristic (Heuristic): The heuristic of the engine.
+
+    Returns:
+        tuple: The unwrapped heuristic and the scale of its estimates, or None if the
+        kernels cannot evaluate the heuristic.
+    """
+    scale = 1.0
+    while isinstance(heuristic, (MemoizedHeuristic, TravelTimeHeuristic)):
+        if isinstance(heuristic, TravelTimeHeuristic):
+            scale *= 3.6 / heuristic.max_speed_kph
+            heuristic = heuristic.distance_heuristic
+        else:
+            heuristic = heuristic.heuristic
+    if type(heuristic) not in HEURISTIC_KINDS:
+        return None
+    return heuristic, scale
+
+
+def heuristic_model(heuristic, graph):
+    """Describes a heuristic as the arrays estimate() computes the estimates from.
+
+    Args:
+        heuristic (Heuristic): The heuristic of the engine, see kernel_heuristic().
+        graph (CompactGraph): The graph being searched.
+
+    Returns:
+        tuple: The kind (PLANAR, HAVERSINE or LANDMARKS), scale and slack of the estimates,
+        three per-node coordinate arrays and the two landmark tables, with empty arrays in
+        the unused slots.
+    """
+    heuristic, scale = kernel_heuristic(heuristic)
+    heuristic.bind(graph)
+    kind = HEURISTIC_KINDS[type(heuristic)]
+    values = [np.asarray(value) for value in heuristic.values]
+    coordinates, tables, slack = [np.empty(0)] * 3, [np.empty((0, 0), np.float32)] * 2, 0.0
+    if kind == LANDMARKS:
+        tables, slack = values[:2], float(values[2])
+    elif isinstance(heuristic, EuclideanHeuristic):
+        coordinates[:2] = values[::-1]
+    else:
+        coordinates[:len(values)] = values
+    return (kind, scale, slack, *coordinates, *tables)
+
+
+class KernelSearch(GraphSearch):
+    """Base of the engines running their search in a kernel function.
+
+    The kernels read the CSR arrays of the CompactGraph directly and compute the heuristic
+    estimates themselves, from the per-node arrays of heuristic_model(), only for the nodes
+    the search reaches. They make the same choices as the Python engines, so the paths and
+    lengths are identical.
+
+    By default the kernels run when numba is installed (COMPILED). Otherwise the engines
+    run the Python engine they extend, which is faster than the kernels interpreted. A
+    TiledGraph has no CSR arrays of the whole graph, and only the heuristics in
+    HEURISTIC_KINDS have a kernel version, so other graphs and heuristics are always
+    searched in Python.
+
+    Attributes:
+        use_kernel (bool): Whether queries run in the kernel.
+    """
+    def __init__(self, graph, heuristic=None, use_kernel=COMPILED):
+        """Initializes the engine.
+
+        Args:
+            graph (networkx.Graph or CompactGraph): A graph representing the street network.
+            heuristic (Heuristic): Heuristic used by the search. Defaults to
+                EquirectangularHeuristic.
+            use_kernel (bool): Whether queries run in the kernel. Defaults to COMPILED.
+        """
+        super().__init__(graph, heuristic=heuristic)
+        self.use_kernel = (use_kernel and not isinstance(graph, TiledGraph)
+                           and kernel_heuristic(self.heuristic) is not None)
+
+    @property
+    def kernel_state(self):
+        """KernelState: The reusable kernel arrays of the calling thread."""
+        edge_count = self.compact_graph.edge_count
+        return self.thread_local('kernel_state', lambda size: KernelState(size, edge_count))
+
+    def run_kernel(self, kernel, state_arrays, start_node, goal_node):
+        """Finds the shortest path with a search kernel.
+
+        Args:
+            kernel (callable): astar_kernel() or fringe_kernel().
+            state_arrays (callable): Starts a query on a KernelState and returns the state
+                argument of the kernel, KernelState.astar_arrays or fringe_arrays.
+            start_node (int): The node ID where the path starts.
+            goal_node (int): The node ID where the path ends.
+
+        Returns:
+            tuple: The path as a list of node IDs and its length, (None, inf) if there is none.
+        """
+        indices = self.node_indices(start_node, goal_node)
+        if indices is None:
+            return None, float('inf')
+
+        graph = self.compact_graph
+        state = self.kernel_state
+        heuristic = (heuristic_model(self.heuristic, graph), state.memo, indices[1])
+        arrays = (np.asarray(graph.offsets), np.asarray(graph.targets),
+                  np.asarray(graph.lengths))
+        path, length, expanded = kernel(arrays, state_arrays(state), heuristic, *indices)
+        self.nodes_expanded = int(expanded)
+        if len(path) == 0:
+            return None, float('inf')
+        return graph.node_path(path), float(length)
+
+
+class CompiledAStarOSMnx(KernelSearch, AStarOSMnx):
+    """A* running in astar_kernel(), see KernelSearch."""
+    def find_path(self, start_node, goal_node):
+        if not self.use_kernel:
+            return super().find_path(start_node, goal_node)
+        return self.run_kernel(astar_kernel, KernelState.astar_arrays, start_node, goal_node)
+
+
+class CompiledFringeSearchOSMnx(KernelSearch, FringeSearchOSMnx):
+    """Fringe Search running in fringe_kernel(), see KernelSearch."""
+    def find_path(self, start_node, goal_node):
+        if not self.use_kernel:
+            return super().find_path(start_node, goal_node)
+        return self.run_kernel(fringe_kernel, KernelState.fringe_arrays, start_node, goal_node)
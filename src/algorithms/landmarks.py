@@ -0,0 +1,314 @@
+import math
+import numpy as np
+from algorithms.dijkstra import DijkstraOSMnx
+from utils.heuristics import Heuristic
+
+
+class Landmarks:
+    """Shortest distances between a few landmark nodes and every node of a graph (ALT).
+
+    For a landmark L the triangle inequality gives two lower bounds of the distance from a
+    node v to a goal t on a directed graph: d(v, L) - d(t, L) and d(L, t) - d(L, v). The
+    distances are computed once with Dijkstra's algorithm, forward from each landmark and
+    backward over the reversed graph, and stored as float32 tables of shape
+    (node count, landmark count) so the values of one node are next to each other.
+
+    Landmarks are selected with one of the STRATEGIES:
+
+    - 'farthest': every new landmark is the node farthest from the landmarks chosen so far.
+    - 'avoid': every new landmark is the leaf of the shortest path tree of a random root
+      under which the current landmarks give the worst bounds (Goldberg and Harrelson).
+
+    Attributes:
+        node_ids (numpy.ndarray): Node IDs of the graph the tables were computed for.
+        landmarks (numpy.ndarray): Node indices of the landmarks.
+        from_landmarks (numpy.ndarray): Distances d(L, v) from each landmark to each node.
+        to_landmarks (numpy.ndarray): Distances d(v, L) from each node to each landmark.
+        fingerprint (str): CompactGraph.fingerprint of the graph, None if unknown.
+    """
+    STRATEGIES = ('farthest', 'avoid')
+
+    def __init__(self, node_ids, landmarks, from_landmarks, to_landmarks, fingerprint=None):
+        """Initializes the tables.
+
+        Args:
+            node_ids (numpy.ndarray): Node IDs of the graph the tables were computed for.
+            landmarks (numpy.ndarray): Node indices of the landmarks.
+            from_landmarks (numpy.ndarray): Distances from each landmark to each node.
+            to_landmarks (numpy.ndarray): Distances from each node to each landmark.
+            fingerprint (str): Fingerprint of the graph. Defaults to None.
+        """
+        self.node_ids = node_ids
+        self.landmarks = np.asarray(landmarks, dtype=np.int32)
+        self.from_landmarks = np.ascontiguousarray(from_landmarks, dtype=np.float32)
+        self.to_landmarks = np.ascontiguousarray(to_landmarks, dtype=np.float32)
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, graph, count=8, strategy='avoid', seed=0):
+        """Selects landmarks and computes their distance tables.
+
+        Args:
+            graph (networkx.Graph or CompactGraph): The street network graph.
+            count (int): Number of landmarks. More landmarks give tighter bounds but make every
+                estimate more expensive. Defaults to 8.
+            strategy (str): One of STRATEGIES. Defaults to 'avoid'.
+            seed (int): Seed of the random choices. Defaults to 0.
+
+        Returns:
+            Landmarks: The tables for the graph.
+
+        Raises:
+            ValueError: If the strategy is unknown.
+        """
+        if strategy not in cls.STRATEGIES:
+            raise ValueError(f"Unknown landmark strategy: {strategy}")
+
+        search = DijkstraOSMnx(graph)
+        node_count = search.compact_graph.node_count
+        tables = cls(search.compact_graph.node_ids, [],
+                     np.empty((node_count, 0)), np.empty((node_count, 0)),
+                     search.compact_graph.fingerprint)
+        rng = np.random.default_rng(seed)
+
+        while len(tables.landmarks) < min(count, node_count):
+            node = None
+            if strategy == 'avoid' and len(tables.landmarks) > 0:
+                node = tables.avoid_node(search, int(rng.integers(node_count)))
+            if node is None:
+                node = tables.farthest_node(search, int(rng.integers(node_count)))
+            tables.add_landmark(search, node)
+        return tables
+
+    @classmethod
+    def load(cls, path):
+        """Loads tables saved with save().
+
+        Args:
+            path (str): Path of the .npz file.
+
+        Returns:
+            Landmarks: The loaded tables.
+        """
+        with np.load(path) as data:
+            return cls(data['node_ids'], data['landmarks'],
+                       data['from_landmarks'], data['to_landmarks'],
+                       str(data['fingerprint']) if 'fingerprint' in data else None)
+
+    def save(self, path):
+        """Saves the tables into an uncompressed .npz file.
+
+        Args:
+            path (str): Path of the .npz file.
+        """
+        np.savez(path, node_ids=self.node_ids, landmarks=self.landmarks,
+                 from_landmarks=self.from_landmarks, to_landmarks=self.to_landmarks,
+                 fingerprint=np.array(self.fingerprint or ''))
+
+    def matches(self, graph):
+        """Returns True if the tables were computed for a graph with the same nodes and edges.
+
+        Args:
+            graph (CompactGraph): The graph to check.
+        """
+        return self.fingerprint == graph.fingerprint
+
+    @property
+    def slack(self):
+        """float: Upper bound of the float32 rounding error of a single bound."""
+        tables = np.concatenate((self.from_landmarks.ravel(), self.to_landmarks.ravel()))
+        finite = tables[np.isfinite(tables)]
+        largest = float(finite.max()) if len(finite) else 0.0
+        return 2 * largest * float(np.finfo(np.float32).eps)
+
+    def add_landmark(self, search, node):
+        """Computes the distance columns of a new landmark.
+
+        Args:
+            search (DijkstraOSMnx): Dijkstra's algorithm over the graph.
+            node (int): Node index of the new landmark.
+        """
+        self.landmarks = np.append(self.landmarks, np.int32(node))
+        self.from_landmarks = np.column_stack(
+            (self.from_landmarks, search.distances_from(node))).astype(np.float32)
+        self.to_landmarks = np.column_stack(
+            (self.to_landmarks, search.distances_from(node, reverse=True))).astype(np.float32)
+
+    def lower_bounds(self, source):
+        """Computes the landmark lower bounds of the distances from a node to every node.
+
+        Args:
+            source (int): The source node index.
+
+        Returns:
+            numpy.ndarray: The lower bounds indexed by node index.
+        """
+        bounds = np.zeros(len(self.node_ids))
+        if len(self.landmarks) == 0:
+            return bounds
+        with np.errstate(invalid='ignore'):
+            ahead = self.from_landmarks - self.from_landmarks[source]
+            behind = self.to_landmarks[source] - self.to_landmarks
+        bounds = np.fmax(bounds, np.nanmax(np.fmax(ahead, behind), axis=1, initial=0.0))
+        return np.nan_to_num(bounds, nan=0.0)
+
+    def farthest_node(self, search, root):
+        """Returns the reachable node farthest from the landmarks chosen so far.
+
+        Args:
+            search (DijkstraOSMnx): Dijkstra's algorithm over the graph.
+            root (int): Random node index used when no landmarks are chosen yet.
+
+        Returns:
+            int: The node index of the next landmark.
+        """
+        if len(self.landmarks) == 0:
+            distances = search.distances_from(root)
+        else:
+            distances = self.from_landmarks.min(axis=1).astype(np.float64)
+        distances[~np.isfinite(distances)] = -1.0
+        return int(np.argmax(distances))
+
+    def avoid_node(self, search, root):
+        """Returns a landmark in the region where the current landmarks give poor bounds.
+
+        Every node of the shortest path tree of the root is weighted by how much the landmark
+        bound underestimates its distance from the root. Subtrees containing a landmark get
+        no weight. The next landmark is the leaf found by descending from the root into the
+        heaviest subtree.
+
+        Args:
+            search (DijkstraOSMnx): Dijkstra's algorithm over the graph.
+            root (int): Root node index of the shortest path tree.
+
+        Returns:
+            int: The node index of the next landmark, or None if every subtree is covered.
+        """
+        state = search.search_state
+        settled = search.run(search.compact_graph, state, root)
+        sizes, covered, heaviest = self.subtree_sizes(state, settled, root)
+
+        if covered[root] or sizes[root] <= 0.0:
+            return None
+        node = root
+        while node in heaviest and sizes[heaviest[node]] > 0.0:
+            node = heaviest[node]
+        return node
+
+    def subtree_sizes(self, state, settled, root):
+        """Sums the bound errors over the subtrees of a shortest path tree.
+
+        Args:
+            state (SearchState): The finished search from the root.
+            settled (list): Node indices in the order the search closed them.
+            root (int): Root node index of the tree.
+
+        Returns:
+            tuple: The subtree sizes and landmark flags indexed by node index, and a dict
+            mapping each inner node to its heaviest child.
+        """
+        bounds = self.lower_bounds(root).tolist()
+        came_from = state.came_from
+        sizes = [0.0] * len(self.node_ids)
+        covered = [False] * len(self.node_ids)
+        for landmark in self.landmarks:
+            covered[landmark] = True
+        heaviest = {}
+
+        # Children are closed after their parents, so sum the subtree sizes in reverse order
+        for node in reversed(settled):
+            if covered[node]:
+                sizes[node] = 0.0
+            else:
+                sizes[node] += max(state.g_scores[node] - bounds[node], 0.0)
+            parent = came_from[node]
+            if parent != -1:
+                covered[parent] = covered[parent] or covered[node]
+                sizes[parent] += sizes[node]
+                if parent not in heaviest or sizes[node] > sizes[heaviest[parent]]:
+                    heaviest[parent] = node
+        return sizes, covered, heaviest
+
+
+class LandmarkHeuristic(Heuristic):
+    """ALT heuristic: the largest landmark lower bound of the remaining distance in meters.
+
+    The bounds come from precomputed Landmarks and, unlike the metric heuristics, follow the
+    road network, so they are much tighter and work with one-way streets. The tables are
+    stored as float32, so each estimate is lowered by the rounding error to stay admissible.
+    Nodes that cannot reach the goal get an infinite estimate.
+
+    Attributes:
+        landmarks (Landmarks): The precomputed distance tables.
+    """
+    def __init__(self, landmarks):
+        """Initializes the heuristic.
+
+        Args:
+            landmarks (Landmarks): Distance tables computed for the searched graph.
+        """
+        super().__init__()
+        self.landmarks = landmarks
+
+    def precompute(self, graph):
+        # The graph may be weighted by another profile, so only its nodes are compared
+        if not np.array_equal(self.landmarks.node_ids, graph.node_ids):
+            raise ValueError("The landmark tables were computed for a different graph")
+        tables = self.landmarks
+        return (memoryview(tables.from_landmarks), memoryview(tables.to_landmarks),
+                tables.slack)
+
+    def make_estimator(self, goal):
+        from_landmarks, to_landmarks, slack = self.values
+        return self.bounds(goal, from_landmarks, to_landmarks, slack)
+
+    def make_reverse_estimator(self, goal):
+        # Following the edges backwards swaps the roles of the two tables
+        from_landmarks, to_landmarks, slack = self.values
+        return self.bounds(goal, landmark_table=to_landmarks, node_table=from_landmarks,
+                           slack=slack)
+
+    def make_estimates(self, goal, reverse=False):
+        from_landmarks, to_landmarks, slack = self.values
+        landmark_table, node_table = np.asarray(from_landmarks), np.asarray(to_landmarks)
+        if reverse:
+            landmark_table, node_table = node_table, landmark_table
+
+        # The same bounds as bounds(), one landmark column at a time to limit memory use
+        best = np.zeros(len(node_table))
+        for k in range(node_table.shape[1]):
+            if node_table[goal, k] != math.inf:
+                np.maximum(best, node_table[:, k].astype(np.float64)
+                           - float(node_table[goal, k]), out=best)
+            if landmark_table[goal, k] != math.inf:
+                np.maximum(best, float(landmark_table[goal, k])
+                           - landmark_table[:, k].astype(np.float64), out=best)
+        return np.where(best > slack, best - slack, 0.0)
+
+    @staticmethod
+    def bounds(goal, landmark_table, node_table, slack):
+        """Builds the estimate function taking the maximum over all landmark bounds.
+
+        Args:
+            goal (int): The goal node index.
+            landmark_table (memoryview): Distances d(L, v) from the landmarks.
+            node_table (memoryview): Distances d(v, L) to the landmarks.
+            slack (float): Rounding error subtracted from every estimate.
+
+        Returns:
+            callable: Function mapping a node index to the estimated cost to the goal.
+        """
+        landmarks = range(landmark_table.shape[1])
+        # Landmarks the goal cannot reach, or cannot be reached from, give no bounds
+        ahead = [(k, node_table[goal, k]) for k in landmarks if node_table[goal, k] != math.inf]
+        behind = [(k, landmark_table[goal, k]) for k in landmarks
+                  if landmark_table[goal, k] != math.inf]
+
+        def estimate(node):
+            best = 0.0
+            for k, goal_distance in ahead:
+                best = max(best, node_table[node, k] - goal_distance)
+            for k, goal_distance in behind:
+                best = max(best, goal_distance - landmark_table[node, k])
+            return best - slack if best > slack else 0.0
+        return estimate
@@ -0,0 +1,253 @@
+import heapq
+import math
+import threading
+from collections import OrderedDict
+from algorithms.a_star import AStarOSMnx
+
+
+class SearchTree:
+    """The state of an A* search from one start node, kept between queries.
+
+    Attributes:
+        g_scores (dict): Cost from the start node of every reached node.
+        came_from (dict): Parent node index of every reached node, -1 for the start node.
+        closed (set): Node indices whose cost from the start node is final.
+        open_list (list): Priority queue of (f-score, node) for the goal of the last query.
+        goal (int): The goal node index the open list is ordered for.
+        start (int): The start node index.
+        lock (threading.Lock): Held while a query reads or extends the tree.
+    """
+    def __init__(self, start):
+        """Starts a tree that only contains the start node.
+
+        Args:
+            start (int): The start node index.
+        """
+        self.g_scores = {start: 0.0}
+        self.came_from = {start: -1}
+        self.closed = set()
+        self.open_list = [(0.0, start)]
+        self.goal = None
+        self.start = start
+        self.lock = threading.Lock()
+
+    def reorder(self, goal, heuristic):
+        """Orders the open nodes by their f-score for a new goal.
+
+        Args:
+            goal (int): The new goal node index.
+            heuristic (callable): Estimates the remaining cost from a node index to the goal.
+        """
+        open_nodes = {node for _, node in self.open_list if node not in self.closed}
+        self.open_list = [(self.g_scores[node] + heuristic(node), node) for node in open_nodes]
+        heapq.heapify(self.open_list)
+        self.goal = goal
+
+    def relax(self, graph, current, heuristic):
+        """Updates the neighbors reached with a shorter path through a closed node.
+
+        Args:
+            graph (CompactGraph): The searched graph.
+            current (int): The node index being expanded.
+            heuristic (callable): Estimates the remaining cost from a node index to the goal.
+        """
+        g_scores = self.g_scores
+        current_g_score = g_scores[current]
+        for neighbor, length in graph.neighbors(current):
+            tentative_g_score = current_g_score + length
+            if neighbor not in self.closed and tentative_g_score < g_scores.get(neighbor, math.inf):
+                g_scores[neighbor] = tentative_g_score
+                self.came_from[neighbor] = current
+                heapq.heappush(self.open_list, (tentative_g_score + heuristic(neighbor), neighbor))
+
+    def reconstruct_path(self, current):
+        """Follows the parent pointers back to the start node.
+
+        Args:
+            current (int): The node index the path ends at.
+
+        Returns:
+            list: Node indices from the start node to current.
+        """
+        path = [current]
+        while self.came_from[current] != -1:
+            current = self.came_from[current]
+            path.append(current)
+        path.reverse()
+        return path
+
+
+class ReusableAStarOSMnx(AStarOSMnx):
+    """A* that keeps the search tree of recent start nodes and continues it for new goals.
+
+    With a consistent heuristic, the cost of every closed node is final whatever the goal
+    is, so a query from a start node searched before only has to reorder the open nodes of
+    the kept tree for the new goal and expand until the goal is closed. A goal inside the
+    closed part of the tree is answered without any expansions, which makes moving the
+    goal marker around the same start almost free.
+
+    The trees are kept in dictionaries and sets of Python objects holding the reached nodes,
+    a few hundred bytes per node, and every weight profile and route worker has its own
+    engine. So the trees kept by an engine share a budget of max_reached_nodes reached
+    nodes, and at most max_trees trees are kept. The budget is checked while a tree grows:
+    the least recently used other trees are dropped to make room for it, and a tree that
+    alone outgrows the budget is dropped as well, after which its query finishes with it.
+
+    Attributes:
+        graph (networkx.Graph or CompactGraph): The street network graph from OSMnx.
+        heuristic (Heuristic): Estimates the remaining cost from a node to the goal.
+        nodes_expanded (int): Number of nodes expanded in the latest query.
+        max_trees (int): Maximum number of search trees kept.
+        max_reached_nodes (int): Maximum number of reached nodes of all kept search trees.
+    """
+    def __init__(self, graph, heuristic=None, max_trees=8, max_reached_nodes=50000):
+        """Initializes the engine.
+
+        Args:
+            graph (networkx.Graph or CompactGraph): A graph representing the street network.
+            heuristic (Heuristic): Heuristic used by the search, which must be consistent.
+            max_trees (int): Maximum number of search trees kept. Defaults to 8.
+            max_reached_nodes (int): Maximum number of reached nodes of all kept search
+                trees. Defaults to 50000.
+        """
+        super().__init__(graph, heuristic)
+        self.max_trees = max_trees
+        self.max_reached_nodes = max_reached_nodes
+        self._trees = OrderedDict()
+        self._trees_lock = threading.Lock()
+
+    def find_path(self, start_node, goal_node):
+        """Finds the shortest path, continuing the kept search tree of the start node.
+
+        Args:
+            start_node (int): The node ID where the path starts.
+            goal_node (int): The node ID where the path ends.
+
+        Returns:
+            tuple:
+                list: The shortest path as a list of node IDs, from start_node to goal_node.
+                float: The total distance of the path in meters.
+                If no path is found, returns (None, float('inf')).
+        """
+        indices = self.node_indices(start_node, goal_node)
+
+        if indices is None:
+            return None, float('inf')
+        start, goal = indices
+
+        tree = self.tree(start)
+        with tree.lock:
+            self.nodes_expanded = 0 if goal in tree.closed else self.extend(tree, goal)
+            if goal in tree.closed:
+                return self.reconstruct(tree, goal), tree.g_scores[goal]
+        return None, float('inf')
+
+    def tree(self, start):
+        """Returns the kept search tree of a start node, starting a new one if needed.
+
+        Args:
+            start (int): The start node index.
+
+        Returns:
+            SearchTree: The search tree of the start node.
+        """
+        with self._trees_lock:
+            tree = self._trees.get(start)
+            if tree is None:
+                tree = self._trees[start] = SearchTree(start)
+            self._trees.move_to_end(start)
+            while len(self._trees) > self.max_trees:
+                self._trees.popitem(last=False)
+            return tree
+
+    def forget(self, start=None):
+        """Drops the kept search tree of a start node, or every tree.
+
+        Args:
+            start (int): The start node index, None to drop every tree.
+        """
+        with self._trees_lock:
+            if start is None:
+                self._trees.clear()
+            else:
+                self._trees.pop(start, None)
+
+    def extend(self, tree, goal):
+        """Expands a search tree until the goal is closed or no open nodes are left.
+
+        Args:
+            tree (SearchTree): The search tree to extend.
+            goal (int): The goal node index.
+
+        Returns:
+            int: The number of nodes expanded.
+        """
+        heuristic = self.heuristic.estimator(self.compact_graph, goal)
+        if tree.goal != goal:
+            tree.reorder(goal, heuristic)
+        open_list = tree.open_list
+        closed = tree.closed
+        expanded = 0
+        limit = self.make_room(tree)
+
+        while open_list and open_list[0][0] != math.inf:
+            current = self.pop_open(tree)
+            if current in closed:
+                continue
+            closed.add(current)
+            expanded += 1
+
+            # Relax the goal too, so that the open list stays complete for later queries
+            self.relax_edges(tree, current, heuristic)
+            if len(tree.g_scores) > limit:
+                limit = self.make_room(tree)
+            if current == goal:
+                break
+        return expanded
+
+    def make_room(self, tree):
+        """Drops the least recently used other trees until a growing tree fits the budget.
+
+        A tree that does not fit even alone is dropped too.
+
+        Args:
+            tree (SearchTree): The search tree being extended.
+
+        Returns:
+            float: The number of reached nodes the tree may grow to before the budget is
+            checked again, infinite once the tree is dropped.
+        """
+        with self._trees_lock:
+            others = [start for start, kept in self._trees.items() if kept is not tree]
+            room = self.max_reached_nodes - sum(len(self._trees[start].g_scores)
+                                                for start in others)
+            for start in others:
+                if len(tree.g_scores) <= room:
+                    break
+                room += len(self._trees.pop(start).g_scores)
+            if len(tree.g_scores) <= room:
+                return room
+            if self._trees.get(tree.start) is tree:
+                del self._trees[tree.start]
+            return math.inf
+
+    def pop_open(self, tree):
+        """Pops the entry with the lowest f-score from the open list of a tree.
+
+        Args:
+            tree (SearchTree): The search tree.
+
+        Returns:
+            int: The node index of the entry, possibly of a node that is already closed.
+        """
+        return heapq.heappop(tree.open_list)[1]
+
+    def relax_edges(self, tree, current, heuristic):
+        """Relaxes the outgoing edges of a node just closed in a tree, see SearchTree.relax.
+
+        Args:
+            tree (SearchTree): The search tree.
+            current (int): The node index being expanded.
+            heuristic (callable): Estimates the remaining cost from a node index to the goal.
+        """
+        tree.relax(self.compact_graph, current, heuristic)
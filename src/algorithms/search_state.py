@@ -0,0 +1,79 @@
+class SearchState:
+    """Per-node search arrays that are reused across queries.
+
+    The arrays are allocated once for the whole graph and never cleared. Instead every query
+    starts a new generation, and an entry is only valid if its stamp equals the current
+    generation. Starting a query is therefore O(1) and a query only touches the nodes it
+    visits.
+
+    Attributes:
+        generation (int): Stamp of the current query.
+        g_scores (list): Cost from the start node, valid where visited equals generation.
+        came_from (list): Parent node index on the best known path, -1 for the start node.
+        visited (list): Generation in which g_scores and came_from were last written.
+        closed (list): Generation in which the node was last closed (expanded).
+        open_list (list): Priority queue of the current query.
+    """
+    def __init__(self, size):
+        """Allocates the arrays for a graph.
+
+        Args:
+            size (int): Number of nodes in the graph.
+        """
+        self.generation = 0
+        self.g_scores = [0.0] * size
+        self.came_from = [-1] * size
+        self.visited = [0] * size
+        self.closed = [0] * size
+        self.open_list = []
+
+    def reset(self, start):
+        """Starts a new query from the start node, invalidating all previous entries.
+
+        Args:
+            start (int): The start node index.
+        """
+        self.generation += 1
+        self.open_list = []
+        self.visit(start, 0.0, -1)
+
+    def visit(self, node, g_score, parent):
+        """Records a new best path to a node.
+
+        Args:
+            node (int): The node index.
+            g_score (float): Cost from the start node.
+            parent (int): Parent node index, -1 for the start node.
+        """
+        self.visited[node] = self.generation
+        self.g_scores[node] = g_score
+        self.came_from[node] = parent
+
+    def g_score(self, node):
+        """Returns the cost from the start node, or infinity if the node is not visited.
+
+        Args:
+            node (int): The node index.
+
+        Returns:
+            float: The best known cost from the start node.
+        """
+        if self.visited[node] == self.generation:
+            return self.g_scores[node]
+        return float('inf')
+
+    def reconstruct_path(self, current):
+        """Follows the parent pointers of the current query back to the start node.
+
+        Args:
+            current (int): The node index the path ends at.
+
+        Returns:
+            list: Node indices from the start node to current.
+        """
+        path = [current]
+        while self.came_from[current] != -1:
+            current = self.came_from[current]
+            path.append(current)
+        path.reverse()
+        return path
@@ -1,67 +1,378 @@
+import hmac
+import json
 import time
-from flask import Flask, request, jsonify
+from functools import partial, wraps
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from flask import Flask, Response, request, jsonify, g
 from flask import send_from_directory
-from utils.osm_utils import download_osm_graph, get_nearest_node
-from algorithms.fringe_search import FringeSearchOSMnx
-from algorithms.a_star import AStarOSMnx
+from utils.graph_reloader import GraphReloader, ReloadInProgressError
+from utils.route_cache import RouteCache, SqliteRouteStore
+from utils.worker_pool import PoolSaturatedError
+from utils.metrics import MetricsRegistry, PhaseTimer
+from utils.weight_profiles import select_profile
+from routing_graph import RoutingGraph, graph_store, tiled
+from config import GRAPH_SOURCE, BATCH_MAX_PAIRS, MATRIX_MAX_POINTS
+from config import ROUTE_CACHE_SIZE, ROUTE_CACHE_TTL, ROUTE_CACHE_FILE
+from config import ROUTE_WORKERS, INSTRUMENTATION, ADMIN_TOKEN
 
 app = Flask(__name__)
 
-# Define the places for which the OSMnx graphs are downloaded
 
-places = ['Helsinki, Finland', 'Espoo, Finland', 'Vantaa, Finland', 'Kauniainen, Finland']
+def swap_graph(cache, old, new):
+    """
+    Start caching the routes of a new graph version once it is swapped in.
 
-# Load the graph
+    Args:
+        cache (RouteCache): The route cache of the app.
+        old (RoutingGraph): The replaced graph.
+        new (RoutingGraph): The graph served from now on.
+    """
+    cache.invalidate(new.version)
+    app.logger.info("Swapped graph version %s for %s", old.version, new.version)
 
-graph = download_osm_graph(places)
 
+def retire_graph(old):
+    """
+    Free a replaced graph once the last request using it has finished.
 
-@app.route('/calculate-fringe-route', methods=['POST'])
-def calculate_fringe_route():
+    Args:
+        old (RoutingGraph): The replaced graph.
     """
-    Calculate the route using the Fringe Search algorithm.
+    if old.route_pool is not None:
+        old.route_pool.close()
+    graph_store.remove_replaced(GRAPH_SOURCE)
 
-    This endpoint receives start and goal coordinates and calculates the 
-    shortest route between them using the Fringe Search algorithm.
+
+# Serve the graph cached at startup. POST /admin/reload builds a new version from a fresh
+# download in the background and swaps it in without stopping the requests (see
+# GraphReloader); requests that started on the old version finish on it.
+#
+# Route worker processes are not forked from this process (see WorkerPool), so when the app
+# runs as a script they import it again, as '__mp_main__'. They build their own routing
+# graph (see routing_graph.start_route_worker), so nothing is loaded in them here and their
+# reloader and route cache stay None.
+
+reloader = None
+route_cache = None
+
+if __name__ != '__mp_main__':
+    initial_graph = RoutingGraph()
+
+    # Cache route results keyed on the snapped nodes. The graph version is part of every
+    # key, so routes of a replaced graph are never served, also from the store shared
+    # between workers.
+    route_cache = RouteCache(
+        ROUTE_CACHE_SIZE, ROUTE_CACHE_TTL,
+        store=SqliteRouteStore(ROUTE_CACHE_FILE) if ROUTE_CACHE_FILE else None,
+        version=initial_graph.version)
+
+    reloader = GraphReloader(lambda report: RoutingGraph(report, refresh=True), initial_graph,
+                             on_swap=partial(swap_graph, route_cache), retire=retire_graph)
+
+# Search counters and phase timings of all requests, exported at /metrics
+
+metrics = MetricsRegistry()
+
+
+@app.before_request
+def acquire_graph():
+    """
+    Take the graph version the request is served from, kept in g.routing until the request
+    is done.
+    """
+    g.routing = reloader.acquire()
+
+
+@app.teardown_request
+def release_graph(_error):
+    """
+    Give back the graph version of the request, so a replaced version can be drained.
+    """
+    routing = g.pop('routing', None)
+    if routing is not None:
+        reloader.release(routing)
+
+
+def compute_route(algorithm, profile, start_node, goal_node):
+    """
+    Look up a route in the route cache, or compute and cache it on the graph version of the
+    request.
+
+    Args:
+        algorithm (str): Key of the search engine.
+        profile (str): Name of the weight profile.
+        start_node (int): The node ID where the route starts.
+        goal_node (int): The node ID where the route ends.
 
     Returns:
-        JSON response with the route coordinates, total route length (in meters), 
-        and the time taken to compute the route.
-        Returns a 404 error if no route is available.
+        tuple: The path, its cost, whether it came from the cache and the stats of the
+        search (see RoutingGraph.find_route), None for a cached route.
 
     Raises:
-        404: If no route is found between the start and goal nodes.
+        PoolSaturatedError: If the worker pool is saturated.
+        TimeoutError: If the route computation timed out.
+        RuntimeError: If the search failed in a route worker or the worker died.
+    """
+    routing = g.routing
+    key = (algorithm, start_node, goal_node, profile)
+    cached = route_cache.get(key, version=routing.version)
+    if cached is not None:
+        return cached[0], cached[1], True, None
+
+    path, cost, stats = routing.submit((algorithm, profile, start_node, goal_node))
+    route_cache.put(key, [path, cost], version=routing.version)
+    return path, cost, False, stats
+
+
+def compare_routes(algorithms, profile, start_node, goal_node):
+    """
+    Compute the same route with several search engines, bypassing the route cache.
+
+    With route workers the engines run in the worker processes, as many at the same time as
+    there are workers. Without them the engines run one after another in the request thread,
+    since threads would only compete for the GIL and distort each other's timings.
+
+    Args:
+        algorithms (list): Keys of the search engines.
+        profile (str): Name of the weight profile.
+        start_node (int): The node ID where the route starts.
+        goal_node (int): The node ID where the route ends.
+
+    Returns:
+        tuple: The path, cost and stats (see RoutingGraph.find_route) of each engine, and the
+        number of engines that ran at the same time, 1 if they ran one after another.
+
+    Raises:
+        PoolSaturatedError: If the worker pool is saturated.
+        TimeoutError: If a route computation timed out.
+        RuntimeError: If a search failed in a route worker or the worker died.
+    """
+    routing = g.routing
+    tasks = [(algorithm, profile, start_node, goal_node) for algorithm in algorithms]
+    if routing.route_pool is None:
+        return [routing.find_route(task) for task in tasks], 1
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        results = list(executor.map(routing.route_pool.submit, tasks))
+    return results, min(len(tasks), routing.route_pool.processes)
+
+
+def snap_points(points, snap='node'):
+    """
+    Find the graph nodes closest to many points in one vectorised query.
+
+    Args:
+        points (list): The points as {'lat': latitude, 'lng': longitude} dicts.
+        snap (str): 'node' to snap every point to the nearest node, or 'edge' to snap it to
+            the nearest edge and use the end of the edge closer to the point.
+
+    Returns:
+        list: The node ID of the node chosen for each point.
+
+    Raises:
+        ValueError: If the snap mode is unknown.
+    """
+    lat = np.array([point['lat'] for point in points], dtype=np.float64)
+    lon = np.array([point['lng'] for point in points], dtype=np.float64)
+    compact_graph = g.routing.compact_graph
+    spatial_index = compact_graph.spatial_index
+
+    if snap == 'node':
+        indices = spatial_index.nearest_nodes(lat, lon)
+    elif snap == 'edge':
+        sources, targets, fractions = spatial_index.nearest_edges(lat, lon, compact_graph)
+        indices = np.where(fractions <= 0.5, sources, targets)
+    else:
+        raise ValueError(f"Unknown snap mode: {snap}")
+    return compact_graph.node_ids[indices].tolist()
+
+
+def route_coordinates(path, compact_graph=None):
+    """
+    Convert a route into map coordinates.
+
+    Args:
+        path (list): Node IDs along the route.
+        compact_graph (CompactGraph): The graph of the route. Defaults to the graph of the
+            request.
+
+    Returns:
+        list: The (latitude, longitude) of every node of the route.
+    """
+    compact_graph = compact_graph or g.routing.compact_graph
+    return compact_graph.coordinates(compact_graph.indices_of(path))
+
+
+def request_profile(data, algorithms):
+    """
+    Choose the weight profile of a route request.
+
+    Args:
+        data (dict): The JSON body, with the optional 'profile' (default 'distance') and
+            the 'hour' of departure, which selects a time-of-day profile for 'time'.
+        algorithms (list): Keys of the search engines of the request.
+
+    Returns:
+        str: The name of the profile.
+
+    Raises:
+        ValueError: If the profile or the hour is invalid, or an algorithm does not
+            support the profile.
+    """
+    engines = g.routing.engines
+    profile = select_profile(engines, data.get('profile', 'distance'), data.get('hour'))
+    for algorithm in algorithms:
+        if algorithm not in engines[profile]:
+            raise ValueError(f"Algorithm {algorithm} does not support the {profile} profile")
+    return profile
+
+
+def route_length(profile, path, cost):
+    """
+    Return the length of a route in meters.
+
+    Args:
+        profile (str): Name of the weight profile the route was found with.
+        path (list): Node IDs along the route.
+        cost (float): The cost of the route in the profile.
+
+    Returns:
+        float: The length, which is the cost of the route with the distance profile.
+    """
+    if profile == 'distance':
+        return cost
+    compact_graph = g.routing.compact_graph
+    return compact_graph.path_length(compact_graph.indices_of(path))
+
+
+def pool_error(error):
+    """
+    Build the response of a computation the route workers did not complete.
+
+    Args:
+        error (Exception): The PoolSaturatedError, TimeoutError or RuntimeError of the
+            worker pool.
+
+    Returns:
+        A 429 response with Retry-After if the workers are saturated, a 504 response if the
+        computation timed out, otherwise a 500 response for a computation that failed in a
+        worker, which is logged.
+    """
+    if isinstance(error, PoolSaturatedError):
+        return jsonify({"error": str(error)}), 429, {"Retry-After": "1"}
+    if isinstance(error, TimeoutError):
+        return jsonify({"error": str(error)}), 504
+    app.logger.error("Route computation failed: %s", error)
+    return jsonify({"error": "The route computation failed"}), 500
+
+
+def instrumented_response(algorithm, result, stats, timer):
+    """
+    Add the stats of a route to its response and record them in the metrics.
+
+    The serialisation of the response can only be measured once the response is built, so
+    its phase is recorded in the metrics but not in the response.
+
+    Args:
+        algorithm (str): Key of the search engine.
+        result (dict): The JSON response body.
+        stats (dict): The stats of the search (see find_route), None for a cached route.
+        timer (PhaseTimer): The phases of the request measured so far.
+
+    Returns:
+        JSON response with the result and its 'stats'.
+    """
+    stats = stats or {'counters': {}, 'phases': {}}
+    phases = {**timer.phases, **stats['phases']}
+    result["stats"] = {"counters": stats['counters'], "phases": phases}
+    with timer.phase('serialise'):
+        response = jsonify(result)
+    metrics.observe(algorithm, stats['counters'], {**phases, **timer.phases})
+    return response
+
+
+def calculate_route(algorithm):
+    """
+    Calculate the route between the posted start and goal coordinates.
+
+    The JSON body may contain a 'snap' option, 'node' (default) or 'edge', selecting how
+    the coordinates are matched to the graph (see snap_points), and the weight 'profile'
+    and departure 'hour' options (see request_profile). Results are cached per algorithm,
+    snapped start and goal node and profile in route_cache.
+
+    Args:
+        algorithm (str): Key of the search engine.
+
+    Returns:
+        JSON response with the route coordinates, total route length (in meters), its
+        cost in the profile (meters or seconds), the profile, the time taken to compute
+        the route and whether it came from the cache. With INSTRUMENTATION it also
+        contains the 'stats' of the search and the nanoseconds of the request phases.
+        Returns a 400 error if the snap mode or the profile is invalid, a 404 error if no
+        route is available, a 429 error if the route workers are saturated, a 504 error
+        if the computation timed out and a 500 error if it failed in a route worker.
     """
     data = request.json
-    start_coords = data['start']
-    goal_coords = data['goal']
+    timer = PhaseTimer(INSTRUMENTATION)
 
     # Find the nearest nodes to the start and goal points
-    start_node = get_nearest_node(graph, start_coords['lat'], start_coords['lng'])
-    goal_node = get_nearest_node(graph, goal_coords['lat'], goal_coords['lng'])
+    try:
+        profile = request_profile(data, [algorithm])
+        with timer.phase('snap'):
+            start_node, goal_node = snap_points([data['start'], data['goal']],
+                                                data.get('snap', 'node'))
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
 
     # Start timing the route calculation
     start_time = time.time()
 
-    # Calculate the route using Fringe Search algorithm
-    fs = FringeSearchOSMnx(graph)
-    path, length = fs.find_path(start_node, goal_node)
+    # Calculate the route using the selected algorithm, unless it is cached
+    try:
+        path, cost, cached, stats = compute_route(algorithm, profile, start_node, goal_node)
+    except (PoolSaturatedError, TimeoutError, RuntimeError) as error:
+        return pool_error(error)
 
     # Stop timing
-    end_time = time.time()
-    elapsed_time = end_time - start_time
+    elapsed_time = time.time() - start_time
 
     if path is None:
         return jsonify({"error": "No route found"}), 404
 
     # Convert node path to map coordinates (latitude, longitude)
-    route_coords = [(graph.nodes[node]['y'], graph.nodes[node]['x']) for node in path]
+    with timer.phase('coordinates'):
+        route_coords = route_coordinates(path)
 
-    return jsonify({
+    result = {
         "routeCoordinates": route_coords,
-        "length": length,
-        "timeTaken": elapsed_time
-    })
+        "length": route_length(profile, path, cost),
+        "cost": cost,
+        "profile": profile,
+        "timeTaken": elapsed_time,
+        "cached": cached
+    }
+    if INSTRUMENTATION:
+        return instrumented_response(algorithm, result, stats, timer)
+    return jsonify(result)
+
+
+@app.route('/calculate-fringe-route', methods=['POST'])
+def calculate_fringe_route():
+    """
+    Calculate the route using the Fringe Search algorithm.
+
+    This endpoint receives start and goal coordinates and calculates the 
+    shortest route between them using the Fringe Search algorithm.
+
+    Returns:
+        JSON response with the route coordinates, total route length (in meters), 
+        and the time taken to compute the route.
+        Returns a 404 error if no route is available.
+
+    Raises:
+        404: If no route is found between the start and goal nodes.
+    """
+    return calculate_route('fringe')
 
 
 @app.route('/calculate-astar-route', methods=['POST'])
@@ -80,38 +391,389 @@ def calculate_astar_route():
     Raises:
         404: If no route is found between the start and goal nodes.
     """
-    data = request.json
-    start_coords = data['start']
-    goal_coords = data['goal']
+    return calculate_route('astar')
 
-    # Find the nearest nodes to the start and goal points
-    start_node = get_nearest_node(graph, start_coords['lat'], start_coords['lng'])
-    goal_node = get_nearest_node(graph, goal_coords['lat'], goal_coords['lng'])
 
-    # Start timing the route calculation
+@app.route('/calculate-bidirectional-astar-route', methods=['POST'])
+def calculate_bidirectional_astar_route():
+    """
+    Calculate the route using the bidirectional A* algorithm.
+
+    This endpoint receives start and goal coordinates and calculates the 
+    shortest route between them by searching from both ends.
+
+    Returns:
+        JSON response with the route coordinates, total route length (in meters), 
+        and the time taken to compute the route.
+        Returns a 404 error if no route is available.
+
+    Raises:
+        404: If no route is found between the start and goal nodes.
+    """
+    return calculate_route('bidirectional-astar')
+
+
+@app.route('/calculate-ch-route', methods=['POST'])
+def calculate_ch_route():
+    """
+    Calculate the route using Contraction Hierarchies.
+
+    This endpoint receives start and goal coordinates and calculates the 
+    shortest route between them with upward searches in the preprocessed hierarchy.
+
+    Returns:
+        JSON response with the route coordinates, total route length (in meters), 
+        and the time taken to compute the route.
+        Returns a 404 error if no route is available.
+
+    Raises:
+        400: If the contraction hierarchy is not preprocessed.
+        404: If no route is found between the start and goal nodes.
+    """
+    if 'ch' not in g.routing.engines['distance']:
+        return jsonify({"error": "The contraction hierarchy is not preprocessed"}), 400
+    return calculate_route('ch')
+
+
+@app.route('/calculate-route', methods=['POST'])
+def calculate_selected_route():
+    """
+    Calculate the route using the algorithm selected in the request.
+
+    The JSON body contains the start and goal coordinates and an optional 'algorithm'
+    ('astar', 'fringe', 'bidirectional-astar' or, if they are preprocessed, 'ch' and
+    'arc-flags'), which defaults to 'astar', an
+    optional 'snap' mode ('node' or 'edge'), which defaults to 'node', and an optional
+    weight 'profile' (one of WEIGHT_PROFILES), which defaults to 'distance'. With the
+    'time' profile an optional departure 'hour' selects the time-of-day profile covering
+    it.
+
+    Returns:
+        JSON response with the route coordinates, total route length (in meters), 
+        and the time taken to compute the route.
+
+    Raises:
+        400: If the algorithm, the snap mode or the profile is invalid.
+        404: If no route is found between the start and goal nodes.
+    """
+    algorithm = request.json.get('algorithm', 'astar')
+    if algorithm not in g.routing.engines['distance']:
+        return jsonify({"error": f"Unknown algorithm: {algorithm}"}), 400
+    return calculate_route(algorithm)
+
+
+@app.route('/compare-routes', methods=['POST'])
+def calculate_compared_routes():
+    """
+    Calculate the route between the same start and goal with several algorithms.
+
+    The JSON body contains the start and goal coordinates, an optional list of
+    'algorithms', which defaults to ['fringe', 'astar'], and the optional 'snap', 'profile'
+    and 'hour' options of /calculate-route. The points are snapped once and the engines run
+    in parallel in the route worker processes, or one after another without route workers
+    (see compare_routes).
+
+    Returns:
+        JSON response with 'routes', mapping every algorithm to its route coordinates,
+        length, cost, the time its search took in seconds and the number of nodes it
+        expanded, or to an error if it found no route, the profile, the total time taken,
+        and 'execution', 'concurrent' or 'sequential', with the 'concurrency', the number of
+        engines that ran at the same time. With INSTRUMENTATION every route also contains
+        the 'stats' of its search.
+
+    Raises:
+        400: If an algorithm, the snap mode or the profile is invalid.
+        429: If the route workers are saturated.
+        504: If a route computation timed out.
+        500: If a route computation failed in a route worker.
+    """
+    data = request.json
+    algorithms = data.get('algorithms', ['fringe', 'astar'])
+    if not isinstance(algorithms, list) or not algorithms:
+        return jsonify({"error": "Expected a non-empty list of algorithms"}), 400
+    unknown = [algorithm for algorithm in algorithms
+               if algorithm not in g.routing.engines['distance']]
+    if unknown:
+        return jsonify({"error": f"Unknown algorithm: {unknown[0]}"}), 400
+    algorithms = list(dict.fromkeys(algorithms))
+
+    try:
+        profile = request_profile(data, algorithms)
+        start_node, goal_node = snap_points([data['start'], data['goal']],
+                                            data.get('snap', 'node'))
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
     start_time = time.time()
+    try:
+        results, concurrency = compare_routes(algorithms, profile, start_node, goal_node)
+    except (PoolSaturatedError, TimeoutError, RuntimeError) as error:
+        return pool_error(error)
+    elapsed_time = time.time() - start_time
+
+    routes = {algorithm: compared_route(algorithm, profile, result)
+              for algorithm, result in zip(algorithms, results)}
+    return jsonify({
+        "routes": routes,
+        "profile": profile,
+        "timeTaken": elapsed_time,
+        "execution": "concurrent" if concurrency > 1 else "sequential",
+        "concurrency": concurrency
+    })
 
-    # Calculate the route using A* algorithm
-    astar = AStarOSMnx(graph)
-    path, length = astar.find_path(start_node, goal_node)
 
-    # Stop timing
-    end_time = time.time()
-    elapsed_time = end_time - start_time
+def compared_route(algorithm, profile, result):
+    """
+    Build the response of one engine in /compare-routes.
+
+    Args:
+        algorithm (str): Key of the search engine.
+        profile (str): Name of the weight profile.
+        result (tuple): The path, cost and stats of the route (see find_route).
 
+    Returns:
+        dict: The route coordinates, length, cost, search time in seconds and nodes
+        expanded, and with INSTRUMENTATION the stats, or an error if there is no route.
+    """
+    path, cost, stats = result
+    if INSTRUMENTATION:
+        metrics.observe(algorithm, stats['counters'], stats['phases'])
     if path is None:
-        return jsonify({"error": "No route found"}), 404
+        return {"error": "No route found"}
+    route = {
+        "routeCoordinates": route_coordinates(path),
+        "length": route_length(profile, path, cost),
+        "cost": cost,
+        "timeTaken": sum(stats['phases'].values()) / 1e9,
+        "nodesExpanded": stats['counters']['nodes_expanded']
+    }
+    if INSTRUMENTATION:
+        route["stats"] = stats
+    return route
+
+
+@app.route('/routes/batch', methods=['POST'])
+def calculate_batch_routes():
+    """
+    Calculate the routes of many start and goal pairs in one request.
 
-    # Convert node path to map coordinates (latitude, longitude)
-    route_coords = [(graph.nodes[node]['y'], graph.nodes[node]['x']) for node in path]
+    The JSON body contains 'pairs', a list of {'start': ..., 'goal': ...} objects with the
+    same coordinates as the single route endpoints, and the optional 'algorithm' and 'snap'
+    options of /calculate-route. All points are snapped in one query and pairs with the same
+    start share one search (see BatchRouter).
+
+    The response is streamed as newline-delimited JSON, one line per pair as soon as its
+    route is found. Every line contains the 'index' of the pair in the request and either
+    'routeCoordinates' and 'length', or an 'error'. Lines are not in request order.
+
+    Returns:
+        Streamed application/x-ndjson response with the route of every pair.
+
+    Raises:
+        400: If the pairs are missing or too many, or the algorithm or snap mode is unknown.
+    """
+    data = request.json
+    algorithm = data.get('algorithm', 'astar')
+    pairs = data.get('pairs')
+    routers = g.routing.routers
+    if algorithm not in routers:
+        return jsonify({"error": f"Unknown algorithm: {algorithm}"}), 400
+    if not isinstance(pairs, list) or not pairs:
+        return jsonify({"error": "Expected a non-empty list of pairs"}), 400
+    if len(pairs) > BATCH_MAX_PAIRS:
+        return jsonify({"error": f"At most {BATCH_MAX_PAIRS} pairs per request"}), 400
+
+    try:
+        nodes = snap_points([pair['start'] for pair in pairs] + [pair['goal'] for pair in pairs],
+                            data.get('snap', 'node'))
+    except (KeyError, TypeError) as error:
+        return jsonify({"error": f"Invalid pair: {error}"}), 400
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    # The response is streamed after the request has ended, so the stream holds the graph
+    # version of the request until the response is closed
+    routing = g.pop('routing')
+
+    def stream():
+        for index, path, length in routers[algorithm].routes(zip(nodes[:len(pairs)],
+                                                                 nodes[len(pairs):])):
+            if path is None:
+                result = {"index": index, "error": "No route found"}
+            else:
+                result = {
+                    "index": index,
+                    "routeCoordinates": route_coordinates(path, routing.compact_graph),
+                    "length": length
+                }
+            yield json.dumps(result) + '\n'
+
+    response = Response(stream(), mimetype='application/x-ndjson')
+    response.call_on_close(lambda: reloader.release(routing))
+    return response
+
+
+@app.route('/distance-matrix', methods=['POST'])
+def calculate_distance_matrix():
+    """
+    Calculate the shortest route lengths between every origin and destination.
+
+    The JSON body contains 'sources' and 'targets', lists of {'lat': ..., 'lng': ...}
+    points, and the optional 'snap' mode of /calculate-route.
+
+    Returns:
+        JSON response with 'distances', the route lengths in meters with one row per source
+        and null where there is no route, and the time taken to compute them.
+
+    Raises:
+        400: If the points are missing, invalid or too many, or the snap mode is unknown.
+        429: If the route workers are saturated.
+        504: If the rows were not computed in time.
+        500: If the rows failed in a route worker.
+    """
+    data = request.json
+    sources = data.get('sources')
+    targets = data.get('targets')
+    if not isinstance(sources, list) or not isinstance(targets, list) or not sources or not targets:
+        return jsonify({"error": "Expected non-empty lists of sources and targets"}), 400
+    if max(len(sources), len(targets)) > MATRIX_MAX_POINTS:
+        return jsonify({"error": f"At most {MATRIX_MAX_POINTS} sources and targets"}), 400
+
+    try:
+        nodes = snap_points(sources + targets, data.get('snap', 'node'))
+    except (KeyError, TypeError) as error:
+        return jsonify({"error": f"Invalid point: {error}"}), 400
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    start_time = time.time()
+    try:
+        matrix = g.routing.distance_matrix.compute(nodes[:len(sources)], nodes[len(sources):])
+    except (PoolSaturatedError, TimeoutError, RuntimeError) as error:
+        return pool_error(error)
+    elapsed_time = time.time() - start_time
 
     return jsonify({
-        "routeCoordinates": route_coords,
-        "length": length,
+        "distances": [[distance if np.isfinite(distance) else None for distance in row]
+                      for row in matrix.tolist()],
         "timeTaken": elapsed_time
     })
 
 
+@app.route('/cache-stats')
+def cache_stats():
+    """
+    Report the hit, miss and eviction counters of the route cache.
+
+    Returns:
+        JSON response with the counters, the number of cached routes and the graph version,
+        and on a tiled graph the 'tiles' loaded and evicted and the tiles and bytes in memory.
+    """
+    stats = {**route_cache.stats(), "version": route_cache.version}
+    if tiled:
+        stats["tiles"] = g.routing.compact_graph.cache.stats()
+    return jsonify(stats)
+
+
+@app.route('/worker-stats')
+def worker_stats():
+    """
+    Report the numbers of route worker processes, running requests and waiting requests.
+
+    Returns:
+        JSON response with the counters, all zero if the routes are computed in the
+        request threads.
+    """
+    route_pool = g.routing.route_pool
+    return jsonify(route_pool.stats() if route_pool else
+                   {"processes": 0, "running": 0, "waiting": 0})
+
+
+def admin_only(view):
+    """
+    Restrict an endpoint to the administrators of the app.
+
+    The request must send ADMIN_TOKEN in an 'Authorization: Bearer <token>' header. Without
+    ADMIN_TOKEN the admin endpoints are disabled: the address of a request cannot tell the
+    administrator apart from other clients, since behind a proxy every request comes from
+    the local machine.
+
+    Args:
+        view (callable): The view function.
+
+    Returns:
+        callable: The view function answering 404 while ADMIN_TOKEN is unset and 403 to
+        requests without the token.
+    """
+    @wraps(view)
+    def guarded(*args, **kwargs):
+        if ADMIN_TOKEN is None:
+            return jsonify({"error": "Admin endpoints are disabled"}), 404
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        if scheme != 'Bearer' or not hmac.compare_digest(token.encode('utf-8'),
+                                                         ADMIN_TOKEN.encode('utf-8')):
+            return jsonify({"error": "Admin access required"}), 403
+        return view(*args, **kwargs)
+    return guarded
+
+
+@app.route('/admin/reload', methods=['POST'])
+@admin_only
+def reload_graph():
+    """
+    Start building a new version of the graph in the background and swap it in when ready.
+
+    The graph is downloaded again, or streamed again from GRAPH_FILE, and weighted, and its
+    search engines and route workers are created, while the requests are still served from
+    the current version. Requests that started before the swap finish on the old version,
+    which is then freed, and the route cache starts over with the new version. The
+    landmarks, the contraction hierarchy and the arc flags are only used if they were
+    preprocessed for the new graph.
+
+    Returns:
+        JSON response with the progress of the reload (see /admin/reload-status), 202.
+
+    Raises:
+        403: If the request is not from an administrator (see admin_only).
+        409: If a reload is already in progress.
+    """
+    try:
+        reloader.reload()
+    except ReloadInProgressError as error:
+        return jsonify({"error": str(error), **reloader.status()}), 409
+    return jsonify(reloader.status()), 202
+
+
+@app.route('/admin/reload-status')
+@admin_only
+def reload_status():
+    """
+    Report the progress of the latest graph reload.
+
+    Returns:
+        JSON response with the 'state' of the reload ('idle', 'building', 'draining' or
+        'failed'), its running 'phase', the 'phases' so far with their durations in seconds,
+        the 'error' of a failed reload, the 'version' of the graph being served with its
+        requests 'in_flight', and the replaced versions still 'draining'.
+
+    Raises:
+        403: If the request is not from an administrator (see admin_only).
+    """
+    return jsonify(reloader.status())
+
+
+@app.route('/metrics')
+def export_metrics():
+    """
+    Export the search counters and phase timings in the Prometheus text format.
+
+    Returns:
+        Plain text response with the metrics of MetricsRegistry, empty unless
+        INSTRUMENTATION is enabled.
+    """
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/')
 def serve_index():
     """
@@ -143,4 +805,5 @@ def serve_js():
     return send_from_directory('../frontend/static/js', 'main.js')
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    # The debug reloader runs the app in a second process that would start its own workers
+    app.run(debug=True, use_reloader=ROUTE_WORKERS == 0)
@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+from algorithms.a_star import AStarOSMnx
+from algorithms.arc_flags import ArcFlags, ArcFlagsAStarOSMnx, kd_partition
+from algorithms.bidirectional_a_star import BidirectionalAStarOSMnx
+from algorithms.contraction_hierarchy import ContractionHierarchy, ContractionHierarchyOSMnx
+from algorithms.dijkstra import DijkstraOSMnx
+from algorithms.fringe_search import FringeSearchOSMnx
+from algorithms.kernels import CompiledAStarOSMnx, CompiledFringeSearchOSMnx
+from algorithms.landmarks import Landmarks, LandmarkHeuristic
+from utils.benchmark import Benchmark, dijkstra_rank_queries, find_regressions
+from utils.graph_store import GraphStore
+from utils.synthetic_graphs import grid_graph, road_like_graph
+from config import PLACES, GRAPH_CACHE_DIR
+
+# Search engines by name, created from the graph and the heuristic (None for the default)
+ENGINES = {
+    'dijkstra': lambda graph, heuristic: DijkstraOSMnx(graph),
+    'astar': AStarOSMnx,
+    'fringe': FringeSearchOSMnx,
+    'astar-compiled': CompiledAStarOSMnx,
+    'fringe-compiled': CompiledFringeSearchOSMnx,
+    'bidirectional-astar': BidirectionalAStarOSMnx,
+    'ch': lambda graph, heuristic: ContractionHierarchyOSMnx(
+        graph, ContractionHierarchy.build(graph)),
+    'arc-flags': lambda graph, heuristic: ArcFlagsAStarOSMnx(
+        graph, ArcFlags.build(graph, kd_partition(graph)), heuristic=heuristic)
+}
+
+
+def refuse_download(places, network_type='drive'):
+    """
+    Fail instead of downloading a graph, so cached benchmarks never need the network.
+
+    Raises:
+        RuntimeError: Always.
+    """
+    raise RuntimeError(f"{places} ({network_type}) is not in {GRAPH_CACHE_DIR}, run the app "
+                       "once with network access to cache it")
+
+
+def load_graph(args):
+    """
+    Generate a synthetic graph, or map a cached real graph or one streamed from a file.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+
+    Returns:
+        CompactGraph: The graph to benchmark.
+
+    Raises:
+        RuntimeError: If the graph is not cached and would have to be downloaded, or if no
+            file is given with --graph file.
+    """
+    if args.graph == 'grid':
+        return grid_graph(args.size, seed=args.seed)
+    if args.graph == 'road':
+        return road_like_graph(args.size, seed=args.seed)
+    if args.graph == 'file':
+        if not args.file:
+            raise RuntimeError("--graph file needs --file")
+        return GraphStore(GRAPH_CACHE_DIR, download=refuse_download).load(args.file)
+    return GraphStore(GRAPH_CACHE_DIR, download=refuse_download).load(args.places)
+
+
+def run_benchmarks(args, graph):
+    """
+    Benchmark the selected algorithms on a query set of the graph.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        graph (CompactGraph): The graph to benchmark.
+
+    Returns:
+        dict: The report with the settings in 'meta' and the results of every algorithm.
+    """
+    queries = dijkstra_rank_queries(graph, args.queries, seed=args.seed)
+    heuristic = None
+    if args.landmarks:
+        heuristic = LandmarkHeuristic(Landmarks.build(graph, count=args.landmarks))
+    benchmark = Benchmark(queries, warmup=args.warmup, repeat=args.repeat)
+
+    results = {}
+    for name in args.algorithms:
+        start_time = time.perf_counter()
+        engine = ENGINES[name](graph, heuristic)
+        setup_time = time.perf_counter() - start_time
+        results[name] = {**benchmark.run(engine), 'setup_seconds': setup_time}
+        latency = results[name]['latency_ms']
+        print(f"{name}: p50 {latency['p50']:.3f} ms, p95 {latency['p95']:.3f} ms, "
+              f"p99 {latency['p99']:.3f} ms, {results[name]['mismatches']} wrong results")
+
+    return {
+        'meta': {
+            'graph': {'cached': args.places, 'file': args.file}.get(args.graph, args.graph),
+            'size': args.size,
+            'nodes': graph.node_count,
+            'edges': graph.edge_count,
+            'queries': len(queries),
+            'seed': args.seed,
+            'warmup': args.warmup,
+            'repeat': args.repeat,
+            'landmarks': args.landmarks,
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'results': results
+    }
+
+
+def argument_parser():
+    """
+    Create the parser of the command line.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the search algorithms.")
+    parser.add_argument('--graph', choices=('grid', 'road', 'cached', 'file'), default='grid',
+                        help="Synthetic grid or road-like graph, a cached real graph, or a "
+                             "graph streamed from --file.")
+    parser.add_argument('--size', type=int, default=100,
+                        help="Grid side length, or number of road-like graph nodes.")
+    parser.add_argument('--places', nargs='+', default=PLACES, help="Places of a cached graph.")
+    parser.add_argument('--file', help="OSM or GraphML file of --graph file.")
+    parser.add_argument('--algorithms', nargs='+', choices=ENGINES,
+                        default=['dijkstra', 'astar', 'fringe', 'bidirectional-astar'],
+                        help="Algorithms to benchmark.")
+    parser.add_argument('--queries', type=int, default=100, help="Number of queries.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the graph and queries.")
+    parser.add_argument('--warmup', type=int, default=10, help="Queries run before timing.")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs of every query.")
+    parser.add_argument('--landmarks', type=int, default=0,
+                        help="Number of ALT landmarks, 0 for the default heuristic.")
+    parser.add_argument('--output', default='test-results/benchmark.json',
+                        help="Output JSON report.")
+    parser.add_argument('--baseline', help="Baseline JSON report to compare with.")
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help="Allowed relative growth before a regression is reported.")
+    return parser
+
+
+def main():
+    """Parse the command line, run the benchmark and compare it with a baseline."""
+    parser = argument_parser()
+    args = parser.parse_args()
+
+    try:
+        graph = load_graph(args)
+    except RuntimeError as error:
+        parser.error(str(error))
+
+    report = run_benchmarks(args, graph)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = find_regressions(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
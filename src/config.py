@@ -0,0 +1,88 @@
+# Places for which the OSMnx graphs are downloaded
+
+PLACES = ['Helsinki, Finland', 'Espoo, Finland', 'Vantaa, Finland', 'Kauniainen, Finland']
+
+# Local OSM (.osm, .osm.gz, .osm.bz2 or .osm.pbf) or GraphML file that is streamed into the
+# routing graph instead of downloading PLACES, None to download. Large regions such as an
+# extract of all of Finland load with bounded memory, see osm_stream.load_graph_file
+
+GRAPH_FILE = None
+
+# Source of the routing graph, the graph file if there is one and otherwise PLACES
+
+GRAPH_SOURCE = GRAPH_FILE or PLACES
+
+# Geohash precision of the tiles the app loads the routing graph in, None to map the whole
+# graph. With tiles (precision 5 gives tiles of about 5 x 5 km) the app starts in the same
+# time whatever area the graph covers, and keeps only the tiles searched recently in memory,
+# at most TILE_MEMORY_BUDGET bytes of them. Features preprocessed for the whole graph are
+# then not available: only the 'distance' profile, no landmarks, CH or arc flags, and no
+# snapping to edges. The tiles are created with `invoke preprocess-tiles` or on startup.
+
+GRAPH_TILE_PRECISION = None
+TILE_MEMORY_BUDGET = 256 * 2 ** 20
+
+# Token required in an 'Authorization: Bearer <token>' header by the /admin endpoints, such as
+# POST /admin/reload, which downloads and rebuilds the whole graph. None disables the admin
+# endpoints.
+
+ADMIN_TOKEN = None
+
+# Directory of the processed graphs cached by GraphStore
+
+GRAPH_CACHE_DIR = 'data/graphs'
+
+# Landmark distance tables of the ALT heuristic, created with `invoke preprocess-landmarks`
+
+LANDMARKS_FILE = 'data/landmarks.npz'
+
+# Contraction hierarchy of the graph, created with `invoke preprocess-ch`
+
+HIERARCHY_FILE = 'data/contraction_hierarchy.npz'
+
+# Arc flags of the graph, created with `invoke preprocess-arc-flags` and stored under this
+# name in the graph's cache entry, so they are dropped with the graph they belong to
+
+ARC_FLAGS_FILE = 'arc_flags.bin'
+
+# Largest number of start and goal pairs accepted by one /routes/batch request
+
+BATCH_MAX_PAIRS = 1000
+
+# Largest number of origins, and of destinations, accepted by one /distance-matrix request
+
+MATRIX_MAX_POINTS = 500
+
+# Route results cached in memory, and the seconds a cached route stays valid
+
+ROUTE_CACHE_SIZE = 10000
+ROUTE_CACHE_TTL = 3600.0
+
+# SQLite file sharing cached routes between worker processes, None to cache per process only
+
+ROUTE_CACHE_FILE = None
+
+# Worker processes computing the routes of the /calculate-* and /compare-routes endpoints,
+# and the rows of large distance matrices, 0 to compute them in the request thread. Workers
+# are opt-in: every worker builds a routing graph of its own, and the debug server only
+# restarts on code changes without workers. With two or more, /compare-routes runs its
+# default Fringe and A* searches at the same time. Requests beyond the workers wait in a
+# queue of ROUTE_QUEUE_LIMIT, and further requests get 429. A route taking longer than
+# ROUTE_TIMEOUT seconds is cancelled.
+
+ROUTE_WORKERS = 0
+ROUTE_QUEUE_LIMIT = 32
+ROUTE_TIMEOUT = 30.0
+
+# Record search counters (expansions, heap and fringe operations, peak queue sizes) and phase
+# timings, return them in the route responses and export them at /metrics. When disabled
+# the plain search engines run, so the searches have no instrumentation overhead.
+
+INSTRUMENTATION = False
+
+# Edge weight profiles precomputed when the app starts, selectable with the 'profile' option
+# of the route requests: 'distance' (meters), 'time' (free-flow travel time in seconds) and
+# the rush hour travel times 'time-morning-peak' and 'time-evening-peak' (see
+# utils/weight_profiles.py). Every profile keeps its own weight arrays and search engines.
+
+WEIGHT_PROFILES = ['distance', 'time', 'time-morning-peak', 'time-evening-peak']
@@ -0,0 +1,144 @@
+import argparse
+import os
+import time
+from utils.osm_utils import download_osm_graph
+from utils.graph_store import GraphStore
+from utils.tiled_graph import DEFAULT_PRECISION
+from algorithms.landmarks import Landmarks
+from algorithms.contraction_hierarchy import ContractionHierarchy
+from algorithms.arc_flags import ArcFlags, kd_partition, place_partition
+from config import PLACES, GRAPH_SOURCE, LANDMARKS_FILE, HIERARCHY_FILE, GRAPH_CACHE_DIR
+from config import ARC_FLAGS_FILE, GRAPH_TILE_PRECISION
+
+
+def load_graph():
+    """
+    Load the routing graph of the app from the graph cache, filling the cache on a miss.
+
+    Returns:
+        CompactGraph: The array-backed graph.
+    """
+    print("Loading the graph...")
+    return GraphStore(GRAPH_CACHE_DIR).load(GRAPH_SOURCE)
+
+
+def save(result, path):
+    """
+    Save a preprocessing result, creating the output directory if needed.
+
+    Args:
+        result (Landmarks, ContractionHierarchy or ArcFlags): The result to save.
+        path (str): The output file.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    result.save(path)
+    print(f"Saved to {path}")
+
+
+def preprocess_landmarks(args):
+    """
+    Select the landmarks of the ALT heuristic and save their distance tables.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    compact_graph = load_graph()
+
+    start_time = time.time()
+    landmarks = Landmarks.build(compact_graph, count=args.count, strategy=args.strategy)
+    print(f"Computed {len(landmarks.landmarks)} landmarks for {compact_graph.node_count} nodes "
+          f"in {time.time() - start_time:.1f} seconds")
+    save(landmarks, args.output)
+
+
+def preprocess_hierarchy(args):
+    """
+    Contract the graph into a contraction hierarchy and save it.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    compact_graph = load_graph()
+
+    start_time = time.time()
+    hierarchy = ContractionHierarchy.build(compact_graph, witness_limit=args.witness_limit)
+    print(f"Contracted {compact_graph.node_count} nodes with {len(hierarchy.shortcuts)} "
+          f"shortcuts in {time.time() - start_time:.1f} seconds")
+    save(hierarchy, args.output)
+
+
+def preprocess_arc_flags(args):
+    """
+    Partition the cached routing graph into cells and save its arc flags in the cache entry.
+
+    The flags belong to the edges of the cached graph, so they are computed from it instead
+    of a new download.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    graph_store = GraphStore(GRAPH_CACHE_DIR)
+    compact_graph = graph_store.load(GRAPH_SOURCE)
+
+    start_time = time.time()
+    if args.partition == 'places':
+        print("Downloading the graph of every place...")
+        place_node_ids = [download_osm_graph(place).nodes for place in PLACES]
+        cells = place_partition(compact_graph, place_node_ids, cells_per_place=args.cells)
+    else:
+        cells = kd_partition(compact_graph, cell_count=args.cells)
+    arc_flags = ArcFlags.build(compact_graph, cells)
+    print(f"Computed the arc flags of {compact_graph.edge_count} edges for "
+          f"{arc_flags.cell_count} cells in {time.time() - start_time:.1f} seconds")
+    save(arc_flags, os.path.join(graph_store.path(GRAPH_SOURCE), ARC_FLAGS_FILE))
+
+
+def preprocess_tiles(args):
+    """
+    Split the cached graph into the geohash tiles the app loads with GRAPH_TILE_PRECISION.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+    """
+    precision = args.precision or DEFAULT_PRECISION
+    start_time = time.time()
+    graph = GraphStore(GRAPH_CACHE_DIR).load_tiles(GRAPH_SOURCE, precision=precision)
+    print(f"Split {graph.node_count} nodes into {len(graph.tile_keys)} tiles of precision "
+          f"{precision} in {time.time() - start_time:.1f} seconds")
+    print(f"Saved to {graph.directory}")
+
+
+def main():
+    """Parse the command line and run the selected preprocessing step."""
+    parser = argparse.ArgumentParser(description="Preprocess the routing graph.")
+    steps = parser.add_subparsers(dest='step', required=True)
+
+    landmarks = steps.add_parser('landmarks', help="Compute the ALT landmark tables.")
+    landmarks.add_argument('--count', type=int, default=8, help="Number of landmarks.")
+    landmarks.add_argument('--strategy', choices=Landmarks.STRATEGIES, default='avoid',
+                           help="Landmark selection strategy.")
+    landmarks.add_argument('--output', default=LANDMARKS_FILE, help="Output .npz file.")
+    landmarks.set_defaults(run=preprocess_landmarks)
+
+    hierarchy = steps.add_parser('ch', help="Build the contraction hierarchy.")
+    hierarchy.add_argument('--witness-limit', type=int, default=50,
+                           help="Maximum number of nodes settled by a witness search.")
+    hierarchy.add_argument('--output', default=HIERARCHY_FILE, help="Output .npz file.")
+    hierarchy.set_defaults(run=preprocess_hierarchy)
+
+    arc_flags = steps.add_parser('arc-flags', help="Compute the arc flags of the cached graph.")
+    arc_flags.add_argument('--partition', choices=('kd', 'places'), default='kd',
+                           help="Geometric cells, or cells per place in PLACES.")
+    arc_flags.add_argument('--cells', type=int, default=32,
+                           help="Number of cells, or of cells per place with 'places'.")
+    arc_flags.set_defaults(run=preprocess_arc_flags)
+
+    steps.add_parser('tiles', help="Split the cached graph into geohash tiles.").set_defaults(
+        run=preprocess_tiles, precision=GRAPH_TILE_PRECISION)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+import logging
+import os
+import time
+from utils.graph_store import GraphStore
+from utils.heuristics import MemoizedHeuristic
+from utils.worker_pool import WorkerPool
+from utils.weight_profiles import PROFILES
+from algorithms.reusable_a_star import ReusableAStarOSMnx
+from algorithms.bidirectional_a_star import BidirectionalAStarOSMnx
+from algorithms.landmarks import Landmarks, LandmarkHeuristic
+from algorithms.contraction_hierarchy import ContractionHierarchy, ContractionHierarchyOSMnx
+from algorithms.arc_flags import ArcFlags, ArcFlagsAStarOSMnx
+from algorithms.fringe_search import FringeSearchOSMnx
+from algorithms.kernels import COMPILED, CompiledFringeSearchOSMnx
+from algorithms.batch_router import BatchRouter
+from algorithms.distance_matrix import DistanceMatrix, ROWS_TASK
+from algorithms.instrumented import (InstrumentedSearch, InstrumentedFringeSearchOSMnx,
+                                     InstrumentedReusableAStarOSMnx)
+from config import GRAPH_SOURCE, GRAPH_CACHE_DIR, LANDMARKS_FILE, HIERARCHY_FILE, ARC_FLAGS_FILE
+from config import ROUTE_WORKERS, ROUTE_QUEUE_LIMIT, ROUTE_TIMEOUT
+from config import INSTRUMENTATION, WEIGHT_PROFILES, GRAPH_TILE_PRECISION, TILE_MEMORY_BUDGET
+
+# The routing graph is read from the local cache, where it is downloaded, or streamed from
+# GRAPH_FILE, only if it is not cached yet. With GRAPH_TILE_PRECISION the graph is opened as
+# tiles that are loaded when a search reaches them, and the features that need the whole
+# graph are left out.
+
+graph_store = GraphStore(GRAPH_CACHE_DIR)
+tiled = GRAPH_TILE_PRECISION is not None
+
+logger = logging.getLogger(__name__)
+
+# Fringe Search revisits nodes in every iteration, so it memoizes the heuristic per node, and
+# runs in its compiled kernel when numba is installed. A* keeps the search trees of recent
+# start nodes, so moving only the goal marker continues the previous search instead of
+# starting over. With INSTRUMENTATION both record the counters and phase timings of every
+# query, otherwise the plain engines run. The instrumented Fringe Search is the Python
+# engine, so INSTRUMENTATION also replaces the compiled kernel with it.
+
+if INSTRUMENTATION:
+    FringeEngine = InstrumentedFringeSearchOSMnx
+else:
+    FringeEngine = CompiledFringeSearchOSMnx if COMPILED else FringeSearchOSMnx
+AStarEngine = InstrumentedReusableAStarOSMnx if INSTRUMENTATION else ReusableAStarOSMnx
+
+
+class RoutingGraph:
+    """
+    One version of the routing graph and everything the requests use that is built from it.
+
+    The app serves every request from a single RoutingGraph taken from the reloader, so a
+    reload can build the next version in the background and swap it in as a whole.
+
+    Attributes:
+        version (str): Version of the graph in the graph store (see GraphStore.version).
+        compact_graph (CompactGraph or TiledGraph): The memory-mapped routing graph.
+        edge_attributes (dict): Speed and road class of every edge, None on a tiled graph.
+        weighted_graphs (dict): The graph weighted by every weight profile.
+        landmarks (Landmarks): The landmark tables of the ALT heuristic, if preprocessed.
+        hierarchy (ContractionHierarchy): The contraction hierarchy, if preprocessed.
+        arc_flags (ArcFlags): The arc flags of the graph, if preprocessed.
+        engines (dict): The search engines of every profile, keyed by algorithm.
+        routers (dict): Batch routers of the distance profile, keyed by algorithm.
+        distance_matrix (DistanceMatrix): Computes the distance matrices.
+        route_pool (WorkerPool): Route worker processes, None without ROUTE_WORKERS.
+    """
+    def __init__(self, report=lambda phase: None, refresh=False, generation=None,
+                 workers=True):
+        """
+        Load the routing graph and build everything used with it.
+
+        Args:
+            report (callable): Called with the name of every loading phase as it starts.
+            refresh (bool): If True, download the graph again (or stream its graph file
+                again) instead of using the cached graph. Defaults to False.
+            generation (int): The generation of the cache entry to load. Defaults to the
+                current one.
+            workers (bool): Whether to start the route workers of ROUTE_WORKERS. Defaults
+                to True.
+        """
+        report('loading graph')
+        if generation is None:
+            generation = self.fetch(refresh)
+        self.version = graph_store.version(GRAPH_SOURCE, generation=generation)
+        self.compact_graph = graph_store.load_tiles(
+            GRAPH_SOURCE, precision=GRAPH_TILE_PRECISION, memory_budget=TILE_MEMORY_BUDGET,
+            generation=generation
+        ) if tiled else graph_store.load(GRAPH_SOURCE, generation=generation)
+        self.edge_attributes = None if tiled else graph_store.load_edge_attributes(
+            GRAPH_SOURCE, generation=generation)
+
+        # Weight the graph once by every profile, so a request only chooses which graph to
+        # search and no edge attribute is parsed during a search. The distance profile is
+        # the routing graph itself and is always available.
+        report('weighting graph')
+        self.weighted_graphs = {
+            name: PROFILES[name].apply(self.compact_graph, self.edge_attributes)
+            for name in dict.fromkeys(['distance', *([] if tiled else WEIGHT_PROFILES)])}
+
+        # The arc flags are stored in the graph's cache entry, so they are dropped with the
+        # graph they belong to
+        report('loading preprocessed data')
+        arc_flags_path = os.path.join(graph_store.path(GRAPH_SOURCE, generation=generation),
+                                      ARC_FLAGS_FILE)
+        self.landmarks, self.hierarchy, self.arc_flags = (
+            self.load_preprocessed(path, loader) for path, loader in (
+                (LANDMARKS_FILE, Landmarks.load), (HIERARCHY_FILE, ContractionHierarchy.load),
+                (arc_flags_path, ArcFlags.load)))
+
+        # Create the search engines once per profile, so their search arrays are reused
+        # between requests. Batch routing shares one search between pairs with the same
+        # start, except with CH, whose single queries are already cheaper than a one-to-many
+        # search. Distance matrices use the bucket algorithm if the hierarchy is
+        # preprocessed, otherwise one Dijkstra search per origin, and split the rows of large
+        # matrices across the route workers.
+        report('creating engines')
+        self.engines = {name: self.create_engines(PROFILES[name]) for name in self.weighted_graphs}
+        self.routers = {name: BatchRouter(engine, shared_search=name != 'ch')
+                        for name, engine in self.engines['distance'].items()}
+
+        self.route_pool = self.start_route_workers(generation, report) if workers else None
+        self.distance_matrix = DistanceMatrix(self.compact_graph, self.hierarchy,
+                                              pool=self.route_pool)
+
+    @staticmethod
+    def fetch(refresh):
+        """
+        Make sure the graph is cached.
+
+        Args:
+            refresh (bool): If True, download the graph again (or stream its graph file
+                again) into a new cache entry.
+
+        Returns:
+            int: The generation of the current cache entry.
+        """
+        if refresh:
+            graph_store.refresh(GRAPH_SOURCE)
+        else:
+            graph_store.fetch(GRAPH_SOURCE)
+        return graph_store.generations(GRAPH_SOURCE)[-1]
+
+    @staticmethod
+    def start_route_workers(generation, report):
+        """
+        Start the route workers, if ROUTE_WORKERS is set.
+
+        The workers compute the routes, and the rows of large distance matrices, in
+        processes of their own, so a long query neither blocks other requests nor competes
+        with them for the GIL. They are not forked from this process, so every worker maps
+        the same cache entry and builds its own engines (see start_route_worker).
+
+        Args:
+            generation (int): The generation of the cache entry.
+            report (callable): Called with the name of the loading phase as it starts.
+
+        Returns:
+            WorkerPool: The route workers, None without ROUTE_WORKERS.
+        """
+        if ROUTE_WORKERS == 0:
+            return None
+        report('starting route workers')
+        return WorkerPool(run_worker_task, ROUTE_WORKERS, ROUTE_QUEUE_LIMIT, ROUTE_TIMEOUT,
+                          initializer=start_route_worker, initargs=(generation,))
+
+    def load_preprocessed(self, path, loader):
+        """
+        Load preprocessed data, such as the landmarks, if it is preprocessed for this graph.
+
+        Preprocessed data is not used on a tiled graph.
+
+        Args:
+            path (str): Path of the preprocessed file.
+            loader (callable): Loads the file, for example Landmarks.load.
+
+        Returns:
+            object: The loaded data, None if it is missing or belongs to a different graph.
+        """
+        if tiled or not os.path.exists(path):
+            return None
+        result = loader(path)
+        if not result.matches(self.compact_graph):
+            logger.warning("Ignoring %s: it was computed for a different graph", path)
+            return None
+        return result
+
+    def create_engines(self, profile):
+        """
+        Create the search engines of one weight profile.
+
+        The heuristic of the profile scales the distance heuristic to its cost, so it stays
+        admissible. The contraction hierarchy and the arc flags are preprocessed for
+        distances, so CH and arc flags are only available with the distance profile, and only
+        if they are preprocessed. Contracting the graph on demand would take minutes in the
+        first CH request. Neither is available on a tiled graph.
+
+        Args:
+            profile (WeightProfile): The weight profile.
+
+        Returns:
+            dict: The search engines keyed by algorithm.
+        """
+        graph = self.weighted_graphs[profile.name]
+        distance_heuristic = LandmarkHeuristic(self.landmarks) if self.landmarks else None
+        heuristic = profile.heuristic(self.edge_attributes, distance_heuristic)
+        profile_engines = {
+            'fringe': FringeEngine(graph, heuristic=MemoizedHeuristic(heuristic)),
+            'astar': AStarEngine(graph, heuristic=heuristic),
+            'bidirectional-astar': BidirectionalAStarOSMnx(graph, heuristic=heuristic)
+        }
+        if profile.name == 'distance' and self.hierarchy is not None:
+            profile_engines['ch'] = ContractionHierarchyOSMnx(graph, self.hierarchy)
+        if profile.name == 'distance' and self.arc_flags is not None:
+            profile_engines['arc-flags'] = ArcFlagsAStarOSMnx(graph, self.arc_flags,
+                                                              heuristic=heuristic)
+        return profile_engines
+
+    def find_route(self, task):
+        """
+        Compute a route with one of the search engines.
+
+        Args:
+            task (tuple): The engine key, the weight profile and the start and goal node IDs.
+
+        Returns:
+            tuple: The path as a list of node IDs and its cost, (None, inf) if there is none,
+            and the stats of the search: a dict of 'counters', at least 'nodes_expanded', and
+            'phases', the nanoseconds of the 'search' and, with instrumented engines, of the
+            path reconstruction ('reconstruct').
+        """
+        algorithm, profile, start_node, goal_node = task
+        engine = self.engines[profile][algorithm]
+        start_time = time.perf_counter_ns()
+        path, cost = engine.find_path(start_node, goal_node)
+        elapsed = time.perf_counter_ns() - start_time
+        if isinstance(engine, InstrumentedSearch):
+            return path, cost, engine.stats.as_dict()
+        return path, cost, {'counters': {'nodes_expanded': engine.nodes_expanded},
+                              'phases': {'search': elapsed}}
+
+    def submit(self, task):
+        """
+        Compute a route in a route worker process, or in the calling thread without workers.
+
+        Args:
+            task (tuple): The task of find_route.
+
+        Returns:
+            tuple: The result of find_route.
+
+        Raises:
+            PoolSaturatedError: If the worker pool is saturated.
+            TimeoutError: If the route computation timed out.
+        """
+        return self.route_pool.submit(task) if self.route_pool else self.find_route(task)
+
+
+# The routing graph of a route worker process, built by start_route_worker
+
+worker_graphs = {}
+
+
+def start_route_worker(generation):
+    """
+    Build the routing graph of a route worker process, from the cache entry of the serving
+    process and without route workers of its own.
+
+    Args:
+        generation (int): The generation of the cache entry.
+    """
+    worker_graphs['routing'] = RoutingGraph(generation=generation, workers=False)
+
+
+def run_worker_task(task):
+    """
+    Compute a route, or rows of a distance matrix, in a route worker process.
+
+    Args:
+        task (tuple): The task of RoutingGraph.find_route, or a task starting with
+            ROWS_TASK submitted by DistanceMatrix.map_rows.
+
+    Returns:
+        object: The result of RoutingGraph.find_route or DistanceMatrix.rows.
+    """
+    routing = worker_graphs['routing']
+    if task[0] == ROWS_TASK:
+        return routing.distance_matrix.rows(*task[1:])
+    return routing.find_route(task)
@@ -2,29 +2,25 @@ import unittest
 import random
 import time
 import os
-import osmnx as ox
 import networkx as nx
 import matplotlib.pyplot as plt
 from algorithms.a_star import AStarOSMnx
 from algorithms.fringe_search import FringeSearchOSMnx
+from utils.graph_store import GraphStore
+from config import GRAPH_CACHE_DIR
+from utils.heuristics import EuclideanHeuristic
 
 class TestAlgorithmPerformance(unittest.TestCase):
     """Performance test comparing Fringe Search and A* using the Uusimaa graph."""
 
     def setUp(self):
-        """Checks for a local OSMnx graph Uusimaa map file, or downloads it if not available."""
-        map_file = "performance_test_map.graphml"
-        
-        if os.path.exists(map_file):
-            print("Loading the Uusimaa graph from a local file...")
-            self.graph = ox.load_graphml(map_file)
-        else:
-            print("Downloading the Uusimaa graph...")
-            self.graph = ox.graph_from_place('Uusimaa, Finland', network_type='drive')
-            ox.save_graphml(self.graph, map_file)  # Save the graph for future use
-
-        self.a_star = AStarOSMnx(self.graph)
-        self.fringe_search = FringeSearchOSMnx(self.graph)
+        """Loads the Uusimaa graph from the local graph cache, or downloads it if not cached."""
+        print("Loading the Uusimaa graph...")
+        store = GraphStore(GRAPH_CACHE_DIR)
+        self.graph = store.load_networkx('Uusimaa, Finland')
+        self.compact_graph = store.load('Uusimaa, Finland')
+        self.a_star = AStarOSMnx(self.compact_graph)
+        self.fringe_search = FringeSearchOSMnx(self.compact_graph)
 
     def test_algorithm_performance(self):
         """Runs 100 random tests comparing A* and Fringe Search and verifies correctness with Dijkstra."""
@@ -47,6 +43,35 @@ class TestAlgorithmPerformance(unittest.TestCase):
         # Plotting results after all tests
         self.plot_results(distances, a_star_times, fringe_times)
 
+    def test_heuristic_node_expansions(self):
+        """Compares nodes expanded with the metric heuristic and the old degree-based one."""
+        engines = {
+            'A*': (self.a_star, AStarOSMnx(self.compact_graph, heuristic=EuclideanHeuristic())),
+            'Fringe Search': (
+                self.fringe_search,
+                FringeSearchOSMnx(self.compact_graph, heuristic=EuclideanHeuristic())
+            )
+        }
+        totals = {name: [0, 0] for name in engines}
+
+        for i in range(20):
+            start_node, goal_node = self.get_random_nodes()
+            print(f"\nTest {i+1}: Nodes expanded between nodes {start_node} and {goal_node}")
+
+            for name, (metric, degrees) in engines.items():
+                _, metric_length = metric.find_path(start_node, goal_node)
+                _, degrees_length = degrees.find_path(start_node, goal_node)
+                self.assertAlmostEqual(metric_length, degrees_length, delta=1)
+                totals[name][0] += metric.nodes_expanded
+                totals[name][1] += degrees.nodes_expanded
+                print(f"{name}: {metric.nodes_expanded} nodes with meters, "
+                      f"{degrees.nodes_expanded} nodes with degrees")
+
+        for name, (metric_total, degrees_total) in totals.items():
+            print(f"\n{name} total: {metric_total} nodes expanded with the metric heuristic, "
+                  f"{degrees_total} with the degree-based heuristic")
+            self.assertLessEqual(metric_total, degrees_total)
+
     def get_random_nodes(self):
         """Returns two random, different nodes from the graph."""
         start_node = random.choice(list(self.graph.nodes))
@@ -0,0 +1,123 @@
+import unittest
+import random
+import time
+import os
+import matplotlib.pyplot as plt
+from algorithms.fringe_search import FringeSearchOSMnx
+from utils.graph_store import GraphStore
+from config import GRAPH_CACHE_DIR
+from utils.heuristics import HaversineHeuristic, EquirectangularHeuristic
+
+class CountingHeuristic(EquirectangularHeuristic):
+    """Equirectangular heuristic counting its evaluations.
+
+    Fringe Search evaluates the heuristic exactly once every time it visits a node in the
+    fringe, so the count equals the number of fringe visits over all iterations.
+    """
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def make_estimator(self, goal):
+        estimate = super().make_estimator(goal)
+
+        def counting_estimate(node):
+            self.calls += 1
+            return estimate(node)
+        return counting_estimate
+
+class TestFringeScalingPerformance(unittest.TestCase):
+    """Performance test showing how Fringe Search scales with route length across Uusimaa."""
+
+    def setUp(self):
+        """Loads the Uusimaa graph from the local graph cache, or downloads it if not cached."""
+        print("Loading the Uusimaa graph...")
+        store = GraphStore(GRAPH_CACHE_DIR)
+        self.graph = store.load_networkx('Uusimaa, Finland')
+        self.compact_graph = store.load('Uusimaa, Finland')
+        self.heuristic = CountingHeuristic()
+        self.fringe_search = FringeSearchOSMnx(self.compact_graph, heuristic=self.heuristic)
+
+    def test_fringe_scaling_on_long_routes(self):
+        """Runs routes of growing length and checks that the time per fringe visit stays flat.
+
+        With O(1) fringe membership, insertion and removal the cost of visiting a node
+        must not grow with the size of the fringe, so long routes across Uusimaa should
+        cost roughly the same per visited node as short ones.
+        """
+        results = []
+        for i, (start_node, goal_node) in enumerate(self.get_pairs_by_distance(40)):
+            self.heuristic.calls = 0
+            start_time = time.perf_counter()
+            path, length = self.fringe_search.find_path(start_node, goal_node)
+            execution_time = time.perf_counter() - start_time
+
+            if path is None:
+                continue
+
+            visits = max(self.heuristic.calls, 1)
+            results.append((length / 1000, execution_time, visits))
+            print(f"Test {i+1}: {length / 1000:.1f} km, "
+                  f"{self.fringe_search.nodes_expanded} expansions, {visits} fringe visits, "
+                  f"{execution_time:.4f} seconds, "
+                  f"{execution_time / visits * 1e6:.2f} microseconds per visit")
+
+        results.sort()
+        quarter = max(len(results) // 4, 1)
+        short_cost = self.cost_per_visit(results[:quarter])
+        long_cost = self.cost_per_visit(results[-quarter:])
+        print(f"\nShortest quarter: {short_cost * 1e6:.2f} us per visit, "
+              f"longest quarter: {long_cost * 1e6:.2f} us per visit")
+
+        # Linear scaling: the longest routes may not be much more expensive per visit
+        self.assertLess(long_cost, short_cost * 3)
+
+        self.plot_results(results)
+
+    def get_pairs_by_distance(self, count):
+        """Returns random node pairs whose straight-line distances cover the whole region."""
+        random.seed(42)
+        nodes = list(self.graph.nodes)
+        heuristic = HaversineHeuristic()
+        candidates = []
+        for _ in range(count * 10):
+            start_node, goal_node = random.sample(nodes, 2)
+            estimate = heuristic.estimator(
+                self.compact_graph, self.compact_graph.index_of(goal_node))
+            candidates.append((estimate(self.compact_graph.index_of(start_node)),
+                               start_node, goal_node))
+
+        # Take evenly spaced pairs from the distance-sorted candidates
+        candidates.sort()
+        step = len(candidates) // count
+        return [(start_node, goal_node) for _, start_node, goal_node in candidates[::step]]
+
+    @staticmethod
+    def cost_per_visit(results):
+        """Returns the total execution time divided by the total number of fringe visits."""
+        return sum(result[1] for result in results) / sum(result[2] for result in results)
+
+    def plot_results(self, results):
+        """Plots Fringe Search execution time and time per fringe visit against route length."""
+        distances = [result[0] for result in results]
+        times = [result[1] for result in results]
+        per_visit = [result[1] / result[2] * 1e6 for result in results]
+
+        _, (time_axis, visit_axis) = plt.subplots(2, 1, figsize=(10, 9), sharex=True)
+        time_axis.plot(distances, times, color='blue', marker='o', markersize=5)
+        time_axis.set_ylabel('Execution Time (seconds)')
+        time_axis.set_title('Fringe Search scaling on Uusimaa routes')
+        time_axis.grid(True)
+
+        visit_axis.plot(distances, per_visit, color='green', marker='o', markersize=5)
+        visit_axis.set_xlabel('Route Length (km)')
+        visit_axis.set_ylabel('Time per Fringe Visit (microseconds)')
+        visit_axis.grid(True)
+
+        # Ensure the directory exists before saving the plot
+        os.makedirs('test-results', exist_ok=True)
+        plt.savefig('test-results/fringe_scaling_plot.png')
+
+
+if __name__ == '__main__':
+    unittest.main()
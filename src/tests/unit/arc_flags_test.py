@@ -0,0 +1,102 @@
+import unittest
+import os
+import random
+import tempfile
+import numpy as np
+from utils.compact_graph import CompactGraph
+from algorithms.arc_flags import ArcFlags, ArcFlagsAStarOSMnx, kd_partition, place_partition
+from algorithms.a_star import AStarOSMnx
+from algorithms.dijkstra import DijkstraOSMnx
+from tests.unit.landmarks_test import directed_grid
+
+
+class TestArcFlags(unittest.TestCase):
+    """Unit tests for the graph partitions, ArcFlags and ArcFlagsAStarOSMnx."""
+
+    def setUp(self):
+        """Creates a directed grid graph and its arc flags for four cells."""
+        self.graph = directed_grid(12, seed=5)
+        self.compact = CompactGraph.from_networkx(self.graph)
+        self.arc_flags = ArcFlags.build(self.compact, kd_partition(self.compact, 4))
+
+    def test_kd_partition_is_balanced(self):
+        """Tests that the geometric cells have equal sizes and are contiguous areas."""
+        cells = kd_partition(self.compact, 4)
+        self.assertEqual(np.bincount(cells).tolist(), [36, 36, 36, 36])
+        # The grid is split into its four quadrants
+        quadrants = (self.compact.lat > 60.1555) * 2 + (self.compact.lon > 24.911)
+        for cell in range(4):
+            self.assertEqual(len(set(quadrants[cells == cell].tolist())), 1)
+
+    def test_place_partition(self):
+        """Tests that nodes get the cell of their place, or of the nearest node in a place."""
+        west = [node for node in self.graph.nodes if node % 12 < 6 and node != 0]
+        east = [node for node in self.graph.nodes if node % 12 >= 6]
+        cells = place_partition(self.compact, [west, east])
+        self.assertEqual(cells[self.compact.index_of(0)], 0)
+        self.assertEqual(cells[self.compact.indices_of(east)].tolist(), [1] * len(east))
+
+        cells = place_partition(self.compact, [west, east], cells_per_place=2)
+        self.assertEqual(sorted(set(cells.tolist())), [0, 1, 2, 3])
+        self.assertTrue(np.all(cells[self.compact.indices_of(east)] >= 2))
+
+    def test_flags_are_packed_bitsets(self):
+        """Tests the storage of the flags and that edges inside a cell are flagged for it."""
+        self.assertEqual(self.arc_flags.flags.shape, (self.compact.edge_count, 1))
+        self.assertEqual(self.arc_flags.cell_count, 4)
+        cells = self.arc_flags.cells
+        for edge, (source, target) in enumerate(zip(self.compact.sources(),
+                                                    self.compact.targets)):
+            if cells[source] == cells[target]:
+                self.assertEqual(self.arc_flags.edge_mask(int(cells[target]))[edge], 1)
+
+    def test_same_lengths_as_dijkstra(self):
+        """Tests that pruned searches find shortest paths between random nodes."""
+        engine = ArcFlagsAStarOSMnx(self.compact, self.arc_flags)
+        dijkstra = DijkstraOSMnx(self.compact)
+        rng = random.Random(1)
+        for _ in range(100):
+            start, goal = rng.randrange(144), rng.randrange(144)
+            path, length = engine.find_path(start, goal)
+            _, expected = dijkstra.find_path(start, goal)
+            self.assertAlmostEqual(length, expected, places=6)
+            if path is not None:
+                self.assertAlmostEqual(self.compact.path_length(path), expected, places=6)
+
+    def test_cross_cell_queries_expand_fewer_nodes(self):
+        """Tests that the flags prune the search between opposite corners."""
+        engine = ArcFlagsAStarOSMnx(self.compact, self.arc_flags)
+        a_star = AStarOSMnx(self.compact)
+        total, pruned = 0, 0
+        for start, goal in ((0, 143), (143, 0), (11, 132), (132, 11)):
+            _, length = engine.find_path(start, goal)
+            self.assertAlmostEqual(length, a_star.find_path(start, goal)[1], places=6)
+            total += a_star.nodes_expanded
+            pruned += engine.nodes_expanded
+        self.assertLess(pruned, total)
+
+    def test_flags_built_on_first_query(self):
+        """Tests that an engine without flags partitions the graph itself."""
+        engine = ArcFlagsAStarOSMnx(self.compact, cell_count=2)
+        self.assertAlmostEqual(engine.find_path(0, 143)[1],
+                               DijkstraOSMnx(self.compact).find_path(0, 143)[1], places=6)
+        self.assertEqual(engine.arc_flags.cell_count, 2)
+        self.assertEqual(engine.find_path(0, 999), (None, float('inf')))
+
+    def test_save_and_map(self):
+        """Tests that saved flags are mapped read-only and match only their graph."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'arc_flags.bin')
+            self.arc_flags.save(path)
+            loaded = ArcFlags.load(path)
+            np.testing.assert_array_equal(loaded.flags, self.arc_flags.flags)
+            np.testing.assert_array_equal(loaded.cells, self.arc_flags.cells)
+            self.assertFalse(loaded.flags.flags.writeable)
+            self.assertTrue(loaded.matches(self.compact))
+            other = CompactGraph.from_networkx(directed_grid(12, seed=6))
+            self.assertFalse(loaded.matches(other))
+            self.assertFalse(loaded.matches(self.compact.with_lengths(
+                np.asarray(self.compact.lengths) * 2)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+from utils.array_file import save_arrays, map_arrays, ALIGNMENT
+
+class TestArrayFile(unittest.TestCase):
+    """Unit tests for the memory-mapped array file format."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'arrays.bin')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_arrays_round_trip(self):
+        """Tests that arrays of different dtypes and shapes are mapped back unchanged."""
+        arrays = {
+            'ids': np.array([5, 7, 11], dtype=np.int64),
+            'flags': np.array([1, 0, 1], dtype=np.uint8),
+            'table': np.arange(12, dtype=np.float32).reshape(3, 4),
+            'empty': np.empty(0, dtype=np.int32)
+        }
+        save_arrays(self.path, arrays, {'nodes': 3})
+        mapped, metadata = map_arrays(self.path)
+
+        self.assertEqual(metadata, {'nodes': 3})
+        self.assertEqual(list(mapped), list(arrays))
+        for name, array in arrays.items():
+            np.testing.assert_array_equal(mapped[name], array)
+            self.assertEqual(mapped[name].dtype, array.dtype)
+        self.assertFalse(os.path.exists(self.path + '.incomplete'))
+
+    def test_arrays_are_aligned_and_read_only(self):
+        """Tests that mapped arrays are aligned views that cannot be written."""
+        save_arrays(self.path, {'a': np.ones(3, dtype=np.uint8), 'b': np.ones(5)})
+        mapped, _ = map_arrays(self.path)
+        for array in mapped.values():
+            self.assertEqual(array.ctypes.data % ALIGNMENT, 0)
+            self.assertFalse(array.flags.writeable)
+        with self.assertRaises(ValueError):
+            mapped['b'][0] = 2.0
+
+    def test_rejects_other_files(self):
+        """Tests that a file without the signature is rejected."""
+        with open(self.path, 'wb') as file:
+            file.write(b'not an array file')
+        with self.assertRaises(ValueError):
+            map_arrays(self.path)
+
+if __name__ == '__main__':
+    unittest.main()
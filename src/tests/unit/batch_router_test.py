@@ -0,0 +1,54 @@
+import unittest
+import random
+import networkx as nx
+from algorithms.a_star import AStarOSMnx
+from algorithms.batch_router import BatchRouter
+
+class TestBatchRouter(unittest.TestCase):
+    """Unit tests for routing batches of start and goal pairs with BatchRouter."""
+
+    def setUp(self):
+        """Creates a random directed graph and a router over it."""
+        random.seed(3)
+        self.graph = nx.gnp_random_graph(60, 0.08, seed=3, directed=True)
+        for u, v in self.graph.edges:
+            self.graph[u][v]['length'] = random.uniform(10.0, 100.0)
+        for node in self.graph.nodes:
+            self.graph.nodes[node]['x'], self.graph.nodes[node]['y'] = 24.9384, 60.1699
+        self.router = BatchRouter(AStarOSMnx(self.graph))
+
+    def test_routes_match_single_queries(self):
+        """Tests that shared and single searches give the shortest path of every pair."""
+        starts = [random.choice([0, 1, 2]) for _ in range(40)]
+        pairs = [(start, random.randrange(60)) for start in starts] + [(5, 7)]
+        results = sorted(self.router.routes(pairs))
+        self.assertEqual([index for index, _, _ in results], list(range(len(pairs))))
+
+        for (index, path, length), (start, goal) in zip(results, pairs):
+            try:
+                expected = nx.shortest_path_length(self.graph, start, goal, weight='length')
+            except nx.NetworkXNoPath:
+                self.assertIsNone(path, index)
+                continue
+            self.assertAlmostEqual(length, expected, delta=1e-6)
+            self.assertEqual((path[0], path[-1]), (start, goal))
+            self.assertAlmostEqual(nx.path_weight(self.graph, path, weight='length'), length,
+                                   delta=1e-6)
+
+    def test_pairs_with_same_start_share_one_search(self):
+        """Tests that a group of pairs with the same start runs a single search."""
+        calls = []
+        engine = self.router.engine
+        engine.find_path = lambda *pair: calls.append(pair) or (None, float('inf'))
+        results = list(self.router.routes([(0, 10), (0, 20), (0, 10), (4, 30)]))
+        self.assertEqual(calls, [(4, 30)])
+        self.assertEqual([index for index, _, _ in results], [0, 1, 2, 3])
+        self.assertEqual(results[0][1:], results[2][1:])
+
+    def test_unknown_nodes(self):
+        """Tests that pairs with nodes outside the graph have no route."""
+        results = list(self.router.routes([(0, 99), (0, 98), (99, 0)]))
+        self.assertEqual([path for _, path, _ in results], [None, None, None])
+
+if __name__ == '__main__':
+    unittest.main()
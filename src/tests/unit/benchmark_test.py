@@ -0,0 +1,66 @@
+import unittest
+from algorithms.a_star import AStarOSMnx
+from algorithms.dijkstra import DijkstraOSMnx
+from utils.benchmark import Benchmark, dijkstra_rank_queries, summarize, find_regressions
+from utils.synthetic_graphs import grid_graph
+
+class TestBenchmark(unittest.TestCase):
+    """Unit tests for the query sets, timing and regression checks of the benchmark."""
+
+    def setUp(self):
+        """Creates a grid graph and a query set over it."""
+        self.graph = grid_graph(12, seed=5, one_way=0.0)
+        self.queries = dijkstra_rank_queries(self.graph, 20, seed=1)
+
+    def test_queries_are_reproducible_and_stratified(self):
+        """Tests that the same seed gives the same queries, covering every rank."""
+        self.assertEqual(self.queries, dijkstra_rank_queries(self.graph, 20, seed=1))
+        self.assertNotEqual(self.queries, dijkstra_rank_queries(self.graph, 20, seed=2))
+        self.assertEqual(len(self.queries), 20)
+        # 144 reachable nodes give ranks 2^4..2^7, one query of each per start
+        self.assertEqual([query['rank'] for query in self.queries[:8]], [4, 5, 6, 7] * 2)
+
+        dijkstra = DijkstraOSMnx(self.graph)
+        for query in self.queries:
+            self.assertAlmostEqual(dijkstra.find_path(query['start'], query['goal'])[1],
+                                   query['distance'], delta=1e-6)
+            self.assertEqual(dijkstra.nodes_expanded, 2 ** query['rank'] + 1)
+
+    def test_summarize(self):
+        """Tests the percentiles of a list of measurements."""
+        summary = summarize(list(range(1, 101)))
+        self.assertEqual((summary['count'], summary['max'], summary['mean']), (100, 100, 50.5))
+        self.assertAlmostEqual(summary['p50'], 50.5)
+        self.assertAlmostEqual(summary['p99'], 99.01)
+        self.assertIsNone(summarize([])['p95'])
+
+    def test_run_reports_every_metric(self):
+        """Tests the structure and correctness check of an engine result."""
+        result = Benchmark(self.queries, warmup=2, repeat=2).run(AStarOSMnx(self.graph))
+        self.assertEqual(result['mismatches'], 0)
+        self.assertEqual(result['latency_ms']['count'], 20)
+        self.assertEqual(set(result['latency_ms_by_rank']), {'4', '5', '6', '7'})
+        self.assertGreater(result['nodes_expanded']['mean'], 0)
+        self.assertGreater(result['peak_memory_bytes'], 0)
+
+    def test_wrong_results_are_counted(self):
+        """Tests that results not matching the query distances are mismatches."""
+        queries = [{**query, 'distance': query['distance'] + 1.0} for query in self.queries]
+        result = Benchmark(queries, warmup=0, repeat=1).run(AStarOSMnx(self.graph))
+        self.assertEqual(result['mismatches'], len(queries))
+
+    def test_find_regressions(self):
+        """Tests that only metrics growing beyond the tolerance are regressions."""
+        def report(latency, expanded, memory, mismatches):
+            return {'results': {'astar': {
+                'latency_ms': {'p50': latency, 'p95': latency * 2, 'p99': latency * 3},
+                'nodes_expanded': {'mean': expanded},
+                'peak_memory_bytes': memory,
+                'mismatches': mismatches
+            }}}
+        baseline = report(1.0, 100.0, 1000, 0)
+        self.assertEqual(find_regressions(report(1.05, 100.0, 900, 0), baseline), [])
+        regressions = find_regressions(report(1.5, 120.0, 1000, 1), baseline)
+        self.assertEqual(len(regressions), 5)
+        self.assertTrue(all(regression.startswith('astar: ') for regression in regressions))
+        self.assertEqual(find_regressions({'results': {}}, baseline), [])
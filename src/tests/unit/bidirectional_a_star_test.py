@@ -0,0 +1,157 @@
+import unittest
+import random
+from algorithms.bidirectional_a_star import BidirectionalAStarOSMnx
+import networkx as nx
+
+class TestBidirectionalAStarOSMnx(unittest.TestCase):
+    """Unit tests for the bidirectional A* algorithm implemented in BidirectionalAStarOSMnx."""
+
+    def setUp(self):
+        """Creates a simple graph for testing."""
+        self.graph = nx.Graph()
+        self.graph.add_edge(1, 2, length=1000.0)  # Distance in meters
+        self.graph.add_edge(2, 3, length=2000.0)
+        self.graph.add_edge(3, 4, length=1000.0)
+        self.graph.add_edge(1, 4, length=5000.0)
+
+        # Add latitude and longitude attributes for testing
+        self.graph.nodes[1]['x'], self.graph.nodes[1]['y'] = 60.1699, 24.9384
+        self.graph.nodes[2]['x'], self.graph.nodes[2]['y'] = 60.1700, 24.9390
+        self.graph.nodes[3]['x'], self.graph.nodes[3]['y'] = 60.1710, 24.9400
+        self.graph.nodes[4]['x'], self.graph.nodes[4]['y'] = 60.1720, 24.9410
+
+        self.bidirectional = BidirectionalAStarOSMnx(self.graph)
+
+    def test_find_path_bidirectional(self):
+        """Tests finding the shortest path using bidirectional A* algorithm."""
+        path, length = self.bidirectional.find_path(1, 4)
+        self.assertEqual(path, [1, 2, 3, 4])
+        self.assertAlmostEqual(length, 4000, delta=1)
+
+    def test_no_path_bidirectional(self):
+        """Tests that bidirectional A* returns no path when the graph is disconnected."""
+        self.graph.remove_edge(1, 4)
+        self.graph.remove_edge(2, 3)
+        path, length = self.bidirectional.find_path(1, 4)
+        self.assertIsNone(path)
+
+    def test_multiple_shortest_paths(self):
+        """Tests the case where multiple shortest paths exist."""
+        self.graph.add_edge(2, 4, length=3000.0)  # Another equally short path
+        path, length = self.bidirectional.find_path(1, 4)
+        self.assertIn(path, [[1, 2, 3, 4], [1, 2, 4]])
+        self.assertAlmostEqual(length, 4000, delta=1)
+
+    def test_start_node_not_in_graph(self):
+        """Tests the case when the start node is not in the graph."""
+        path, length = self.bidirectional.find_path(99, 4)  # Node 99 is not in the graph
+        self.assertIsNone(path)
+
+    def test_goal_node_not_in_graph(self):
+        """Tests the case when the goal node is not in the graph."""
+        path, length = self.bidirectional.find_path(1, 99)  # Node 99 is not in the graph
+        self.assertIsNone(path)
+
+    def test_single_node_graph(self):
+        """Tests the case where the graph contains only one node."""
+        graph = nx.Graph()
+        graph.add_node(1, x=60.1699, y=24.9384)
+        bidirectional = BidirectionalAStarOSMnx(graph)
+        path, length = bidirectional.find_path(1, 1)
+        self.assertEqual(path, [1])
+        self.assertAlmostEqual(length, 0.0)
+
+    def test_cycle_in_graph(self):
+        """Tests handling of a cycle in the graph."""
+        self.graph.add_edge(4, 1, length=500.0)  # Create a cycle with a shorter direct path
+        path, length = self.bidirectional.find_path(1, 4)
+        
+        self.assertEqual(path, [1, 4])
+        self.assertAlmostEqual(length, 500, delta=1)
+
+    def test_no_weights_on_edges(self):
+        """Tests the case where some edges have no weight assigned."""
+        self.graph.add_edge(2, 4, length=2000.0)
+        path, length = self.bidirectional.find_path(1, 4)
+        self.assertEqual(path, [1, 2, 4])
+
+    def test_no_valid_path(self):
+        """Tests the case where there is no valid path due to isolated nodes."""
+        self.graph.add_node(99)  # Add isolated node
+        path, length = self.bidirectional.find_path(1, 99)  # Node 99 is not connected
+        self.assertIsNone(path)
+        self.assertEqual(length, float('inf'))
+
+
+    def test_compare_bidirectional_dijkstra(self):
+        """Runs bidirectional A* and Dijkstra algorithms 100 times with random start and goal nodes."""
+        for _ in range(100):
+            # Randomly select start and goal nodes from the graph
+            start_node = random.choice(list(self.graph.nodes))
+            goal_node = random.choice(list(self.graph.nodes))
+            
+            # Ensure start and goal are different
+            while start_node == goal_node:
+                goal_node = random.choice(list(self.graph.nodes))
+
+            # Test bidirectional A* algorithm
+            bidirectional_path, bidirectional_length = self.bidirectional.find_path(start_node, goal_node)
+
+            # Test Dijkstra algorithm using NetworkX            
+            dijkstra_length = nx.shortest_path_length(self.graph, source=start_node, target=goal_node, weight='length')
+
+            # Assert both algorithms return the same path length
+            if bidirectional_path:
+                self.assertAlmostEqual(bidirectional_length, dijkstra_length, delta=1)
+            else:
+                self.assertIsNone(bidirectional_path)
+
+    def test_one_way_streets(self):
+        """Tests that the backward search follows incoming edges of a directed graph."""
+        graph = nx.MultiDiGraph()
+        graph.add_edge(1, 2, length=1000.0)
+        graph.add_edge(2, 3, length=1000.0)
+        graph.add_edge(3, 1, length=500.0)  # One-way back to the start
+        for node in (1, 2, 3):
+            graph.nodes[node]['x'], graph.nodes[node]['y'] = 24.9384, 60.1699 + node * 0.001
+        bidirectional = BidirectionalAStarOSMnx(graph)
+
+        path, length = bidirectional.find_path(1, 3)
+        self.assertEqual(path, [1, 2, 3])
+        self.assertAlmostEqual(length, 2000.0)
+
+        path, length = bidirectional.find_path(3, 2)
+        self.assertEqual(path, [3, 1, 2])
+        self.assertAlmostEqual(length, 1500.0)
+
+    def test_compare_dijkstra_on_directed_grid(self):
+        """Compares path lengths with Dijkstra on a grid with one-way streets."""
+        graph = nx.MultiDiGraph()
+        random.seed(3)
+        for i in range(8):
+            for j in range(8):
+                graph.add_node(i * 8 + j, x=24.90 + j * 0.002, y=60.15 + i * 0.001)
+        for i in range(8):
+            for j in range(8):
+                for neighbor in ([i * 8 + j + 1] if j < 7 else []) + ([i * 8 + j + 8] if i < 7 else []):
+                    length = random.uniform(120.0, 200.0)
+                    graph.add_edge(i * 8 + j, neighbor, length=length)
+                    if random.random() < 0.7:
+                        graph.add_edge(neighbor, i * 8 + j, length=length)
+        bidirectional = BidirectionalAStarOSMnx(graph)
+
+        for _ in range(100):
+            start_node, goal_node = random.sample(list(graph.nodes), 2)
+            path, length = bidirectional.find_path(start_node, goal_node)
+            try:
+                dijkstra_length = nx.shortest_path_length(
+                    graph, source=start_node, target=goal_node, weight='length')
+            except nx.NetworkXNoPath:
+                self.assertIsNone(path)
+                continue
+            self.assertAlmostEqual(length, dijkstra_length, delta=1e-6)
+            self.assertEqual((path[0], path[-1]), (start_node, goal_node))
+            self.assertAlmostEqual(nx.path_weight(graph, path, weight='length'), length, delta=1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import math
+import os
+import tempfile
+import networkx as nx
+from utils.compact_graph import CompactGraph
+from algorithms.a_star import AStarOSMnx
+
+class TestCompactGraph(unittest.TestCase):
+    """Unit tests for the array-backed CompactGraph built from NetworkX graphs."""
+
+    def setUp(self):
+        """Creates a small directed multigraph with parallel edges and coordinates."""
+        self.graph = nx.MultiDiGraph()
+        self.graph.add_edge(30, 10, length=1000.0)
+        self.graph.add_edge(10, 20, length=2000.0)
+        self.graph.add_edge(10, 20, length=1500.0)  # Shorter parallel edge
+        self.graph.add_edge(20, 30, length=500.0)
+        self.graph.add_edge(20, 20, length=10.0)  # Self-loop
+        self.graph.add_edge(30, 20)  # No length attribute
+
+        self.graph.nodes[10]['y'], self.graph.nodes[10]['x'] = 60.1699, 24.9384
+        self.graph.nodes[20]['y'], self.graph.nodes[20]['x'] = 60.1700, 24.9390
+        self.graph.nodes[30]['y'], self.graph.nodes[30]['x'] = 60.1705, 24.9395
+
+        self.compact = CompactGraph.from_networkx(self.graph)
+
+    def test_nodes_are_sorted_and_indexed(self):
+        """Tests that node IDs are sorted and mapped to contiguous indices."""
+        self.assertEqual(self.compact.node_ids.tolist(), [10, 20, 30])
+        self.assertEqual(self.compact.index_of(20), 1)
+        self.assertIsNone(self.compact.index_of(99))
+        self.assertIsNone(self.compact.index_of(5))
+
+    def test_parallel_edges_collapsed_to_minimum(self):
+        """Tests that parallel edges are stored once with the minimum length."""
+        self.assertEqual(list(self.compact.neighbors(0)), [(1, 1500.0)])
+
+    def test_self_loops_and_missing_lengths_dropped(self):
+        """Tests that self-loops and edges without length are not stored."""
+        self.assertEqual(list(self.compact.neighbors(1)), [(2, 500.0)])
+        self.assertEqual(list(self.compact.neighbors(2)), [(0, 1000.0)])
+        self.assertEqual(self.compact.edge_count, 3)
+
+    def test_undirected_graph_stores_both_directions(self):
+        """Tests that an undirected edge can be traversed both ways."""
+        graph = nx.Graph()
+        graph.add_edge(1, 2, length=100.0)
+        compact = CompactGraph.from_networkx(graph)
+        self.assertEqual(list(compact.neighbors(0)), [(1, 100.0)])
+        self.assertEqual(list(compact.neighbors(1)), [(0, 100.0)])
+
+    def test_coordinates(self):
+        """Tests coordinate lookups and conversion of index paths back to node IDs."""
+        self.assertEqual(self.compact.coordinate(2), (60.1705, 24.9395))
+        self.assertEqual(self.compact.coordinates([0, 1]), [(60.1699, 24.9384), (60.1700, 24.9390)])
+        self.assertEqual(self.compact.node_path([2, 0, 1]), [30, 10, 20])
+
+    def test_missing_coordinates_are_nan(self):
+        """Tests that nodes without coordinates get NaN coordinates."""
+        self.graph.add_node(40)
+        compact = CompactGraph.from_networkx(self.graph)
+        lat, lon = compact.coordinate(compact.index_of(40))
+        self.assertTrue(math.isnan(lat) and math.isnan(lon))
+
+    def test_nbytes(self):
+        """Tests that the reported memory use covers all arrays."""
+        self.assertGreater(self.compact.nbytes, 0)
+        self.assertEqual(self.compact.node_count, 3)
+
+    def test_save_and_map_file(self):
+        """Tests that a saved graph is mapped read-only and can be searched directly."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'graph.bin')
+            self.compact.save(path)
+            mapped = CompactGraph.load(path)
+
+            self.assertFalse(mapped.targets.flags.writeable)
+            self.assertEqual(list(mapped.neighbors(0)), [(1, 1500.0)])
+            self.assertEqual(list(mapped.reverse.neighbors(1)), [(0, 1500.0)])
+            self.assertEqual(mapped.coordinate(2), (60.1705, 24.9395))
+            self.assertEqual(AStarOSMnx(mapped).find_path(10, 30), ([10, 20, 30], 2000.0))
+
+    def test_with_lengths_shares_structure(self):
+        """Tests that a reweighted graph keeps the edges and reweights the reverse graph."""
+        reweighted = self.compact.with_lengths(self.compact.lengths * 2)
+        self.assertIs(reweighted.targets, self.compact.targets)
+        self.assertEqual(list(reweighted.neighbors(0)), [(1, 3000.0)])
+        self.assertEqual(list(reweighted.reverse.neighbors(1)), [(0, 3000.0)])
+        self.assertEqual(reweighted.reverse.lengths.tolist(),
+                         (self.compact.reverse.lengths * 2).tolist())
+
+    def test_path_length(self):
+        """Tests that path lengths sum the edges and are infinite without an edge."""
+        self.assertEqual(self.compact.path_length([0, 1, 2]), 2000.0)
+        self.assertEqual(self.compact.path_length([0]), 0.0)
+        self.assertEqual(self.compact.path_length([0, 2]), float('inf'))
+
+    def test_spatial_index_nearest(self):
+        """Tests nearest-node lookups, ignoring nodes without coordinates."""
+        self.graph.add_node(40)
+        compact = CompactGraph.from_networkx(self.graph)
+        self.assertEqual(compact.spatial_index.nearest(60.1704, 24.9396), 2)
+        self.assertEqual(compact.spatial_index.nearest(60.1690, 24.9380), 0)
+        self.assertEqual(compact.indices_of([30, 10]).tolist(), [2, 0])
+
+if __name__ == '__main__':
+    unittest.main()
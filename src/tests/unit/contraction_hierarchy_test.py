@@ -0,0 +1,109 @@
+import unittest
+import os
+import random
+import tempfile
+import networkx as nx
+import numpy as np
+from algorithms.contraction_hierarchy import ContractionHierarchy, ContractionHierarchyOSMnx
+from utils.compact_graph import CompactGraph
+from tests.unit.landmarks_test import directed_grid
+
+class TestContractionHierarchyOSMnx(unittest.TestCase):
+    """Unit tests for the Contraction Hierarchies preprocessing and query engine."""
+
+    def setUp(self):
+        """Creates a simple graph for testing."""
+        self.graph = nx.Graph()
+        self.graph.add_edge(1, 2, length=1000.0)  # Distance in meters
+        self.graph.add_edge(2, 3, length=2000.0)
+        self.graph.add_edge(3, 4, length=1000.0)
+        self.graph.add_edge(1, 4, length=5000.0)
+
+        # Add latitude and longitude attributes for testing
+        self.graph.nodes[1]['x'], self.graph.nodes[1]['y'] = 60.1699, 24.9384
+        self.graph.nodes[2]['x'], self.graph.nodes[2]['y'] = 60.1700, 24.9390
+        self.graph.nodes[3]['x'], self.graph.nodes[3]['y'] = 60.1710, 24.9400
+        self.graph.nodes[4]['x'], self.graph.nodes[4]['y'] = 60.1720, 24.9410
+
+        self.contraction_hierarchy = ContractionHierarchyOSMnx(self.graph)
+
+    def test_find_path_contraction_hierarchy(self):
+        """Tests that the shortcuts are unpacked into the original path."""
+        path, length = self.contraction_hierarchy.find_path(1, 4)
+        self.assertEqual(path, [1, 2, 3, 4])
+        self.assertAlmostEqual(length, 4000, delta=1)
+
+    def test_no_path_contraction_hierarchy(self):
+        """Tests that no path is returned when the graph is disconnected."""
+        self.graph.remove_edge(1, 4)
+        self.graph.remove_edge(2, 3)
+        path, length = self.contraction_hierarchy.find_path(1, 4)
+        self.assertIsNone(path)
+        self.assertEqual(length, float('inf'))
+
+    def test_node_not_in_graph(self):
+        """Tests the case when the start or goal node is not in the graph."""
+        self.assertIsNone(self.contraction_hierarchy.find_path(99, 4)[0])
+        self.assertIsNone(self.contraction_hierarchy.find_path(1, 99)[0])
+
+    def test_start_equals_goal(self):
+        """Tests that a route from a node to itself is empty."""
+        path, length = self.contraction_hierarchy.find_path(3, 3)
+        self.assertEqual(path, [3])
+        self.assertAlmostEqual(length, 0.0)
+
+    def test_one_way_streets(self):
+        """Tests that the hierarchy keeps the direction of one-way streets."""
+        graph = nx.MultiDiGraph()
+        graph.add_edge(1, 2, length=1000.0)
+        graph.add_edge(2, 3, length=1000.0)
+        graph.add_edge(3, 1, length=500.0)  # One-way back to the start
+        contraction_hierarchy = ContractionHierarchyOSMnx(graph)
+
+        self.assertEqual(contraction_hierarchy.find_path(1, 3), ([1, 2, 3], 2000.0))
+        self.assertEqual(contraction_hierarchy.find_path(3, 2), ([3, 1, 2], 1500.0))
+
+    def test_compare_dijkstra_on_directed_grid(self):
+        """Compares paths with Dijkstra on a grid with one-way streets."""
+        graph = directed_grid(12, seed=4)
+        contraction_hierarchy = ContractionHierarchyOSMnx(graph)
+        random.seed(6)
+
+        for _ in range(100):
+            start_node, goal_node = random.sample(list(graph.nodes), 2)
+            path, length = contraction_hierarchy.find_path(start_node, goal_node)
+            try:
+                dijkstra_length = nx.shortest_path_length(
+                    graph, source=start_node, target=goal_node, weight='length')
+            except nx.NetworkXNoPath:
+                self.assertIsNone(path)
+                continue
+            self.assertAlmostEqual(length, dijkstra_length, delta=1e-6)
+            self.assertEqual((path[0], path[-1]), (start_node, goal_node))
+            self.assertAlmostEqual(nx.path_weight(graph, path, weight='length'), length, delta=1e-6)
+
+    def test_save_and_load(self):
+        """Tests that a saved hierarchy is loaded back and answers the same queries."""
+        graph = directed_grid(6, seed=2)
+        compact = CompactGraph.from_networkx(graph)
+        hierarchy = ContractionHierarchy.build(compact)
+        self.assertTrue(all(hierarchy.rank[target] > hierarchy.rank[source]
+                            for source in range(compact.node_count)
+                            for target, _ in hierarchy.upward.neighbors(source)))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'hierarchy.npz')
+            hierarchy.save(path)
+            loaded = ContractionHierarchy.load(path)
+
+        self.assertEqual(loaded.shortcuts, hierarchy.shortcuts)
+        self.assertTrue(loaded.matches(compact))
+        self.assertFalse(loaded.matches(compact.with_lengths(np.asarray(compact.lengths) + 1.0)))
+        original = ContractionHierarchyOSMnx(compact, hierarchy)
+        reloaded = ContractionHierarchyOSMnx(compact, loaded)
+        for start_node, goal_node in ((0, 35), (35, 0), (7, 30)):
+            self.assertEqual(reloaded.find_path(start_node, goal_node),
+                             original.find_path(start_node, goal_node))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import random
+import math
+import networkx as nx
+from algorithms.dijkstra import DijkstraOSMnx
+from utils.compact_graph import CompactGraph
+
+class TestDijkstraOSMnx(unittest.TestCase):
+    """Unit tests for Dijkstra's algorithm implemented in DijkstraOSMnx."""
+
+    def setUp(self):
+        """Creates a simple directed graph for testing."""
+        self.graph = nx.MultiDiGraph()
+        self.graph.add_edge(1, 2, length=1000.0)  # Distance in meters
+        self.graph.add_edge(2, 3, length=2000.0)
+        self.graph.add_edge(3, 4, length=1000.0)
+        self.graph.add_edge(1, 4, length=5000.0)
+        self.graph.add_edge(4, 1, length=500.0)  # One-way back to the start
+        for node in (1, 2, 3, 4):
+            self.graph.nodes[node]['x'], self.graph.nodes[node]['y'] = 24.9384, 60.1699
+        self.compact = CompactGraph.from_networkx(self.graph)
+        self.dijkstra = DijkstraOSMnx(self.compact)
+
+    def test_find_path_dijkstra(self):
+        """Tests finding the shortest path along one-way edges."""
+        path, length = self.dijkstra.find_path(1, 4)
+        self.assertEqual(path, [1, 2, 3, 4])
+        self.assertAlmostEqual(length, 4000.0)
+
+        path, length = self.dijkstra.find_path(4, 2)
+        self.assertEqual(path, [4, 1, 2])
+        self.assertAlmostEqual(length, 1500.0)
+
+    def test_no_path_dijkstra(self):
+        """Tests that no path is returned when the goal cannot be reached."""
+        graph = nx.MultiDiGraph()
+        graph.add_edge(1, 2, length=100.0)
+        path, length = DijkstraOSMnx(graph).find_path(2, 1)
+        self.assertIsNone(path)
+        self.assertEqual(length, float('inf'))
+
+    def test_node_not_in_graph(self):
+        """Tests the case when the start or goal node is not in the graph."""
+        self.assertIsNone(self.dijkstra.find_path(99, 4)[0])
+        self.assertIsNone(self.dijkstra.find_path(1, 99)[0])
+
+    def test_distances_from(self):
+        """Tests the distances from a node, and to a node over the reversed edges."""
+        start = self.compact.index_of(2)
+        forward = self.dijkstra.distances_from(start)
+        backward = self.dijkstra.distances_from(start, reverse=True)
+        self.assertEqual(list(forward), [3500.0, 0.0, 2000.0, 3000.0])
+        self.assertEqual(list(backward), [1000.0, 0.0, 2500.0, 1500.0])
+        self.assertEqual(self.dijkstra.nodes_expanded, 4)
+
+    def test_distances_from_unreachable_nodes(self):
+        """Tests that unreachable nodes get an infinite distance."""
+        self.graph.add_edge(5, 1, length=100.0)
+        dijkstra = DijkstraOSMnx(self.graph)
+        distances = dijkstra.distances_from(dijkstra.compact_graph.index_of(1))
+        self.assertTrue(math.isinf(distances[dijkstra.compact_graph.index_of(5)]))
+
+    def test_find_paths_stops_at_last_goal(self):
+        """Tests that a one-to-many search closes fewer nodes than a full search."""
+        graph = nx.path_graph(50, create_using=nx.DiGraph)
+        nx.set_edge_attributes(graph, 1.0, 'length')
+        dijkstra = DijkstraOSMnx(graph)
+        paths = dijkstra.find_paths(0, [3, 5])
+        self.assertEqual(paths, [([0, 1, 2, 3], 3.0), ([0, 1, 2, 3, 4, 5], 5.0)])
+        self.assertEqual(dijkstra.nodes_expanded, 6)
+
+    def test_find_paths_without_known_goals(self):
+        """Tests that a one-to-many search without any goal in the graph searches nothing."""
+        graph = nx.path_graph(50, create_using=nx.DiGraph)
+        nx.set_edge_attributes(graph, 1.0, 'length')
+        dijkstra = DijkstraOSMnx(graph)
+        dijkstra.find_paths(0, [5])
+        self.assertEqual(dijkstra.nodes_expanded, 6)
+        self.assertEqual(dijkstra.find_paths(0, [98, 99]), [(None, math.inf)] * 2)
+        self.assertEqual(dijkstra.nodes_expanded, 0)
+        dijkstra.find_paths(0, [5])
+        self.assertEqual(dijkstra.find_paths(0, []), [])
+        self.assertEqual(dijkstra.nodes_expanded, 0)
+
+    def test_compare_networkx(self):
+        """Compares path lengths with NetworkX on a random directed graph."""
+        random.seed(5)
+        graph = nx.gnp_random_graph(60, 0.08, seed=5, directed=True)
+        for u, v in graph.edges:
+            graph[u][v]['length'] = random.uniform(10.0, 100.0)
+        dijkstra = DijkstraOSMnx(graph)
+
+        for _ in range(50):
+            start_node, goal_node = random.sample(list(graph.nodes), 2)
+            path, length = dijkstra.find_path(start_node, goal_node)
+            try:
+                expected = nx.shortest_path_length(
+                    graph, source=start_node, target=goal_node, weight='length')
+            except nx.NetworkXNoPath:
+                self.assertIsNone(path)
+                continue
+            self.assertAlmostEqual(length, expected, delta=1e-6)
+            self.assertAlmostEqual(nx.path_weight(graph, path, weight='length'), length, delta=1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import math
+import networkx as nx
+from algorithms.contraction_hierarchy import ContractionHierarchy
+from algorithms.distance_matrix import DistanceMatrix, ROWS_TASK
+from utils.compact_graph import CompactGraph
+from utils.worker_pool import WorkerPool
+from tests.unit.landmarks_test import directed_grid
+
+# The matrix engine of a worker process, built by start_worker
+worker_matrix = {}
+
+
+def start_worker(use_hierarchy):
+    """Builds the matrix engine of a worker process over the graph of the tests."""
+    compact = CompactGraph.from_networkx(directed_grid(12, seed=4))
+    hierarchy = ContractionHierarchy.build(compact) if use_hierarchy else None
+    worker_matrix['matrix'] = DistanceMatrix(compact, hierarchy)
+
+
+def compute_rows(task):
+    """Computes the rows of a task submitted by DistanceMatrix.map_rows."""
+    assert task[0] == ROWS_TASK
+    return worker_matrix['matrix'].rows(*task[1:])
+
+
+class TestDistanceMatrix(unittest.TestCase):
+    """Unit tests for the origin-destination distance matrices of DistanceMatrix."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Creates a directed grid graph, its hierarchy and the expected distances."""
+        cls.graph = directed_grid(12, seed=4)
+        cls.compact = CompactGraph.from_networkx(cls.graph)
+        cls.hierarchy = ContractionHierarchy.build(cls.compact)
+        cls.sources = [0, 13, 77, 143, 60, 5, 99, 120, 31, 142, 44, 88, 1, 2, 3, 4, 6, 7]
+        cls.targets = [143, 0, 50, 71, 8]
+        cls.expected = [[cls.shortest_length(source, target) for target in cls.targets]
+                        for source in cls.sources]
+
+    @classmethod
+    def shortest_length(cls, source, target):
+        """Returns the NetworkX shortest path length, infinity if there is no path."""
+        try:
+            return nx.shortest_path_length(cls.graph, source, target, weight='length')
+        except nx.NetworkXNoPath:
+            return math.inf
+
+    def assert_matrix(self, matrix):
+        """Asserts that a matrix matches the NetworkX distances."""
+        self.assertEqual(matrix.shape, (len(self.sources), len(self.targets)))
+        for row, expected_row in zip(matrix.tolist(), self.expected):
+            for distance, expected in zip(row, expected_row):
+                self.assertAlmostEqual(distance, expected, delta=1e-6)
+
+    def test_dijkstra_matrix(self):
+        """Tests the matrix of one Dijkstra search per origin."""
+        self.assert_matrix(DistanceMatrix(self.compact).compute(self.sources, self.targets))
+
+    def test_bucket_matrix(self):
+        """Tests the matrix of the CH bucket algorithm."""
+        matrix = DistanceMatrix(self.compact, self.hierarchy)
+        self.assert_matrix(matrix.compute(self.sources, self.targets))
+
+    def test_worker_processes(self):
+        """Tests that rows computed in the processes of a worker pool give the same matrix."""
+        for hierarchy in (None, self.hierarchy):
+            pool = WorkerPool(compute_rows, processes=2, initializer=start_worker,
+                              initargs=(hierarchy is not None,))
+            try:
+                matrix = DistanceMatrix(self.compact, hierarchy, pool=pool)
+                self.assert_matrix(matrix.compute(self.sources, self.targets))
+                self.assertEqual(pool.stats()['running'], 0)
+            finally:
+                pool.close()
+
+    def test_unknown_nodes(self):
+        """Tests that rows and columns of nodes outside the graph are infinite."""
+        matrix = DistanceMatrix(self.compact, self.hierarchy).compute([0, 999], [999, 143])
+        self.assertTrue(math.isinf(matrix[0, 0]) and math.isinf(matrix[1, 1]))
+        self.assertAlmostEqual(matrix[0, 1], self.expected[0][0], delta=1e-6)
+        self.assertTrue(math.isinf(DistanceMatrix(self.compact).compute([999], [0])[0, 0]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from algorithms.fringe_list import FringeList
+
+class TestFringeList(unittest.TestCase):
+    """Unit tests for the array-backed doubly linked FringeList."""
+
+    def setUp(self):
+        """Creates an empty list for ten nodes."""
+        self.fringe = FringeList(10)
+        self.fringe.reset()
+
+    def test_append_and_iterate(self):
+        """Tests that appended nodes are iterated in insertion order."""
+        for node in (3, 1, 4):
+            self.fringe.append(node)
+        self.assertEqual(list(self.fringe), [3, 1, 4])
+        self.assertEqual(self.fringe.first(), 3)
+        self.assertFalse(self.fringe.is_empty())
+
+    def test_insert_after(self):
+        """Tests inserting nodes after a given node and at the front."""
+        self.fringe.append(1)
+        self.fringe.append(2)
+        self.fringe.insert_after(1, 5)
+        self.fringe.insert_after(self.fringe.head, 7)
+        self.assertEqual(list(self.fringe), [7, 1, 5, 2])
+
+    def test_remove_and_membership(self):
+        """Tests removing nodes from the front, middle and back."""
+        for node in range(5):
+            self.fringe.append(node)
+        self.fringe.remove(0)
+        self.fringe.remove(2)
+        self.fringe.remove(4)
+        self.assertEqual(list(self.fringe), [1, 3])
+        self.assertNotIn(2, self.fringe)
+        self.assertIn(3, self.fringe)
+
+    def test_remove_last_node_empties_list(self):
+        """Tests that removing the only node leaves an empty list."""
+        self.fringe.append(9)
+        self.fringe.remove(9)
+        self.assertTrue(self.fringe.is_empty())
+        self.assertEqual(list(self.fringe), [])
+
+    def test_reset_clears_membership(self):
+        """Tests that reset empties the list without touching the node slots."""
+        self.fringe.append(6)
+        self.fringe.reset()
+        self.assertTrue(self.fringe.is_empty())
+        self.assertNotIn(6, self.fringe)
+        self.fringe.append(6)
+        self.assertEqual(list(self.fringe), [6])
+
+if __name__ == '__main__':
+    unittest.main()
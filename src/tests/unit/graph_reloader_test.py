@@ -0,0 +1,105 @@
+import unittest
+import threading
+from types import SimpleNamespace
+from utils.graph_reloader import GraphReloader, ReloadInProgressError
+
+class TestGraphReloader(unittest.TestCase):
+    """Unit tests for swapping in a new graph version while requests are served."""
+
+    def setUp(self):
+        """Creates a reloader whose builds wait until the test lets them finish."""
+        self.proceed = threading.Event()
+        self.swaps = []
+        self.retired = []
+        self.versions = iter(['v2', 'v3'])
+        self.reloader = GraphReloader(self.build, SimpleNamespace(version='v1'),
+                                      on_swap=lambda old, new: self.swaps.append(
+                                          (old.version, new.version)),
+                                      retire=self.retired.append)
+
+    def build(self, report):
+        """Builds the state of the next version once the test sets the event."""
+        report('loading graph')
+        self.proceed.wait(5)
+        report('creating engines')
+        return SimpleNamespace(version=next(self.versions))
+
+    def test_requests_finish_on_the_version_they_started_on(self):
+        """Tests that a request keeps its state across a swap, new requests get the new
+        state, and the old state is retired only when the last request using it ends."""
+        with self.reloader.snapshot() as before:
+            request = self.reloader.acquire()
+            self.reloader.reload()
+            self.assertEqual(self.reloader.status()['state'], 'building')
+            self.assertEqual(self.reloader.current.version, 'v1')
+            self.proceed.set()
+        self.assertFalse(self.reloader.wait(0.5))
+        self.assertEqual(self.reloader.current.version, 'v2')
+        self.assertEqual(self.swaps, [('v1', 'v2')])
+
+        status = self.reloader.status()
+        self.assertEqual(status['state'], 'draining')
+        self.assertEqual(status['draining'], [{'version': 'v1', 'in_flight': 1}])
+        self.assertEqual(self.retired, [])
+        with self.reloader.snapshot() as after:
+            self.assertEqual(after.version, 'v2')
+        self.assertIs(request, before)
+
+        self.reloader.release(request)
+        self.assertTrue(self.reloader.wait(5))
+        self.assertEqual(self.retired, [before])
+        status = self.reloader.status()
+        self.assertEqual((status['state'], status['version'], status['draining']),
+                         ('idle', 'v2', []))
+        self.assertEqual([phase['phase'] for phase in status['phases']],
+                         ['loading graph', 'creating engines', 'swapping', 'draining'])
+        self.assertTrue(all(phase['seconds'] >= 0 for phase in status['phases']))
+
+    def test_one_reload_at_a_time(self):
+        """Tests that a reload is refused while another one is running."""
+        self.reloader.reload()
+        with self.assertRaises(ReloadInProgressError):
+            self.reloader.reload()
+        self.proceed.set()
+        self.assertTrue(self.reloader.wait(5))
+        self.reloader.reload()
+        self.assertTrue(self.reloader.wait(5))
+        self.assertEqual(self.reloader.current.version, 'v3')
+
+    def test_failed_build_keeps_the_current_version(self):
+        """Tests that a failed build is reported and the current state is still served."""
+        self.proceed.set()
+        self.versions = iter([])
+        self.reloader.reload()
+        self.assertTrue(self.reloader.wait(5))
+        status = self.reloader.status()
+        self.assertEqual((status['state'], status['version']), ('failed', 'v1'))
+        self.assertIn('StopIteration', status['error'])
+        self.assertEqual((self.swaps, self.retired), ([], []))
+
+    def test_failed_swap_callbacks_are_reported(self):
+        """Tests that a failing on_swap or retire ends the reload as failed, and that the old
+        state is still drained and retired after a failing on_swap."""
+        self.proceed.set()
+
+        def failing(*_):
+            raise ValueError("cache unavailable")
+        self.reloader.on_swap = failing
+        self.reloader.reload()
+        self.assertTrue(self.reloader.wait(5))
+        status = self.reloader.status()
+        self.assertEqual((status['state'], status['version']), ('failed', 'v2'))
+        self.assertEqual(status['error'], "ValueError: cache unavailable")
+        self.assertEqual((status['draining'], [state.version for state in self.retired]),
+                         ([], ['v1']))
+
+        self.reloader.on_swap = None
+        self.reloader.retire = failing
+        self.reloader.reload()
+        self.assertTrue(self.reloader.wait(5))
+        status = self.reloader.status()
+        self.assertEqual((status['state'], status['version']), ('failed', 'v3'))
+        self.assertEqual(status['draining'], [])
+
+if __name__ == '__main__':
+    unittest.main()
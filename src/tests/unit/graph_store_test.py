@@ -0,0 +1,175 @@
+import unittest
+import json
+import os
+import tempfile
+import networkx as nx
+import numpy as np
+from utils.graph_store import GraphStore
+from utils.tiled_graph import TileCache
+from algorithms.a_star import AStarOSMnx
+from algorithms.dijkstra import DijkstraOSMnx
+from tests.unit.osm_stream_test import OSM_XML
+
+class TestGraphStore(unittest.TestCase):
+    """Unit tests for the persistent graph cache."""
+
+    def setUp(self):
+        """Creates a store in a temporary directory with a local graph builder."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.downloads = []
+        self.store = GraphStore(self.directory.name, download=self.build_graph)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def build_graph(self, places, network_type='drive'):
+        """Stands in for the OSMnx download and records every call."""
+        self.downloads.append((places, network_type))
+        graph = nx.MultiDiGraph()
+        graph.add_edge(1, 2, length=100.0)
+        graph.add_edge(2, 3, length=50.0)
+        for node in (1, 2, 3):
+            graph.nodes[node]['x'], graph.nodes[node]['y'] = 24.9 + node * 0.001, 60.1
+        return graph
+
+    def test_cache_miss_downloads_and_hit_loads(self):
+        """Tests that a graph is downloaded once and then loaded from the cache."""
+        compact_graph = self.store.load(['Helsinki, Finland'])
+        self.assertEqual(len(self.downloads), 1)
+
+        cached = GraphStore(self.directory.name, download=None)
+        cached_compact = cached.load(['Helsinki, Finland'])
+        cached_graph = cached.load_networkx(['Helsinki, Finland'])
+        self.assertEqual(sorted(cached_graph.edges), [(1, 2, 0), (2, 3, 0)])
+        np.testing.assert_array_equal(cached_compact.lengths, compact_graph.lengths)
+        self.assertEqual(cached_compact.node_path([0, 1, 2]), [1, 2, 3])
+        self.assertFalse(cached_compact.targets.flags.writeable)
+
+    def test_edge_attributes_are_cached(self):
+        """Tests that the speed and road class of every edge are stored with the graph."""
+        self.store.load('Helsinki, Finland')
+        attributes = GraphStore(self.directory.name, download=None).load_edge_attributes(
+            'Helsinki, Finland')
+        self.assertEqual(attributes['speeds'].tolist(), [30.0, 30.0])
+        self.assertEqual(attributes['road_classes'].tolist(), [9, 9])
+
+    def test_key_depends_on_places_and_network_type(self):
+        """Tests that different graphs get different cache entries."""
+        keys = {
+            self.store.key('Helsinki, Finland'),
+            self.store.key(['Helsinki, Finland', 'Espoo, Finland']),
+            self.store.key('Helsinki, Finland', network_type='walk')
+        }
+        self.assertEqual(len(keys), 3)
+        self.assertEqual(self.store.key('Helsinki, Finland'),
+                         self.store.key(['Helsinki, Finland']))
+
+    def test_entry_is_written_atomically(self):
+        """Tests that the entry has its metadata and no temporary directories are left."""
+        self.store.load('Helsinki, Finland', network_type='walk')
+        self.assertEqual(self.downloads, [('Helsinki, Finland', 'walk')])
+        self.assertEqual(os.listdir(self.directory.name), [self.store.key('Helsinki, Finland',
+                                                                          'walk')])
+        path = self.store.path('Helsinki, Finland', 'walk')
+        self.assertTrue(os.path.exists(os.path.join(path, 'meta.json')))
+
+    def test_version_changes_when_entry_is_replaced(self):
+        """Tests that a re-downloaded entry gets a new version."""
+        version = self.store.version('Helsinki, Finland')
+        self.assertEqual(self.store.version('Helsinki, Finland'), version)
+        self.assertTrue(version.startswith(self.store.key('Helsinki, Finland')))
+
+        path = self.store.path('Helsinki, Finland')
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as file:
+            meta = json.load(file)
+        meta['created'] = '2000-01-01T00:00:00'
+        with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as file:
+            json.dump(meta, file)
+        self.assertNotEqual(self.store.version('Helsinki, Finland'), version)
+
+    def build_other_graph(self, places, network_type='drive'):
+        """Stands in for a download of changed map data, which renumbers the nodes."""
+        graph = self.build_graph(places, network_type)
+        graph.add_edge(0, 1, length=10.0)
+        graph.nodes[0]['x'], graph.nodes[0]['y'] = 24.9, 60.1
+        for _, _, data in graph.edges(data=True):
+            data['length'] *= 2
+        return graph
+
+    def test_refresh_writes_a_new_entry_and_keeps_the_old_one_until_removed(self):
+        """Tests that refresh() downloads the graph again into a new entry with a new
+        version, and that the replaced entry stays readable until remove_replaced()."""
+        old_graph = self.store.load('Helsinki, Finland')
+        version = self.store.version('Helsinki, Finland')
+        old_path = self.store.path('Helsinki, Finland')
+        path = self.store.refresh('Helsinki, Finland')
+        self.assertNotEqual(path, old_path)
+        self.assertEqual(path, self.store.path('Helsinki, Finland'))
+        self.assertEqual(len(self.downloads), 2)
+        self.assertNotEqual(self.store.version('Helsinki, Finland'), version)
+        self.assertEqual(old_graph.node_path([0, 1, 2]), [1, 2, 3])
+        old_generation = self.store.generations('Helsinki, Finland')[0]
+        self.assertEqual(self.store.version('Helsinki, Finland', generation=old_generation),
+                         version)
+        self.assertEqual(self.store.path('Helsinki, Finland', generation=old_generation),
+                         old_path)
+
+        self.store.remove_replaced('Helsinki, Finland')
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(os.listdir(self.directory.name), [self.store.key('Helsinki, Finland')])
+        self.assertEqual(self.store.load('Helsinki, Finland').path_length([0, 1, 2]), 150.0)
+
+    def test_tiled_search_during_refresh_reads_its_own_tiles(self):
+        """Tests that a search on a tiled graph that is running while the graph is refreshed
+        keeps reading the tiles of its own entry, not those of the new graph."""
+        graph = self.store.load_tiles('Helsinki, Finland', precision=7)
+        self.store.download = self.build_other_graph
+        read_tile = graph.read_tile
+
+        def read_tile_during_refresh(key):
+            if len(self.downloads) == 1:
+                self.store.refresh('Helsinki, Finland')
+                self.store.load_tiles('Helsinki, Finland', precision=7)
+            return read_tile(key)
+
+        graph.cache = TileCache(read_tile_during_refresh, 2 ** 20)
+        self.assertEqual(AStarOSMnx(graph).find_path(1, 3), ([1, 2, 3], 150.0))
+        self.assertEqual(len(self.downloads), 2)
+        self.assertEqual(DijkstraOSMnx(graph).distances_from(2, reverse=True).tolist(),
+                         [150.0, 50.0, 0.0])
+
+        new_graph = self.store.load_tiles('Helsinki, Finland', precision=7)
+        self.assertEqual(AStarOSMnx(new_graph).find_path(0, 3), ([0, 1, 2, 3], 320.0))
+
+    def test_graph_file_is_streamed_instead_of_downloaded(self):
+        """Tests that a graph file is cached without a download and gets a new entry when
+        it changes."""
+        path = os.path.join(self.directory.name, 'extract.osm')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(OSM_XML)
+        compact_graph = self.store.load(path)
+        self.assertEqual(self.downloads, [])
+        self.assertEqual(compact_graph.node_ids.tolist(), [1, 2, 3, 4, 5])
+        self.assertEqual(len(self.store.load_edge_attributes(path)['speeds']),
+                         compact_graph.edge_count)
+
+        key = self.store.key(path)
+        os.utime(path, ns=(0, 0))
+        self.assertNotEqual(self.store.key(path), key)
+
+    def test_tiles_are_split_once_and_stored_in_the_entry(self):
+        """Tests that the tiles of a graph are written into its entry on the first use."""
+        graph = self.store.load_tiles('Helsinki, Finland', precision=7)
+        self.assertEqual(graph.node_path([0, 1, 2]), [1, 2, 3])
+        self.assertEqual(graph.path_length([0, 1, 2]), 150.0)
+        self.assertEqual(os.path.dirname(graph.directory), self.store.path('Helsinki, Finland'))
+
+        manifest = os.path.join(graph.directory, 'manifest.bin')
+        modified = os.stat(manifest).st_mtime_ns
+        GraphStore(self.directory.name, download=None).load_tiles('Helsinki, Finland',
+                                                                  precision=7)
+        self.assertEqual(os.stat(manifest).st_mtime_ns, modified)
+        self.assertEqual(len(self.downloads), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import unittest
+import math
+import networkx as nx
+from utils.compact_graph import CompactGraph
+from utils.heuristics import (
+    Heuristic, EuclideanHeuristic, HaversineHeuristic, EquirectangularHeuristic,
+    TravelTimeHeuristic, MemoizedHeuristic
+)
+from algorithms.a_star import AStarOSMnx
+from algorithms.bidirectional_a_star import BidirectionalAStarOSMnx
+from algorithms.fringe_search import FringeSearchOSMnx
+from algorithms.landmarks import Landmarks, LandmarkHeuristic
+from tests.unit.landmarks_test import directed_grid
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Reference great-circle distance in meters."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * 6_371_009 * math.asin(math.sqrt(a))
+
+def grid_graph(size):
+    """Creates a size x size street grid around Helsinki with great-circle edge lengths."""
+    graph = nx.Graph()
+    for i in range(size):
+        for j in range(size):
+            graph.add_node(i * size + j, y=60.15 + i * 0.001, x=24.90 + j * 0.002)
+    for i in range(size):
+        for j in range(size):
+            node = i * size + j
+            for neighbor in ([node + 1] if j + 1 < size else []) + (
+                    [node + size] if i + 1 < size else []):
+                data_u, data_v = graph.nodes[node], graph.nodes[neighbor]
+                graph.add_edge(node, neighbor, length=haversine(
+                    data_u['y'], data_u['x'], data_v['y'], data_v['x']))
+    return graph
+
+class CountingHeuristic(EquirectangularHeuristic):
+    """Equirectangular heuristic counting its evaluations per node."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = {}
+
+    def make_estimator(self, goal):
+        estimate = super().make_estimator(goal)
+
+        def counting_estimate(node):
+            self.calls[node] = self.calls.get(node, 0) + 1
+            return estimate(node)
+        return counting_estimate
+
+class TestHeuristics(unittest.TestCase):
+    """Unit tests for the heuristics used by A* and Fringe Search."""
+
+    def setUp(self):
+        """Creates a grid graph and its compact representation."""
+        self.graph = grid_graph(15)
+        self.compact = CompactGraph.from_networkx(self.graph)
+
+    def test_haversine_matches_reference(self):
+        """Tests that the haversine heuristic gives great-circle distances in meters."""
+        estimate = HaversineHeuristic().estimator(self.compact, 0)
+        lat, lon = self.compact.coordinate(224)
+        expected = haversine(60.15, 24.90, lat, lon)
+        self.assertAlmostEqual(estimate(224), expected, places=3)
+        self.assertEqual(estimate(0), 0.0)
+
+    def test_metric_heuristics_are_admissible(self):
+        """Tests that the metric heuristics never exceed the shortest path length."""
+        distances = nx.single_source_dijkstra_path_length(self.graph, 0, weight='length')
+        for heuristic in (HaversineHeuristic(), EquirectangularHeuristic()):
+            estimate = heuristic.estimator(self.compact, self.compact.index_of(0))
+            for node, distance in distances.items():
+                self.assertLessEqual(estimate(self.compact.index_of(node)), distance + 1e-6)
+
+    def test_equirectangular_close_to_haversine(self):
+        """Tests that the equirectangular estimate stays within a few percent of haversine."""
+        equirectangular = EquirectangularHeuristic().estimator(self.compact, 0)
+        haversine_estimate = HaversineHeuristic().estimator(self.compact, 0)
+        ratio = equirectangular(224) / haversine_estimate(224)
+        self.assertGreater(ratio, 0.95)
+        self.assertLessEqual(ratio, 1.0)
+
+    def test_euclidean_in_degrees(self):
+        """Tests that the legacy heuristic returns raw degree distances."""
+        estimate = EuclideanHeuristic().estimator(self.compact, 0)
+        self.assertAlmostEqual(estimate(1), 0.002, places=9)
+
+    def test_travel_time_heuristic(self):
+        """Tests that the travel time heuristic divides the distance by the maximum speed."""
+        distance = EquirectangularHeuristic().estimator(self.compact, 0)
+        travel_time = TravelTimeHeuristic(max_speed_kph=36).estimator(self.compact, 0)
+        self.assertAlmostEqual(travel_time(224), distance(224) / 10, places=6)
+
+    def test_travel_time_heuristic_keeps_direction(self):
+        """Tests that reverse travel time estimates scale the reverse distance estimates."""
+        compact = CompactGraph.from_networkx(directed_grid(6, seed=1))
+        landmarks = LandmarkHeuristic(Landmarks.build(compact, count=2))
+        travel_time = TravelTimeHeuristic(max_speed_kph=36, distance_heuristic=landmarks)
+        distance = landmarks.estimator(compact, 0, reverse=True)
+        estimate = travel_time.estimator(compact, 0, reverse=True)
+        estimates = travel_time.estimate_all(compact, 0, reverse=True).tolist()
+        for node in range(compact.node_count):
+            self.assertAlmostEqual(estimate(node), distance(node) / 10)
+            self.assertAlmostEqual(estimates[node], estimate(node))
+
+    def test_missing_coordinates_give_zero(self):
+        """Tests that nodes without coordinates are estimated as zero."""
+        self.graph.add_node(1000)
+        compact = CompactGraph.from_networkx(self.graph)
+        for heuristic in (EuclideanHeuristic(), HaversineHeuristic(), EquirectangularHeuristic()):
+            estimate = heuristic.estimator(compact, compact.index_of(1000))
+            self.assertEqual(estimate(0), 0.0)
+
+    def test_precomputed_once_per_graph(self):
+        """Tests that the per-node values are reused for the same graph."""
+        heuristic = HaversineHeuristic()
+        heuristic.estimator(self.compact, 0)
+        values = heuristic.values
+        heuristic.estimator(self.compact, 5)
+        self.assertIs(heuristic.values, values)
+
+    def test_metric_heuristic_expands_fewer_nodes(self):
+        """Tests that the metric heuristic reduces expansions compared to degrees."""
+        for algorithm in (AStarOSMnx, FringeSearchOSMnx):
+            metric = algorithm(self.compact)
+            degrees = algorithm(self.compact, heuristic=EuclideanHeuristic())
+            _, metric_length = metric.find_path(105, 119)
+            _, degrees_length = degrees.find_path(105, 119)
+            self.assertAlmostEqual(metric_length, degrees_length, places=6)
+            self.assertLess(metric.nodes_expanded, degrees.nodes_expanded)
+
+    def test_estimate_all_matches_estimator(self):
+        """Tests that the vectorized estimates equal the estimate function."""
+        self.graph.add_node(1000)
+        compact = CompactGraph.from_networkx(self.graph)
+        for heuristic in (EuclideanHeuristic(), HaversineHeuristic(), EquirectangularHeuristic(),
+                          TravelTimeHeuristic()):
+            for goal in (0, 112):
+                estimate = heuristic.estimator(compact, goal)
+                expected = [estimate(node) for node in range(compact.node_count)]
+                estimates = heuristic.estimate_all(compact, goal).tolist()
+                for value, expected_value in zip(estimates, expected):
+                    self.assertAlmostEqual(value, expected_value, delta=1e-6)
+                self.assertEqual(estimates[-1], 0.0)
+
+    def test_estimate_all_default(self):
+        """Tests the node by node estimates of heuristics without a vectorized version."""
+        class IndexHeuristic(Heuristic):
+            """Estimates the difference of the node indices."""
+            def precompute(self, graph):
+                return ()
+
+            def make_estimator(self, goal):
+                return lambda node: float(abs(node - goal))
+
+        estimates = IndexHeuristic().estimate_all(self.compact, 3)
+        self.assertEqual(estimates[:5].tolist(), [3.0, 2.0, 1.0, 0.0, 1.0])
+
+    def test_memoized_heuristic_evaluates_nodes_once(self):
+        """Tests that Fringe Search evaluates each node once with the memoized heuristic."""
+        counting = CountingHeuristic()
+        plain_length = FringeSearchOSMnx(self.compact, heuristic=counting).find_path(105, 119)[1]
+        self.assertGreater(max(counting.calls.values()), 1)
+
+        counting.calls = {}
+        memoized = FringeSearchOSMnx(self.compact, heuristic=MemoizedHeuristic(counting))
+        self.assertAlmostEqual(memoized.find_path(105, 119)[1], plain_length, places=6)
+        self.assertEqual(max(counting.calls.values()), 1)
+
+        # A new query starts a new generation instead of reusing the old goal's values
+        counting.calls = {}
+        memoized.find_path(119, 105)
+        self.assertEqual(max(counting.calls.values()), 1)
+
+    def test_memoized_heuristic_gives_same_paths(self):
+        """Tests the lazy and vectorized modes with one- and two-sided searches."""
+        for vectorized in (False, True):
+            heuristic = MemoizedHeuristic(HaversineHeuristic(), vectorized=vectorized)
+            for algorithm in (AStarOSMnx, FringeSearchOSMnx, BidirectionalAStarOSMnx):
+                plain = algorithm(self.compact, heuristic=HaversineHeuristic())
+                memoized = algorithm(self.compact, heuristic=heuristic)
+                for start, goal in ((0, 224), (105, 119), (200, 3)):
+                    self.assertEqual(memoized.find_path(start, goal), plain.find_path(start, goal))
+
+if __name__ == '__main__':
+    unittest.main()
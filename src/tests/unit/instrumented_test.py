@@ -0,0 +1,70 @@
+import unittest
+from algorithms.a_star import AStarOSMnx
+from algorithms.fringe_search import FringeSearchOSMnx
+from algorithms.instrumented import (InstrumentedAStarOSMnx, InstrumentedReusableAStarOSMnx,
+                                     InstrumentedFringeSearchOSMnx)
+from algorithms.landmarks import Landmarks, LandmarkHeuristic
+from utils.compact_graph import CompactGraph
+from tests.unit.landmarks_test import directed_grid
+
+class TestInstrumentedSearch(unittest.TestCase):
+    """Unit tests for the search engines recording counters and phase timings."""
+
+    def setUp(self):
+        """Creates a directed grid graph."""
+        self.compact = CompactGraph.from_networkx(directed_grid(12, seed=4))
+        self.queries = [(0, 143), (5, 100), (77, 3), (9, 9)]
+
+    def test_same_results_as_plain_engines(self):
+        """Tests that instrumentation does not change the paths or expansion counts."""
+        heuristic = LandmarkHeuristic(Landmarks.build(self.compact, count=3))
+        for instrumented, plain in ((InstrumentedAStarOSMnx, AStarOSMnx),
+                                    (InstrumentedFringeSearchOSMnx, FringeSearchOSMnx)):
+            engine, reference = instrumented(self.compact, heuristic), plain(self.compact, heuristic)
+            for start, goal in self.queries:
+                self.assertEqual(engine.find_path(start, goal), reference.find_path(start, goal))
+                self.assertEqual(engine.stats.counters['nodes_expanded'],
+                                 reference.nodes_expanded)
+                self.assertEqual(set(engine.stats.phases), {'search', 'reconstruct'})
+
+    def test_a_star_heap_counters(self):
+        """Tests that every pushed entry is popped as an expansion or a stale entry."""
+        engine = InstrumentedAStarOSMnx(self.compact)
+        for start, goal in self.queries:
+            engine.find_path(start, goal)
+            counters = engine.stats.counters
+            self.assertEqual(counters['heap_pushes'] - counters['heap_pops'],
+                             len(engine.search_state.open_list))
+            self.assertEqual(counters['heap_pops'] - counters['stale_pops'],
+                             counters['nodes_expanded'])
+            self.assertLessEqual(counters['peak_queue_size'], counters['heap_pushes'])
+
+    def test_reusable_a_star_counts_only_new_work(self):
+        """Tests that a goal inside a kept search tree records no expansions."""
+        engine = InstrumentedReusableAStarOSMnx(self.compact)
+        path, _ = engine.find_path(0, 143)
+        counters = engine.stats.counters
+        self.assertEqual(counters['heap_pops'] - counters['stale_pops'],
+                         counters['nodes_expanded'])
+        self.assertLessEqual(counters['heap_pops'], counters['heap_pushes'])
+        self.assertGreater(counters['edges_relaxed'], 0)
+        engine.find_path(0, path[len(path) // 2])
+        self.assertEqual(dict(engine.stats.counters), {'nodes_expanded': 0})
+
+    def test_fringe_counters(self):
+        """Tests the iteration count and the peak fringe size against the fringe itself."""
+        engine = InstrumentedFringeSearchOSMnx(self.compact)
+        largest = []
+        expand_neighbors = engine.expand_neighbors
+
+        def measured(current, fringe, cache):
+            expand_neighbors(current, fringe, cache)
+            largest.append(len(list(fringe)))
+        engine.expand_neighbors = measured
+
+        engine.find_path(0, 143)
+        counters = engine.stats.counters
+        self.assertEqual(counters['peak_fringe_size'], max(largest))
+        self.assertEqual(engine.fringe_list.size, len(list(engine.fringe_list)))
+        self.assertGreaterEqual(counters['iterations'], 1)
+        self.assertGreaterEqual(counters['nodes_expanded'], counters['revisits'])
@@ -0,0 +1,117 @@
+import unittest
+import heapq
+import importlib.util
+import random
+import numpy as np
+import networkx as nx
+from algorithms import kernels
+from algorithms.a_star import AStarOSMnx
+from algorithms.fringe_search import FringeSearchOSMnx
+from algorithms.kernels import CompiledAStarOSMnx, CompiledFringeSearchOSMnx
+from algorithms.landmarks import Landmarks, LandmarkHeuristic
+from utils.compact_graph import CompactGraph
+from utils.heuristics import (EuclideanHeuristic, HaversineHeuristic, MemoizedHeuristic,
+                              TravelTimeHeuristic)
+from utils.synthetic_graphs import grid_graph
+from tests.unit.landmarks_test import directed_grid
+
+class TestKernels(unittest.TestCase):
+    """Unit tests asserting that the search kernels match the Python engines."""
+
+    def setUp(self):
+        """Creates a directed grid graph and random queries on it."""
+        self.compact = CompactGraph.from_networkx(directed_grid(10, seed=3))
+        rng = random.Random(5)
+        node_ids = self.compact.node_ids.tolist()
+        self.queries = [(rng.choice(node_ids), rng.choice(node_ids)) for _ in range(60)]
+
+    def assert_same_results(self, python_engine, kernel_engine, queries):
+        """Asserts that both engines find the same paths, lengths and expansions."""
+        for start, goal in queries:
+            expected = python_engine.find_path(start, goal)
+            self.assertEqual(kernel_engine.find_path(start, goal), expected)
+            self.assertEqual(kernel_engine.nodes_expanded, python_engine.nodes_expanded)
+
+    def test_kernel_selected_by_numba_availability(self):
+        """Tests that the kernels are compiled exactly when numba is installed."""
+        self.assertEqual(kernels.COMPILED, importlib.util.find_spec('numba') is not None)
+        self.assertEqual(CompiledAStarOSMnx(self.compact).use_kernel, kernels.COMPILED)
+
+    def test_heap_pops_in_heapq_order(self):
+        """Tests that the array heap pops (key, node) entries in the order of heapq."""
+        rng = random.Random(1)
+        keys = np.zeros(200)
+        nodes = np.zeros(200, dtype=np.int64)
+        size = 0
+        entries = []
+        popped, expected = [], []
+        for _ in range(200):
+            if entries and rng.random() < 0.4:
+                node, size = kernels.heap_pop(keys, nodes, size)
+                popped.append(node)
+                expected.append(heapq.heappop(entries)[1])
+            else:
+                entry = (float(rng.randint(0, 20)), rng.randint(0, 50))
+                size = kernels.heap_push(keys, nodes, size, *entry)
+                heapq.heappush(entries, entry)
+        self.assertEqual(popped, expected)
+
+    def test_astar_kernel_matches_python_engine(self):
+        """Tests that the A* kernel returns the paths and lengths of AStarOSMnx."""
+        self.assert_same_results(AStarOSMnx(self.compact),
+                                 CompiledAStarOSMnx(self.compact, use_kernel=True),
+                                 self.queries)
+
+    def test_fringe_kernel_matches_python_engine(self):
+        """Tests that the Fringe Search kernel returns the paths and lengths of
+        FringeSearchOSMnx."""
+        self.assert_same_results(FringeSearchOSMnx(self.compact),
+                                 CompiledFringeSearchOSMnx(self.compact, use_kernel=True),
+                                 self.queries)
+
+    def test_kernels_match_with_landmarks_and_travel_times(self):
+        """Tests the kernels with direction-dependent and travel time heuristics."""
+        graph = grid_graph(8, seed=2)
+        timed = graph.with_lengths(np.asarray(graph.lengths) * 3.6 / 50.0)
+        queries = [(start, goal) for start in range(0, 64, 9) for goal in range(3, 64, 7)]
+        for search_graph, heuristic in (
+                (graph, LandmarkHeuristic(Landmarks.build(graph, count=3))),
+                (timed, TravelTimeHeuristic(max_speed_kph=50.0))):
+            for python_class, kernel_class in ((AStarOSMnx, CompiledAStarOSMnx),
+                                               (FringeSearchOSMnx, CompiledFringeSearchOSMnx)):
+                self.assert_same_results(
+                    python_class(search_graph, heuristic=heuristic),
+                    kernel_class(search_graph, heuristic=heuristic, use_kernel=True), queries)
+
+    def test_kernels_match_with_coordinate_heuristics(self):
+        """Tests the kernels with the heuristics computed from the node coordinates."""
+        for heuristic in (EuclideanHeuristic(), HaversineHeuristic(),
+                          MemoizedHeuristic(HaversineHeuristic())):
+            for python_class, kernel_class in ((AStarOSMnx, CompiledAStarOSMnx),
+                                               (FringeSearchOSMnx, CompiledFringeSearchOSMnx)):
+                self.assert_same_results(
+                    python_class(self.compact, heuristic=heuristic),
+                    kernel_class(self.compact, heuristic=heuristic, use_kernel=True),
+                    self.queries[:20])
+
+    def test_kernel_estimates_only_the_nodes_it_reaches(self):
+        """Tests that a query does not estimate every node of the graph up front."""
+        engine = CompiledAStarOSMnx(self.compact, use_kernel=True)
+        engine.heuristic.make_estimates = None
+        node_ids = self.compact.node_ids.tolist()
+        self.assertEqual(engine.find_path(node_ids[0], node_ids[1])[0][-1], node_ids[1])
+        estimated = engine.kernel_state.memo[1]
+        self.assertLess(np.count_nonzero(estimated), self.compact.node_count)
+
+    def test_no_path_and_unknown_nodes(self):
+        """Tests that the kernels report missing paths and nodes like the Python engines."""
+        graph = nx.DiGraph()
+        graph.add_node(1, x=24.90, y=60.15)
+        graph.add_node(2, x=24.91, y=60.15)
+        graph.add_edge(2, 1, length=600.0)
+        for engine_class in (CompiledAStarOSMnx, CompiledFringeSearchOSMnx):
+            engine = engine_class(graph, use_kernel=True)
+            self.assertEqual(engine.find_path(1, 2), (None, float('inf')))
+            self.assertEqual(engine.find_path(1, 99), (None, float('inf')))
+            self.assertEqual(engine.find_path(2, 1), ([2, 1], 600.0))
+            self.assertEqual(engine.find_path(1, 1), ([1], 0.0))
@@ -0,0 +1,128 @@
+import unittest
+import os
+import random
+import tempfile
+import numpy as np
+import networkx as nx
+from algorithms.landmarks import Landmarks, LandmarkHeuristic
+from algorithms.a_star import AStarOSMnx
+from algorithms.fringe_search import FringeSearchOSMnx
+from algorithms.bidirectional_a_star import BidirectionalAStarOSMnx
+from utils.compact_graph import CompactGraph
+
+def directed_grid(size, seed):
+    """Creates a size x size grid where about a third of the streets are one-way."""
+    graph = nx.MultiDiGraph()
+    rng = random.Random(seed)
+    for i in range(size):
+        for j in range(size):
+            graph.add_node(i * size + j, x=24.90 + j * 0.002, y=60.15 + i * 0.001)
+    for i in range(size):
+        for j in range(size):
+            node = i * size + j
+            for neighbor in ([node + 1] if j + 1 < size else []) + (
+                    [node + size] if i + 1 < size else []):
+                length = rng.uniform(120.0, 200.0)
+                graph.add_edge(node, neighbor, length=length)
+                if rng.random() < 0.7:
+                    graph.add_edge(neighbor, node, length=length)
+    return graph
+
+class TestLandmarks(unittest.TestCase):
+    """Unit tests for the ALT landmark tables and LandmarkHeuristic."""
+
+    def setUp(self):
+        """Creates a directed grid graph and landmark tables for it."""
+        self.graph = directed_grid(10, seed=3)
+        self.compact = CompactGraph.from_networkx(self.graph)
+        self.landmarks = Landmarks.build(self.compact, count=4)
+
+    def test_tables_hold_shortest_distances(self):
+        """Tests the table shapes and compares the distances with NetworkX."""
+        self.assertEqual(self.landmarks.from_landmarks.shape, (100, 4))
+        self.assertEqual(self.landmarks.to_landmarks.dtype, np.float32)
+        self.assertEqual(len(set(self.landmarks.landmarks.tolist())), 4)
+
+        landmark = int(self.landmarks.landmarks[1])
+        node_id = int(self.compact.node_ids[landmark])
+        distances = nx.single_source_dijkstra_path_length(self.graph, node_id, weight='length')
+        for target, distance in distances.items():
+            index = self.compact.index_of(target)
+            self.assertAlmostEqual(self.landmarks.from_landmarks[index, 1], distance, delta=1e-3)
+
+    def test_strategies(self):
+        """Tests that both strategies select distinct landmarks and others are rejected."""
+        farthest = Landmarks.build(self.compact, count=5, strategy='farthest')
+        self.assertEqual(len(set(farthest.landmarks.tolist())), 5)
+        with self.assertRaises(ValueError):
+            Landmarks.build(self.compact, strategy='random')
+
+    def test_save_and_load(self):
+        """Tests that saved tables are loaded back unchanged."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'landmarks.npz')
+            self.landmarks.save(path)
+            loaded = Landmarks.load(path)
+        np.testing.assert_array_equal(loaded.landmarks, self.landmarks.landmarks)
+        np.testing.assert_array_equal(loaded.to_landmarks, self.landmarks.to_landmarks)
+        self.assertTrue(loaded.matches(self.compact))
+        self.assertFalse(loaded.matches(CompactGraph.from_networkx(directed_grid(5, seed=1))))
+        self.assertFalse(loaded.matches(self.compact.with_lengths(
+            np.asarray(self.compact.lengths) + 1.0)))
+
+    def test_heuristic_is_admissible(self):
+        """Tests that no estimate exceeds the real distance in either direction."""
+        heuristic = LandmarkHeuristic(self.landmarks)
+        goal_node = 57
+        goal = self.compact.index_of(goal_node)
+        to_goal = heuristic.estimator(self.compact, goal)
+        from_goal = heuristic.estimator(self.compact, goal, reverse=True)
+        distances_to = nx.single_source_dijkstra_path_length(
+            self.graph.reverse(), goal_node, weight='length')
+        distances_from = nx.single_source_dijkstra_path_length(
+            self.graph, goal_node, weight='length')
+
+        for node in self.graph.nodes:
+            index = self.compact.index_of(node)
+            self.assertLessEqual(to_goal(index), distances_to.get(node, float('inf')))
+            self.assertLessEqual(from_goal(index), distances_from.get(node, float('inf')))
+        self.assertEqual(to_goal(goal), 0.0)
+
+    def test_estimate_all_matches_estimator(self):
+        """Tests that the vectorized estimates equal the estimate function in both directions."""
+        heuristic = LandmarkHeuristic(self.landmarks)
+        for goal in (0, 57, 99):
+            for reverse in (False, True):
+                estimate = heuristic.estimator(self.compact, goal, reverse=reverse)
+                estimates = heuristic.estimate_all(self.compact, goal, reverse=reverse)
+                self.assertEqual(estimates.tolist(),
+                                 [estimate(node) for node in range(self.compact.node_count)])
+
+    def test_heuristic_rejects_other_graph(self):
+        """Tests that tables computed for another graph are not used."""
+        other = CompactGraph.from_networkx(directed_grid(5, seed=1))
+        with self.assertRaises(ValueError):
+            LandmarkHeuristic(self.landmarks).estimator(other, 0)
+
+    def test_searches_match_networkx(self):
+        """Compares A*, Fringe Search and bidirectional A* using ALT with NetworkX."""
+        heuristic = LandmarkHeuristic(self.landmarks)
+        engines = [engine(self.compact, heuristic=heuristic) for engine in (
+            AStarOSMnx, FringeSearchOSMnx, BidirectionalAStarOSMnx)]
+        random.seed(8)
+
+        for _ in range(40):
+            start_node, goal_node = random.sample(list(self.graph.nodes), 2)
+            try:
+                expected = nx.shortest_path_length(
+                    self.graph, source=start_node, target=goal_node, weight='length')
+            except nx.NetworkXNoPath:
+                expected = float('inf')
+            for engine in engines:
+                path, length = engine.find_path(start_node, goal_node)
+                self.assertAlmostEqual(length, expected, delta=1e-3)
+                if path is not None:
+                    self.assertEqual((path[0], path[-1]), (start_node, goal_node))
+
+if __name__ == '__main__':
+    unittest.main()
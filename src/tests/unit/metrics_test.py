@@ -0,0 +1,55 @@
+import unittest
+from utils.metrics import SearchStats, PhaseTimer, MetricsRegistry
+
+class TestMetrics(unittest.TestCase):
+    """Unit tests for the search stats, phase timer and Prometheus metrics registry."""
+
+    def test_peak_keeps_largest_value(self):
+        """Tests that peak counters only grow."""
+        stats = SearchStats()
+        for value in (3, 7, 5):
+            stats.peak('peak_queue_size', value)
+        stats.counters['heap_pushes'] += 2
+        self.assertEqual(stats.as_dict(), {'counters': {'peak_queue_size': 7, 'heap_pushes': 2},
+                                           'phases': {}})
+
+    def test_phase_timer(self):
+        """Tests that enabled timers add up phases and disabled timers measure nothing."""
+        timer = PhaseTimer()
+        for _ in range(2):
+            with timer.phase('snap'):
+                pass
+        self.assertEqual(list(timer.phases), ['snap'])
+        self.assertGreater(timer.phases['snap'], 0)
+
+        disabled = PhaseTimer(enabled=False)
+        with disabled.phase('snap'):
+            pass
+        self.assertEqual(disabled.phases, {})
+
+    def test_render_prometheus_text(self):
+        """Tests that totals are summed, peaks maximized and phases summarized per label."""
+        registry = MetricsRegistry()
+        registry.observe('astar', {'heap_pushes': 10, 'peak_queue_size': 4},
+                         {'search': 2_000_000_000})
+        registry.observe('astar', {'heap_pushes': 5, 'peak_queue_size': 9},
+                         {'search': 1_000_000_000})
+        registry.observe('fringe', {'iterations': 3})
+        self.assertEqual(registry.render().splitlines(), [
+            '# TYPE route_heap_pushes_total counter',
+            'route_heap_pushes_total{algorithm="astar"} 15',
+            '# TYPE route_iterations_total counter',
+            'route_iterations_total{algorithm="fringe"} 3',
+            '# TYPE route_queries_total counter',
+            'route_queries_total{algorithm="astar"} 2',
+            'route_queries_total{algorithm="fringe"} 1',
+            '# TYPE route_peak_queue_size gauge',
+            'route_peak_queue_size{algorithm="astar"} 9',
+            '# TYPE route_phase_seconds summary',
+            'route_phase_seconds_sum{algorithm="astar",phase="search"} 3.0',
+            'route_phase_seconds_count{algorithm="astar",phase="search"} 2'
+        ])
+
+    def test_empty_registry_renders_nothing(self):
+        """Tests that a registry without observations renders an empty exposition."""
+        self.assertEqual(MetricsRegistry().render(), '')
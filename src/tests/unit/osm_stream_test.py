@@ -0,0 +1,150 @@
+import unittest
+import bz2
+import os
+import tempfile
+import networkx as nx
+import numpy as np
+import osmnx as ox
+from utils.compact_graph import CompactGraph
+from utils.osm_stream import load_graph_file, keeps_way, way_direction, is_graph_file
+from tests.unit.landmarks_test import directed_grid
+
+OSM_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6" generator="test">
+ <bounds minlat="60.0" minlon="24.0" maxlat="60.01" maxlon="24.01"/>
+ <node id="1" lat="60.000" lon="24.000"/>
+ <node id="2" lat="60.001" lon="24.000"/>
+ <node id="3" lat="60.002" lon="24.000"><tag k="highway" v="traffic_signals"/></node>
+ <node id="4" lat="60.002" lon="24.002"/>
+ <node id="5" lat="60.000" lon="24.002"/>
+ <node id="6" lat="60.005" lon="24.005"/>
+ <way id="10">
+  <nd ref="1"/><nd ref="2"/><nd ref="3"/>
+  <tag k="highway" v="residential"/>
+ </way>
+ <way id="11">
+  <nd ref="3"/><nd ref="4"/>
+  <tag k="highway" v="primary"/><tag k="oneway" v="yes"/><tag k="maxspeed" v="60"/>
+ </way>
+ <way id="12">
+  <nd ref="4"/><nd ref="5"/>
+  <tag k="highway" v="footway"/>
+ </way>
+ <way id="13">
+  <nd ref="1"/><nd ref="5"/>
+  <tag k="highway" v="tertiary"/><tag k="oneway" v="-1"/>
+ </way>
+ <way id="14">
+  <nd ref="4"/><nd ref="99"/>
+  <tag k="highway" v="residential"/>
+ </way>
+ <way id="15">
+  <nd ref="6"/><nd ref="4"/>
+  <tag k="building" v="yes"/>
+ </way>
+ <way id="16">
+  <nd ref="4"/><nd ref="5"/>
+  <tag k="highway" v="residential"/><tag k="oneway" v="yes"/>
+ </way>
+ <way id="17">
+  <nd ref="3"/><nd ref="6"/>
+  <tag k="highway" v="residential"/><tag k="oneway" v="yes"/>
+ </way>
+ <relation id="20">
+  <member type="way" ref="10" role=""/><tag k="type" v="route"/>
+ </relation>
+</osm>
+"""
+
+class TestOsmStream(unittest.TestCase):
+    """Unit tests for the streaming OSM and GraphML loader."""
+
+    def setUp(self):
+        """Writes a small OSM extract into a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.osm_file = os.path.join(self.directory.name, 'extract.osm')
+        with open(self.osm_file, 'w', encoding='utf-8') as file:
+            file.write(OSM_XML)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def edges(self, graph):
+        """Returns the edges of a graph as (source ID, target ID) pairs."""
+        return sorted(zip(graph.node_ids[graph.sources()].tolist(),
+                          graph.node_ids[np.asarray(graph.targets)].tolist()))
+
+    def test_drive_network_follows_filters_and_one_way_streets(self):
+        """Tests that footways, untagged ways, edges to missing nodes and nodes outside the
+        largest strongly connected component are dropped and that one-way streets have a
+        single direction."""
+        graph, attributes = load_graph_file(self.osm_file)
+        self.assertEqual(graph.node_ids.tolist(), [1, 2, 3, 4, 5])
+        self.assertEqual(self.edges(graph),
+                         [(1, 2), (2, 1), (2, 3), (3, 2), (3, 4), (4, 5), (5, 1)])
+        self.assertAlmostEqual(float(graph.path_length([0, 1, 2])), 222.39, places=1)
+
+        speeds = dict(zip(self.edges(graph), attributes['speeds'].tolist()))
+        self.assertEqual(speeds[(3, 4)], 60.0)
+        self.assertEqual(speeds[(5, 1)], 50.0)
+        self.assertEqual(len(attributes['road_classes']), graph.edge_count)
+
+    def test_walk_network_is_bidirectional(self):
+        """Tests that the walking network includes footways in both directions."""
+        graph, _ = load_graph_file(self.osm_file, network_type='walk')
+        self.assertIn((4, 5), self.edges(graph))
+        self.assertIn((4, 3), self.edges(graph))
+        self.assertIn((6, 3), self.edges(graph))
+        self.assertEqual(graph.edge_count, 12)
+
+    def test_compressed_file_and_small_chunks(self):
+        """Tests that compressed files and chunked node matching give the same graph."""
+        compressed = self.osm_file + '.bz2'
+        with open(self.osm_file, 'rb') as source, bz2.open(compressed, 'wb') as target:
+            target.write(source.read())
+        expected, _ = load_graph_file(self.osm_file)
+        graph, _ = load_graph_file(compressed, chunk_size=2)
+        np.testing.assert_array_equal(graph.node_ids, expected.node_ids)
+        np.testing.assert_array_equal(graph.targets, expected.targets)
+        np.testing.assert_array_equal(graph.lengths, expected.lengths)
+
+    def test_graphml_matches_networkx_conversion(self):
+        """Tests that a GraphML file saved by OSMnx streams into the same routing graph as
+        converting the NetworkX graph."""
+        graph = nx.MultiDiGraph(directed_grid(5, seed=1), crs='epsg:4326')
+        for _, _, data in graph.edges(data=True):
+            data.update(highway='residential', oneway=False)
+        graph.add_edge(0, 1, length=1.0, highway='footway', oneway=False)
+        path = os.path.join(self.directory.name, 'graph.graphml')
+        ox.save_graphml(graph, path)
+
+        streamed, _ = load_graph_file(path, network_type='drive')
+        graph.remove_edge(0, 1, key=1)
+        expected = CompactGraph.from_networkx(
+            graph.subgraph(max(nx.strongly_connected_components(graph), key=len)))
+        np.testing.assert_array_equal(streamed.node_ids, expected.node_ids)
+        np.testing.assert_array_equal(streamed.offsets, expected.offsets)
+        np.testing.assert_array_equal(streamed.targets, expected.targets)
+        np.testing.assert_allclose(streamed.lengths, expected.lengths)
+        np.testing.assert_allclose(streamed.lat, expected.lat)
+
+    def test_filters_and_directions(self):
+        """Tests the OSMnx network filters and one-way rules."""
+        self.assertTrue(keeps_way({'highway': 'residential'}, 'drive'))
+        self.assertFalse(keeps_way({'highway': 'service', 'service': 'parking_aisle'},
+                                   'drive_service'))
+        self.assertFalse(keeps_way({'highway': 'motorway'}, 'walk'))
+        self.assertFalse(keeps_way({'highway': "['residential', 'footway']"}, 'drive'))
+        self.assertFalse(keeps_way({'highway': 'primary', 'access': 'private'}, 'drive'))
+        self.assertTrue(keeps_way({'highway': 'primary', 'access': 'private'}, 'all'))
+        self.assertEqual(way_direction({'junction': 'roundabout'}, 'drive'), 1)
+        self.assertEqual(way_direction({'oneway': 'yes'}, 'walk'), 0)
+        self.assertTrue(is_graph_file('finland-latest.osm.pbf'))
+        self.assertFalse(is_graph_file(['Helsinki, Finland']))
+
+    def test_invalid_arguments(self):
+        """Tests that unknown network and file types are rejected."""
+        with self.assertRaises(ValueError):
+            load_graph_file(self.osm_file, network_type='boat')
+        with self.assertRaises(ValueError):
+            load_graph_file(os.path.join(self.directory.name, 'graph.json'))
@@ -0,0 +1,91 @@
+import unittest
+import random
+import networkx as nx
+from algorithms.a_star import AStarOSMnx
+from algorithms.reusable_a_star import ReusableAStarOSMnx
+from algorithms.landmarks import Landmarks, LandmarkHeuristic
+from utils.compact_graph import CompactGraph
+from tests.unit.landmarks_test import directed_grid
+
+class TestReusableAStarOSMnx(unittest.TestCase):
+    """Unit tests for A* reusing the search trees of earlier queries."""
+
+    def setUp(self):
+        """Creates a directed grid graph and an engine over it."""
+        self.graph = directed_grid(12, seed=6)
+        self.compact = CompactGraph.from_networkx(self.graph)
+        self.engine = ReusableAStarOSMnx(self.compact, max_trees=2)
+
+    def assert_shortest(self, path, length, start, goal):
+        """Asserts that a path is a shortest path between two nodes."""
+        try:
+            expected = nx.shortest_path_length(self.graph, start, goal, weight='length')
+        except nx.NetworkXNoPath:
+            self.assertIsNone(path)
+            return
+        self.assertAlmostEqual(length, expected, delta=1e-6)
+        self.assertEqual((path[0], path[-1]), (start, goal))
+        self.assertAlmostEqual(nx.path_weight(self.graph, path, weight='length'), length,
+                               delta=1e-6)
+
+    def test_repeated_starts_give_shortest_paths(self):
+        """Tests continued searches from a few starts against NetworkX."""
+        random.seed(2)
+        landmarks = LandmarkHeuristic(Landmarks.build(self.compact, count=3))
+        for engine in (self.engine, ReusableAStarOSMnx(self.compact, landmarks, max_trees=2)):
+            for _ in range(60):
+                start, goal = random.choice([0, 77, 143]), random.randrange(144)
+                self.assert_shortest(*engine.find_path(start, goal), start, goal)
+
+    def test_goal_in_tree_needs_no_expansions(self):
+        """Tests that a goal closed by an earlier query is answered from the tree."""
+        path, length = self.engine.find_path(0, 143)
+        self.assertGreater(self.engine.nodes_expanded, 0)
+        self.assertEqual(self.engine.find_path(0, path[len(path) // 2])[0],
+                         path[:len(path) // 2 + 1])
+        self.assertEqual(self.engine.nodes_expanded, 0)
+        self.assertEqual(self.engine.find_path(0, 143), (path, length))
+
+    def test_moved_goal_expands_less_than_new_search(self):
+        """Tests that moving the goal continues the search instead of restarting it."""
+        self.engine.find_path(0, 130)
+        self.engine.find_path(0, 143)
+        fresh = AStarOSMnx(self.compact)
+        fresh.find_path(0, 143)
+        self.assertLess(self.engine.nodes_expanded, fresh.nodes_expanded)
+
+    def test_bounded_retention(self):
+        """Tests that only the most recently used trees are kept."""
+        for start in (0, 1, 2, 1):
+            self.engine.find_path(start, 143)
+        self.assertEqual(list(self.engine._trees), [2, 1])  # pylint: disable=protected-access
+
+    def test_reached_nodes_share_a_budget(self):
+        """Tests that the kept trees stay within max_reached_nodes, dropping the least
+        recently used trees first and a tree outgrowing the budget while it grows."""
+        engine = ReusableAStarOSMnx(self.compact)
+        engine.find_path(0, 143)
+        budget = len(engine._trees[0].g_scores) + 10  # pylint: disable=protected-access
+
+        engine = ReusableAStarOSMnx(self.compact, max_reached_nodes=budget)
+        engine.find_path(0, 5)
+        engine.find_path(0, 143)
+        engine.find_path(143, 0)
+        trees = engine._trees  # pylint: disable=protected-access
+        self.assertEqual(list(trees), [143])
+        self.assertLessEqual(len(trees[143].g_scores), budget)
+
+        engine = ReusableAStarOSMnx(self.compact, max_reached_nodes=5)
+        kept = []
+        relax_edges = engine.relax_edges
+
+        def recorded(tree, current, heuristic):
+            relax_edges(tree, current, heuristic)
+            kept.append(0 in engine._trees)  # pylint: disable=protected-access
+        engine.relax_edges = recorded
+        self.assert_shortest(*engine.find_path(0, 143), 0, 143)
+        self.assertEqual((kept[0], kept[-1]), (True, False))
+        self.assertLess(kept.index(False), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import os
+import tempfile
+from utils.route_cache import RouteCache, SqliteRouteStore
+
+class TestRouteCache(unittest.TestCase):
+    """Unit tests for the LRU/TTL route cache and its shared SQLite store."""
+
+    def setUp(self):
+        """Creates a small cache with a manually advanced clock."""
+        self.now = 1000.0
+        self.cache = RouteCache(max_entries=2, ttl=60.0, version='v1', clock=lambda: self.now)
+
+    def test_hit_and_miss(self):
+        """Tests that cached results are returned and counted."""
+        self.assertIsNone(self.cache.get(('astar', 1, 2, 'length')))
+        self.cache.put(('astar', 1, 2, 'length'), ([1, 2], 100.0))
+        self.assertEqual(self.cache.get(('astar', 1, 2, 'length')), ([1, 2], 100.0))
+        self.assertIsNone(self.cache.get(('fringe', 1, 2, 'length')))
+        self.assertEqual(self.cache.stats(),
+                         {'hits': 1, 'shared_hits': 0, 'misses': 2, 'evictions': 0, 'size': 1})
+
+    def test_least_recently_used_is_evicted(self):
+        """Tests that the entry used least recently is evicted first."""
+        self.cache.put(('astar', 1, 2, 'length'), 'a')
+        self.cache.put(('astar', 1, 3, 'length'), 'b')
+        self.cache.get(('astar', 1, 2, 'length'))
+        self.cache.put(('astar', 1, 4, 'length'), 'c')
+        self.assertEqual(self.cache.get(('astar', 1, 2, 'length')), 'a')
+        self.assertIsNone(self.cache.get(('astar', 1, 3, 'length')))
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_entries_expire(self):
+        """Tests that entries older than the TTL are not returned."""
+        self.cache.put(('astar', 1, 2, 'length'), 'a')
+        self.now += 59.0
+        self.assertEqual(self.cache.get(('astar', 1, 2, 'length')), 'a')
+        self.now += 2.0
+        self.assertIsNone(self.cache.get(('astar', 1, 2, 'length')))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_invalidate_on_new_graph_version(self):
+        """Tests that a new graph version drops every entry."""
+        self.cache.put(('astar', 1, 2, 'length'), 'a')
+        self.cache.invalidate('v2')
+        self.assertIsNone(self.cache.get(('astar', 1, 2, 'length')))
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_results_of_an_old_version_are_not_returned(self):
+        """Tests that a result put for the graph version before invalidate() is kept apart
+        from the routes of the new version."""
+        self.cache.invalidate('v2')
+        self.cache.put(('astar', 1, 2, 'length'), 'old', version='v1')
+        self.assertIsNone(self.cache.get(('astar', 1, 2, 'length')))
+        self.assertEqual(self.cache.get(('astar', 1, 2, 'length'), version='v1'), 'old')
+
+    def test_shared_store(self):
+        """Tests that caches of different processes share results through the store."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'routes.sqlite')
+            self.cache.store = SqliteRouteStore(path)
+            self.cache.put(('astar', 1, 2, 'length'), [[1, 2], float('inf')])
+
+            other = RouteCache(ttl=60.0, store=SqliteRouteStore(path), version='v1',
+                               clock=lambda: self.now)
+            self.assertEqual(other.get(('astar', 1, 2, 'length')), [[1, 2], float('inf')])
+            self.assertEqual(other.get(('astar', 1, 2, 'length')), [[1, 2], float('inf')])
+            self.assertEqual(other.stats()['shared_hits'], 1)
+            self.assertEqual(other.stats()['hits'], 1)
+
+            other.invalidate('v2')
+            self.assertIsNone(other.get(('astar', 1, 2, 'length')))
+            self.now += 61.0
+            self.assertIsNone(RouteCache(store=SqliteRouteStore(path), version='v1',
+                                         clock=lambda: self.now).get(('astar', 1, 2, 'length')))
+
+    def test_store_purges_surplus_rows(self):
+        """Tests that the store keeps at most max_entries rows."""
+        with tempfile.TemporaryDirectory() as directory:
+            store = SqliteRouteStore(os.path.join(directory, 'routes.sqlite'), max_entries=3)
+            store.PURGE_INTERVAL = 5
+            for i in range(10):
+                store.put(('v1', 'astar', i, 0, 'length'), (100.0 + i, i), 0.0)
+            rows = store.connection().execute('SELECT COUNT(*) FROM routes').fetchone()[0]
+            self.assertEqual(rows, 3)
+            self.assertIsNotNone(store.get(('v1', 'astar', 9, 0, 'length'), 0.0))
+
+if __name__ == '__main__':
+    unittest.main()
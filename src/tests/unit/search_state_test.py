@@ -0,0 +1,65 @@
+import unittest
+import threading
+import networkx as nx
+from algorithms.search_state import SearchState
+from algorithms.a_star import AStarOSMnx
+
+class TestSearchState(unittest.TestCase):
+    """Unit tests for the generation-stamped SearchState and its reuse in AStarOSMnx."""
+
+    def setUp(self):
+        """Creates a state for five nodes."""
+        self.state = SearchState(5)
+
+    def test_reset_invalidates_previous_query(self):
+        """Tests that entries of an older generation are treated as unvisited."""
+        self.state.reset(0)
+        self.state.visit(3, 42.0, 0)
+        self.assertEqual(self.state.g_score(3), 42.0)
+
+        self.state.reset(1)
+        self.assertEqual(self.state.g_score(3), float('inf'))
+        self.assertEqual(self.state.g_score(1), 0.0)
+
+    def test_reconstruct_path(self):
+        """Tests following parent pointers back to the start node."""
+        self.state.reset(2)
+        self.state.visit(4, 1.0, 2)
+        self.state.visit(0, 2.0, 4)
+        self.assertEqual(self.state.reconstruct_path(0), [2, 4, 0])
+
+    def test_engine_reuses_state_between_queries(self):
+        """Tests that consecutive queries share the arrays and do not leak into each other."""
+        graph = nx.Graph()
+        graph.add_edge(1, 2, length=1000.0)
+        graph.add_edge(2, 3, length=2000.0)
+        graph.add_edge(3, 4, length=1000.0)
+        graph.add_node(5)
+        astar = AStarOSMnx(graph)
+
+        path, length = astar.find_path(1, 4)
+        state = astar.search_state
+        self.assertEqual(path, [1, 2, 3, 4])
+
+        path, length = astar.find_path(4, 2)
+        self.assertIs(astar.search_state, state)
+        self.assertEqual(path, [4, 3, 2])
+        self.assertAlmostEqual(length, 3000.0)
+
+        path, length = astar.find_path(1, 5)
+        self.assertIsNone(path)
+        self.assertEqual(length, float('inf'))
+
+    def test_state_per_thread(self):
+        """Tests that every thread gets its own state from a shared engine."""
+        graph = nx.Graph()
+        graph.add_edge(1, 2, length=1.0)
+        astar = AStarOSMnx(graph)
+        states = []
+        thread = threading.Thread(target=lambda: states.append(astar.search_state))
+        thread.start()
+        thread.join()
+        self.assertIsNot(states[0], astar.search_state)
+
+if __name__ == '__main__':
+    unittest.main()
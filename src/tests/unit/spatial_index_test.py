@@ -0,0 +1,67 @@
+import unittest
+import os
+import tempfile
+import numpy as np
+import networkx as nx
+from utils.compact_graph import CompactGraph
+from utils.spatial_index import SpatialIndex
+
+class TestSpatialIndex(unittest.TestCase):
+    """Unit tests for batched nearest-node and nearest-edge snapping."""
+
+    def setUp(self):
+        """Creates an L-shaped street of three nodes, each segment about 1.1 km long."""
+        self.graph = nx.MultiDiGraph()
+        self.graph.add_edge(1, 2, length=1113.0)
+        self.graph.add_edge(2, 3, length=1113.0)
+        self.graph.nodes[1]['y'], self.graph.nodes[1]['x'] = 60.00, 25.00
+        self.graph.nodes[2]['y'], self.graph.nodes[2]['x'] = 60.01, 25.00
+        self.graph.nodes[3]['y'], self.graph.nodes[3]['x'] = 60.01, 25.02
+        self.graph.add_node(4)  # No coordinates
+        self.compact = CompactGraph.from_networkx(self.graph)
+        self.index = self.compact.spatial_index
+
+    def test_nearest_nodes_batch(self):
+        """Tests that a batch query matches single lookups point by point."""
+        rng = np.random.default_rng(0)
+        lat = rng.uniform(59.99, 60.02, 50)
+        lon = rng.uniform(24.99, 25.03, 50)
+        nodes = self.index.nearest_nodes(lat, lon)
+        self.assertEqual(nodes.tolist(),
+                         [self.index.nearest(a, b) for a, b in zip(lat, lon)])
+        self.assertNotIn(3, nodes.tolist())
+
+    def test_nearest_edges(self):
+        """Tests that points snap to the closest edge and the position along it."""
+        sources, targets, fractions = self.index.nearest_edges(
+            np.array([60.0025, 60.0105]), np.array([25.0001, 25.015]), self.compact)
+        self.assertEqual(sources.tolist(), [0, 1])
+        self.assertEqual(targets.tolist(), [1, 2])
+        self.assertAlmostEqual(fractions[0], 0.25, places=2)
+        self.assertAlmostEqual(fractions[1], 0.75, places=2)
+
+    def test_nearest_edge_prefers_segment_over_closer_node(self):
+        """Tests that the edge distance, not the node distance, decides the edge."""
+        # Close to the middle of the first edge but nearer to node 2 than to node 1
+        sources, targets, _ = self.index.nearest_edges(60.006, 25.0003, self.compact)
+        self.assertEqual((int(sources[0]), int(targets[0])), (0, 1))
+
+    def test_save_and_load_edge_samples(self):
+        """Tests that an index over the mapped edge samples gives the same answers as the
+        index that sampled the edges."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'spatial_index.bin')
+            self.index.save_edge_samples(path, self.compact)
+            restored = SpatialIndex(self.index.x, self.index.y, self.index.origin)
+            restored.load_edge_samples(path)
+            self.assertFalse(restored.edge_samples['points'].flags.writeable)
+
+            lat, lon = np.array([60.0025, 60.0105]), np.array([25.0001, 25.015])
+            self.assertEqual(restored.nearest_nodes(lat, lon).tolist(),
+                             self.index.nearest_nodes(lat, lon).tolist())
+            for restored_array, array in zip(restored.nearest_edges(lat, lon, self.compact),
+                                             self.index.nearest_edges(lat, lon, self.compact)):
+                np.testing.assert_array_equal(restored_array, array)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import random
+import numpy as np
+from algorithms.a_star import AStarOSMnx
+from algorithms.dijkstra import DijkstraOSMnx
+from utils.heuristics import HaversineHeuristic
+from utils.synthetic_graphs import grid_graph, road_like_graph
+
+class TestSyntheticGraphs(unittest.TestCase):
+    """Unit tests for the network-free benchmark graph generators."""
+
+    def test_grid_shape(self):
+        """Tests the node and edge counts of a grid without one-way streets."""
+        graph = grid_graph(5, one_way=0.0)
+        self.assertEqual(graph.node_count, 25)
+        self.assertEqual(graph.edge_count, 2 * 2 * 5 * 4)
+        self.assertEqual(sorted(target for target, _ in graph.neighbors(6)), [1, 5, 7, 11])
+
+    def test_same_seed_gives_same_graph(self):
+        """Tests that the generators are reproducible."""
+        for generate in (grid_graph, road_like_graph):
+            first, second, other = generate(30, seed=1), generate(30, seed=1), generate(30, seed=2)
+            np.testing.assert_array_equal(first.lengths, second.lengths)
+            np.testing.assert_array_equal(first.targets, second.targets)
+            self.assertFalse(np.array_equal(first.lengths, other.lengths))
+
+    def test_streets_are_not_shorter_than_straight_lines(self):
+        """Tests that the haversine estimate of every edge is a lower bound of its length."""
+        for graph in (grid_graph(10, seed=3), road_like_graph(500, seed=3)):
+            estimates = HaversineHeuristic().estimate_all(graph, 0)
+            for node in range(graph.node_count):
+                for neighbor, length in graph.neighbors(node):
+                    self.assertLessEqual(abs(estimates[node] - estimates[neighbor]), length)
+
+    def test_a_star_matches_dijkstra(self):
+        """Tests that A* finds the shortest routes on the generated graphs."""
+        random.seed(4)
+        for graph in (grid_graph(15, seed=4), road_like_graph(800, seed=4)):
+            a_star, dijkstra = AStarOSMnx(graph), DijkstraOSMnx(graph)
+            for _ in range(20):
+                start, goal = random.randrange(graph.node_count), random.randrange(graph.node_count)
+                self.assertAlmostEqual(a_star.find_path(start, goal)[1],
+                                       dijkstra.find_path(start, goal)[1], delta=1e-6)
@@ -0,0 +1,97 @@
+import unittest
+import random
+import tempfile
+import numpy as np
+from algorithms.a_star import AStarOSMnx
+from algorithms.fringe_search import FringeSearchOSMnx
+from algorithms.bidirectional_a_star import BidirectionalAStarOSMnx
+from algorithms.dijkstra import DijkstraOSMnx
+from algorithms.kernels import CompiledFringeSearchOSMnx
+from utils.compact_graph import CompactGraph
+from utils.tiled_graph import TileGrid, TiledGraph, save_tiles
+from tests.unit.landmarks_test import directed_grid
+
+class TestTiledGraph(unittest.TestCase):
+    """Unit tests for the graph split into lazily loaded geohash tiles."""
+
+    def setUp(self):
+        """Splits a directed grid graph into tiles in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.compact = CompactGraph.from_networkx(directed_grid(15, seed=4))
+        save_tiles(self.compact, self.directory.name, precision=6)
+        self.tiled = TiledGraph(self.directory.name)
+        rng = random.Random(2)
+        node_ids = self.compact.node_ids.tolist()
+        self.queries = [(rng.choice(node_ids), rng.choice(node_ids)) for _ in range(40)]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_geohash_grid(self):
+        """Tests that the cells are named by their geohash."""
+        grid = TileGrid(11)
+        row, column = grid.cells(57.64911, 10.40744)
+        self.assertEqual(grid.geohash(int(row), int(column)), 'u4pruydqqvj')
+        grid = TileGrid(5)
+        row, column = grid.cells(60.17, 24.94)
+        self.assertEqual(grid.geohash(int(row), int(column)), 'ud9wr')
+        self.assertEqual(grid.geohash(int(row) + 1, int(column)), 'ud9wx')
+
+    def test_tiles_hold_the_edges_of_the_graph(self):
+        """Tests that the tiles give every node the edges, IDs and coordinates it has in the
+        graph, in both directions."""
+        self.assertGreater(len(self.tiled.tile_keys), 4)
+        self.assertEqual(self.tiled.edge_count, self.compact.edge_count)
+        for graph, tiled in ((self.compact, self.tiled),
+                             (self.compact.reverse, self.tiled.reverse)):
+            for index in range(graph.node_count):
+                self.assertEqual(list(tiled.neighbors(index)), list(graph.neighbors(index)))
+                self.assertEqual(tiled.out_degree(index), graph.out_degree(index))
+        indices = self.tiled.indices_of([17, 3, 200])
+        self.assertEqual(self.tiled.node_path(indices), [17, 3, 200])
+        self.assertEqual(self.tiled.coordinates(indices), self.compact.coordinates(indices))
+        self.assertIsNone(self.tiled.index_of(10 ** 6))
+
+    def test_searches_match_the_compact_graph(self):
+        """Tests that the search engines find the same paths and lengths on the tiles."""
+        for engine_class in (AStarOSMnx, FringeSearchOSMnx, BidirectionalAStarOSMnx,
+                             CompiledFringeSearchOSMnx):
+            expected_engine = engine_class(self.compact)
+            engine = engine_class(self.tiled)
+            for start, goal in self.queries:
+                self.assertEqual(engine.find_path(start, goal),
+                                 expected_engine.find_path(start, goal))
+        np.testing.assert_array_equal(DijkstraOSMnx(self.tiled).distances_from(5, reverse=True),
+                                      DijkstraOSMnx(self.compact).distances_from(5, reverse=True))
+
+    def test_tiles_are_loaded_on_demand_and_evicted_under_the_budget(self):
+        """Tests that opening the graph loads no tiles, a short search only the tiles it
+        reaches, and that the least recently used tiles are evicted beyond the budget."""
+        self.assertEqual(self.tiled.cache.stats()['loads'], 0)
+        path, _ = AStarOSMnx(self.tiled).find_path(0, 1)
+        self.assertEqual(path, [0, 1])
+        self.assertLess(self.tiled.cache.stats()['loads'], len(self.tiled.tile_keys))
+
+        tile_bytes = self.tiled.tile(0).nbytes
+        budget = 2 * tile_bytes
+        tiled = TiledGraph(self.directory.name, memory_budget=budget)
+        engine = AStarOSMnx(tiled)
+        for start, goal in self.queries:
+            self.assertEqual(engine.find_path(start, goal),
+                             AStarOSMnx(self.compact).find_path(start, goal))
+            stats = tiled.cache.stats()
+            self.assertTrue(stats['bytes'] <= budget or stats['tiles'] == 1)
+        self.assertGreater(tiled.cache.stats()['evictions'], 0)
+
+    def test_nearest_nodes_match_the_spatial_index(self):
+        """Tests that nearest nodes found from the tiles around a point are the nearest nodes
+        of the whole graph, also for points outside the graph."""
+        rng = np.random.default_rng(1)
+        lat = rng.uniform(60.14, 60.17, 50)
+        lon = rng.uniform(24.88, 24.94, 50)
+        np.testing.assert_array_equal(self.tiled.spatial_index.nearest_nodes(lat, lon),
+                                      self.compact.spatial_index.nearest_nodes(lat, lon))
+        self.assertEqual(self.tiled.spatial_index.nearest(61.0, 24.9),
+                         self.compact.spatial_index.nearest(61.0, 24.9))
+        with self.assertRaises(ValueError):
+            self.tiled.spatial_index.nearest_edges(lat, lon, self.tiled)
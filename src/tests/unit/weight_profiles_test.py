@@ -0,0 +1,93 @@
+import unittest
+import networkx as nx
+import numpy as np
+from utils.compact_graph import CompactGraph
+from utils.weight_profiles import (
+    ROAD_CLASSES, PROFILES, TravelTimeProfile, road_class, parse_maxspeed, edge_attributes,
+    select_profile
+)
+from algorithms.a_star import AStarOSMnx
+from algorithms.bidirectional_a_star import BidirectionalAStarOSMnx
+from algorithms.dijkstra import DijkstraOSMnx
+from tests.unit.landmarks_test import directed_grid
+
+
+class TestWeightProfiles(unittest.TestCase):
+    """Unit tests for the edge weight profiles and the OSM speed parsing."""
+
+    def setUp(self):
+        """Creates a directed grid with random speeds and road classes on its edges."""
+        self.compact = CompactGraph.from_networkx(directed_grid(8, seed=2))
+        rng = np.random.default_rng(2)
+        self.attributes = {
+            'speeds': rng.choice([30.0, 50.0, 80.0], self.compact.edge_count).astype(np.float32),
+            'road_classes': rng.integers(len(ROAD_CLASSES), size=self.compact.edge_count,
+                                         dtype=np.int8)
+        }
+
+    def test_parse_maxspeed(self):
+        """Tests numeric, mph, implicit, list and invalid speed limits."""
+        self.assertEqual(parse_maxspeed('50'), 50.0)
+        self.assertAlmostEqual(parse_maxspeed('30 mph'), 48.28032)
+        self.assertEqual(parse_maxspeed('FI:urban'), 50.0)
+        self.assertEqual(parse_maxspeed(['40', '60', 'signals']), 50.0)
+        self.assertIsNone(parse_maxspeed('signals'))
+        self.assertIsNone(parse_maxspeed('0'))
+        self.assertIsNone(parse_maxspeed(None))
+
+    def test_road_class(self):
+        """Tests that link roads belong to their road class and unknown tags to 'other'."""
+        self.assertEqual(ROAD_CLASSES[road_class('primary_link')], 'primary')
+        self.assertEqual(ROAD_CLASSES[road_class(['residential', 'service'])], 'residential')
+        self.assertEqual(ROAD_CLASSES[road_class('busway')], 'other')
+        self.assertEqual(ROAD_CLASSES[road_class(None)], 'other')
+
+    def test_edge_attributes_follow_shortest_parallel_edge(self):
+        """Tests that attributes are aligned with the edges and come from the shortest one."""
+        graph = nx.MultiDiGraph()
+        graph.add_edge(1, 2, length=100.0, highway='motorway', maxspeed='120')
+        graph.add_edge(1, 2, length=90.0, highway='residential')
+        graph.add_edge(2, 1, length=100.0, highway='trunk_link', maxspeed=['60', '80'])
+        compact = CompactGraph.from_networkx(graph)
+
+        attributes = edge_attributes(graph, compact)
+        self.assertEqual(attributes['speeds'].tolist(), [30.0, 70.0])
+        self.assertEqual([ROAD_CLASSES[i] for i in attributes['road_classes']],
+                         ['residential', 'trunk'])
+
+    def test_travel_time_weights(self):
+        """Tests that travel times are lengths divided by the speeds and speed factors."""
+        profile = TravelTimeProfile('slow', {name: 0.5 for name in ROAD_CLASSES})
+        graph = profile.apply(self.compact, self.attributes)
+        expected = self.compact.lengths * 3.6 / self.attributes['speeds'] * 2
+        np.testing.assert_allclose(graph.lengths, expected, rtol=1e-6)
+        np.testing.assert_allclose(sorted(graph.reverse.lengths), sorted(expected), rtol=1e-6)
+        self.assertIs(PROFILES['distance'].apply(self.compact, self.attributes), self.compact)
+
+    def test_scaled_heuristic_finds_shortest_travel_times(self):
+        """Tests that A* with the profile heuristics finds the optimal costs."""
+        for profile in PROFILES.values():
+            graph = profile.apply(self.compact, self.attributes)
+            heuristic = profile.heuristic(self.attributes)
+            dijkstra = DijkstraOSMnx(graph)
+            for algorithm in (AStarOSMnx, BidirectionalAStarOSMnx):
+                engine = algorithm(graph, heuristic=heuristic)
+                for start, goal in ((0, 63), (7, 56), (60, 3)):
+                    _, expected = dijkstra.find_path(start, goal)
+                    _, cost = engine.find_path(start, goal)
+                    self.assertAlmostEqual(cost, expected, places=6)
+
+    def test_select_profile(self):
+        """Tests profile names, hours selecting time-of-day profiles and invalid input."""
+        self.assertEqual(select_profile(PROFILES), 'distance')
+        self.assertEqual(select_profile(PROFILES, 'time', hour=8), 'time-morning-peak')
+        self.assertEqual(select_profile(PROFILES, 'time', hour=16), 'time-evening-peak')
+        self.assertEqual(select_profile(PROFILES, 'time', hour=12), 'time')
+        self.assertEqual(select_profile(['distance', 'time'], 'time', hour=8), 'time')
+        with self.assertRaises(ValueError):
+            select_profile(PROFILES, 'walking')
+        with self.assertRaises(ValueError):
+            select_profile(PROFILES, 'time', hour=24)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import os
+import threading
+import time
+from utils.worker_pool import WorkerPool, PoolSaturatedError
+
+# State of a worker process, set by its initializer
+worker_state = {}
+
+def handle(task):
+    """Sleeps for the given seconds and returns the worker's process ID, or fails."""
+    if task == 'fail':
+        raise ValueError("bad task")
+    if task == 'state':
+        return worker_state
+    time.sleep(task)
+    return os.getpid()
+
+def initialize(name):
+    """Stores the name in the worker's state, or fails without a name."""
+    if name is None:
+        raise ValueError("no name")
+    worker_state['name'] = name
+
+class TestWorkerPool(unittest.TestCase):
+    """Unit tests for the process pool with queueing, timeouts and backpressure."""
+
+    def setUp(self):
+        """Starts a pool of two workers."""
+        self.pool = WorkerPool(handle, processes=2, max_pending=1, timeout=2.0)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_results_come_from_worker_processes(self):
+        """Tests that tasks run in other processes and the workers are reused."""
+        pids = {self.pool.submit(0.0) for _ in range(6)}
+        self.assertNotIn(os.getpid(), pids)
+        self.assertLessEqual(len(pids), 2)
+
+    def test_workers_are_initialized_in_their_own_processes(self):
+        """Tests that the initializer runs in every worker, not in the serving process, and
+        that a failing initializer fails the pool."""
+        pool = WorkerPool(handle, processes=2, initializer=initialize, initargs=('ready',))
+        try:
+            self.assertEqual(pool.submit('state'), {'name': 'ready'})
+            self.assertEqual(worker_state, {})
+        finally:
+            pool.close()
+        with self.assertRaisesRegex(RuntimeError, "ValueError: no name"):
+            WorkerPool(handle, processes=1, initializer=initialize, initargs=(None,))
+
+    def test_handler_errors_are_raised(self):
+        """Tests that an exception in the handler is raised and the worker is kept."""
+        with self.assertRaisesRegex(RuntimeError, "ValueError: bad task"):
+            self.pool.submit('fail')
+        self.assertIsInstance(self.pool.submit(0.0), int)
+
+    def test_timeout_replaces_worker(self):
+        """Tests that a task running too long is cancelled by replacing its worker."""
+        self.pool.timeout = 0.3
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            self.pool.submit(5.0)
+        self.assertLess(time.monotonic() - start, 2.0)
+        self.assertEqual(self.pool.stats(), {'processes': 2, 'running': 0, 'waiting': 0})
+        self.assertIsInstance(self.pool.submit(0.0), int)
+
+    def test_saturated_pool_rejects_requests(self):
+        """Tests that requests beyond the workers and the queue are rejected at once."""
+        threads = [threading.Thread(target=self.pool.submit, args=(0.5,)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        self.assertEqual(self.pool.stats(), {'processes': 2, 'running': 2, 'waiting': 1})
+        with self.assertRaises(PoolSaturatedError):
+            self.pool.submit(0.0)
+        for thread in threads:
+            thread.join()
+        self.assertIsInstance(self.pool.submit(0.0), int)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import mmap
+import os
+import numpy as np
+
+# File signature and version of the array file format
+MAGIC = b'RTARRAY1'
+
+# Every array starts at a multiple of this many bytes, so mapped arrays are aligned
+ALIGNMENT = 64
+
+
+def save_arrays(path, arrays, metadata=None):
+    """Writes named NumPy arrays into a single file that can be memory-mapped.
+
+    The file starts with MAGIC, the length of a JSON header and the header itself, which
+    lists the dtype, shape and offset of every array. The raw array data follows, each array
+    aligned to ALIGNMENT bytes. The file is written under a temporary name and renamed, so
+    readers never see a partially written file.
+
+    Args:
+        path (str): The output file.
+        arrays (dict): The arrays keyed by name.
+        metadata (dict): Optional JSON-serializable information stored in the header.
+    """
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        table[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset = aligned(offset + array.nbytes)
+
+    header = json.dumps({'metadata': metadata or {}, 'arrays': table}).encode('utf-8')
+    data_start = aligned(len(MAGIC) + 8 + len(header))
+
+    temporary = f'{path}.incomplete'
+    with open(temporary, 'wb') as file:
+        file.write(MAGIC)
+        file.write(len(header).to_bytes(8, 'little'))
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(data_start + table[name]['offset'])
+            file.write(np.ascontiguousarray(array).tobytes())
+        file.truncate(data_start + offset)
+    os.replace(temporary, path)
+
+
+def map_arrays(path):
+    """Memory-maps a file written with save_arrays().
+
+    The arrays are read-only views into one shared mapping of the file, so no data is
+    copied and processes mapping the same file share its pages in the operating system's
+    page cache. The mapping stays open as long as any of the arrays is alive.
+
+    Args:
+        path (str): The file to map.
+
+    Returns:
+        tuple: The arrays keyed by name and the metadata dict.
+
+    Raises:
+        ValueError: If the file is not an array file.
+    """
+    with open(path, 'rb') as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mapping[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not an array file")
+    header_length = int.from_bytes(mapping[len(MAGIC):len(MAGIC) + 8], 'little')
+    header_start = len(MAGIC) + 8
+    header = json.loads(mapping[header_start:header_start + header_length].decode('utf-8'))
+    data_start = aligned(header_start + header_length)
+
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        arrays[name] = np.frombuffer(mapping, dtype=dtype, count=count,
+                                     offset=data_start + entry['offset']).reshape(entry['shape'])
+    return arrays, header['metadata']
+
+
+def aligned(offset):
+    """Rounds an offset up to the next multiple of ALIGNMENT."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
@@ -0,0 +1,199 @@
+import math
+import random
+import statistics
+import time
+import tracemalloc
+import numpy as np
+from algorithms.dijkstra import DijkstraOSMnx
+
+# Latency percentiles reported for every algorithm and rank
+PERCENTILES = (50, 95, 99)
+
+
+def dijkstra_rank_queries(graph, count, seed=0, min_exponent=4):
+    """Generates a reproducible query set stratified by Dijkstra rank.
+
+    The Dijkstra rank of a goal is the number of nodes Dijkstra's algorithm closes from the
+    start before it closes the goal. For every random start one query is made for each
+    goal of rank 2^k from 2^min_exponent up to the number of reachable nodes, so short,
+    medium and long routes are equally represented whatever the size of the graph. The
+    true distance of every query is stored, so the results can be checked.
+
+    Args:
+        graph (CompactGraph): The graph to query.
+        count (int): Number of queries.
+        seed (int): Seed of the random starts. Defaults to 0.
+        min_exponent (int): Exponent of the smallest rank. Defaults to 4 (rank 16).
+
+    Returns:
+        list: The queries as dicts with the 'start' and 'goal' node IDs, the rank exponent
+        'rank' and the shortest 'distance' in meters.
+    """
+    search = DijkstraOSMnx(graph)
+    state = search.search_state
+    rng = random.Random(seed)
+    queries = []
+
+    for _ in range(100 * count):
+        if len(queries) >= count:
+            break
+        start = rng.randrange(graph.node_count)
+        settled = search.run(graph, state, start)
+        for exponent in range(min_exponent, int(math.log2(max(len(settled) - 1, 1))) + 1):
+            goal = settled[2 ** exponent]
+            queries.append({'start': int(graph.node_ids[start]),
+                            'goal': int(graph.node_ids[goal]),
+                            'rank': exponent,
+                            'distance': state.g_scores[goal]})
+    return queries[:count]
+
+
+def summarize(values):
+    """Summarizes measurements with their mean, maximum and PERCENTILES.
+
+    Args:
+        values (list): The measurements.
+
+    Returns:
+        dict: 'count', 'mean', 'max' and 'p50', 'p95', 'p99', all None without values.
+    """
+    if not values:
+        return {'count': 0, 'mean': None, 'max': None,
+                **{f"p{percentile}": None for percentile in PERCENTILES}}
+    percentiles = np.percentile(values, PERCENTILES).tolist()
+    return {'count': len(values), 'mean': float(np.mean(values)), 'max': float(max(values)),
+            **{f"p{percentile}": value for percentile, value in zip(PERCENTILES, percentiles)}}
+
+
+class Benchmark:
+    """Times search engines on a fixed query set.
+
+    Each engine first runs warmup queries, which also allocates its search arrays. Every
+    query is then timed repeat times with time.perf_counter_ns and its median is kept, so
+    a single interruption does not distort the latency percentiles. The peak memory
+    allocated by a query is measured with tracemalloc in a separate pass, since tracing
+    slows the searches down. Every result is compared with the distance of the query.
+
+    Attributes:
+        queries (list): The queries, see dijkstra_rank_queries().
+        warmup (int): Number of queries run before timing.
+        repeat (int): Number of times every query is timed.
+    """
+    def __init__(self, queries, warmup=10, repeat=5):
+        """Initializes the benchmark.
+
+        Args:
+            queries (list): The queries, see dijkstra_rank_queries().
+            warmup (int): Number of queries run before timing. Defaults to 10.
+            repeat (int): Number of times every query is timed. Defaults to 5.
+        """
+        self.queries = queries
+        self.warmup = warmup
+        self.repeat = repeat
+
+    def run(self, engine):
+        """Benchmarks one engine.
+
+        Args:
+            engine (GraphSearch): The search engine.
+
+        Returns:
+            dict: Latency summaries in milliseconds overall ('latency_ms') and per rank
+            exponent ('latency_ms_by_rank'), a summary of 'nodes_expanded', the largest
+            'peak_memory_bytes' of a query and the number of wrong results ('mismatches').
+        """
+        for query in self.queries[:self.warmup]:
+            engine.find_path(query['start'], query['goal'])
+
+        latencies, expansions, mismatches = self.time_queries(engine)
+        by_rank = {}
+        for query, latency in zip(self.queries, latencies):
+            by_rank.setdefault(str(query['rank']), []).append(latency)
+
+        return {
+            'latency_ms': summarize(latencies),
+            'latency_ms_by_rank': {rank: summarize(values) for rank, values in by_rank.items()},
+            'nodes_expanded': summarize(expansions),
+            'peak_memory_bytes': self.peak_memory(engine),
+            'mismatches': mismatches
+        }
+
+    def time_queries(self, engine):
+        """Times every query repeat times.
+
+        Args:
+            engine (GraphSearch): The search engine.
+
+        Returns:
+            tuple: The median latency of every query in milliseconds, the nodes expanded by
+            every query and the number of queries with a wrong length.
+        """
+        latencies = []
+        expansions = []
+        mismatches = 0
+        for query in self.queries:
+            timings = []
+            for _ in range(self.repeat):
+                start_time = time.perf_counter_ns()
+                _, length = engine.find_path(query['start'], query['goal'])
+                timings.append(time.perf_counter_ns() - start_time)
+            latencies.append(statistics.median(timings) / 1e6)
+            expansions.append(engine.nodes_expanded)
+            if not math.isclose(length, query['distance'], rel_tol=1e-9, abs_tol=1e-6):
+                mismatches += 1
+        return latencies, expansions, mismatches
+
+    def peak_memory(self, engine):
+        """Returns the largest memory allocated by a single query, measured with tracemalloc.
+
+        Args:
+            engine (GraphSearch): The search engine.
+
+        Returns:
+            int: The peak in bytes above the memory allocated before the query.
+        """
+        peak = 0
+        tracemalloc.start()
+        try:
+            for query in self.queries:
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                engine.find_path(query['start'], query['goal'])
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+        return peak
+
+
+def find_regressions(report, baseline, tolerance=0.1):
+    """Compares a benchmark report with a baseline report.
+
+    Latency percentiles, mean expansions and peak memory are regressions if they grew by
+    more than the tolerance, and any new wrong result is a regression. Algorithms that are
+    not in both reports are skipped.
+
+    Args:
+        report (dict): The new report.
+        baseline (dict): The baseline report.
+        tolerance (float): Allowed relative growth. Defaults to 0.1 (10 percent).
+
+    Returns:
+        list: A description of every regression, empty if there are none.
+    """
+    regressions = []
+    for algorithm, result in report['results'].items():
+        previous = baseline['results'].get(algorithm)
+        if previous is None:
+            continue
+        metrics = [(f"latency {name}", result['latency_ms'][name], previous['latency_ms'][name])
+                   for name in (f"p{percentile}" for percentile in PERCENTILES)]
+        metrics.append(('mean nodes expanded', result['nodes_expanded']['mean'],
+                        previous['nodes_expanded']['mean']))
+        metrics.append(('peak memory', result['peak_memory_bytes'],
+                        previous['peak_memory_bytes']))
+        for name, value, old_value in metrics:
+            if value is not None and old_value is not None and value > old_value * (1 + tolerance):
+                regressions.append(f"{algorithm}: {name} {old_value:.6g} -> {value:.6g}")
+        if result['mismatches'] > previous['mismatches']:
+            regressions.append(f"{algorithm}: {result['mismatches']} wrong results")
+    return regressions
@@ -0,0 +1,363 @@
+import hashlib
+import itertools
+import numpy as np
+from utils.array_file import save_arrays, map_arrays
+from utils.graph_utils import GraphUtils
+from utils.spatial_index import SpatialIndex
+
+
+class CompactGraph:
+    """Array-backed street network graph in compressed sparse row (CSR) form.
+
+    Nodes are renumbered to contiguous indices 0..n-1 in ascending node ID order. The outgoing
+    edges of node index u are stored in targets[offsets[u]:offsets[u + 1]] together with their
+    lengths in the matching slice of lengths. Parallel edges are collapsed into one edge with
+    the minimum length and edges without a length are dropped, so a search never has to look
+    at edge attributes.
+
+    Attributes:
+        node_ids (numpy.ndarray): Sorted original node IDs (int64), indexed by node index.
+        offsets (numpy.ndarray): CSR row offsets (int64) of length n + 1.
+        targets (numpy.ndarray): Target node index (int32) of each edge.
+        lengths (numpy.ndarray): Length of each edge in meters (float64).
+        lat (numpy.ndarray): Latitude of each node (float64), NaN if unknown.
+        lon (numpy.ndarray): Longitude of each node (float64), NaN if unknown.
+    """
+    def __init__(self, node_ids, offsets, targets, lengths, lat, lon):
+        """Initializes CompactGraph from prebuilt arrays.
+
+        Args:
+            node_ids (numpy.ndarray): Sorted original node IDs.
+            offsets (numpy.ndarray): CSR row offsets.
+            targets (numpy.ndarray): Target node index of each edge.
+            lengths (numpy.ndarray): Length of each edge.
+            lat (numpy.ndarray): Latitude of each node.
+            lon (numpy.ndarray): Longitude of each node.
+        """
+        self.node_ids = node_ids
+        self.offsets = offsets
+        self.targets = targets
+        self.lengths = lengths
+        self.lat = lat
+        self.lon = lon
+
+        # Memoryviews give fast scalar access from the pure Python search loops
+        self._offsets = memoryview(offsets)
+        self._targets = memoryview(targets)
+        self._lengths = memoryview(lengths)
+        self._lat = memoryview(lat)
+        self._lon = memoryview(lon)
+        self._reverse = None
+        self._spatial_index = None
+        self._fingerprint = None
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """Builds a CompactGraph from a NetworkX (OSMnx) graph.
+
+        Undirected graphs are stored with both edge directions. Node coordinates are read from
+        the 'y' (latitude) and 'x' (longitude) node attributes.
+
+        Args:
+            graph (networkx.Graph): The street network graph. Node IDs must be integers.
+
+        Returns:
+            CompactGraph: The array-backed copy of the graph.
+        """
+        node_ids = np.sort(np.fromiter(graph.nodes, dtype=np.int64, count=len(graph)))
+        index = {node: i for i, node in enumerate(node_ids.tolist())}
+
+        offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        targets = []
+        lengths = []
+        lat = np.full(len(node_ids), np.nan)
+        lon = np.full(len(node_ids), np.nan)
+
+        for i, node in enumerate(node_ids.tolist()):
+            data = graph.nodes[node]
+            lat[i] = data.get('y', np.nan)
+            lon[i] = data.get('x', np.nan)
+
+            for neighbor in graph.adj[node]:
+                length = GraphUtils.get_edge_length(graph, node, neighbor)
+                # Self-loops never shorten a path and missing lengths are not traversable
+                if neighbor == node or length == float('inf'):
+                    continue
+                targets.append(index[neighbor])
+                lengths.append(length)
+            offsets[i + 1] = len(targets)
+
+        return cls(
+            node_ids,
+            offsets,
+            np.array(targets, dtype=np.int32),
+            np.array(lengths, dtype=np.float64),
+            lat,
+            lon
+        )
+
+    @classmethod
+    def from_edges(cls, node_ids, sources, targets, lengths, lat, lon):
+        """Builds a CompactGraph from parallel edge arrays in any order.
+
+        Args:
+            node_ids (numpy.ndarray): Sorted original node IDs.
+            sources (numpy.ndarray): Source node index of each edge.
+            targets (numpy.ndarray): Target node index of each edge.
+            lengths (numpy.ndarray): Length of each edge.
+            lat (numpy.ndarray): Latitude of each node.
+            lon (numpy.ndarray): Longitude of each node.
+
+        Returns:
+            CompactGraph: The graph with the edges grouped by source node.
+        """
+        sources = np.asarray(sources, dtype=np.int32)
+        order = np.argsort(sources, kind='stable')
+        offsets = np.zeros(len(node_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(node_ids)), out=offsets[1:])
+        return cls(node_ids, offsets, np.asarray(targets, dtype=np.int32)[order],
+                   np.asarray(lengths, dtype=np.float64)[order], lat, lon)
+
+    EDGE_ARRAYS = ('offsets', 'targets', 'lengths')
+
+    @classmethod
+    def load(cls, path):
+        """Memory-maps a graph saved with save().
+
+        The arrays are read-only views of the file, so every process serving the same graph
+        shares one copy of it in memory and the searches run directly on the mapped data.
+
+        Args:
+            path (str): The graph file.
+
+        Returns:
+            CompactGraph: The mapped graph, including its reverse graph and spatial index.
+        """
+        arrays, _ = map_arrays(path)
+        node_arrays = (arrays['node_ids'], arrays['lat'], arrays['lon'])
+
+        def graph(prefix):
+            offsets, targets, lengths = (arrays[prefix + name] for name in cls.EDGE_ARRAYS)
+            return cls(node_arrays[0], offsets, targets, lengths, *node_arrays[1:])
+
+        compact_graph = graph('')
+        compact_graph.attach(graph('reverse_'), SpatialIndex(
+            arrays['spatial_x'], arrays['spatial_y'], arrays['spatial_origin']))
+        return compact_graph
+
+    def save(self, path):
+        """Saves the graph with its reverse graph and spatial index into a single file.
+
+        Args:
+            path (str): The graph file.
+        """
+        arrays = {'node_ids': self.node_ids, 'lat': self.lat, 'lon': self.lon}
+        for prefix, graph in (('', self), ('reverse_', self.reverse)):
+            for name in self.EDGE_ARRAYS:
+                arrays[prefix + name] = getattr(graph, name)
+        spatial_index = self.spatial_index
+        arrays.update(spatial_x=spatial_index.x, spatial_y=spatial_index.y,
+                      spatial_origin=spatial_index.origin)
+        save_arrays(path, arrays, {'nodes': self.node_count, 'edges': self.edge_count})
+
+    def attach(self, reverse, spatial_index):
+        """Uses prebuilt (for example memory-mapped) derived structures of the graph.
+
+        Args:
+            reverse (CompactGraph): The reverse graph.
+            spatial_index (SpatialIndex): The spatial index of the nodes.
+        """
+        self._reverse = reverse
+        self._spatial_index = spatial_index
+
+    @property
+    def node_count(self):
+        """int: Number of nodes in the graph."""
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self):
+        """int: Number of directed edges in the graph."""
+        return len(self.targets)
+
+    @property
+    def nbytes(self):
+        """int: Total size of the graph arrays in bytes."""
+        return sum(array.nbytes for array in (
+            self.node_ids, self.offsets, self.targets, self.lengths, self.lat, self.lon))
+
+    @property
+    def fingerprint(self):
+        """str: Hash of the node IDs, the edges and their lengths, computed on first use.
+
+        Preprocessed data such as landmarks or a contraction hierarchy stores the fingerprint
+        of its graph, so it is never used with a graph whose edges have changed, for example
+        after a one-way street or the length of a road changed in the map data.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for array, dtype in ((self.node_ids, np.int64), (self.offsets, np.int64),
+                                 (self.targets, np.int32), (self.lengths, np.float64)):
+                digest.update(np.ascontiguousarray(array, dtype=dtype).data)
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    @property
+    def reverse(self):
+        """CompactGraph: The graph with every edge reversed, built on first use.
+
+        The outgoing edges of a node in the reverse graph are the incoming edges of the node
+        in this graph, which is what a backward search from the goal needs. Both graphs share
+        the node arrays.
+        """
+        if self._reverse is None:
+            self._reverse = CompactGraph.from_edges(
+                self.node_ids, self.targets, self.sources(), self.lengths, self.lat, self.lon)
+        return self._reverse
+
+    @property
+    def spatial_index(self):
+        """SpatialIndex: Index of the projected node coordinates, built on first use."""
+        if self._spatial_index is None:
+            self._spatial_index = SpatialIndex.from_coordinates(self.lat, self.lon)
+        return self._spatial_index
+
+    def with_lengths(self, lengths):
+        """Returns a graph with the same nodes and edges but different edge lengths.
+
+        This is how graphs weighted by another cost, such as travel time, are created. The
+        node arrays, the CSR structure and the spatial index are shared with this graph, and
+        the reverse graph gets the lengths in its own edge order without another sort.
+
+        Args:
+            lengths (numpy.ndarray): The new length of each edge, aligned with targets.
+
+        Returns:
+            CompactGraph: The graph with the new lengths.
+        """
+        lengths = np.asarray(lengths, dtype=np.float64)
+        graph = CompactGraph(self.node_ids, self.offsets, self.targets, lengths,
+                             self.lat, self.lon)
+        # The reverse graph orders the edges by target index, see from_edges()
+        reverse = self.reverse
+        order = np.argsort(np.asarray(self.targets, dtype=np.int32), kind='stable')
+        graph.attach(CompactGraph(self.node_ids, reverse.offsets, reverse.targets,
+                                  lengths[order], self.lat, self.lon), self._spatial_index)
+        return graph
+
+    def path_length(self, indices):
+        """Sums the lengths of the edges along a path.
+
+        Args:
+            indices (list): Node indices along the path, each joined to the next by an edge.
+
+        Returns:
+            float: The length of the path, inf if two consecutive nodes are not joined.
+        """
+        total = 0.0
+        for current, following in zip(indices, indices[1:]):
+            total += min((length for target, length in self.neighbors(current)
+                          if target == following), default=float('inf'))
+        return total
+
+    def sources(self):
+        """Returns the source node index (int32) of each edge, aligned with targets."""
+        counts = np.diff(self.offsets)
+        return np.repeat(np.arange(self.node_count, dtype=np.int32), counts)
+
+    def index_of(self, node_id):
+        """Looks up the node index of an original node ID.
+
+        Args:
+            node_id (int): The original node ID.
+
+        Returns:
+            int: The node index, or None if the node is not in the graph.
+        """
+        i = int(np.searchsorted(self.node_ids, node_id))
+        if i < len(self.node_ids) and self.node_ids[i] == node_id:
+            return i
+        return None
+
+    def indices_of(self, node_ids):
+        """Looks up the node indices of original node IDs that are in the graph.
+
+        Args:
+            node_ids (list): The original node IDs.
+
+        Returns:
+            numpy.ndarray: The node indices.
+        """
+        return np.searchsorted(self.node_ids, node_ids)
+
+    def neighbors(self, index):
+        """Iterates over the outgoing edges of a node.
+
+        Args:
+            index (int): The node index.
+
+        Returns:
+            iterator: (target index, edge length) pairs.
+        """
+        start = self._offsets[index]
+        end = self._offsets[index + 1]
+        return zip(self._targets[start:end], self._lengths[start:end])
+
+    def masked_neighbors(self, index, mask):
+        """Iterates over the outgoing edges of a node that are set in an edge mask.
+
+        Args:
+            index (int): The node index.
+            mask (memoryview): A truth value for every edge, aligned with targets.
+
+        Returns:
+            iterator: (target index, edge length) pairs of the edges set in the mask.
+        """
+        start = self._offsets[index]
+        end = self._offsets[index + 1]
+        return itertools.compress(zip(self._targets[start:end], self._lengths[start:end]),
+                                  mask[start:end])
+
+    def out_degree(self, index):
+        """Returns the number of outgoing edges of a node.
+
+        Args:
+            index (int): The node index.
+
+        Returns:
+            int: The number of outgoing edges.
+        """
+        return self._offsets[index + 1] - self._offsets[index]
+
+    def coordinate(self, index):
+        """Returns the coordinates of a single node.
+
+        Args:
+            index (int): The node index.
+
+        Returns:
+            tuple: (latitude, longitude) of the node, NaN if unknown.
+        """
+        return self._lat[index], self._lon[index]
+
+    def node_path(self, indices):
+        """Converts a path of node indices into original node IDs.
+
+        Args:
+            indices (list): Node indices along the path.
+
+        Returns:
+            list: The original node IDs along the path.
+        """
+        return self.node_ids[indices].tolist()
+
+    def coordinates(self, indices):
+        """Returns the (latitude, longitude) pairs of the given nodes.
+
+        Args:
+            indices (list): Node indices.
+
+        Returns:
+            list: (latitude, longitude) tuples in the same order.
+        """
+        return list(zip(self.lat[indices].tolist(), self.lon[indices].tolist()))
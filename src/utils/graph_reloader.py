@@ -0,0 +1,241 @@
+import contextlib
+import threading
+import time
+import traceback
+
+
+class ReloadInProgressError(RuntimeError):
+    """Raised when a reload is requested while another one is still running."""
+
+
+class GraphReloader:
+    """Replaces the routing graph, and everything built from it, with a new version at runtime.
+
+    The serving state of one graph version (the graph, its weighted graphs, search engines
+    and so on) is built by the build callable and has a 'version' attribute. reload() builds
+    the state of the next version in a background thread while requests keep being served
+    from the current one, and then swaps it in with a single reference assignment, so a
+    request sees either the old or the new state as a whole.
+
+    Requests take the current state with acquire() and give it back with release(), or use
+    the snapshot() context manager, and use that state for all of their work. A replaced
+    state is drained: it stays alive until the last request using it has released it, after
+    which retire() is called with it to free its resources (for example worker processes).
+    on_swap() is called right after the swap, for example to invalidate the caches keyed by
+    the graph version. The reloader is safe to use from concurrent request threads.
+
+    Attributes:
+        build (callable): Builds a state, given a callback taking the name of every phase
+            of the build as it starts.
+        on_swap (callable): Called with the old and the new state after a swap.
+        retire (callable): Called with a replaced state once it is drained.
+    """
+    def __init__(self, build, current, on_swap=None, retire=None, clock=time.time):
+        """Initializes the reloader with the state being served.
+
+        Args:
+            build (callable): Builds a state, see the attributes.
+            current (object): The state served until the first reload.
+            on_swap (callable): Called with the old and the new state after a swap.
+                Defaults to None.
+            retire (callable): Called with a drained state. Defaults to None.
+            clock (callable): Returns the current time in seconds. Defaults to time.time.
+        """
+        self.build = build
+        self.on_swap = on_swap
+        self.retire = retire
+        self._clock = clock
+        self._current = current
+        self._in_flight = {id(current): 0}
+        self._draining = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._status = {'state': 'idle', 'phase': None, 'phases': [], 'error': None,
+                        'started': None, 'finished': None}
+
+    @property
+    def current(self):
+        """object: The state new requests are served from."""
+        return self._current
+
+    def acquire(self):
+        """Takes the current state for a request, which must release() it when done.
+
+        Returns:
+            object: The current state.
+        """
+        with self._condition:
+            state = self._current
+            self._in_flight[id(state)] += 1
+            return state
+
+    def release(self, state):
+        """Gives back a state taken with acquire().
+
+        Args:
+            state (object): The state the request used.
+        """
+        with self._condition:
+            self._in_flight[id(state)] -= 1
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def snapshot(self):
+        """Holds the current state for the duration of a with block.
+
+        Yields:
+            object: The current state.
+        """
+        state = self.acquire()
+        try:
+            yield state
+        finally:
+            self.release(state)
+
+    def reload(self):
+        """Starts building the state of a new graph version in a background thread.
+
+        Raises:
+            ReloadInProgressError: If a reload is already running.
+        """
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                raise ReloadInProgressError("A reload is already in progress")
+            self._status = {'state': 'building', 'phase': None, 'phases': [], 'error': None,
+                            'started': self._clock(), 'finished': None}
+            self._thread = threading.Thread(target=self.run, name='graph-reload', daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout=None):
+        """Waits for the running reload, if any, to finish.
+
+        Args:
+            timeout (float): Seconds to wait at most, None to wait until it finishes.
+
+        Returns:
+            bool: True if no reload is running anymore.
+        """
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def run(self):
+        """Builds a new state, swaps it in and drains the old one. Runs in the thread
+        started by reload().
+
+        A failure of the build keeps the current state. Once the new state is served, the
+        old one is drained and retired even if on_swap() failed. Any failure ends the
+        reload in the 'failed' state with its error.
+        """
+        try:
+            state = self.build(self.report)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            self.fail(error)
+            return
+
+        old = self.swap(state)
+        try:
+            try:
+                if self.on_swap is not None:
+                    self.on_swap(old, state)
+            finally:
+                self.drain(old)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            self.fail(error)
+            return
+        self.finish('idle')
+
+    def swap(self, state):
+        """Serves the new requests from a new state.
+
+        Args:
+            state (object): The new state.
+
+        Returns:
+            object: The replaced state.
+        """
+        self.report('swapping')
+        with self._condition:
+            old, self._current = self._current, state
+            self._in_flight[id(state)] = 0
+            self._draining.append(old)
+        return old
+
+    def drain(self, old):
+        """Waits until no request uses a replaced state anymore, and retires it.
+
+        Args:
+            old (object): The replaced state.
+        """
+        self.report('draining')
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight[id(old)] == 0)
+            del self._in_flight[id(old)]
+            self._draining.remove(old)
+        if self.retire is not None:
+            self.retire(old)
+
+    def report(self, phase):
+        """Records the start of a reload phase.
+
+        Args:
+            phase (str): Name of the phase.
+        """
+        now = self._clock()
+        with self._condition:
+            self.end_phase(now)
+            self._status['phases'].append({'phase': phase, 'started': now, 'seconds': None})
+            self._status['phase'] = phase
+
+    def fail(self, error):
+        """Records the end of a failed reload and prints its traceback.
+
+        Args:
+            error (Exception): The error of the reload.
+        """
+        traceback.print_exc()
+        self.finish('failed', f"{type(error).__name__}: {error}")
+
+    def finish(self, state, error=None):
+        """Records the end of a reload.
+
+        Args:
+            state (str): 'idle' after a swap and drain, 'failed' if a step of the reload
+                failed.
+            error (str): Description of the error. Defaults to None.
+        """
+        now = self._clock()
+        with self._condition:
+            self.end_phase(now)
+            self._status.update(state=state, phase=None, error=error, finished=now)
+
+    def end_phase(self, now):
+        """Records the duration of the running phase. The caller holds the lock."""
+        phases = self._status['phases']
+        if phases and phases[-1]['seconds'] is None:
+            phases[-1]['seconds'] = now - phases[-1]['started']
+
+    def status(self):
+        """Returns the progress of the latest reload and the graph versions being served.
+
+        Returns:
+            dict: The 'state' ('idle', 'building', 'draining' or 'failed'), the running
+            'phase', the 'phases' run so far with their start times and durations in seconds,
+            the 'error' of a failed reload, the 'started' and 'finished' times of the latest
+            reload, the 'version' being served with its requests 'in_flight', and the
+            replaced versions still 'draining' with their requests in flight.
+        """
+        with self._condition:
+            status = {**self._status,
+                      'phases': [dict(phase) for phase in self._status['phases']]}
+            if status['phase'] == 'draining':
+                status['state'] = 'draining'
+            return {
+                **status,
+                'version': self._current.version,
+                'in_flight': self._in_flight[id(self._current)],
+                'draining': [{'version': state.version, 'in_flight': self._in_flight[id(state)]}
+                             for state in self._draining]
+            }
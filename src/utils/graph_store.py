@@ -0,0 +1,330 @@
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import osmnx as ox
+from utils.array_file import save_arrays, map_arrays
+from utils.compact_graph import CompactGraph
+from utils.osm_stream import is_graph_file, load_graph_file
+from utils.osm_utils import download_osm_graph
+from utils.tiled_graph import MANIFEST_FILE, DEFAULT_PRECISION, TiledGraph, save_tiles
+from utils.weight_profiles import edge_attributes
+
+
+class GraphStore:
+    """Local cache of processed OSMnx graphs and their compact arrays.
+
+    Downloading and simplifying a street network takes minutes and needs network access, so
+    every graph is written once into a directory named by a key of the place list, the
+    network type, the OSMnx version and FORMAT_VERSION. A changed OSMnx version or cache
+    format therefore never reads stale data, it just misses the cache. The entry of a graph
+    is a numbered generation in that directory (see path()).
+
+    An entry holds the pickled NetworkX graph, the routing graph file of the CompactGraph
+    (see CompactGraph.save), the speed and road class of every edge of the routing graph
+    (edges.bin, see weight_profiles.edge_attributes), the points sampled along its edges for
+    the SpatialIndex (spatial_index.bin) and a meta.json describing the entry. Routing only
+    needs the memory-mapped files, so processes serving the same graph share one read-only
+    copy of them and never load the NetworkX graph. Entries are written into a temporary directory and renamed
+    into place, so a crashed or concurrent writer never leaves a half-written entry behind.
+
+    Instead of a place list every method also accepts the path of a local OSM or GraphML
+    file (see osm_stream.is_graph_file). Such a graph is streamed into the routing arrays
+    with osm_stream.load_graph_file instead of being downloaded, its entry has no NetworkX
+    graph, and its key includes the size and modification time of the file, so a replaced
+    file gets a new entry.
+
+    refresh() writes a new generation of an entry from a new download of the same graph,
+    for example to pick up new map data, and gives it a new version(). The older generations
+    are left untouched until remove_replaced() deletes them, so graphs loaded from them,
+    including tiled graphs that read their tiles lazily, keep working meanwhile.
+
+    load_tiles() splits the routing graph of an entry into geohash tiles (see tiled_graph)
+    on first use and stores them in a tiles-<precision> directory of the entry.
+
+    Attributes:
+        directory (str): The cache directory.
+        download (callable): Downloads a graph from a place list and a network type.
+    """
+    FORMAT_VERSION = 6
+
+    def __init__(self, directory, download=download_osm_graph):
+        """Initializes the store.
+
+        Args:
+            directory (str): The cache directory, created on the first write.
+            download (callable): Downloads a graph on a cache miss. Defaults to
+                download_osm_graph.
+        """
+        self.directory = directory
+        self.download = download
+
+    def key(self, places, network_type='drive'):
+        """Returns the cache key of a graph.
+
+        Args:
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type. Defaults to 'drive'.
+
+        Returns:
+            str: A hexadecimal key identifying the graph and the code that processed it.
+        """
+        if is_graph_file(places):
+            status = os.stat(places)
+            source = {'file': os.path.abspath(places), 'size': status.st_size,
+                      'modified': status.st_mtime_ns}
+        else:
+            source = {'places': [places] if isinstance(places, str) else list(places)}
+        description = json.dumps({
+            **source,
+            'network_type': network_type,
+            'osmnx': ox.__version__,
+            'format': self.FORMAT_VERSION
+        }, sort_keys=True)
+        return hashlib.sha256(description.encode('utf-8')).hexdigest()[:16]
+
+    def path(self, places, network_type='drive', generation=None):
+        """Returns the directory of the current cache entry of a graph.
+
+        The current entry is the newest complete generation in the directory of the key.
+
+        Args:
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type. Defaults to 'drive'.
+            generation (int): The generation of the entry to use. Defaults to the current one.
+
+        Returns:
+            str: The entry directory, which exists only after the graph is cached.
+        """
+        if generation is None:
+            generations = self.generations(places, network_type)
+            generation = generations[-1] if generations else 0
+        return os.path.join(self.directory, self.key(places, network_type), str(generation))
+
+    def generations(self, places, network_type='drive'):
+        """Returns the numbers of the complete cache entries of a graph.
+
+        Args:
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type. Defaults to 'drive'.
+
+        Returns:
+            list: The generation numbers, oldest first.
+        """
+        root = os.path.join(self.directory, self.key(places, network_type))
+        if not os.path.isdir(root):
+            return []
+        return sorted(int(name) for name in os.listdir(root)
+                      if name.isdigit() and os.path.exists(os.path.join(root, name, 'meta.json')))
+
+    def load(self, places, network_type='drive', generation=None):
+        """Maps the routing graph from the cache, downloading and caching it on a miss.
+
+        Args:
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type. Defaults to 'drive'.
+            generation (int): The generation of the entry to use. Defaults to the current one.
+
+        Returns:
+            CompactGraph: The memory-mapped routing graph.
+        """
+        path = self.fetch(places, network_type, generation)
+        compact_graph = CompactGraph.load(os.path.join(path, 'graph.bin'))
+        compact_graph.spatial_index.load_edge_samples(os.path.join(path, 'spatial_index.bin'))
+        return compact_graph
+
+    def load_tiles(self, places, network_type='drive', precision=DEFAULT_PRECISION,
+                   memory_budget=256 * 2 ** 20, generation=None):
+        """Opens the routing graph split into geohash tiles, splitting it on a miss.
+
+        Args:
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type. Defaults to 'drive'.
+            precision (int): Geohash precision of the tiles. Defaults to DEFAULT_PRECISION.
+            memory_budget (int): Bytes of tiles kept in memory. Defaults to 256 MiB.
+            generation (int): The generation of the entry to use. Defaults to the current one.
+
+        Returns:
+            TiledGraph: The graph, whose tiles are loaded when a search reaches them.
+        """
+        entry = self.fetch(places, network_type, generation)
+        path = os.path.join(entry, f'tiles-{precision}')
+        if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+            temporary = tempfile.mkdtemp(dir=entry, prefix='.incomplete-')
+            try:
+                save_tiles(CompactGraph.load(os.path.join(entry, 'graph.bin')), temporary,
+                           precision)
+                os.replace(temporary, path)
+            except OSError:
+                # Another process split the graph first
+                if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+                    raise
+            finally:
+                shutil.rmtree(temporary, ignore_errors=True)
+        return TiledGraph(path, memory_budget)
+
+    def load_edge_attributes(self, places, network_type='drive', generation=None):
+        """Maps the edge attributes of the routing graph from the cache.
+
+        Args:
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type. Defaults to 'drive'.
+            generation (int): The generation of the entry to use. Defaults to the current one.
+
+        Returns:
+            dict: The memory-mapped 'speeds' and 'road_classes' arrays, aligned with the
+            edges of the routing graph.
+        """
+        path = self.fetch(places, network_type, generation)
+        return map_arrays(os.path.join(path, 'edges.bin'))[0]
+
+    def load_networkx(self, places, network_type='drive'):
+        """Loads the NetworkX graph from the cache, downloading and caching it on a miss.
+
+        Args:
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type. Defaults to 'drive'.
+
+        Returns:
+            networkx.MultiDiGraph: The OSMnx graph.
+
+        Raises:
+            FileNotFoundError: If the graph was streamed from a graph file.
+        """
+        path = self.fetch(places, network_type)
+        with open(os.path.join(path, 'graph.pickle'), 'rb') as file:
+            return pickle.load(file)
+
+    def version(self, places, network_type='drive', generation=None):
+        """Returns a version string that changes whenever the cached graph is replaced.
+
+        Args:
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type. Defaults to 'drive'.
+            generation (int): The generation of the entry to use. Defaults to the current one.
+
+        Returns:
+            str: The cache key and the creation time of the entry.
+        """
+        with open(os.path.join(self.fetch(places, network_type, generation), 'meta.json'),
+                  encoding='utf-8') as file:
+            return f"{self.key(places, network_type)}-{json.load(file)['created']}"
+
+    def fetch(self, places, network_type='drive', generation=None):
+        """Makes sure a graph is cached, downloading it on a miss.
+
+        Args:
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type. Defaults to 'drive'.
+            generation (int): The generation of the entry to use. Defaults to the current one.
+
+        Returns:
+            str: The entry directory.
+        """
+        path = self.path(places, network_type, generation)
+        if not os.path.exists(os.path.join(path, 'meta.json')):
+            self.build(path, places, network_type)
+        return path
+
+    def refresh(self, places, network_type='drive'):
+        """Downloads a graph again, or streams its graph file again, into a new entry.
+
+        The new entry is the next generation of the graph and becomes its current entry once
+        it is written completely. The older entries, with everything stored in them such as
+        arc flags and tiles, are not moved or changed, so graphs still being searched can keep
+        reading them until remove_replaced() deletes them.
+
+        Args:
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type. Defaults to 'drive'.
+
+        Returns:
+            str: The new entry directory.
+        """
+        generations = self.generations(places, network_type)
+        path = os.path.join(self.directory, self.key(places, network_type),
+                            str(generations[-1] + 1 if generations else 0))
+        self.build(path, places, network_type)
+        return path
+
+    def remove_replaced(self, places, network_type='drive'):
+        """Deletes the entries of a graph older than its current entry.
+
+        Call it once no graph loaded from them is used anymore.
+
+        Args:
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type. Defaults to 'drive'.
+        """
+        root = os.path.join(self.directory, self.key(places, network_type))
+        for generation in self.generations(places, network_type)[:-1]:
+            shutil.rmtree(os.path.join(root, str(generation)), ignore_errors=True)
+
+    def build(self, path, places, network_type):
+        """Downloads a graph, or streams it from its graph file, into a new entry.
+
+        Args:
+            path (str): The entry directory.
+            places (str or list): The place name or names of the graph, or a graph file.
+            network_type (str): The OSMnx network type.
+        """
+        if is_graph_file(places):
+            compact_graph, attributes = load_graph_file(places, network_type)
+            self.save_compact(path, compact_graph, attributes,
+                              {'file': os.path.abspath(places), 'network_type': network_type})
+        else:
+            graph = self.download(places, network_type=network_type)
+            self.save(path, graph, {'places': places, 'network_type': network_type})
+
+    def save(self, path, graph, description):
+        """Writes a cache entry of a NetworkX graph atomically.
+
+        Args:
+            path (str): The entry directory.
+            graph (networkx.Graph): The graph to cache.
+            description (dict): Information stored in meta.json.
+        """
+        compact_graph = CompactGraph.from_networkx(graph)
+        self.save_compact(path, compact_graph, edge_attributes(graph, compact_graph),
+                          description, graph)
+
+    def save_compact(self, path, compact_graph, attributes, description, graph=None):
+        """Writes a cache entry of a routing graph atomically.
+
+        Args:
+            path (str): The entry directory.
+            compact_graph (CompactGraph): The routing graph.
+            attributes (dict): The edge attributes of the routing graph.
+            description (dict): Information stored in meta.json.
+            graph (networkx.Graph): The NetworkX graph the routing graph was built from,
+                None if there is none. Defaults to None.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = tempfile.mkdtemp(dir=self.directory, prefix='.incomplete-')
+        try:
+            compact_graph.save(os.path.join(temporary, 'graph.bin'))
+            save_arrays(os.path.join(temporary, 'edges.bin'), attributes)
+            compact_graph.spatial_index.save_edge_samples(
+                os.path.join(temporary, 'spatial_index.bin'), compact_graph)
+            if graph is not None:
+                with open(os.path.join(temporary, 'graph.pickle'), 'wb') as file:
+                    pickle.dump(graph, file, protocol=pickle.HIGHEST_PROTOCOL)
+            with open(os.path.join(temporary, 'meta.json'), 'w', encoding='utf-8') as file:
+                json.dump({
+                    **description,
+                    'osmnx': ox.__version__,
+                    'format': self.FORMAT_VERSION,
+                    'nodes': compact_graph.node_count,
+                    'edges': compact_graph.edge_count,
+                    'created': datetime.datetime.now().isoformat(timespec='microseconds')
+                }, file, indent=2)
+            os.replace(temporary, path)
+        except OSError:
+            # Another process stored the same entry first
+            if not os.path.exists(os.path.join(path, 'meta.json')):
+                raise
+        finally:
+            shutil.rmtree(temporary, ignore_errors=True)
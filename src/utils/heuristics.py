@@ -0,0 +1,363 @@
+import itertools
+import math
+import threading
+import numpy as np
+
+# Mean Earth radius in meters, the same value OSMnx uses for edge lengths
+EARTH_RADIUS_M = 6_371_009
+
+
+class Heuristic:
+    """Base class for heuristics estimating the remaining cost to a goal node.
+
+    A heuristic precomputes per-node arrays once for a CompactGraph, after which estimator()
+    returns a cheap function of a single node index for one goal. Subclasses implement
+    precompute() and make_estimator(), and make_reverse_estimator() if the estimate depends
+    on the direction of travel. estimate_all() computes the estimates of every node at once,
+    which subclasses speed up by overriding make_estimates() with NumPy expressions.
+
+    Attributes:
+        graph (CompactGraph): The graph the precomputed values belong to, or None.
+        values (tuple): The precomputed per-node arrays.
+    """
+    def __init__(self):
+        """Initializes the heuristic without any precomputed values."""
+        self.graph = None
+        self.values = ()
+
+    def estimator(self, graph, goal, reverse=False):
+        """Returns the estimate function for the given goal.
+
+        The per-node values are precomputed the first time the heuristic is used with a graph.
+
+        Args:
+            graph (CompactGraph): The graph being searched.
+            goal (int): The goal node index.
+            reverse (bool): If True, estimate the cost from the goal to each node instead,
+                as needed by searches following the edges backwards.
+
+        Returns:
+            callable: Function mapping a node index to the estimated cost to the goal.
+        """
+        self.bind(graph)
+        if reverse:
+            return self.make_reverse_estimator(goal)
+        return self.make_estimator(goal)
+
+    def bind(self, graph):
+        """Precomputes the per-node values unless they already belong to the graph.
+
+        Args:
+            graph (CompactGraph): The graph being searched.
+        """
+        if graph is not self.graph:
+            self.values = self.precompute(graph)
+            self.graph = graph
+
+    def precompute(self, graph):
+        """Precomputes the per-node values for a graph.
+
+        Args:
+            graph (CompactGraph): The graph to precompute values for.
+
+        Returns:
+            tuple: The per-node arrays stored in values.
+        """
+        raise NotImplementedError
+
+    def make_estimator(self, goal):
+        """Builds the estimate function for a goal from the precomputed values.
+
+        Args:
+            goal (int): The goal node index.
+
+        Returns:
+            callable: Function mapping a node index to the estimated cost to the goal.
+        """
+        raise NotImplementedError
+
+    def make_reverse_estimator(self, goal):
+        """Builds the estimate function of the cost from a goal to each node.
+
+        Distances on a map are symmetric, so by default this is make_estimator().
+
+        Args:
+            goal (int): The goal node index.
+
+        Returns:
+            callable: Function mapping a node index to the estimated cost from the goal.
+        """
+        return self.make_estimator(goal)
+
+    def estimate_all(self, graph, goal, reverse=False):
+        """Estimates the cost between every node and a goal in one pass.
+
+        Args:
+            graph (CompactGraph): The graph being searched.
+            goal (int): The goal node index.
+            reverse (bool): If True, estimate the cost from the goal to each node instead.
+
+        Returns:
+            numpy.ndarray: The estimates (float64) indexed by node index.
+        """
+        self.bind(graph)
+        return self.make_estimates(goal, reverse)
+
+    def make_estimates(self, goal, reverse=False):
+        """Computes the estimates of every node from the precomputed values.
+
+        By default the estimate function is evaluated node by node.
+
+        Args:
+            goal (int): The goal node index.
+            reverse (bool): If True, estimate the cost from the goal to each node instead.
+
+        Returns:
+            numpy.ndarray: The estimates (float64) indexed by node index.
+        """
+        estimate = self.make_reverse_estimator(goal) if reverse else self.make_estimator(goal)
+        count = self.graph.node_count
+        return np.fromiter((estimate(node) for node in range(count)), np.float64, count)
+
+
+class EuclideanHeuristic(Heuristic):
+    """Euclidean distance in raw degrees of longitude and latitude.
+
+    This is the heuristic the algorithms originally used. It is admissible but, compared to
+    edge lengths in meters, about five orders of magnitude too small, so it barely guides
+    the search. It is kept for comparisons.
+    """
+    def precompute(self, graph):
+        return memoryview(graph.lat), memoryview(graph.lon)
+
+    def make_estimator(self, goal):
+        lat, lon = self.values
+        goal_lat, goal_lon = lat[goal], lon[goal]
+        isnan = math.isnan
+        hypot = math.hypot
+
+        def estimate(node):
+            distance = hypot(lon[node] - goal_lon, lat[node] - goal_lat)
+            return 0.0 if isnan(distance) else distance
+        return estimate
+
+    def make_estimates(self, goal, reverse=False):
+        lat, lon = (np.asarray(values) for values in self.values)
+        return zero_unknown(np.hypot(lon - lon[goal], lat - lat[goal]))
+
+
+class HaversineHeuristic(Heuristic):
+    """Great-circle (haversine) distance in meters.
+
+    Edge lengths in OSMnx are great-circle distances along the road geometry, so this is an
+    admissible and consistent lower bound of the remaining route length. Latitudes and
+    longitudes are converted to radians and the cosine of each latitude is precomputed.
+    """
+    def precompute(self, graph):
+        lat = np.radians(graph.lat)
+        return memoryview(lat), memoryview(np.radians(graph.lon)), memoryview(np.cos(lat))
+
+    def make_estimator(self, goal):
+        lat, lon, cos_lat = self.values
+        goal_lat, goal_lon, goal_cos = lat[goal], lon[goal], cos_lat[goal]
+        diameter = 2 * EARTH_RADIUS_M
+        sin, asin, sqrt, isnan = math.sin, math.asin, math.sqrt, math.isnan
+
+        def estimate(node):
+            a = (sin((lat[node] - goal_lat) / 2) ** 2
+                 + cos_lat[node] * goal_cos * sin((lon[node] - goal_lon) / 2) ** 2)
+            distance = diameter * asin(sqrt(min(a, 1.0)))
+            return 0.0 if isnan(distance) else distance
+        return estimate
+
+    def make_estimates(self, goal, reverse=False):
+        lat, lon, cos_lat = (np.asarray(values) for values in self.values)
+        a = (np.sin((lat - lat[goal]) / 2) ** 2
+             + cos_lat * cos_lat[goal] * np.sin((lon - lon[goal]) / 2) ** 2)
+        return zero_unknown(2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0))))
+
+
+class EquirectangularHeuristic(Heuristic):
+    """Equirectangular (flat-earth) distance in meters.
+
+    The nodes are projected once onto a plane where one degree of longitude is scaled with
+    the cosine of the graph's highest latitude, which shortens every east-west distance.
+    The remaining projection error on regional graphs is well below one percent, so the
+    distance is scaled down with SAFETY_FACTOR to stay below the great-circle distance.
+    An estimate then costs a single hypot() call.
+    """
+    SAFETY_FACTOR = 0.99
+
+    def precompute(self, graph):
+        lat = np.radians(graph.lat)
+        lon = np.radians(graph.lon)
+        scale = EARTH_RADIUS_M * self.SAFETY_FACTOR
+        max_lat = np.nanmax(np.abs(lat)) if np.any(~np.isnan(lat)) else 0.0
+        return memoryview(lon * math.cos(max_lat) * scale), memoryview(lat * scale)
+
+    def make_estimator(self, goal):
+        x, y = self.values
+        goal_x, goal_y = x[goal], y[goal]
+        hypot, isnan = math.hypot, math.isnan
+
+        def estimate(node):
+            distance = hypot(x[node] - goal_x, y[node] - goal_y)
+            return 0.0 if isnan(distance) else distance
+        return estimate
+
+    def make_estimates(self, goal, reverse=False):
+        x, y = (np.asarray(values) for values in self.values)
+        return zero_unknown(np.hypot(x - x[goal], y - y[goal]))
+
+
+class TravelTimeHeuristic(Heuristic):
+    """Lower bound of the travel time in seconds for time-weighted graphs.
+
+    The straight-line distance of a metric heuristic is divided by the maximum speed of any
+    edge, so the estimate never exceeds the real travel time.
+
+    Attributes:
+        distance_heuristic (Heuristic): Metric heuristic giving distances in meters.
+        max_speed_kph (float): Highest speed allowed on any edge in km/h.
+    """
+    def __init__(self, max_speed_kph=120, distance_heuristic=None):
+        """Initializes the heuristic.
+
+        Args:
+            max_speed_kph (float): Highest speed allowed on any edge in km/h. Defaults to 120.
+            distance_heuristic (Heuristic): Metric heuristic to scale. Defaults to
+                EquirectangularHeuristic.
+        """
+        super().__init__()
+        self.max_speed_kph = max_speed_kph
+        self.distance_heuristic = distance_heuristic or EquirectangularHeuristic()
+
+    def precompute(self, graph):
+        self.distance_heuristic.bind(graph)
+        return ()
+
+    def make_estimator(self, goal):
+        return self.scale(self.distance_heuristic.make_estimator(goal))
+
+    def make_reverse_estimator(self, goal):
+        # Landmark distances depend on the direction of travel
+        return self.scale(self.distance_heuristic.make_reverse_estimator(goal))
+
+    def make_estimates(self, goal, reverse=False):
+        return (self.distance_heuristic.make_estimates(goal, reverse)
+                * (3.6 / self.max_speed_kph))
+
+    def scale(self, distance):
+        """Converts a distance estimate function into a travel time estimate function.
+
+        Args:
+            distance (callable): Function mapping a node index to a distance in meters.
+
+        Returns:
+            callable: Function mapping a node index to a travel time in seconds.
+        """
+        seconds_per_meter = 3.6 / self.max_speed_kph
+
+        def estimate(node):
+            return distance(node) * seconds_per_meter
+        return estimate
+
+
+class MemoizedHeuristic(Heuristic):
+    """Memoizes the estimates of another heuristic in flat per-node arrays.
+
+    Fringe Search evaluates the heuristic of a node again in every iteration the node stays
+    in the fringe, and expensive heuristics such as LandmarkHeuristic then dominate the
+    search. This wrapper evaluates every node at most once per query in one of two ways:
+
+    - lazily (default): an estimate is computed on first use and stored in arrays that are
+      allocated once per thread and stamped with a generation per query, like SearchState.
+      The forward and reverse estimators of a query have separate arrays.
+    - vectorized: all estimates are computed with one NumPy pass per query (estimate_all()),
+      after which an estimate is a single array lookup. The pass costs O(n) per query, so
+      this pays off for long searches that visit a large part of the graph.
+
+    Attributes:
+        heuristic (Heuristic): The memoized heuristic.
+        vectorized (bool): Whether every estimate is computed up front.
+    """
+    def __init__(self, heuristic=None, vectorized=False):
+        """Initializes the wrapper.
+
+        Args:
+            heuristic (Heuristic): The heuristic to memoize. Defaults to
+                EquirectangularHeuristic.
+            vectorized (bool): If True, compute every estimate up front. Defaults to False.
+        """
+        super().__init__()
+        self.heuristic = heuristic or EquirectangularHeuristic()
+        self.vectorized = vectorized
+        self._local = threading.local()
+
+    def precompute(self, graph):
+        self.heuristic.bind(graph)
+        self._local = threading.local()
+        return ()
+
+    def make_estimator(self, goal):
+        return self.memoize(goal, reverse=False)
+
+    def make_reverse_estimator(self, goal):
+        return self.memoize(goal, reverse=True)
+
+    def make_estimates(self, goal, reverse=False):
+        return self.heuristic.make_estimates(goal, reverse)
+
+    def memoize(self, goal, reverse):
+        """Builds the memoizing estimate function for a goal.
+
+        Args:
+            goal (int): The goal node index.
+            reverse (bool): If True, estimate the cost from the goal to each node instead.
+
+        Returns:
+            callable: Function mapping a node index to the estimated cost.
+        """
+        if self.vectorized:
+            return memoryview(self.heuristic.make_estimates(goal, reverse)).__getitem__
+
+        estimate = (self.heuristic.make_reverse_estimator(goal) if reverse
+                    else self.heuristic.make_estimator(goal))
+        arrays = getattr(self._local, 'reverse' if reverse else 'forward', None)
+        if arrays is None:
+            count = self.graph.node_count
+            arrays = ([0.0] * count, [0] * count, itertools.count(1))
+            setattr(self._local, 'reverse' if reverse else 'forward', arrays)
+        values, stamps, generations = arrays
+        generation = next(generations)
+
+        def memoized(node):
+            if stamps[node] == generation:
+                return values[node]
+            value = values[node] = estimate(node)
+            stamps[node] = generation
+            return value
+        return memoized
+
+
+def zero_unknown(distances):
+    """Replaces the NaN distances of nodes without coordinates with zero."""
+    return np.where(np.isnan(distances), 0.0, distances)
+
+
+def great_circle_distances(lat, lon, ends):
+    """Computes the haversine distances between pairs of points.
+
+    Args:
+        lat (numpy.ndarray): Latitude of each point.
+        lon (numpy.ndarray): Longitude of each point.
+        ends (numpy.ndarray): Pairs of point indices, one row per pair.
+
+    Returns:
+        numpy.ndarray: The distance of each pair in meters.
+    """
+    lat1, lon1 = np.radians(lat[ends[:, 0]]), np.radians(lon[ends[:, 0]])
+    lat2, lon2 = np.radians(lat[ends[:, 1]]), np.radians(lon[ends[:, 1]])
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
@@ -0,0 +1,151 @@
+import contextlib
+import threading
+import time
+from collections import Counter
+
+
+class SearchStats:
+    """Counters and phase timings of one query, recorded by an instrumented search engine.
+
+    Counters whose name starts with 'peak_' hold the largest value seen during the query
+    (for example the largest open list), the others are totals. Phase timings are in
+    nanoseconds measured with time.perf_counter_ns.
+
+    Attributes:
+        counters (collections.Counter): The counters by name.
+        phases (dict): Nanoseconds spent in each named phase.
+    """
+    def __init__(self):
+        """Initializes empty counters and timings."""
+        self.counters = Counter()
+        self.phases = {}
+
+    def peak(self, name, value):
+        """Raises a peak counter to a value if the value is larger.
+
+        Args:
+            name (str): Name of the counter, starting with 'peak_'.
+            value (int): The current value.
+        """
+        if value > self.counters[name]:
+            self.counters[name] = value
+
+    def as_dict(self):
+        """Returns the counters and phase timings as a JSON-serializable dict."""
+        return {'counters': dict(self.counters), 'phases': dict(self.phases)}
+
+
+class PhaseTimer:
+    """Measures the named phases of a request with time.perf_counter_ns.
+
+    A disabled timer measures nothing, and its phases are a shared no-op context manager.
+
+    Attributes:
+        enabled (bool): Whether the phases are measured.
+        phases (dict): Nanoseconds spent in each named phase.
+    """
+    _DISABLED = contextlib.nullcontext()
+
+    def __init__(self, enabled=True):
+        """Initializes a timer without measured phases.
+
+        Args:
+            enabled (bool): Whether the phases are measured. Defaults to True.
+        """
+        self.enabled = enabled
+        self.phases = {}
+
+    def phase(self, name):
+        """Returns a context manager adding the time spent in it to a phase.
+
+        Args:
+            name (str): Name of the phase.
+        """
+        return self._measure(name) if self.enabled else self._DISABLED
+
+    @contextlib.contextmanager
+    def _measure(self, name):
+        """Adds the nanoseconds spent in the with block to a phase."""
+        start_time = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + time.perf_counter_ns() - start_time
+
+
+class MetricsRegistry:
+    """Aggregates search counters and phase timings and renders them for Prometheus.
+
+    The metrics are rendered in the Prometheus text exposition format, labelled with the
+    algorithm:
+
+    - route_queries_total: Number of observed queries.
+    - route_<counter>_total: Sum of every total counter over the queries.
+    - route_<peak counter>: Largest peak counter value of any query, as a gauge.
+    - route_phase_seconds: Summary (sum and count) of the time spent in each phase.
+
+    The registry is safe to use from concurrent request threads.
+    """
+    PREFIX = 'route'
+
+    def __init__(self):
+        """Initializes an empty registry."""
+        self._lock = threading.Lock()
+        self._totals = Counter()
+        self._peaks = {}
+        self._phase_sums = Counter()
+        self._phase_counts = Counter()
+
+    def observe(self, algorithm, counters=None, phases=None):
+        """Adds the counters and phase timings of one query.
+
+        Args:
+            algorithm (str): The algorithm label.
+            counters (dict): Counters of the query, see SearchStats.
+            phases (dict): Nanoseconds spent in each phase of the query.
+        """
+        with self._lock:
+            self._totals[('queries', algorithm)] += 1
+            for name, value in (counters or {}).items():
+                if name.startswith('peak_'):
+                    key = (name, algorithm)
+                    self._peaks[key] = max(self._peaks.get(key, 0), value)
+                else:
+                    self._totals[(name, algorithm)] += value
+            for name, nanoseconds in (phases or {}).items():
+                self._phase_sums[(name, algorithm)] += nanoseconds
+                self._phase_counts[(name, algorithm)] += 1
+
+    def render(self):
+        """Returns the metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: One sample per line, grouped by metric with a TYPE line each.
+        """
+        with self._lock:
+            totals = dict(self._totals)
+            peaks = dict(self._peaks)
+            phase_sums = dict(self._phase_sums)
+            phase_counts = dict(self._phase_counts)
+
+        lines = []
+        for name in sorted({name for name, _ in totals}):
+            metric = f"{self.PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.extend(f'{metric}{{algorithm="{algorithm}"}} {value}'
+                         for (sample, algorithm), value in sorted(totals.items())
+                         if sample == name)
+        for name in sorted({name for name, _ in peaks}):
+            metric = f"{self.PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.extend(f'{metric}{{algorithm="{algorithm}"}} {value}'
+                         for (sample, algorithm), value in sorted(peaks.items())
+                         if sample == name)
+        if phase_sums:
+            metric = f"{self.PREFIX}_phase_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for (phase, algorithm), nanoseconds in sorted(phase_sums.items()):
+                labels = f'{{algorithm="{algorithm}",phase="{phase}"}}'
+                lines.append(f"{metric}_sum{labels} {nanoseconds / 1e9}")
+                lines.append(f"{metric}_count{labels} {phase_counts[(phase, algorithm)]}")
+        return ''.join(line + '\n' for line in lines)
@@ -0,0 +1,603 @@
+import ast
+import bz2
+import gzip
+import math
+import re
+import xml.etree.ElementTree as ET
+from array import array
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from utils.compact_graph import CompactGraph
+from utils.heuristics import great_circle_distances
+from utils.weight_profiles import DEFAULT_SPEEDS_KPH, ROAD_CLASSES, road_class, parse_maxspeed
+
+try:
+    import osmium
+except ImportError:
+    osmium = None
+
+# File extensions the streaming loader reads. Compressed OSM XML is decompressed on the fly.
+
+GRAPH_FILE_EXTENSIONS = ('.osm', '.osm.gz', '.osm.bz2', '.osm.pbf', '.graphml')
+
+# Highways excluded from both driving networks
+
+DRIVE_EXCLUDED = ('abandoned|bridleway|bus_guideway|construction|corridor|cycleway|elevator|'
+                  'escalator|footway|no|path|pedestrian|planned|platform|proposed|raceway|'
+                  'razed|steps|track')
+
+# The way filters of the OSMnx network types: a way needs a 'highway' tag, and is dropped if
+# the value of any of these tags matches the pattern. The patterns are the unanchored
+# regular expressions of the Overpass queries of OSMnx 1.9, so 'motor' also drops
+# motorways from the walking and cycling networks like in OSMnx.
+
+NETWORK_FILTERS = {
+    'drive': {
+        'area': 'yes', 'access': 'private', 'highway': DRIVE_EXCLUDED + '|service',
+        'motor_vehicle': 'no', 'motorcar': 'no',
+        'service': 'alley|driveway|emergency_access|parking|parking_aisle|private'
+    },
+    'drive_service': {
+        'area': 'yes', 'access': 'private', 'highway': DRIVE_EXCLUDED,
+        'motor_vehicle': 'no', 'motorcar': 'no',
+        'service': 'emergency_access|parking|parking_aisle|private'
+    },
+    'walk': {
+        'area': 'yes', 'access': 'private',
+        'highway': ('abandoned|bus_guideway|construction|cycleway|motor|no|planned|platform|'
+                    'proposed|raceway|razed'),
+        'foot': 'no', 'service': 'private'
+    },
+    'bike': {
+        'area': 'yes', 'access': 'private',
+        'highway': ('abandoned|bus_guideway|construction|corridor|elevator|escalator|footway|'
+                    'motor|no|planned|platform|proposed|raceway|razed|steps'),
+        'bicycle': 'no', 'service': 'private'
+    },
+    'all_public': {
+        'area': 'yes', 'access': 'private',
+        'highway': 'abandoned|construction|no|planned|platform|proposed|raceway|razed',
+        'service': 'private'
+    },
+    'all': {
+        'area': 'yes',
+        'highway': 'abandoned|construction|no|planned|platform|proposed|raceway|razed'
+    }
+}
+
+FILTER_PATTERNS = {network_type: {key: re.compile(pattern) for key, pattern in rules.items()}
+                   for network_type, rules in NETWORK_FILTERS.items()}
+
+# Network types whose ways can be used in both directions regardless of the 'oneway' tag
+
+BIDIRECTIONAL_NETWORK_TYPES = ('walk',)
+
+# Values of the 'oneway' tag that make a way one-way, and those of them that mean the
+# direction is against the order of the way's nodes (as in OSMnx)
+
+ONEWAY_VALUES = ('yes', 'true', '1', '-1', 'reverse', 'T', 'F')
+REVERSED_VALUES = ('-1', 'reverse', 'T')
+
+GRAPHML_NAMESPACE = '{http://graphml.graphdrawing.org/xmlns}'
+
+
+def is_graph_file(source):
+    """Returns True if a graph source is a file the streaming loader reads.
+
+    Args:
+        source (str or list): A file path, or place names.
+    """
+    return isinstance(source, str) and source.lower().endswith(GRAPH_FILE_EXTENSIONS)
+
+
+def load_graph_file(path, network_type='drive', chunk_size=100_000):
+    """Streams an OSM or GraphML file into a routing graph and its edge attributes.
+
+    The file is read element by element and never held in memory. For OSM files a first
+    pass keeps the edges of the ways of the network type, and a second pass keeps the
+    coordinates of only the nodes those edges use, so the peak memory is a few arrays of
+    the size of the routing graph plus one chunk of nodes. The graph is not simplified,
+    so every node of the ways stays a node of the graph. Edges between nodes missing from
+    the file, for example at the border of an extract, are dropped. GraphML files (such as
+    those OSMnx saves) are filtered by the tags of their edges and use their 'length'
+    attribute where it exists.
+
+    Args:
+        path (str): An .osm, .osm.gz, .osm.bz2, .osm.pbf or .graphml file. Reading .osm.pbf
+            files needs pyosmium.
+        network_type (str): The OSMnx network type, see NETWORK_FILTERS. Defaults to
+            'drive'.
+        chunk_size (int): Number of nodes matched with the edges at a time. Defaults to
+            100 000.
+
+    Returns:
+        tuple: The CompactGraph and its edge attributes, as weight_profiles.edge_attributes
+        returns them.
+
+    Raises:
+        ValueError: If the network type or the file type is unknown.
+        ImportError: If the file is an .osm.pbf file and pyosmium is not installed.
+    """
+    if network_type not in NETWORK_FILTERS:
+        raise ValueError(f"Unknown network type: {network_type}")
+    if not is_graph_file(path):
+        raise ValueError(f"Unsupported graph file: {path}")
+
+    if path.lower().endswith('.graphml'):
+        return load_graphml(path, network_type)
+
+    ways, nodes = ((pbf_ways, pbf_nodes) if path.lower().endswith('.pbf')
+                   else (osm_xml_ways, osm_xml_nodes))
+    edges = EdgeBuffer()
+    for tags, refs in ways(path):
+        edges.add_way(tags, refs, network_type)
+
+    table = NodeTable(edges.node_ids())
+    for chunk in chunked(nodes(path), chunk_size):
+        table.add(*chunk)
+    return edges.build(table)
+
+
+def load_graphml(path, network_type='drive'):
+    """Streams a GraphML file into a routing graph, see load_graph_file().
+
+    Args:
+        path (str): The GraphML file.
+        network_type (str): The OSMnx network type. Defaults to 'drive'.
+
+    Returns:
+        tuple: The CompactGraph and its edge attributes.
+    """
+    node_buffer = (array('q'), array('d'), array('d'))
+    edges = EdgeBuffer()
+    for kind, attributes, data in graphml_elements(path):
+        if kind == 'node':
+            node_buffer[0].append(int(attributes['id']))
+            node_buffer[1].append(float(data.get('y', math.nan)))
+            node_buffer[2].append(float(data.get('x', math.nan)))
+        elif keeps_way(data, network_type):
+            edges.add_edge(int(attributes['source']), int(attributes['target']), data,
+                           bidirectional=(attributes['directed'] == 'false'
+                                          or network_type in BIDIRECTIONAL_NETWORK_TYPES))
+
+    table = NodeTable(edges.node_ids())
+    table.add(*(np.frombuffer(values, dtype=values.typecode) for values in node_buffer))
+    return edges.build(table)
+
+
+def keeps_way(tags, network_type):
+    """Returns True if a way (or GraphML edge) belongs to a network type.
+
+    Args:
+        tags (dict): The tags of the way. Values can be lists, as in simplified graphs.
+        network_type (str): The OSMnx network type, see NETWORK_FILTERS.
+    """
+    if 'highway' not in tags:
+        return False
+    patterns = FILTER_PATTERNS[network_type]
+    return not any(pattern.search(value)
+                   for key, pattern in patterns.items() if key in tags
+                   for value in tag_values(tags[key]))
+
+
+def tag_values(value):
+    """Returns the values of a tag as a list of strings.
+
+    Args:
+        value (str or list): A tag value, or several merged by simplification. GraphML files
+            store lists in their Python representation.
+
+    Returns:
+        list: The values.
+    """
+    if isinstance(value, str) and value.startswith('['):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return [value]
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return [str(value)]
+
+
+def way_direction(tags, network_type):
+    """Returns the directions a way can be traveled in, as OSMnx decides them.
+
+    Args:
+        tags (dict): The tags of the way.
+        network_type (str): The OSMnx network type.
+
+    Returns:
+        int: 1 if only along the order of its nodes, -1 if only against it and 0 if both.
+    """
+    if network_type in BIDIRECTIONAL_NETWORK_TYPES:
+        return 0
+    oneway = tags.get('oneway')
+    if oneway in ONEWAY_VALUES:
+        return -1 if oneway in REVERSED_VALUES else 1
+    return 1 if tags.get('junction') == 'roundabout' else 0
+
+
+class EdgeBuffer:
+    """Growable arrays of the edges read from a file, keyed by node ID.
+
+    Attributes:
+        sources (array.array): Source node ID of each edge.
+        targets (array.array): Target node ID of each edge.
+        lengths (array.array): Length of each edge in meters, NaN to compute it from the
+            node coordinates.
+        speeds (array.array): Speed of each edge in km/h.
+        road_classes (array.array): Road class of each edge, an index in ROAD_CLASSES.
+    """
+    def __init__(self):
+        """Initializes the buffer without any edges."""
+        self.sources = array('q')
+        self.targets = array('q')
+        self.lengths = array('d')
+        self.speeds = array('f')
+        self.road_classes = array('b')
+
+    def add_way(self, tags, refs, network_type):
+        """Adds the edges between the consecutive nodes of a way of the network type.
+
+        Args:
+            tags (dict): The tags of the way.
+            refs (list): The node IDs of the way in order.
+            network_type (str): The OSMnx network type.
+        """
+        if len(refs) < 2 or not keeps_way(tags, network_type):
+            return
+        direction = way_direction(tags, network_type)
+        attributes = edge_values(tags)
+        if direction >= 0:
+            self.extend(refs[:-1], refs[1:], math.nan, attributes)
+        if direction <= 0:
+            self.extend(refs[1:], refs[:-1], math.nan, attributes)
+
+    def add_edge(self, source, target, data, bidirectional=False):
+        """Adds a single edge, for example of a GraphML file.
+
+        Args:
+            source (int): The source node ID.
+            target (int): The target node ID.
+            data (dict): The attributes of the edge, with its 'length' in meters if known.
+            bidirectional (bool): Whether to add the reverse edge too. Defaults to False.
+        """
+        length = float(data.get('length', math.nan))
+        attributes = edge_values(data)
+        self.extend((source,), (target,), length, attributes)
+        if bidirectional:
+            self.extend((target,), (source,), length, attributes)
+
+    def extend(self, sources, targets, length, attributes):
+        """Appends edges that share their length and attributes.
+
+        Args:
+            sources (sequence): The source node IDs.
+            targets (sequence): The target node IDs.
+            length (float): The length of every edge, NaN if unknown.
+            attributes (tuple): The speed and road class of every edge.
+        """
+        count = len(sources)
+        self.sources.extend(sources)
+        self.targets.extend(targets)
+        self.lengths.extend((length,) * count)
+        self.speeds.extend((attributes[0],) * count)
+        self.road_classes.extend((attributes[1],) * count)
+
+    def node_ids(self):
+        """Returns the sorted IDs of the nodes the edges use.
+
+        Returns:
+            numpy.ndarray: The node IDs (int64).
+        """
+        return np.union1d(np.frombuffer(self.sources, dtype=np.int64),
+                          np.frombuffer(self.targets, dtype=np.int64))
+
+    def build(self, table):
+        """Builds the routing graph from the edges and the coordinates of their nodes.
+
+        Self-loops and edges with a node without coordinates are dropped, and parallel
+        edges are collapsed into the shortest one like in CompactGraph.from_networkx. Only
+        the largest strongly connected component is kept, as for the downloaded OSMnx
+        graphs, so the dead ends of one-way streets and the fragments cut off at the border
+        of an extract cannot be snapped to.
+
+        Args:
+            table (NodeTable): The coordinates of the nodes.
+
+        Returns:
+            tuple: The CompactGraph and its edge attributes.
+        """
+        sources = table.indices_of(np.frombuffer(self.sources, dtype=np.int64))
+        targets = table.indices_of(np.frombuffer(self.targets, dtype=np.int64))
+        lengths = np.frombuffer(self.lengths, dtype=np.float64).copy()
+        unknown = np.isnan(lengths) & (sources >= 0) & (targets >= 0)
+        lengths[unknown] = great_circle_distances(
+            table.lat, table.lon, np.column_stack((sources[unknown], targets[unknown])))
+        valid = (sources >= 0) & (targets >= 0) & (sources != targets) & np.isfinite(lengths)
+
+        # Keep only the nodes with an edge, renumbered in ascending node ID order
+        used = np.union1d(sources[valid], targets[valid])
+        sources = np.searchsorted(used, sources[valid])
+        targets = np.searchsorted(used, targets[valid])
+        edges = np.flatnonzero(valid)
+
+        # Edges sorted by source, target and length, so the first of every pair is kept and
+        # the edges are already in the order of CompactGraph.from_edges
+        order = np.lexsort((lengths[edges], targets, sources))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = ((sources[order][1:] != sources[order][:-1])
+                     | (targets[order][1:] != targets[order][:-1]))
+        order = order[first]
+
+        # Renumber the nodes of the largest component, which keeps the order of the edges
+        inside = largest_component(len(used), sources[order], targets[order])
+        order = order[inside[sources[order]] & inside[targets[order]]]
+        renumbered = np.cumsum(inside) - 1
+        used = used[inside]
+
+        graph = CompactGraph.from_edges(table.node_ids[used], renumbered[sources[order]],
+                                        renumbered[targets[order]], lengths[edges[order]],
+                                        table.lat[used], table.lon[used])
+        return graph, {
+            'speeds': np.frombuffer(self.speeds, dtype=np.float32)[edges[order]],
+            'road_classes': np.frombuffer(self.road_classes, dtype=np.int8)[edges[order]]
+        }
+
+
+def largest_component(node_count, sources, targets):
+    """Finds the nodes of the largest strongly connected component of a graph.
+
+    Args:
+        node_count (int): Number of nodes.
+        sources (numpy.ndarray): Source node index of each edge.
+        targets (numpy.ndarray): Target node index of each edge.
+
+    Returns:
+        numpy.ndarray: Whether each node is in the largest component.
+    """
+    if node_count == 0:
+        return np.zeros(0, dtype=bool)
+    adjacency = csr_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)),
+                           shape=(node_count, node_count))
+    _, labels = connected_components(adjacency, directed=True, connection='strong')
+    return labels == np.argmax(np.bincount(labels))
+
+
+def edge_values(tags):
+    """Returns the speed in km/h and the road class index of a way or edge.
+
+    Args:
+        tags (dict): The tags of the way.
+
+    Returns:
+        tuple: The speed and the road class, as in weight_profiles.edge_attributes().
+    """
+    highway = tags.get('highway')
+    if isinstance(highway, str) and highway.startswith('['):
+        highway = tag_values(highway)
+    maxspeed = tags.get('maxspeed')
+    if isinstance(maxspeed, str) and maxspeed.startswith('['):
+        maxspeed = tag_values(maxspeed)
+
+    road = road_class(highway)
+    return parse_maxspeed(maxspeed) or DEFAULT_SPEEDS_KPH[ROAD_CLASSES[road]], road
+
+
+class NodeTable:
+    """Coordinates of the nodes the edges use, filled from a stream of nodes.
+
+    Attributes:
+        node_ids (numpy.ndarray): The sorted IDs of the nodes to keep.
+        lat (numpy.ndarray): Latitude of each node, NaN until it is read.
+        lon (numpy.ndarray): Longitude of each node, NaN until it is read.
+    """
+    def __init__(self, node_ids):
+        """Initializes the table.
+
+        Args:
+            node_ids (numpy.ndarray): The sorted IDs of the nodes to keep.
+        """
+        self.node_ids = np.asarray(node_ids, dtype=np.int64)
+        self.lat = np.full(len(self.node_ids), np.nan)
+        self.lon = np.full(len(self.node_ids), np.nan)
+
+    def add(self, node_ids, lat, lon):
+        """Stores the coordinates of the nodes in the table and ignores the rest.
+
+        Args:
+            node_ids (numpy.ndarray): IDs of the read nodes.
+            lat (numpy.ndarray): Their latitudes.
+            lon (numpy.ndarray): Their longitudes.
+        """
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        positions = np.searchsorted(self.node_ids, node_ids)
+        found = positions < len(self.node_ids)
+        found[found] = self.node_ids[positions[found]] == node_ids[found]
+        self.lat[positions[found]] = np.asarray(lat)[found]
+        self.lon[positions[found]] = np.asarray(lon)[found]
+
+    def indices_of(self, node_ids):
+        """Looks up the positions of nodes in the table.
+
+        Args:
+            node_ids (numpy.ndarray): Node IDs.
+
+        Returns:
+            numpy.ndarray: The position of every node, -1 if it has no coordinates.
+        """
+        if not self.node_ids.size:
+            return np.full(len(node_ids), -1, dtype=np.int64)
+        positions = np.searchsorted(self.node_ids, node_ids).clip(0, len(self.node_ids) - 1)
+        known = (self.node_ids[positions] == node_ids) & ~np.isnan(self.lat[positions])
+        return np.where(known, positions, -1)
+
+
+def chunked(nodes, chunk_size):
+    """Groups a stream of (node ID, latitude, longitude) tuples into arrays.
+
+    Args:
+        nodes (iterable): The nodes.
+        chunk_size (int): Number of nodes per chunk.
+
+    Yields:
+        tuple: Arrays of the node IDs, latitudes and longitudes of a chunk.
+    """
+    chunk = (array('q'), array('d'), array('d'))
+    for node in nodes:
+        for values, value in zip(chunk, node):
+            values.append(value)
+        if len(chunk[0]) >= chunk_size:
+            yield tuple(np.frombuffer(values, dtype=values.typecode) for values in chunk)
+            chunk = (array('q'), array('d'), array('d'))
+    if chunk[0]:
+        yield tuple(np.frombuffer(values, dtype=values.typecode) for values in chunk)
+
+
+def open_file(path):
+    """Opens a possibly compressed file for binary reading.
+
+    Args:
+        path (str): The file, decompressed on the fly if it ends with .gz or .bz2.
+
+    Returns:
+        file: The opened file.
+    """
+    if path.lower().endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.lower().endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def root_children(path):
+    """Parses an XML file incrementally, yielding the children of the root one at a time.
+
+    Every child is cleared from the root once it has been processed, so the parsed tree
+    never grows beyond one element.
+
+    Args:
+        path (str): The XML file.
+
+    Yields:
+        xml.etree.ElementTree.Element: The children, complete with their own children.
+    """
+    with open_file(path) as file:
+        context = ET.iterparse(file, events=('start', 'end'))
+        start = next(context, None)
+        if start is None:
+            return
+        root = start[1]
+        depth = 0
+        for event, element in context:
+            depth += 1 if event == 'start' else -1
+            if event == 'end' and depth == 0:
+                yield element
+                root.clear()
+
+
+def osm_xml_ways(path):
+    """Streams the ways of an OSM XML file.
+
+    Args:
+        path (str): The .osm file, optionally compressed.
+
+    Yields:
+        tuple: The tags (dict) and the node IDs (list) of every way.
+    """
+    for element in root_children(path):
+        if element.tag == 'way':
+            yield ({tag.get('k'): tag.get('v') for tag in element.iter('tag')},
+                   [int(node.get('ref')) for node in element.iter('nd')])
+
+
+def osm_xml_nodes(path):
+    """Streams the nodes of an OSM XML file.
+
+    Args:
+        path (str): The .osm file, optionally compressed.
+
+    Yields:
+        tuple: The ID, latitude and longitude of every node.
+    """
+    for element in root_children(path):
+        if element.tag == 'node':
+            yield int(element.get('id')), float(element.get('lat')), float(element.get('lon'))
+
+
+def pbf_ways(path):
+    """Streams the ways of an OSM PBF file with pyosmium.
+
+    Args:
+        path (str): The .osm.pbf file.
+
+    Yields:
+        tuple: The tags (dict) and the node IDs (list) of every way.
+    """
+    for way in pbf_objects(path, 'WAY'):
+        yield {tag.k: tag.v for tag in way.tags}, [node.ref for node in way.nodes]
+
+
+def pbf_nodes(path):
+    """Streams the nodes of an OSM PBF file with pyosmium.
+
+    Args:
+        path (str): The .osm.pbf file.
+
+    Yields:
+        tuple: The ID, latitude and longitude of every node.
+    """
+    for node in pbf_objects(path, 'NODE'):
+        yield node.id, node.location.lat, node.location.lon
+
+
+def pbf_objects(path, kind):
+    """Iterates over the objects of one kind in an OSM PBF file.
+
+    Args:
+        path (str): The .osm.pbf file.
+        kind (str): 'NODE' or 'WAY'.
+
+    Returns:
+        iterator: The pyosmium objects.
+
+    Raises:
+        ImportError: If pyosmium is not installed.
+    """
+    if osmium is None:
+        raise ImportError("Reading .osm.pbf files needs pyosmium: pip install osmium")
+    return iter(osmium.FileProcessor(path, getattr(osmium.osm, kind)))
+
+
+def graphml_elements(path):
+    """Streams the nodes and edges of a GraphML file with their data.
+
+    Args:
+        path (str): The GraphML file.
+
+    Yields:
+        tuple: 'node' or 'edge', the XML attributes of the element (with 'directed' of
+        edges set from the graph's default if missing) and its data by attribute name.
+    """
+    names = {}
+    directed = 'true'
+    with open_file(path) as file:
+        graph = None
+        for event, element in ET.iterparse(file, events=('start', 'end')):
+            tag = element.tag.removeprefix(GRAPHML_NAMESPACE)
+            if event == 'start':
+                if tag == 'graph':
+                    graph = element
+                    directed = 'false' if element.get('edgedefault') == 'undirected' else 'true'
+            elif tag == 'key':
+                names[element.get('id')] = element.get('attr.name')
+            elif tag in ('node', 'edge') and graph is not None:
+                data = {names.get(item.get('key'), item.get('key')): item.text or ''
+                        for item in element.iter(GRAPHML_NAMESPACE + 'data')}
+                attributes = dict(element.attrib)
+                if tag == 'edge':
+                    attributes.setdefault('directed', directed)
+                yield tag, attributes, data
+                graph.clear()
@@ -0,0 +1,201 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class RouteCache:
+    """Bounded in-memory cache of route results with LRU and TTL eviction.
+
+    Entries are keyed on (algorithm, start node, goal node, weight profile) and the version
+    of the graph they were computed on. Setting a new graph version with invalidate() drops
+    every entry, and since the version is part of every key, entries of an older graph in a
+    shared store are never returned either.
+
+    At most max_entries results are kept in memory; the least recently used entry is evicted
+    first and entries older than ttl seconds are treated as missing. An optional shared store
+    (see SqliteRouteStore) is consulted on a memory miss, so several worker processes benefit
+    from each other's results. The cache is safe to use from concurrent request threads.
+
+    Attributes:
+        max_entries (int): Maximum number of entries kept in memory.
+        ttl (float): Lifetime of an entry in seconds.
+        store (SqliteRouteStore): Optional store shared between processes.
+        version (str): Version of the graph the cached routes belong to.
+    """
+    def __init__(self, max_entries=10000, ttl=3600.0, store=None, version='', clock=time.time):
+        """Initializes an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of entries kept in memory. Defaults to 10000.
+            ttl (float): Lifetime of an entry in seconds. Defaults to one hour.
+            store (SqliteRouteStore): Optional store shared between processes.
+            version (str): Version of the graph. Defaults to ''.
+            clock (callable): Returns the current time in seconds. Defaults to time.time.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self.version = version
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(('hits', 'shared_hits', 'misses', 'evictions'), 0)
+
+    def get(self, key, version=None):
+        """Looks up a cached result.
+
+        Args:
+            key (tuple): (algorithm, start node ID, goal node ID, weight profile).
+            version (str): Version of the graph the result is for. Defaults to the version
+                of the cache.
+
+        Returns:
+            object: The cached result, or None on a miss.
+        """
+        full_key = (version or self.version, *key)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(full_key)
+                self._counters['hits'] += 1
+                return entry[1]
+            self._entries.pop(full_key, None)
+
+        entry = self.store.get(full_key, now) if self.store is not None else None
+        with self._lock:
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            self._counters['shared_hits'] += 1
+            self._insert(full_key, entry)
+        return entry[1]
+
+    def put(self, key, value, version=None):
+        """Caches a result.
+
+        A search that started before invalidate() passes the version of the graph it ran
+        on, so its result is never returned for the new graph.
+
+        Args:
+            key (tuple): (algorithm, start node ID, goal node ID, weight profile).
+            value (object): The result. Must be JSON-serializable if a store is used.
+            version (str): Version of the graph the result is for. Defaults to the version
+                of the cache.
+        """
+        full_key = (version or self.version, *key)
+        now = self._clock()
+        entry = (now + self.ttl, value)
+        with self._lock:
+            self._insert(full_key, entry)
+        if self.store is not None:
+            self.store.put(full_key, entry, now)
+
+    def invalidate(self, version):
+        """Drops every entry and caches the routes of a new graph version from now on.
+
+        Args:
+            version (str): Version of the new graph.
+        """
+        with self._lock:
+            self.version = version
+            self._entries.clear()
+
+    def stats(self):
+        """Returns the hit, miss and eviction counters and the number of entries in memory."""
+        with self._lock:
+            return {**self._counters, 'size': len(self._entries)}
+
+    def _insert(self, full_key, entry):
+        """Stores an entry as the most recently used one, evicting the least recently used."""
+        self._entries[full_key] = entry
+        self._entries.move_to_end(full_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters['evictions'] += 1
+
+
+class SqliteRouteStore:
+    """Route results shared between processes in a local SQLite database.
+
+    Keys and values are stored as JSON. Every process and thread uses its own connection, and
+    SQLite serializes the writes. The write counter is shared by the threads and guarded by
+    a lock. Expired rows are deleted every PURGE_INTERVAL writes, and
+    the rows expiring first are deleted when there are more than max_entries.
+
+    Attributes:
+        path (str): The database file.
+        max_entries (int): Maximum number of rows kept in the database.
+    """
+    # Number of writes between purges of expired and surplus rows
+    PURGE_INTERVAL = 1000
+
+    def __init__(self, path, max_entries=100000):
+        """Opens the database, creating the table if needed.
+
+        Args:
+            path (str): The database file.
+            max_entries (int): Maximum number of rows kept. Defaults to 100000.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self.connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS routes '
+                               '(key TEXT PRIMARY KEY, value TEXT, expires REAL)')
+
+    def connection(self):
+        """Returns the connection of the calling thread, opening it on first use."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key, now):
+        """Looks up an entry that has not expired.
+
+        Args:
+            key (tuple): The full cache key.
+            now (float): The current time.
+
+        Returns:
+            tuple: The expiry time and the value, or None if there is no such entry.
+        """
+        row = self.connection().execute(
+            'SELECT expires, value FROM routes WHERE key = ? AND expires > ?',
+            (json.dumps(key), now)).fetchone()
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def put(self, key, entry, now):
+        """Stores an entry, replacing an existing entry with the same key.
+
+        Args:
+            key (tuple): The full cache key.
+            entry (tuple): The expiry time and the value.
+            now (float): The current time.
+        """
+        with self.connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO routes VALUES (?, ?, ?)',
+                               (json.dumps(key), json.dumps(entry[1]), entry[0]))
+            with self._lock:
+                self._writes += 1
+                due = self._writes % self.PURGE_INTERVAL == 0
+            if due:
+                self.purge(connection, now)
+
+    def purge(self, connection, now):
+        """Deletes expired rows and the rows expiring first above max_entries.
+
+        Args:
+            connection (sqlite3.Connection): The connection to use.
+            now (float): The current time.
+        """
+        connection.execute('DELETE FROM routes WHERE expires <= ?', (now,))
+        connection.execute('DELETE FROM routes WHERE key IN (SELECT key FROM routes '
+                           'ORDER BY expires DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
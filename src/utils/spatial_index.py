@@ -0,0 +1,227 @@
+import math
+import numpy as np
+from sklearn.neighbors import KDTree
+from utils.array_file import save_arrays, map_arrays
+from utils.heuristics import EARTH_RADIUS_M
+
+
+class SpatialIndex:
+    """Nearest-node and nearest-edge lookups over node coordinates projected into meters.
+
+    Latitudes and longitudes are projected once onto a local equirectangular plane centered
+    on the graph, where distances in meters are accurate to well below a percent on a
+    regional graph. The projected coordinates are plain arrays, so they can be stored in and
+    memory-mapped from the same file as the graph.
+
+    Lookups use KD-trees over the projected points, built on first use, so processes that
+    never snap a point, such as route workers, never build them. The points sampled along
+    the edges can be saved with save_edge_samples() and mapped back with load_edge_samples(),
+    and the edge tree then indexes the mapped points without copying them. Every lookup
+    takes whole arrays of points, so snapping many points costs a single tree query.
+
+    Attributes:
+        x (numpy.ndarray): Projected east coordinate of each node in meters, NaN if unknown.
+        y (numpy.ndarray): Projected north coordinate of each node in meters, NaN if unknown.
+        origin (numpy.ndarray): Latitude and longitude of the projection center in degrees.
+        edge_samples (dict): The points sampled along the edges, None until sampled or
+            loaded (see sample_edges()).
+    """
+    # Distance in meters between the points sampled along every edge for the edge tree
+    EDGE_SAMPLE_SPACING = 25.0
+
+    def __init__(self, x, y, origin):
+        """Initializes the index from projected coordinates.
+
+        Args:
+            x (numpy.ndarray): Projected east coordinate of each node in meters.
+            y (numpy.ndarray): Projected north coordinate of each node in meters.
+            origin (numpy.ndarray): Latitude and longitude of the projection center.
+        """
+        self.x = x
+        self.y = y
+        self.origin = origin
+        self.edge_samples = None
+        self._node_tree = None
+        self._edge_tree = None
+
+    @classmethod
+    def from_coordinates(cls, lat, lon):
+        """Projects node coordinates and builds the index.
+
+        Args:
+            lat (numpy.ndarray): Latitude of each node, NaN if unknown.
+            lon (numpy.ndarray): Longitude of each node, NaN if unknown.
+
+        Returns:
+            SpatialIndex: The index of the nodes.
+        """
+        known = ~(np.isnan(lat) | np.isnan(lon))
+        origin = np.array([lat[known].mean(), lon[known].mean()] if known.any() else [0.0, 0.0])
+        index = cls(np.empty(0), np.empty(0), origin)
+        index.x, index.y = index.project(lat, lon)
+        return index
+
+    def project(self, lat, lon):
+        """Projects coordinates onto the plane of the index.
+
+        Args:
+            lat (float or numpy.ndarray): Latitudes in degrees.
+            lon (float or numpy.ndarray): Longitudes in degrees.
+
+        Returns:
+            tuple: The east and north coordinates in meters.
+        """
+        scale = math.radians(1) * EARTH_RADIUS_M
+        x = (np.asarray(lon, dtype=np.float64) - self.origin[1]) * scale * math.cos(
+            math.radians(self.origin[0]))
+        y = (np.asarray(lat, dtype=np.float64) - self.origin[0]) * scale
+        return x, y
+
+    def points(self, lat, lon):
+        """Projects coordinates into an (n, 2) array of query points."""
+        x, y = self.project(np.atleast_1d(lat), np.atleast_1d(lon))
+        return np.column_stack((x, y))
+
+    @property
+    def node_tree(self):
+        """tuple: KD-tree over the nodes with known coordinates and their node indices."""
+        if self._node_tree is None:
+            nodes = np.flatnonzero(~(np.isnan(self.x) | np.isnan(self.y)))
+            self._node_tree = (KDTree(np.column_stack((self.x[nodes], self.y[nodes]))), nodes)
+        return self._node_tree
+
+    def nearest(self, lat, lon):
+        """Finds the node closest to a point.
+
+        Args:
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+
+        Returns:
+            int: The index of the nearest node with known coordinates.
+        """
+        return int(self.nearest_nodes(lat, lon)[0])
+
+    def nearest_nodes(self, lat, lon):
+        """Finds the nodes closest to many points in one query.
+
+        Args:
+            lat (numpy.ndarray): Latitudes of the points.
+            lon (numpy.ndarray): Longitudes of the points.
+
+        Returns:
+            numpy.ndarray: The index of the nearest node of each point.
+        """
+        tree, nodes = self.node_tree
+        neighbors = tree.query(self.points(lat, lon), k=1, return_distance=False)
+        return nodes[neighbors[:, 0]]
+
+    def sample_edges(self, graph):
+        """Samples points along the edges of a graph.
+
+        Args:
+            graph (CompactGraph): The graph the index belongs to.
+
+        Returns:
+            dict: The (n, 2) projected 'points', the index into 'sources' and 'targets' of
+            the edge of each point in 'edges', and the source and target node index of every
+            edge with known coordinates.
+        """
+        sources = graph.sources()
+        targets = np.asarray(graph.targets)
+        known = ~np.isnan(self.x[sources] + self.y[sources] + self.x[targets] + self.y[targets])
+        sources, targets = sources[known], targets[known]
+
+        lengths = np.hypot(self.x[targets] - self.x[sources], self.y[targets] - self.y[sources])
+        counts = np.ceil(lengths / self.EDGE_SAMPLE_SPACING).astype(np.int64) + 1
+        edges = np.repeat(np.arange(len(sources)), counts)
+        starts = np.repeat(np.cumsum(counts) - counts, counts)
+        fractions = (np.arange(len(edges)) - starts) / np.maximum(counts[edges] - 1, 1)
+        x = self.x[sources[edges]] + fractions * (self.x[targets[edges]] - self.x[sources[edges]])
+        y = self.y[sources[edges]] + fractions * (self.y[targets[edges]] - self.y[sources[edges]])
+        return {'points': np.column_stack((x, y)), 'edges': edges, 'sources': sources,
+                'targets': targets}
+
+    def build_edge_tree(self, graph):
+        """Builds the KD-tree of the points sampled along the edges of a graph.
+
+        The loaded or previously sampled points are used if there are any.
+
+        Args:
+            graph (CompactGraph): The graph the index belongs to.
+        """
+        if self.edge_samples is None:
+            self.edge_samples = self.sample_edges(graph)
+        samples = self.edge_samples
+        self._edge_tree = (KDTree(samples['points']), samples['edges'], samples['sources'],
+                           samples['targets'])
+
+    def nearest_edges(self, lat, lon, graph, candidates=8):
+        """Finds the edges closest to many points in one query.
+
+        The nearest sampled edge points give the candidate edges, and the exact distance to
+        each candidate segment decides between them.
+
+        Args:
+            lat (numpy.ndarray): Latitudes of the points.
+            lon (numpy.ndarray): Longitudes of the points.
+            graph (CompactGraph): The graph the index belongs to, used to build the edge tree.
+            candidates (int): Number of sampled points to consider per query point.
+
+        Returns:
+            tuple: For each point the source and target node index of the nearest edge and
+            the position of the closest point along the edge, from 0 (source) to 1 (target).
+        """
+        if self._edge_tree is None:
+            self.build_edge_tree(graph)
+        tree, edges, sources, targets = self._edge_tree
+        points = self.points(lat, lon)
+        candidate_edges = edges[tree.query(points, k=min(candidates, len(edges)),
+                                           return_distance=False)]
+        fractions, distances = self.segment_positions(
+            points, sources[candidate_edges], targets[candidate_edges])
+
+        best = (np.arange(len(points)), np.argmin(distances, axis=1))
+        return (sources[candidate_edges[best]], targets[candidate_edges[best]],
+                fractions[best])
+
+    def segment_positions(self, points, sources, targets):
+        """Projects every point onto each of its candidate segments.
+
+        Args:
+            points (numpy.ndarray): The (n, 2) query points.
+            sources (numpy.ndarray): The (n, k) source node indices of the segments.
+            targets (numpy.ndarray): The (n, k) target node indices of the segments.
+
+        Returns:
+            tuple: The position of the closest point along each segment, from 0 to 1, and
+            the distance of the query point from it.
+        """
+        start_x, start_y = self.x[sources], self.y[sources]
+        delta_x, delta_y = self.x[targets] - start_x, self.y[targets] - start_y
+        offset_x, offset_y = points[:, :1] - start_x, points[:, 1:] - start_y
+        squared_lengths = delta_x ** 2 + delta_y ** 2
+        fractions = np.clip((offset_x * delta_x + offset_y * delta_y)
+                            / np.where(squared_lengths > 0, squared_lengths, 1.0), 0.0, 1.0)
+        distances = np.hypot(offset_x - fractions * delta_x, offset_y - fractions * delta_y)
+        return fractions, distances
+
+    def save_edge_samples(self, path, graph):
+        """Saves the points sampled along the edges into an array file.
+
+        Args:
+            path (str): The output file.
+            graph (CompactGraph): The graph the index belongs to, sampled if needed.
+        """
+        if self.edge_samples is None:
+            self.edge_samples = self.sample_edges(graph)
+        save_arrays(path, self.edge_samples)
+
+    def load_edge_samples(self, path):
+        """Maps the points saved with save_edge_samples(), so they are not sampled again.
+
+        Args:
+            path (str): The file written by save_edge_samples().
+        """
+        self.edge_samples = map_arrays(path)[0]
+        self._edge_tree = None
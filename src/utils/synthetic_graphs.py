@@ -0,0 +1,125 @@
+import math
+import numpy as np
+from sklearn.neighbors import KDTree
+from utils.compact_graph import CompactGraph
+from utils.heuristics import EARTH_RADIUS_M, great_circle_distances
+
+# Latitude and longitude the synthetic graphs are placed at (Helsinki)
+ORIGIN = (60.17, 24.94)
+
+
+def grid_graph(size, seed=0, spacing=150.0, one_way=0.3):
+    """Generates a size x size street grid, with a share of one-way streets.
+
+    Args:
+        size (int): Number of nodes per row and column.
+        seed (int): Seed of the random choices. Defaults to 0.
+        spacing (float): Distance between neighboring crossings in meters. Defaults to 150.
+        one_way (float): Share of the streets that are one-way. Defaults to 0.3.
+
+    Returns:
+        CompactGraph: The grid, with node IDs 0..size * size - 1 numbered row by row.
+    """
+    rows, columns = np.divmod(np.arange(size * size), size)
+    lat, lon = project(columns * spacing, rows * spacing)
+    nodes = np.arange(size * size).reshape(size, size)
+    streets = np.concatenate((
+        np.column_stack((nodes[:, :-1].ravel(), nodes[:, 1:].ravel())),
+        np.column_stack((nodes[:-1, :].ravel(), nodes[1:, :].ravel()))))
+    return street_graph(lat, lon, streets, np.random.default_rng(seed), one_way)
+
+
+def road_like_graph(node_count, seed=0, spacing=150.0, neighbors=3, one_way=0.1):
+    """Generates an irregular road network with dense towns and a sparse countryside.
+
+    Two thirds of the crossings are scattered around a few town centers and the rest evenly
+    over the whole area. Every crossing is connected to its nearest crossings, so the
+    degrees, street lengths and densities vary like in a real road network.
+
+    Args:
+        node_count (int): Number of crossings.
+        seed (int): Seed of the random choices. Defaults to 0.
+        spacing (float): Mean distance between crossings in meters. Defaults to 150.
+        neighbors (int): Number of nearest crossings each crossing connects to. Defaults
+            to 3.
+        one_way (float): Share of the streets that are one-way. Defaults to 0.1.
+
+    Returns:
+        CompactGraph: The road network, with node IDs 0..node_count - 1.
+    """
+    rng = np.random.default_rng(seed)
+    points = town_points(node_count, math.sqrt(node_count) * spacing, rng)
+    _, nearest = KDTree(points).query(points, k=min(neighbors + 1, node_count))
+    pairs = np.column_stack((np.repeat(np.arange(node_count), nearest.shape[1] - 1),
+                             nearest[:, 1:].ravel()))
+    # Connect every pair of crossings with one street, however many times it was chosen
+    streets = np.unique(np.sort(pairs, axis=1), axis=0)
+    lat, lon = project(points[:, 0], points[:, 1])
+    return street_graph(lat, lon, streets, rng, one_way)
+
+
+def town_points(count, side, rng):
+    """Scatters points over a square, two thirds of them around a few town centers.
+
+    Args:
+        count (int): Number of points.
+        side (float): Side length of the square in meters.
+        rng (numpy.random.Generator): Source of the random choices.
+
+    Returns:
+        numpy.ndarray: The east and north coordinates of the points, one row per point.
+    """
+    towns = rng.uniform(0.0, side, size=(max(count // 2000, 3), 2))
+    in_towns = count * 2 // 3
+    points = np.concatenate((
+        towns[rng.integers(len(towns), size=in_towns)]
+        + rng.normal(0.0, side / 12, size=(in_towns, 2)),
+        rng.uniform(0.0, side, size=(count - in_towns, 2))))
+    return np.clip(points, 0.0, side)
+
+
+def project(x, y, origin=ORIGIN):
+    """Converts local east and north coordinates in meters into latitudes and longitudes.
+
+    Args:
+        x (numpy.ndarray): East coordinates in meters.
+        y (numpy.ndarray): North coordinates in meters.
+        origin (tuple): Latitude and longitude of the point (0, 0).
+
+    Returns:
+        tuple: The latitudes and longitudes in degrees.
+    """
+    lat = origin[0] + np.degrees(np.asarray(y, dtype=np.float64) / EARTH_RADIUS_M)
+    lon = origin[1] + np.degrees(np.asarray(x, dtype=np.float64)
+                                 / (EARTH_RADIUS_M * math.cos(math.radians(origin[0]))))
+    return lat, lon
+
+
+def street_graph(lat, lon, streets, rng, one_way):
+    """Builds a directed graph from undirected streets between crossings.
+
+    Every street is at least as long as the great-circle distance between its ends, so
+    all the metric heuristics stay admissible, and up to 20 percent longer to vary the
+    routes. A one-way street gets a random direction.
+
+    Args:
+        lat (numpy.ndarray): Latitude of each crossing.
+        lon (numpy.ndarray): Longitude of each crossing.
+        streets (numpy.ndarray): Pairs of crossing indices, one row per street.
+        rng (numpy.random.Generator): Source of the random choices.
+        one_way (float): Share of the streets that are one-way.
+
+    Returns:
+        CompactGraph: The street network.
+    """
+    ends = np.asarray(streets, dtype=np.int64)
+    lengths = (great_circle_distances(lat, lon, ends)
+               * rng.uniform(1.0, 1.2, size=len(ends)) + 1e-6)
+
+    one_way_streets = rng.random(len(ends)) < one_way
+    flipped = one_way_streets & (rng.random(len(ends)) < 0.5)
+    forward = np.where(flipped[:, None], ends[:, ::-1], ends)
+    edges = np.concatenate((forward, forward[~one_way_streets][:, ::-1]))
+    lengths = np.concatenate((lengths, lengths[~one_way_streets]))
+    return CompactGraph.from_edges(np.arange(len(lat), dtype=np.int64), edges[:, 0],
+                                   edges[:, 1], lengths, lat, lon)
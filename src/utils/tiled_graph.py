@@ -0,0 +1,503 @@
+import math
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from utils.array_file import save_arrays, map_arrays
+from utils.compact_graph import CompactGraph
+from utils.heuristics import EARTH_RADIUS_M
+
+# Characters of the geohash base 32 encoding
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Name of the file listing the nodes and tiles of a tiled graph. It is written last, so a
+# directory with a manifest holds every tile.
+
+MANIFEST_FILE = 'manifest.bin'
+
+# Geohash precision of the tiles when none is given. Tiles of precision 5 are about 4.9 km
+# wide at the equator and 4.9 km high.
+
+DEFAULT_PRECISION = 5
+
+
+class TileGrid:
+    """The geohash grid of one precision as rows and columns of cells.
+
+    A geohash of precision p interleaves 5p bits of longitude and latitude, starting with
+    longitude, so the grid has 2^ceil(5p/2) columns and 2^floor(5p/2) rows. Cells are
+    addressed by integer row and column, so the neighbours of a cell are the rows and
+    columns one apart, and geohash() gives the usual geohash string of a cell.
+
+    Attributes:
+        precision (int): Number of geohash characters.
+        rows (int): Number of rows, counted from latitude -90.
+        columns (int): Number of columns, counted from longitude -180.
+    """
+    def __init__(self, precision=DEFAULT_PRECISION):
+        """Initializes the grid.
+
+        Args:
+            precision (int): Number of geohash characters. Defaults to DEFAULT_PRECISION.
+        """
+        self.precision = precision
+        self._lat_bits = 5 * precision // 2
+        self._lon_bits = 5 * precision - self._lat_bits
+        self.rows = 1 << self._lat_bits
+        self.columns = 1 << self._lon_bits
+
+    @property
+    def cell_height(self):
+        """float: Height of a cell in degrees of latitude."""
+        return 180.0 / self.rows
+
+    @property
+    def cell_width(self):
+        """float: Width of a cell in degrees of longitude."""
+        return 360.0 / self.columns
+
+    def cells(self, lat, lon):
+        """Returns the cells containing points. Unknown (NaN) coordinates count as 0.
+
+        Args:
+            lat (numpy.ndarray): Latitudes of the points.
+            lon (numpy.ndarray): Longitudes of the points.
+
+        Returns:
+            tuple: The row and column (int64 arrays) of each point.
+        """
+        lat = np.nan_to_num(np.asarray(lat, dtype=np.float64))
+        lon = np.nan_to_num(np.asarray(lon, dtype=np.float64))
+        rows = np.floor((lat + 90.0) / self.cell_height).astype(np.int64)
+        columns = np.floor((lon + 180.0) / self.cell_width).astype(np.int64)
+        return np.clip(rows, 0, self.rows - 1), np.clip(columns, 0, self.columns - 1)
+
+    def geohash(self, row, column):
+        """Returns the geohash of a cell.
+
+        Args:
+            row (int): The row of the cell.
+            column (int): The column of the cell.
+
+        Returns:
+            str: The geohash of precision characters.
+        """
+        code = 0
+        for bit in range(5 * self.precision):
+            if bit % 2 == 0:
+                value = column >> (self._lon_bits - 1 - bit // 2) & 1
+            else:
+                value = row >> (self._lat_bits - 1 - bit // 2) & 1
+            code = code << 1 | value
+        return ''.join(GEOHASH_ALPHABET[code >> 5 * (self.precision - 1 - i) & 31]
+                       for i in range(self.precision))
+
+
+def save_tiles(graph, directory, precision=DEFAULT_PRECISION):
+    """Splits a graph into geohash tiles that TiledGraph loads on demand.
+
+    Every node belongs to the tile containing it, and every tile file, named by its geohash,
+    holds the outgoing and incoming edges of its nodes in CSR form with the global node
+    indices of the graph. Edges crossing a tile border are therefore stored like any other
+    edge, and a TiledGraph numbers its nodes exactly like the graph. The manifest holds the
+    node arrays and where each node is stored, and is written last.
+
+    Args:
+        graph (CompactGraph): The graph to split.
+        directory (str): The output directory, created if missing.
+        precision (int): Geohash precision of the tiles. Defaults to DEFAULT_PRECISION.
+    """
+    grid = TileGrid(precision)
+    cells, node_tiles = np.unique(np.ravel_multi_index(grid.cells(graph.lat, graph.lon),
+                                                       (grid.rows, grid.columns)),
+                                  return_inverse=True)
+    node_tiles = node_tiles.astype(np.int32).ravel()
+    tile_nodes, positions = group_nodes(node_tiles, len(cells))
+
+    keys = [grid.geohash(cell // grid.columns, cell % grid.columns) for cell in cells.tolist()]
+    os.makedirs(directory, exist_ok=True)
+    for key, nodes in zip(keys, tile_nodes):
+        arrays = {'nodes': nodes.astype(np.int32), 'lat': graph.lat[nodes],
+                  'lon': graph.lon[nodes]}
+        for prefix, direction in (('', graph), ('reverse_', graph.reverse)):
+            arrays.update({prefix + name: array
+                           for name, array in zip(CompactGraph.EDGE_ARRAYS,
+                                                  tile_edges(direction, nodes))})
+        save_arrays(os.path.join(directory, f'{key}.bin'), arrays)
+
+    save_arrays(os.path.join(directory, MANIFEST_FILE), {
+        'node_ids': graph.node_ids, 'lat': graph.lat, 'lon': graph.lon,
+        'node_tiles': node_tiles, 'node_positions': positions,
+        'tile_rows': cells // grid.columns, 'tile_columns': cells % grid.columns
+    }, {'precision': precision, 'nodes': graph.node_count, 'edges': graph.edge_count,
+        'tiles': keys})
+
+
+def group_nodes(node_tiles, tile_count):
+    """Groups the nodes by tile.
+
+    Args:
+        node_tiles (numpy.ndarray): The tile number of each node.
+        tile_count (int): Number of tiles.
+
+    Returns:
+        tuple: The node indices of each tile in ascending order, and the position (int32) of
+        each node among the nodes of its tile.
+    """
+    order = np.argsort(node_tiles, kind='stable')
+    starts = np.searchsorted(node_tiles[order], np.arange(tile_count + 1))
+    positions = np.empty(len(node_tiles), dtype=np.int32)
+    positions[order] = np.arange(len(node_tiles)) - starts[node_tiles[order]]
+    return np.split(order, starts[1:-1]), positions
+
+
+def tile_edges(graph, nodes):
+    """Extracts the outgoing edges of some nodes in CSR form.
+
+    Args:
+        graph (CompactGraph): The graph.
+        nodes (numpy.ndarray): The node indices.
+
+    Returns:
+        tuple: The offsets (int64) local to the nodes, and the target indices (int32) and
+        lengths (float64) of the edges.
+    """
+    offsets = np.asarray(graph.offsets)
+    starts = offsets[nodes]
+    counts = offsets[nodes + 1] - starts
+    local_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+    edges = np.repeat(starts - local_offsets[:-1], counts) + np.arange(local_offsets[-1])
+    return (local_offsets, np.asarray(graph.targets)[edges],
+            np.asarray(graph.lengths)[edges])
+
+
+class Tile:
+    """The nodes of one tile and their edges in one direction, copied into memory.
+
+    Attributes:
+        nodes (numpy.ndarray): Global indices of the nodes in the tile, ascending.
+        lat (numpy.ndarray): Latitude of each node of the tile.
+        lon (numpy.ndarray): Longitude of each node of the tile.
+        nbytes (int): Memory used by the arrays of the tile.
+    """
+    def __init__(self, arrays, prefix=''):
+        """Copies a tile out of its mapped file, so evicting it frees the memory.
+
+        Args:
+            arrays (dict): The arrays of the tile file.
+            prefix (str): 'reverse_' for the incoming edges, '' for the outgoing edges.
+        """
+        self.nodes = np.array(arrays['nodes'])
+        self.lat = np.array(arrays['lat'])
+        self.lon = np.array(arrays['lon'])
+        edges = [np.array(arrays[prefix + name]) for name in CompactGraph.EDGE_ARRAYS]
+        self.nbytes = sum(array.nbytes for array in (self.nodes, self.lat, self.lon, *edges))
+        self._offsets, self._targets, self._lengths = (memoryview(array) for array in edges)
+
+    def neighbors(self, position):
+        """Iterates over the edges of the node at a position of the tile.
+
+        Args:
+            position (int): The position of the node in nodes.
+
+        Returns:
+            iterator: (target index, edge length) pairs.
+        """
+        start = self._offsets[position]
+        end = self._offsets[position + 1]
+        return zip(self._targets[start:end], self._lengths[start:end])
+
+    def out_degree(self, position):
+        """Returns the number of edges of the node at a position of the tile."""
+        return self._offsets[position + 1] - self._offsets[position]
+
+
+class TileCache:
+    """Loaded tiles in least recently used order under a memory budget.
+
+    A tile is loaded on the first access and stays in memory until the tiles together use
+    more than memory_budget bytes, after which the least recently used tiles are evicted.
+    The tile accessed last is never evicted, so a budget smaller than one tile still works.
+    A search holding the edges of an evicted tile keeps them alive until it is done. The
+    cache is safe to use from concurrent request threads.
+
+    Attributes:
+        load (callable): Loads the tile of a key.
+        memory_budget (int): Bytes of tiles kept in memory.
+        nbytes (int): Bytes used by the tiles in memory.
+    """
+    def __init__(self, load, memory_budget):
+        """Initializes an empty cache.
+
+        Args:
+            load (callable): Loads the Tile of a key.
+            memory_budget (int): Bytes of tiles kept in memory.
+        """
+        self.load = load
+        self.memory_budget = memory_budget
+        self.nbytes = 0
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(('loads', 'evictions'), 0)
+
+    def get(self, key):
+        """Returns a tile, loading it on a miss.
+
+        Args:
+            key (tuple): The tile number and the edge direction prefix.
+
+        Returns:
+            Tile: The tile.
+        """
+        # A hit runs once per expanded node, so it skips the lock: both dictionary operations
+        # are atomic, and a tile evicted in between is still returned
+        tile = self._tiles.get(key)
+        if tile is not None:
+            try:
+                self._tiles.move_to_end(key)
+            except KeyError:
+                pass
+            return tile
+
+        # Read the file without holding the lock, so other searches keep running
+        tile = self.load(key)
+        with self._lock:
+            if key in self._tiles:
+                return self._tiles[key]
+            self._tiles[key] = tile
+            self.nbytes += tile.nbytes
+            self._counters['loads'] += 1
+            while self.nbytes > self.memory_budget and len(self._tiles) > 1:
+                _, evicted = self._tiles.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                self._counters['evictions'] += 1
+        return tile
+
+    def stats(self):
+        """Returns the load and eviction counters and the tiles and bytes in memory."""
+        with self._lock:
+            return {**self._counters, 'tiles': len(self._tiles), 'bytes': self.nbytes}
+
+
+class TiledGraph:
+    """A graph saved with save_tiles() whose edges are loaded tile by tile when searched.
+
+    Opening the graph only maps the manifest, so startup time and memory do not grow with
+    the area the graph covers. The edges of a tile are loaded into a shared TileCache when a
+    search first expands one of its nodes and evicted under its memory budget. Node indices,
+    node IDs and coordinates are those of the CompactGraph the tiles were saved from, and the
+    graph has the members of CompactGraph the searches use (neighbors(), reverse,
+    spatial_index and so on), so the search engines run on it unchanged and find the same
+    paths.
+
+    The per-node arrays (node IDs, coordinates and the tile of each node) stay memory-mapped,
+    so pages of them are only read when used. A search still allocates its per-node search
+    arrays and heuristic values for the whole graph, as on a CompactGraph.
+
+    Attributes:
+        directory (str): The directory of the tiles.
+        node_ids (numpy.ndarray): Sorted original node IDs, indexed by node index.
+        lat (numpy.ndarray): Latitude of each node.
+        lon (numpy.ndarray): Longitude of each node.
+        grid (TileGrid): The geohash grid of the tiles.
+        tile_keys (list): The geohash of each tile, indexed by tile number.
+        cache (TileCache): The loaded tiles, shared with the reverse graph.
+    """
+    def __init__(self, directory, memory_budget=256 * 2 ** 20, cache=None, reverse=False):
+        """Maps the manifest of a tiled graph.
+
+        Args:
+            directory (str): The directory written by save_tiles().
+            memory_budget (int): Bytes of tiles kept in memory. Defaults to 256 MiB.
+            cache (TileCache): Cache of the loaded tiles, by default a new one with
+                memory_budget.
+            reverse (bool): If True, the graph has every edge reversed. Defaults to False.
+        """
+        arrays, metadata = map_arrays(os.path.join(directory, MANIFEST_FILE))
+        self.directory = directory
+        self.node_ids = arrays['node_ids']
+        self.lat = arrays['lat']
+        self.lon = arrays['lon']
+        self.grid = TileGrid(metadata['precision'])
+        self.tile_keys = metadata['tiles']
+        self.cache = cache or TileCache(self.read_tile, memory_budget)
+        self._edge_count = metadata['edges']
+        self._tile_cells = arrays['tile_rows'], arrays['tile_columns']
+        self._node_tiles = memoryview(arrays['node_tiles'])
+        self._node_positions = memoryview(arrays['node_positions'])
+        self._lat = memoryview(self.lat)
+        self._lon = memoryview(self.lon)
+        self._prefix = 'reverse_' if reverse else ''
+        self._reverse = None
+        self._spatial_index = None
+
+    def read_tile(self, key):
+        """Reads a tile from its file.
+
+        Args:
+            key (tuple): The tile number and the edge direction prefix.
+
+        Returns:
+            Tile: The tile.
+        """
+        number, prefix = key
+        arrays, _ = map_arrays(os.path.join(self.directory, f'{self.tile_keys[number]}.bin'))
+        return Tile(arrays, prefix)
+
+    def tile(self, number):
+        """Returns a tile with the edges of this graph's direction, loading it on a miss.
+
+        Args:
+            number (int): The tile number.
+
+        Returns:
+            Tile: The tile.
+        """
+        return self.cache.get((number, self._prefix))
+
+    @property
+    def node_count(self):
+        """int: Number of nodes in the graph."""
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self):
+        """int: Number of directed edges in the graph."""
+        return self._edge_count
+
+    @property
+    def tile_cells(self):
+        """tuple: The row and column of each tile in the grid."""
+        return self._tile_cells
+
+    @property
+    def reverse(self):
+        """TiledGraph: The graph with every edge reversed, sharing the tile cache."""
+        if self._reverse is None:
+            self._reverse = TiledGraph(self.directory, cache=self.cache,
+                                       reverse=not self._prefix)
+        return self._reverse
+
+    @property
+    def spatial_index(self):
+        """TileSpatialIndex: Nearest-node lookups over the tiles, created on first use."""
+        if self._spatial_index is None:
+            self._spatial_index = TileSpatialIndex(self)
+        return self._spatial_index
+
+    def neighbors(self, index):
+        """Iterates over the outgoing edges of a node, loading its tile on a miss.
+
+        Args:
+            index (int): The node index.
+
+        Returns:
+            iterator: (target index, edge length) pairs.
+        """
+        tile = self.cache.get((self._node_tiles[index], self._prefix))
+        return tile.neighbors(self._node_positions[index])
+
+    def out_degree(self, index):
+        """Returns the number of outgoing edges of a node.
+
+        Args:
+            index (int): The node index.
+
+        Returns:
+            int: The number of outgoing edges.
+        """
+        return self.tile(self._node_tiles[index]).out_degree(self._node_positions[index])
+
+    # The node lookups only read node_ids, lat, lon and neighbors(), so they are shared with
+    # CompactGraph
+    path_length = CompactGraph.path_length
+    index_of = CompactGraph.index_of
+    indices_of = CompactGraph.indices_of
+    coordinate = CompactGraph.coordinate
+    node_path = CompactGraph.node_path
+    coordinates = CompactGraph.coordinates
+
+
+class TileSpatialIndex:
+    """Nearest-node lookups that only load the tiles around each point.
+
+    The tiles are searched in the order of their distance in cells from the cell of the
+    point, until the nearest node found is closer than any node of the remaining tiles can
+    be. Usually that is the 3 x 3 block of tiles around the point.
+
+    Attributes:
+        graph (TiledGraph): The graph whose nodes are searched.
+    """
+    def __init__(self, graph):
+        """Initializes the index.
+
+        Args:
+            graph (TiledGraph): The graph whose nodes are searched.
+        """
+        self.graph = graph
+
+    def nearest(self, lat, lon):
+        """Finds the node closest to a point.
+
+        Args:
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+
+        Returns:
+            int: The index of the nearest node, None if the graph has no nodes.
+        """
+        row, column = (int(value) for value in self.graph.grid.cells(lat, lon))
+        rows, columns = self.graph.tile_cells
+        rings = np.maximum(np.abs(rows - row), np.abs(columns - column))
+        best, best_distance = None, math.inf
+        for number in np.argsort(rings, kind='stable').tolist():
+            if best_distance <= self.ring_distance(lat, int(rings[number])):
+                break
+            tile = self.graph.tile(number)
+            distances = self.distances(lat, lon, tile.lat, tile.lon)
+            i = int(np.argmin(distances))
+            if distances[i] < best_distance:
+                best, best_distance = int(tile.nodes[i]), float(distances[i])
+        return best
+
+    def nearest_nodes(self, lat, lon):
+        """Finds the nodes closest to many points.
+
+        Args:
+            lat (numpy.ndarray): Latitudes of the points.
+            lon (numpy.ndarray): Longitudes of the points.
+
+        Returns:
+            numpy.ndarray: The index of the nearest node of each point.
+        """
+        return np.array([self.nearest(point_lat, point_lon) for point_lat, point_lon
+                         in zip(np.atleast_1d(lat).tolist(), np.atleast_1d(lon).tolist())],
+                        dtype=np.int64)
+
+    def nearest_edges(self, lat, lon, graph):
+        """Snapping to edges needs the edge tree of the whole graph, see SpatialIndex.
+
+        Raises:
+            ValueError: Always.
+        """
+        raise ValueError("Snapping to edges is not available on a tiled graph")
+
+    def ring_distance(self, lat, ring):
+        """Returns a lower bound of the distance in meters from a point to the nodes of the
+        tiles ring cells away from the cell of the point."""
+        grid = self.graph.grid
+        scale = math.radians(1) * EARTH_RADIUS_M
+        # Cells get narrower towards the poles, so use the latitude furthest from the equator
+        far_lat = min(90.0, abs(lat) + ring * grid.cell_height)
+        return (ring - 1) * scale * min(grid.cell_height,
+                                        grid.cell_width * math.cos(math.radians(far_lat)))
+
+    @staticmethod
+    def distances(lat, lon, node_lat, node_lon):
+        """Returns the equirectangular distances in meters from a point to nodes, inf for
+        nodes without coordinates."""
+        scale = math.radians(1) * EARTH_RADIUS_M
+        dx = (node_lon - lon) * scale * math.cos(math.radians(lat))
+        dy = (node_lat - lat) * scale
+        return np.nan_to_num(np.hypot(dx, dy), nan=np.inf)
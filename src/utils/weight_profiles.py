@@ -0,0 +1,271 @@
+import re
+import numpy as np
+from utils.heuristics import TravelTimeHeuristic
+
+# Road classes of the OSM 'highway' tag, stored as their index in the edge attributes.
+# Link roads ('motorway_link' and so on) belong to the class of the road they link to.
+
+ROAD_CLASSES = ('motorway', 'trunk', 'primary', 'secondary', 'tertiary', 'unclassified',
+                'residential', 'living_street', 'service', 'other')
+
+# Free-flow speed in km/h of the roads without a 'maxspeed' tag, by road class (Finnish
+# defaults)
+
+DEFAULT_SPEEDS_KPH = {
+    'motorway': 100.0,
+    'trunk': 80.0,
+    'primary': 70.0,
+    'secondary': 60.0,
+    'tertiary': 50.0,
+    'unclassified': 40.0,
+    'residential': 30.0,
+    'living_street': 20.0,
+    'service': 20.0,
+    'other': 30.0
+}
+
+# Speeds of the implicit 'maxspeed' values such as 'FI:urban', by the part after the colon
+
+IMPLICIT_SPEEDS_KPH = {'urban': 50.0, 'rural': 80.0, 'motorway': 120.0,
+                       'living_street': 20.0, 'walk': 6.0}
+
+MAXSPEED_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)\s*(mph|km/h|kmh|kph)?$')
+
+# Share of the free-flow speed driven in rush hour traffic, by road class (1.0 if missing)
+
+PEAK_SPEED_FACTORS = {
+    'motorway': 0.6,
+    'trunk': 0.6,
+    'primary': 0.65,
+    'secondary': 0.7,
+    'tertiary': 0.8,
+    'unclassified': 0.9,
+    'residential': 0.9
+}
+
+
+def road_class(highway):
+    """Returns the index of the road class of an OSM 'highway' tag in ROAD_CLASSES.
+
+    Args:
+        highway (str or list): The tag value, a list if simplification merged several ways.
+
+    Returns:
+        int: The road class index, the index of 'other' for unknown values.
+    """
+    if isinstance(highway, list):
+        highway = highway[0] if highway else None
+    if not isinstance(highway, str):
+        return ROAD_CLASSES.index('other')
+    highway = highway.removesuffix('_link')
+    return ROAD_CLASSES.index(highway if highway in ROAD_CLASSES else 'other')
+
+
+def parse_maxspeed(value):
+    """Parses an OSM 'maxspeed' tag into km/h.
+
+    Numbers are in km/h unless followed by 'mph'. Implicit values such as 'FI:urban' use
+    IMPLICIT_SPEEDS_KPH. A list, which simplification creates when it merges ways with
+    different limits, gives the mean of its parsable values like OSMnx's add_edge_speeds.
+
+    Args:
+        value (str or list): The tag value.
+
+    Returns:
+        float: The speed limit in km/h, or None if the value is missing or not understood.
+    """
+    if isinstance(value, list):
+        speeds = [speed for speed in map(parse_maxspeed, value) if speed is not None]
+        return sum(speeds) / len(speeds) if speeds else None
+    if not isinstance(value, str):
+        return None
+
+    value = value.strip().lower()
+    match = MAXSPEED_PATTERN.match(value)
+    if match:
+        speed = float(match.group(1)) * (1.609344 if match.group(2) == 'mph' else 1.0)
+        return speed if speed > 0 else None
+    return IMPLICIT_SPEEDS_KPH.get(value.rsplit(':', 1)[-1])
+
+
+def edge_attributes(graph, compact_graph):
+    """Reads the speed and road class of every edge of a CompactGraph from its OSMnx graph.
+
+    Parallel edges are collapsed into the shortest one in the CompactGraph, so the
+    attributes of each edge come from that edge too. Edges without a usable 'maxspeed' tag
+    get the DEFAULT_SPEEDS_KPH of their road class.
+
+    Args:
+        graph (networkx.Graph): The OSMnx graph the CompactGraph was built from.
+        compact_graph (CompactGraph): The routing graph.
+
+    Returns:
+        dict: 'speeds' in km/h (float32) and 'road_classes' (int8, indices in ROAD_CLASSES),
+        aligned with the edges of the CompactGraph.
+    """
+    node_ids = compact_graph.node_ids.tolist()
+    sources = compact_graph.sources().tolist()
+    targets = compact_graph.targets.tolist()
+    speeds = np.empty(len(targets), dtype=np.float32)
+    road_classes = np.empty(len(targets), dtype=np.int8)
+
+    for edge, (source, target) in enumerate(zip(sources, targets)):
+        data = graph.get_edge_data(node_ids[source], node_ids[target])
+        if graph.is_multigraph():
+            data = min(data.values(), key=lambda attributes: attributes.get('length', np.inf))
+        road_classes[edge] = road_class(data.get('highway'))
+        speeds[edge] = (parse_maxspeed(data.get('maxspeed'))
+                        or DEFAULT_SPEEDS_KPH[ROAD_CLASSES[road_classes[edge]]])
+    return {'speeds': speeds, 'road_classes': road_classes}
+
+
+class WeightProfile:
+    """A routing cost whose edge weights are precomputed into an array at load time.
+
+    The searches only ever read edge lengths from a CompactGraph, so a profile is applied
+    by creating a graph with the same structure and the weights as lengths (see
+    CompactGraph.with_lengths). Switching profiles then means searching another graph,
+    and no edge attribute is parsed during a search.
+
+    Attributes:
+        name (str): The name the profile is selected with.
+    """
+    name = None
+
+    def weights(self, graph, attributes):
+        """Computes the weight of every edge.
+
+        Args:
+            graph (CompactGraph): The routing graph, weighted by length in meters.
+            attributes (dict): The edge attributes of the graph, see edge_attributes().
+
+        Returns:
+            numpy.ndarray: The weight of every edge, aligned with the edges of the graph.
+        """
+        raise NotImplementedError
+
+    def apply(self, graph, attributes):
+        """Returns the routing graph weighted by this profile.
+
+        Args:
+            graph (CompactGraph): The routing graph, weighted by length in meters.
+            attributes (dict): The edge attributes of the graph, see edge_attributes().
+
+        Returns:
+            CompactGraph: The graph with the weights as edge lengths.
+        """
+        return graph.with_lengths(self.weights(graph, attributes))
+
+    def heuristic(self, attributes, distance_heuristic=None):
+        """Returns an admissible heuristic for the weights of this profile.
+
+        Args:
+            attributes (dict): The edge attributes of the graph, see edge_attributes().
+            distance_heuristic (Heuristic): Lower bound of the distance in meters, None for
+                the default heuristic of the search engines.
+
+        Returns:
+            Heuristic: The heuristic, None for the default heuristic of the search engines.
+        """
+        raise NotImplementedError
+
+
+class DistanceProfile(WeightProfile):
+    """Routes on the length of the edges in meters, the cost of the plain routing graph."""
+    name = 'distance'
+
+    def weights(self, graph, attributes):
+        return graph.lengths
+
+    def apply(self, graph, attributes):
+        return graph
+
+    def heuristic(self, attributes, distance_heuristic=None):
+        return distance_heuristic
+
+
+class TravelTimeProfile(WeightProfile):
+    """Routes on the travel time of the edges in seconds.
+
+    The free-flow speed of an edge comes from its 'maxspeed' tag or its road class, and is
+    optionally multiplied with a factor of the road class for the traffic at certain hours.
+    The heuristic divides the distance estimate by the highest speed of any edge, so it
+    never overestimates the travel time (see TravelTimeHeuristic).
+
+    Attributes:
+        name (str): The name the profile is selected with.
+        speed_factors (dict): Share of the free-flow speed driven on each road class.
+        hours (tuple): Hours of the day (0-23) the profile describes, empty for free flow.
+    """
+    def __init__(self, name='time', speed_factors=None, hours=()):
+        """Initializes the profile.
+
+        Args:
+            name (str): The name the profile is selected with. Defaults to 'time'.
+            speed_factors (dict): Share of the free-flow speed driven on each road class,
+                1.0 for missing classes. Defaults to None (free flow).
+            hours (iterable): Hours of the day the profile describes. Defaults to none.
+        """
+        self.name = name
+        self.speed_factors = speed_factors or {}
+        self.hours = tuple(hours)
+
+    def speeds(self, attributes):
+        """Returns the speed of every edge in km/h, including the speed factors.
+
+        Args:
+            attributes (dict): The edge attributes, see edge_attributes().
+
+        Returns:
+            numpy.ndarray: The speeds (float64).
+        """
+        factors = np.array([self.speed_factors.get(name, 1.0) for name in ROAD_CLASSES])
+        return attributes['speeds'].astype(np.float64) * factors[attributes['road_classes']]
+
+    def weights(self, graph, attributes):
+        return np.asarray(graph.lengths) * 3.6 / self.speeds(attributes)
+
+    def heuristic(self, attributes, distance_heuristic=None):
+        speeds = self.speeds(attributes)
+        max_speed = float(speeds.max()) if len(speeds) else 1.0
+        return TravelTimeHeuristic(max_speed_kph=max_speed,
+                                   distance_heuristic=distance_heuristic)
+
+
+# All weight profiles by name. The time-of-day profiles are also chosen for the 'time'
+# profile when a request gives an hour they cover (see select_profile).
+
+PROFILES = {profile.name: profile for profile in (
+    DistanceProfile(),
+    TravelTimeProfile(),
+    TravelTimeProfile('time-morning-peak', PEAK_SPEED_FACTORS, hours=range(7, 9)),
+    TravelTimeProfile('time-evening-peak', PEAK_SPEED_FACTORS, hours=range(15, 18))
+)}
+
+
+def select_profile(names, name='distance', hour=None):
+    """Chooses the weight profile of a request.
+
+    Args:
+        names (iterable): Names of the available profiles.
+        name (str): The requested profile. Defaults to 'distance'.
+        hour (int): Hour of the departure (0-23). With the 'time' profile, selects an
+            available time-of-day profile covering the hour. Defaults to None.
+
+    Returns:
+        str: The name of the profile.
+
+    Raises:
+        ValueError: If the profile is not available or the hour is invalid.
+    """
+    if name not in names:
+        raise ValueError(f"Unknown profile: {name}")
+    if hour is None:
+        return name
+    if not isinstance(hour, int) or isinstance(hour, bool) or not 0 <= hour <= 23:
+        raise ValueError(f"Invalid hour: {hour}")
+    if name == 'time':
+        for candidate in names:
+            if hour in getattr(PROFILES.get(candidate), 'hours', ()):
+                return candidate
+    return name
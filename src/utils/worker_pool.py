@@ -0,0 +1,236 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+
+# Start method of the worker processes. A forkserver forks them from a process of its own
+# that runs no other threads; spawn starts them as new interpreters where it is missing.
+START_METHOD = ('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+                else 'spawn')
+CONTEXT = multiprocessing.get_context(START_METHOD)
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a WorkerPool already has as many queued requests as it accepts."""
+
+
+class WorkerPool:
+    """Runs tasks in a fixed set of worker processes with queueing, timeouts and backpressure.
+
+    The workers are started with START_METHOD, never forked from the serving process: it
+    runs request threads (and a reload thread), and a child forked while another thread
+    holds a lock could deadlock on it. So the workers do not inherit the serving process's
+    state. The initializer builds it in every worker, for example by mapping the graph files
+    of the cache, which the processes then share read-only. A pool is ready once every
+    worker has run its initializer. A request thread checks out an idle worker, sends it
+    the task over a pipe and waits for the result without holding the GIL, so a long query
+    no longer blocks the requests of other threads.
+
+    Requests wait for an idle worker in FIFO order. At most max_pending requests may wait,
+    further requests are rejected with PoolSaturatedError so the server can answer 429 at
+    once. A request that does not finish within timeout seconds, waiting included, raises
+    TimeoutError; if its task is already running, the worker is killed to cancel it and a
+    fresh worker is started in its place in the background.
+
+    Attributes:
+        worker_args (tuple): The handler computing the result of a task in a worker process,
+            and the initializer and its arguments, passed to serve() in every worker.
+        processes (int): Number of worker processes.
+        max_pending (int): Maximum number of requests waiting for a worker.
+        timeout (float): Seconds a request may take, waiting included.
+    """
+    def __init__(self, handler, processes=4, max_pending=32, timeout=30.0,  # pylint: disable=too-many-arguments,too-many-positional-arguments
+                 initializer=None, initargs=()):
+        """Starts the worker processes and waits until they are initialized.
+
+        Args:
+            handler (callable): Computes the result of a task. The handler, the initializer
+                and their arguments are pickled into the workers, so they must be defined
+                at the top level of a module that can be imported without side effects.
+                Tasks and results must be picklable.
+            processes (int): Number of worker processes. Defaults to 4.
+            max_pending (int): Maximum number of requests waiting for a worker. Defaults
+                to 32.
+            timeout (float): Seconds a request may take. Defaults to 30.
+            initializer (callable): Called with initargs in every worker process before it
+                serves tasks. Defaults to None.
+            initargs (tuple): Arguments of the initializer. Defaults to ().
+
+        Raises:
+            RuntimeError: If a worker failed to initialize.
+        """
+        self.worker_args = (handler, initializer, initargs)
+        self.processes = processes
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._active = 0
+        self._closed = False
+        for _ in range(processes):
+            self._idle.put(self.start_worker())
+
+    def start_worker(self):
+        """Starts a worker process and waits until it is initialized.
+
+        Returns:
+            tuple: The process and the parent end of its pipe.
+
+        Raises:
+            RuntimeError: If the worker failed to initialize.
+        """
+        connection, worker_connection = CONTEXT.Pipe()
+        handler, initializer, initargs = self.worker_args
+        process = CONTEXT.Process(target=serve, daemon=True,
+                                  args=(handler, worker_connection, initializer, initargs))
+        process.start()
+        worker_connection.close()
+        try:
+            status, value = connection.recv()
+        except EOFError:
+            status, value = 'error', "The worker process died"
+        if status == 'error':
+            process.join()
+            connection.close()
+            raise RuntimeError(f"A worker failed to start: {value}")
+        return process, connection
+
+    def replace_worker(self):
+        """Starts a worker in the background and adds it to the idle workers once it is
+        initialized, so the request that lost its worker does not wait for it.
+
+        A replacement that fails to initialize is not retried, so the pool continues with
+        one worker less.
+        """
+        def start():
+            try:
+                worker = self.start_worker()
+            except RuntimeError:
+                return
+            with self._lock:
+                if not self._closed:
+                    self._idle.put(worker)
+                    return
+            stop_worker(worker)
+        threading.Thread(target=start, daemon=True).start()
+
+    def submit(self, task):
+        """Runs a task in a worker process and waits for its result.
+
+        Args:
+            task (object): The task passed to the handler.
+
+        Returns:
+            object: The result of the handler.
+
+        Raises:
+            PoolSaturatedError: If max_pending requests are already waiting for a worker.
+            TimeoutError: If the task did not finish in time.
+            RuntimeError: If the handler raised an exception or the worker died.
+        """
+        with self._lock:
+            if self._active >= self.processes + self.max_pending:
+                raise PoolSaturatedError("All workers are busy")
+            self._active += 1
+
+        deadline = time.monotonic() + self.timeout
+        try:
+            try:
+                worker = self._idle.get(timeout=self.timeout)
+            except queue.Empty as error:
+                raise TimeoutError("No worker became available in time") from error
+            return self.run(worker, task, deadline)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def run(self, worker, task, deadline):
+        """Sends a task to a checked out worker and returns the worker to the pool.
+
+        Args:
+            worker (tuple): The process and the parent end of its pipe.
+            task (object): The task passed to the handler.
+            deadline (float): time.monotonic() value by which the result is needed.
+
+        Returns:
+            object: The result of the handler.
+        """
+        connection = worker[1]
+        try:
+            connection.send(task)
+            if not connection.poll(max(deadline - time.monotonic(), 0.0)):
+                raise TimeoutError("The route computation timed out")
+            status, value = connection.recv()
+        except (TimeoutError, EOFError, OSError) as error:
+            # Cancel the task by replacing the worker that is running it
+            stop_worker(worker)
+            self.replace_worker()
+            if isinstance(error, TimeoutError):
+                raise
+            raise RuntimeError("The worker process died") from error
+
+        self._idle.put(worker)
+        if status == 'error':
+            raise RuntimeError(value)
+        return value
+
+    def stats(self):
+        """Returns the numbers of worker processes, running requests and waiting requests."""
+        with self._lock:
+            active = self._active
+        running = min(active, self.processes)
+        return {'processes': self.processes, 'running': running, 'waiting': active - running}
+
+    def close(self):
+        """Stops every idle worker process, and the replacement workers once they start."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                stop_worker(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def stop_worker(worker):
+    """Kills a worker process and closes its pipe.
+
+    Args:
+        worker (tuple): The process and the parent end of its pipe.
+    """
+    process, connection = worker
+    process.kill()
+    process.join()
+    connection.close()
+
+
+def serve(handler, connection, initializer=None, initargs=()):
+    """Initializes a worker and runs tasks received over a pipe until the pipe is closed.
+
+    The worker reports ('ready', None) once the initializer has run, or the error of the
+    initializer, after which it exits.
+
+    Args:
+        handler (callable): Computes the result of a task.
+        connection (multiprocessing.connection.Connection): The worker end of the pipe.
+        initializer (callable): Called with initargs before the first task. Defaults to None.
+        initargs (tuple): Arguments of the initializer. Defaults to ().
+    """
+    try:
+        if initializer is not None:
+            initializer(*initargs)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        connection.send(('error', f"{type(error).__name__}: {error}"))
+        return
+    connection.send(('ready', None))
+
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        try:
+            connection.send(('ok', handler(task)))
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            connection.send(('error', f"{type(error).__name__}: {error}"))
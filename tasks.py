@@ -42,3 +42,32 @@ def coverage_report(c):
     """Generate a coverage report as html and show results in terminal."""
     c.run("poetry run coverage report -m")
     c.run("poetry run coverage html")
+
+@task
+def preprocess_landmarks(c, count=8, strategy='avoid'):
+    """Compute the ALT landmark tables loaded by the app at startup."""
+    c.run(f"poetry run python src/preprocess.py landmarks --count {count} --strategy {strategy}")
+
+@task
+def preprocess_ch(c, witness_limit=50):
+    """Build the contraction hierarchy loaded by the app at startup."""
+    c.run(f"poetry run python src/preprocess.py ch --witness-limit {witness_limit}")
+
+@task
+def preprocess_arc_flags(c, partition='kd', cells=32):
+    """Compute the arc flags of the cached graph loaded by the app at startup."""
+    c.run(f"poetry run python src/preprocess.py arc-flags --partition {partition} --cells {cells}")
+
+@task
+def preprocess_tiles(c):
+    """Split the cached graph into the geohash tiles loaded with GRAPH_TILE_PRECISION."""
+    c.run("poetry run python src/preprocess.py tiles")
+
+@task
+def benchmark(c, graph='grid', size=100, queries=100, seed=0, baseline=None, file=None):
+    """Benchmark the algorithms offline, save test-results/benchmark.json and compare it with a baseline."""
+    baseline_option = f" --baseline {baseline}" if baseline else ""
+    file_option = f" --file {file}" if file else ""
+    c.run(f"poetry run python src/benchmark.py --graph {graph} --size {size} --queries {queries} "
+          f"--seed {seed} --output test-results/benchmark.json{baseline_option}{file_option}",
+          pty=True)